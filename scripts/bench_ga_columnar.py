@@ -0,0 +1,206 @@
+"""GA report 解析微基准：逐行解析（旧实现）vs 列式解码（decode_ga_report）。
+
+用法：
+  python scripts/bench_ga_columnar.py
+  python scripts/bench_ga_columnar.py --rows 10000 --repeat 20
+
+说明：
+- 构造 pagePath / city / date 三类 report（默认 10k 行），不访问网络
+- 旧实现：图表与摘要各自逐行解析一遍（与改造前 report 节点一致）
+- 新实现：decode_ga_report 一次，build_chart / build_summary 共用
+- 会先校验两种实现的输出完全一致
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Any
+
+# 允许直接在源码仓库中运行：把 src/ 加进 PYTHONPATH
+_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(_ROOT / "src"))
+
+from agent.insights.reporting.columnar import (  # noqa: E402
+    PIE_FRIENDLY_DIMS,
+    build_chart,
+    build_summary,
+    decode_ga_report,
+    humanize_ga_value,
+)
+
+
+def _parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="GA report 列式解码微基准")
+    p.add_argument("--rows", type=int, default=10000, help="每个 report 的行数（默认：10000）")
+    p.add_argument("--repeat", type=int, default=15, help="重复次数（取最快一次）")
+    p.add_argument("--seed", type=int, default=7, help="随机种子")
+    return p.parse_args()
+
+
+def _cell(v: str) -> dict[str, str]:
+    return {"value": v}
+
+
+def _make_report(kind: str, n: int, rng: random.Random) -> dict[str, Any]:
+    if kind == "pagePath":
+        dims = ["pagePath"]
+        dim_values = [[f"/blog/post-{i}"] for i in range(n)]
+    elif kind == "city":
+        cities = [f"City {i}" for i in range(max(1, n // 8))]
+        dims = ["city", "deviceCategory"]
+        dim_values = [[rng.choice(cities), rng.choice(["desktop", "mobile", "tablet"])] for _ in range(n)]
+    else:
+        dims = ["date"]
+        dim_values = [[f"2024{(i // 28) % 12 + 1:02d}{i % 28 + 1:02d}"] for i in range(n)]
+    metrics = ["activeUsers", "sessions", "screenPageViews", "engagementRate"]
+    rows = []
+    for dv in dim_values:
+        rows.append(
+            {
+                "dimension_values": [_cell(v) for v in dv],
+                "metric_values": [
+                    _cell(str(rng.randint(0, 5000))),
+                    _cell(str(rng.randint(0, 8000))),
+                    _cell(str(rng.randint(0, 20000))),
+                    _cell(f"{rng.random():.6f}"),
+                ],
+            }
+        )
+    return {
+        "dimension_headers": [{"name": d} for d in dims],
+        "metric_headers": [{"name": m} for m in metrics],
+        "rows": rows,
+    }
+
+
+# ---------- 旧实现（改造前 report 节点的逐行解析） ----------
+
+
+def _legacy_chart(result: dict[str, Any]) -> dict[str, Any] | None:
+    rows = result.get("rows") or []
+    dim_names = [h.get("name") for h in (result.get("dimension_headers") or []) if h.get("name")]
+    metric_names = [h.get("name") for h in (result.get("metric_headers") or []) if h.get("name")]
+    if not metric_names:
+        return None
+    data: list[dict[str, Any]] = []
+    for r in rows:
+        row: dict[str, Any] = {}
+        dim_vals = r.get("dimension_values") or []
+        met_vals = r.get("metric_values") or []
+        for i, dn in enumerate(dim_names):
+            if i < len(dim_vals):
+                row[dn] = humanize_ga_value(dn, (dim_vals[i] or {}).get("value"))
+        for i, mn in enumerate(metric_names):
+            if i < len(met_vals):
+                v = (met_vals[i] or {}).get("value")
+                try:
+                    row[mn] = float(v) if "." in str(v) else int(v)
+                except Exception:
+                    row[mn] = v
+        data.append(row)
+    x_key = dim_names[0] if dim_names else "x"
+    if "date" in (x_key or "").lower():
+        return {
+            "chart_type": "line",
+            "title": "Trend",
+            "data": data,
+            "x_key": x_key,
+            "y_keys": metric_names,
+            "y_labels": metric_names,
+            "colors": ["#3b82f6", "#10b981", "#f59e0b", "#8b5cf6", "#ef4444"],
+        }
+    if len(metric_names) == 1 and len(data) <= 12 and (x_key in PIE_FRIENDLY_DIMS):
+        return {
+            "chart_type": "pie",
+            "title": f"{x_key} Distribution",
+            "data": [{"name": r.get(x_key), "value": r.get(metric_names[0], 0)} for r in data],
+            "value_key": "value",
+            "label_key": "name",
+        }
+    y_key = metric_names[0]
+    return {
+        "chart_type": "bar",
+        "title": f"{x_key} - {y_key}",
+        "data": data,
+        "x_key": x_key,
+        "y_key": y_key,
+        "color": "#6366f1",
+        "show_change": False,
+    }
+
+
+def _legacy_summary(result: dict[str, Any]) -> dict[str, Any]:
+    metric_names = [h.get("name") for h in (result.get("metric_headers") or []) if h.get("name")]
+    totals: dict[str, float] = {mn: 0.0 for mn in metric_names}
+    for r in result.get("rows") or []:
+        met_vals = r.get("metric_values") or []
+        for i, mn in enumerate(metric_names):
+            if i < len(met_vals):
+                try:
+                    totals[mn] += float((met_vals[i] or {}).get("value"))
+                except Exception:
+                    pass
+    total_visits = int(totals.get("sessions", 0))
+    total_unique = int(totals.get("activeUsers", 0))
+    total_pv = int(totals.get("screenPageViews", 0))
+    return {
+        "total_visits": total_visits,
+        "total_unique_visitors": total_unique,
+        "total_page_views": total_pv,
+        "avg_session_duration": 0,
+        "bounce_rate": 0.0,
+        "pages_per_session": round(total_pv / total_visits, 2) if total_visits > 0 else 0,
+    }
+
+
+def _legacy(result: dict[str, Any]) -> tuple[Any, Any]:
+    return _legacy_chart(result), _legacy_summary(result)
+
+
+def _columnar(result: dict[str, Any]) -> tuple[Any, Any]:
+    frame = decode_ga_report(result)
+    return build_chart(frame), build_summary(frame)
+
+
+def _best_of(fn, arg, repeat: int) -> float:
+    best = float("inf")
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            fn(arg)
+            best = min(best, time.perf_counter() - t0)
+    finally:
+        gc.enable()
+    return best * 1000
+
+
+def main() -> int:
+    """运行基准并打印结果。"""
+    args = _parse_args()
+    rng = random.Random(args.seed)
+    print(f"rows={args.rows} repeat={args.repeat}（取最快一次）")
+    for kind in ("pagePath", "city", "date"):
+        report = _make_report(kind, args.rows, rng)
+        legacy_out, columnar_out = _legacy(report), _columnar(report)
+        if legacy_out != columnar_out:
+            print(f"[{kind}] ❌ 输出不一致")
+            return 1
+        legacy_ms = _best_of(_legacy, report, args.repeat)
+        columnar_ms = _best_of(_columnar, report, args.repeat)
+        frame = decode_ga_report(report)
+        top = frame.top_n("sessions", 3)
+        print(
+            f"[{kind:8s}] legacy={legacy_ms:7.2f}ms  columnar={columnar_ms:7.2f}ms  "
+            f"speedup={legacy_ms / columnar_ms:4.1f}x  top3(sessions)={top}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,117 @@
+"""洞察 plan 阶段基准：LLM planner vs 模板 plan（REPORT_INSIGHTS_PLANNER=llm / auto）。
+
+用法：
+  python scripts/bench_insights_planner.py
+  python scripts/bench_insights_planner.py --planner-ms 1800 --summarizer-ms 2500 --repeat 5
+  python scripts/bench_insights_planner.py --live   # 真实调用模型（需要 API key）
+
+说明：
+- 默认不访问网络：planner / summarizer 替换为按给定延迟返回的假模型，只衡量调用次数与端到端耗时
+- 证据包为标准槽位（summary / daily_visits / traffic_sources / device_stats / top_pages）
+- 输出两种模式下 generate_report_insights 的平均耗时、模型调用次数与模板 plan 步骤数
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+from typing import Any
+
+# 允许直接在源码仓库中运行：把 src/ 加进 PYTHONPATH
+_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(_ROOT / "src"))
+
+from agent.insights import report_insights_agent as ria  # noqa: E402
+from agent.insights.report_insights_agent import (  # noqa: E402
+    ActionModel,
+    AnalysisPlanModel,
+    InsightsModel,
+    InsightsOutputModel,
+    PlanStepModel,
+)
+from agent.insights.reporting.plan_template import template_plan_steps  # noqa: E402
+
+
+def _parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="洞察 plan 阶段基准（LLM planner vs 模板）")
+    p.add_argument("--planner-ms", type=float, default=1500, help="模拟 planner 调用延迟（毫秒）")
+    p.add_argument("--summarizer-ms", type=float, default=2000, help="模拟 summarizer 调用延迟（毫秒）")
+    p.add_argument("--repeat", type=int, default=3, help="每种模式重复次数（取平均）")
+    p.add_argument("--live", action="store_true", help="真实调用模型，不使用模拟延迟")
+    return p.parse_args()
+
+
+class _FakeModel:
+    def __init__(self, delay_ms: float, result: Any) -> None:
+        self.delay_ms = delay_ms
+        self.result = result
+        self.calls = 0
+
+    async def ainvoke(self, *_: Any, **__: Any) -> Any:
+        self.calls += 1
+        await asyncio.sleep(self.delay_ms / 1000)
+        return self.result
+
+
+def _evidence_pack() -> dict[str, Any]:
+    days = [{"date": f"2024-05-{d:02d}", "sessions": 1000 + d * 15 + (900 if d == 20 else 0)} for d in range(1, 29)]
+    return {
+        "summary": {"total_visits": 35000, "total_unique_visitors": 21000, "total_page_views": 88000, "pages_per_session": 2.5},
+        "charts": {
+            "daily_visits": {"chart_type": "line", "data": days},
+            "traffic_sources": {
+                "chart_type": "pie",
+                "data": [{"name": n, "value": v} for n, v in [("Organic", 16000), ("Direct", 9000), ("Referral", 6000), ("Social", 4000)]],
+            },
+            "device_stats": {
+                "chart_type": "pie",
+                "data": [{"name": n, "value": v} for n, v in [("mobile", 21000), ("desktop", 12000), ("tablet", 2000)]],
+            },
+            "top_pages": {
+                "chart_type": "bar",
+                "data": [{"name": f"/page-{i}", "value": 5000 // (i + 1)} for i in range(10)],
+            },
+        },
+        "data_quality": {"warnings": []},
+    }
+
+
+async def _run_mode(mode: str, pack: dict[str, Any], repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        await ria.generate_report_insights(evidence_pack=pack, planner_mode=mode)
+    return (time.perf_counter() - started) * 1000 / repeat
+
+
+async def _main() -> None:
+    args = _parse_args()
+    pack = _evidence_pack()
+    planner = summarizer = None
+    if not args.live:
+        plan = AnalysisPlanModel(
+            steps=[PlanStepModel(title="Core metrics overview", evidence_refs=["summary"], output_expectation="Totals")]
+        )
+        final = InsightsOutputModel(
+            insights=InsightsModel(one_liner="Traffic grew steadily.", evidence=[], hypotheses=[]),
+            actions=[ActionModel(id="a1", title="Keep publishing", why="Organic leads traffic")],
+        )
+        planner = ria._PLANNER = _FakeModel(args.planner_ms, plan)
+        summarizer = ria._SUMMARIZER = _FakeModel(args.summarizer_ms, final)
+
+    print(f"repeat={args.repeat} live={args.live}")
+    for mode in ("llm", "auto"):
+        before = (planner.calls, summarizer.calls) if planner else (0, 0)
+        avg_ms = await _run_mode(mode, pack, args.repeat)
+        line = f"{mode:>5}: avg {avg_ms:8.1f} ms"
+        if planner:
+            line += f"  planner_calls={planner.calls - before[0]}  summarizer_calls={summarizer.calls - before[1]}"
+        if mode == "auto":
+            line += f"  template_steps={len(template_plan_steps(pack) or [])}"
+        print(line)
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
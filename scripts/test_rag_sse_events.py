@@ -7,6 +7,9 @@
   # 自定义参数
   python scripts/test_rag_sse_events.py --tenant-id tenant_123 --site-id site_123 --query "什么情况"
 
+  # 离线微基准：逐行 str 解析（旧实现）vs 字节级 SSEDecoder + node_name 预过滤
+  python scripts/test_rag_sse_events.py --bench --bench-chunks 5000
+
 说明：
 - 默认租户 ID: tenant_123
 - 默认站点 ID: site_123
@@ -21,15 +24,20 @@ import asyncio
 import json
 import os
 import sys
+import time
 import uuid
 from pathlib import Path
 
+import httpx
+
 # 允许直接在源码仓库中运行：把 src/ 加进 PYTHONPATH
 _ROOT = Path(__file__).resolve().parents[1]
 sys.path.insert(0, str(_ROOT / "src"))
 
 from agent.tools.rag import rag_sse_events
 from agent.config import RAG_API_URL
+from agent.utils.http import aiter_with_deadlines
+from agent.utils.sse import aiter_sse, make_node_filter
 
 
 def _parse_args() -> argparse.Namespace:
@@ -44,9 +52,137 @@ def _parse_args() -> argparse.Namespace:
         help="RAG API URL（默认：从环境变量或 config 中获取）",
     )
     p.add_argument("--timeout", type=float, default=60.0, help="超时时间（秒，默认：60.0）")
+    p.add_argument("--bench", action="store_true", help="运行离线 SSE 解析微基准（不访问网络）")
+    p.add_argument("--bench-chunks", type=int, default=5000, help="基准流中 generate_answer 事件数")
+    p.add_argument("--bench-read-size", type=int, default=1024, help="模拟网络读取的字节块大小")
+    p.add_argument("--bench-repeat", type=int, default=15, help="重复次数（取最快一次）")
     return p.parse_args()
 
 
+# ============ 微基准 ============
+
+_BENCH_NODE_TYPES = ("generate_answer", "final_answer")
+
+
+def _bench_stream(n_chunks: int, sources_every: int = 0) -> bytes:
+    """构造一条接近线上形态的 SSE 流：少量大事件 + 大量小 generate_answer 事件。
+
+    sources_every > 0 时每隔若干答案片段插入一个携带检索片段的大事件（调用方不消费）。
+    """
+    sources = [
+        {"score": 0.9 - i * 0.01, "content": "文档内容片段 " * 80, "title": f"doc-{i}"}
+        for i in range(10)
+    ]
+    events: list[tuple[str | None, dict]] = [
+        (None, {"node_name": "workflow", "session_id": "bench"}),
+        (None, {"node_name": "analysis_language", "detected_language": "zh"}),
+        (None, {"node_name": "retrieval_rerank", "sources": sources}),
+    ]
+    words = ["配置", "页脚", "菜单", "，", "请在", "后台", "设置", "中", "找到", "。"]
+    for i in range(n_chunks):
+        events.append((None, {"node_name": "generate_answer", "answer": words[i % len(words)]}))
+        if sources_every and i % sources_every == sources_every - 1:
+            events.append((None, {"node_name": "retrieval_rerank", "sources": sources}))
+    events.append(("message", {"node_name": "final_answer", "usages": [{"model_name": "x", "total_tokens": 1}]}))
+    parts = []
+    for event_name, data in events:
+        head = f"event: {event_name}\r\n" if event_name else ""
+        parts.append(f"{head}data: {json.dumps(data, ensure_ascii=False)}\r\n\r\n")
+    return "".join(parts).encode("utf-8")
+
+
+def _split(raw: bytes, size: int) -> list[bytes]:
+    return [raw[i : i + size] for i in range(0, len(raw), size)]
+
+
+def _bench_response(chunks: list[bytes]) -> httpx.Response:
+    async def _body():
+        for chunk in chunks:
+            yield chunk
+
+    return httpx.Response(200, content=_body())
+
+
+def _bench_deadlines(source):
+    return aiter_with_deadlines(source, first_byte_timeout_s=30, idle_timeout_s=60)
+
+
+async def _bench_legacy(chunks: list[bytes]) -> str:
+    """旧实现：aiter_lines → startswith → join → 全量 json.loads（逐行超时）。"""
+    response = _bench_response(chunks)
+    answer: list[str] = []
+    data_lines: list[str] = []
+    async for line in _bench_deadlines(response.aiter_lines()):
+        if line.startswith("event:"):
+            continue
+        if line.startswith("data:"):
+            data_lines.append(line[len("data:") :].strip())
+            continue
+        if line.strip() or not data_lines:
+            continue
+        data_str = "\n".join(data_lines).strip()
+        data_lines = []
+        data = json.loads(data_str)
+        if data.get("node_name") == "generate_answer":
+            answer.append(data["answer"])
+    return "".join(answer)
+
+
+async def _bench_bytes(chunks: list[bytes], node_types: tuple[str, ...] | None) -> str:
+    """新实现：aiter_bytes → 字节级 SSE 解码（逐块超时），按 node_name 预过滤后再 json.loads。"""
+    response = _bench_response(chunks)
+    wants = make_node_filter(node_types)
+    answer: list[str] = []
+    async for msg in aiter_sse(_bench_deadlines(response.aiter_bytes())):
+        if not wants(msg.data):
+            continue
+        data = json.loads(msg.data.decode("utf-8"))
+        if data.get("node_name") == "generate_answer":
+            answer.append(data["answer"])
+    return "".join(answer)
+
+
+def _bench_case(raw: bytes, args: argparse.Namespace) -> int:
+    chunks = _split(raw, args.bench_read_size)
+    n_events = raw.count(b"\r\n\r\n")
+    print(f"[基准] 流大小 {len(raw) / 1024:.0f} KiB, 事件 {n_events}, 读取块 {args.bench_read_size} B x {len(chunks)}")
+
+    cases = {
+        "legacy (aiter_lines + json)": lambda: _bench_legacy(chunks),
+        "bytes decoder (no filter)": lambda: _bench_bytes(chunks, None),
+        "bytes decoder + node filter": lambda: _bench_bytes(chunks, _BENCH_NODE_TYPES),
+    }
+    expected = None
+    baseline = None
+    for name, fn in cases.items():
+        best = float("inf")
+        for _ in range(args.bench_repeat):
+            t0 = time.perf_counter()
+            out = asyncio.run(fn())
+            best = min(best, time.perf_counter() - t0)
+        if expected is None:
+            expected, baseline = out, best
+        elif out != expected:
+            print(f"[基准] {name}: 输出与旧实现不一致！")
+            return 1
+        print(
+            f"  {name:<30} {best * 1000:8.2f} ms  {best / n_events * 1e6:6.2f} µs/event  "
+            f"x{baseline / best:.2f}"
+        )
+    return 0
+
+
+def _run_bench(args: argparse.Namespace) -> int:
+    import gc
+
+    # 单次耗时在毫秒级，关闭 GC 减少抖动
+    gc.disable()
+    print("[场景 1] 仅答案片段")
+    rc = _bench_case(_bench_stream(args.bench_chunks), args)
+    print("[场景 2] 每 100 个答案片段穿插一次检索结果事件")
+    return rc or _bench_case(_bench_stream(args.bench_chunks, sources_every=100), args)
+
+
 async def _test_rag_sse_events() -> dict:
     args = _parse_args()
     session_id = args.session_id or str(uuid.uuid4())
@@ -240,6 +376,8 @@ async def _test_rag_sse_events() -> dict:
 
 
 if __name__ == "__main__":
+    if _parse_args().bench:
+        sys.exit(_run_bench(_parse_args()))
     try:
         result = asyncio.run(_test_rag_sse_events())
         if result.get("error"):
@@ -5,6 +5,7 @@
 
 import logging
 import os
+import tempfile
 
 # ============ LangGraph Cloud 配置 ============
 
@@ -25,6 +26,32 @@ LLM_BASE_URL = os.getenv("LLM_BASE_URL")
 LLM_API_KEY = os.getenv("LLM_API_KEY")
 LLM_MODEL = os.getenv("LLM_MODEL", "gpt-4.1-mini")
 LLM_NANO_MODEL = os.getenv("LLM_NANO_MODEL", "gpt-4.1-nano")
+LLM_EMBEDDING_MODEL = os.getenv("LLM_EMBEDDING_MODEL", "text-embedding-3-small")
+GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
+GOOGLE_FLASH_MODEL = os.getenv("GOOGLE_FLASH_MODEL", "gemini-3-flash-preview")
+# Gemini 思考等级（minimal / low / medium / high；空为模型默认）：报表规划 / 洞察总结
+REPORT_THINKING_LEVEL = os.getenv("REPORT_THINKING_LEVEL") or None
+REPORT_INSIGHTS_LEVEL = os.getenv("REPORT_INSIGHTS_LEVEL") or None
+
+
+# ============ 模型路由配置 ============
+
+# 任务类型 -> 模型档位（nano / full / gemini）与调用参数；见 agent.utils.model_router
+# - cascade: 结构化输出校验失败时依次升级的档位
+# - "plan.report" 这类带作用域的任务未配置时回退到 "plan"
+MODEL_ROUTE_TIMEOUT_S = float(os.getenv("MODEL_ROUTE_TIMEOUT_S", "60"))
+MODEL_ROUTES: dict[str, dict] = {
+    "classify": {"tier": "nano", "cascade": ["full"]},
+    "extract": {"tier": "full"},
+    "plan": {"tier": "full"},
+    # temperature=None：沿用 Gemini 默认温度
+    "plan.report": {"tier": "gemini", "temperature": None, "thinking_level": REPORT_THINKING_LEVEL},
+    "narrate": {"tier": "nano", "cascade": ["full"]},
+    "summarize": {"tier": "full"},
+    "summarize.insights": {"tier": "gemini", "thinking_level": REPORT_INSIGHTS_LEVEL},
+}
+# JSON 覆盖（按任务合并），如 '{"extract": {"tier": "nano", "cascade": ["full"]}, "narrate": {"max_tokens": 300}}'
+MODEL_ROUTES_OVERRIDES = os.getenv("MODEL_ROUTES_OVERRIDES", "").strip()
 
 
 # ============ MCP 配置 ============
@@ -43,6 +70,111 @@ MCP_LOWCODE_APP_URL = os.getenv(
     "/api/mcp/lowcode-app",
 )
 
+# MCP 会话池：进程内复用已 initialize 的会话（按 server/site/tenant/token 区分）
+MCP_POOL_MAX_SESSIONS = int(os.getenv("MCP_POOL_MAX_SESSIONS", "64"))
+MCP_POOL_IDLE_TTL_S = float(os.getenv("MCP_POOL_IDLE_TTL_S", "300"))
+MCP_POOL_KEEPALIVE_S = float(os.getenv("MCP_POOL_KEEPALIVE_S", "60"))
+MCP_POOL_CONNECT_TIMEOUT_S = float(os.getenv("MCP_POOL_CONNECT_TIMEOUT_S", "15"))
+
+# MCP tools/list 目录缓存：TTL 内直接命中；过期后 STALE 窗口内先返回旧值并后台刷新
+MCP_TOOLS_CACHE_TTL_S = float(os.getenv("MCP_TOOLS_CACHE_TTL_S", "300"))
+MCP_TOOLS_CACHE_STALE_S = float(os.getenv("MCP_TOOLS_CACHE_STALE_S", "600"))
+
+
+# ============ GA 报表结果缓存配置 ============
+# 后端：memory（默认）/ sqlite（内存 + 本地 SQLite）/ off
+GA_REPORT_CACHE_BACKEND = os.getenv("GA_REPORT_CACHE_BACKEND", "memory").strip().lower()
+GA_REPORT_CACHE_PATH = os.getenv(
+    "GA_REPORT_CACHE_PATH",
+    os.path.join(tempfile.gettempdir(), "agent-cache", "ga_reports.sqlite3"),
+)
+GA_REPORT_CACHE_MAX_ENTRIES = int(os.getenv("GA_REPORT_CACHE_MAX_ENTRIES", "512"))
+# TTL（秒）：实时报表 / 区间含今天 / 近两天内结束 / 已结束的历史区间
+GA_REPORT_CACHE_TTL_REALTIME_S = float(os.getenv("GA_REPORT_CACHE_TTL_REALTIME_S", "0"))
+GA_REPORT_CACHE_TTL_TODAY_S = float(os.getenv("GA_REPORT_CACHE_TTL_TODAY_S", "300"))
+GA_REPORT_CACHE_TTL_RECENT_S = float(os.getenv("GA_REPORT_CACHE_TTL_RECENT_S", "3600"))
+GA_REPORT_CACHE_TTL_HISTORICAL_S = float(os.getenv("GA_REPORT_CACHE_TTL_HISTORICAL_S", "604800"))
+
+
+# ============ 报表图表配置 ============
+# 图表点数预算：柱状图 / 饼图保留 TopN，其余合并为 "Other"；折线图按 LTTB 降采样
+REPORT_CHART_MAX_BARS = int(os.getenv("REPORT_CHART_MAX_BARS", "20"))
+REPORT_CHART_MAX_PIE_SLICES = int(os.getenv("REPORT_CHART_MAX_PIE_SLICES", "12"))
+REPORT_CHART_MAX_LINE_POINTS = int(os.getenv("REPORT_CHART_MAX_LINE_POINTS", "200"))
+# 写入 state（tool_result.raws）的 GA 原始结果最多保留的行数
+REPORT_RAW_MAX_ROWS = int(os.getenv("REPORT_RAW_MAX_ROWS", "50"))
+# 图表分析文本生成方式：per_chart（默认，每张图表一次流式调用，数据一到就开始）/
+# batched（所有图表数据到齐后一次结构化调用，失败或遗漏的图表回退 per_chart）
+REPORT_NARRATION_MODE = os.getenv("REPORT_NARRATION_MODE", "per_chart").strip().lower()
+# 洞察分析计划：auto（默认，只含标准图表槽位的证据包用模板生成，其余用 LLM planner）/ llm（始终 LLM）
+REPORT_INSIGHTS_PLANNER = os.getenv("REPORT_INSIGHTS_PLANNER", "auto").strip().lower()
+# 图表分析文本缓存（按图表类型 / 标题 / 数据预览 / 模型 / prompt 版本）：memory（默认）/ sqlite / off
+REPORT_NARRATION_CACHE_BACKEND = os.getenv("REPORT_NARRATION_CACHE_BACKEND", "memory").strip().lower()
+REPORT_NARRATION_CACHE_PATH = os.getenv(
+    "REPORT_NARRATION_CACHE_PATH",
+    os.path.join(tempfile.gettempdir(), "agent-cache", "report_narrations.sqlite3"),
+)
+REPORT_NARRATION_CACHE_MAX_ENTRIES = int(os.getenv("REPORT_NARRATION_CACHE_MAX_ENTRIES", "1024"))
+REPORT_NARRATION_CACHE_TTL_S = float(os.getenv("REPORT_NARRATION_CACHE_TTL_S", "86400"))
+# 洞察 prompt 中证据包 / 数据集的 token 预算（约 4 字符 / token 估算）与序列化结果缓存条目数
+REPORT_PROMPT_TOKEN_BUDGET = int(os.getenv("REPORT_PROMPT_TOKEN_BUDGET", "6000"))
+REPORT_PROMPT_CACHE_MAX_ENTRIES = int(os.getenv("REPORT_PROMPT_CACHE_MAX_ENTRIES", "64"))
+# 环比：与当前周期并发拉取上一周期 GA 数据（run_report），计算差值 / Top movers / 异常点写入证据包
+REPORT_COMPARISON_ENABLED = os.getenv("REPORT_COMPARISON_ENABLED", "true").strip().lower() in {"1", "true", "yes", "on"}
+# 当前周期全部完成后，最多再等待上一周期查询的秒数（超时则放弃环比，不影响报表）
+REPORT_COMPARISON_TIMEOUT_S = float(os.getenv("REPORT_COMPARISON_TIMEOUT_S", "5"))
+REPORT_COMPARISON_TOP_N = int(os.getenv("REPORT_COMPARISON_TOP_N", "5"))
+# GA 调用计划缓存：按 规范化问题 + 工具目录哈希 + property（当天内）复用规划结果；TTL<=0 关闭
+REPORT_PLAN_CACHE_TTL_S = float(os.getenv("REPORT_PLAN_CACHE_TTL_S", "3600"))
+REPORT_PLAN_CACHE_MAX_ENTRIES = int(os.getenv("REPORT_PLAN_CACHE_MAX_ENTRIES", "256"))
+
+
+# ============ Blob 存储配置 ============
+# 大体积工具结果按内容哈希存入 Blob 存储，state 只保留引用
+# 后端：off（保持内联，默认）/ fs（本地目录）/ sqlite（单文件）/ memory（仅进程内）
+# checkpoint 会保存引用：多副本部署时 fs / sqlite 的 BLOB_STORE_PATH 必须是各副本共享的持久化目录
+BLOB_STORE_BACKEND = os.getenv("BLOB_STORE_BACKEND", "off").strip().lower()
+# 存储目录（sqlite 后端在其中创建 blobs.sqlite3）；fs / sqlite 后端必须显式配置
+BLOB_STORE_PATH = os.getenv("BLOB_STORE_PATH", "")
+BLOB_STORE_MEMORY_MAX_ENTRIES = int(os.getenv("BLOB_STORE_MEMORY_MAX_ENTRIES", "256"))
+# 保留期：超过该时长未再写入的 Blob 会被清理（应长于会话可能被恢复的时间）；<=0 不清理
+BLOB_STORE_RETENTION_S = float(os.getenv("BLOB_STORE_RETENTION_S", str(7 * 86400)))
+# 两次清理之间的最小间隔（写入时按需在后台线程触发）
+BLOB_STORE_PURGE_INTERVAL_S = float(os.getenv("BLOB_STORE_PURGE_INTERVAL_S", "3600"))
+# 序列化后不小于该字节数的值才外置
+BLOB_OFFLOAD_MIN_BYTES = int(os.getenv("BLOB_OFFLOAD_MIN_BYTES", "4096"))
+
+# ============ 消息历史配置 ============
+# messages 最多保留的条数（不含归档标记）；超出后最旧的一批归档到 Blob 存储。<=0 关闭
+MESSAGE_HISTORY_WINDOW = int(os.getenv("MESSAGE_HISTORY_WINDOW", "400"))
+
+# ============ 意图路由配置 ============
+# 规则层置信度达到该值时直接采用，不再调用 LLM
+INTENT_RULES_MIN_CONFIDENCE = float(os.getenv("INTENT_RULES_MIN_CONFIDENCE", "0.8"))
+# 历史分类结果缓存（按规范化文本）；TTL<=0 关闭
+INTENT_CACHE_TTL_S = float(os.getenv("INTENT_CACHE_TTL_S", "86400"))
+INTENT_CACHE_MAX_ENTRIES = int(os.getenv("INTENT_CACHE_MAX_ENTRIES", "2048"))
+# 路由模式：rules（规则 → 缓存 → LLM）/ index（规则 → 缓存 → 本地向量索引 → LLM）
+INTENT_ROUTER_MODE = os.getenv("INTENT_ROUTER_MODE", "rules").strip().lower()
+# 向量索引：标注语料文件（JSONL，每行 {"text", "label"}；为空时仅使用路由 prompt 的 few-shot 种子）
+INTENT_INDEX_PATH = os.getenv("INTENT_INDEX_PATH", "")
+# Embedding 后端：hashing（本地字符 n-gram 哈希，无网络）/ openai（LLM_EMBEDDING_MODEL）
+INTENT_INDEX_EMBEDDER = os.getenv("INTENT_INDEX_EMBEDDER", "hashing").strip().lower()
+INTENT_INDEX_TOP_K = int(os.getenv("INTENT_INDEX_TOP_K", "5"))
+# top1 相似度不低于 MIN_SCORE 且 top1/top2 意图间差值不低于 MIN_MARGIN 时采用，否则交给 LLM
+INTENT_INDEX_MIN_SCORE = float(os.getenv("INTENT_INDEX_MIN_SCORE", "0.5"))
+INTENT_INDEX_MIN_MARGIN = float(os.getenv("INTENT_INDEX_MIN_MARGIN", "0.1"))
+# 检查语料文件 mtime 的最小间隔（秒）；文件变化后自动重建索引，无需重启服务
+INTENT_INDEX_RELOAD_CHECK_S = float(os.getenv("INTENT_INDEX_RELOAD_CHECK_S", "5"))
+
+# 意图分类期间预热最可能的下游分支（token / tools/list / RAG 连接）
+PREWARM_ENABLED = os.getenv("PREWARM_ENABLED", "true").strip().lower() in {"1", "true", "yes", "on"}
+# 最多预热的意图数；规则层分数低于 MIN_SCORE 的候选不预热
+PREWARM_MAX_INTENTS = int(os.getenv("PREWARM_MAX_INTENTS", "2"))
+PREWARM_MIN_SCORE = float(os.getenv("PREWARM_MIN_SCORE", "0.3"))
+# 单个预热任务的最长耗时（秒），超时取消
+PREWARM_TIMEOUT_S = float(os.getenv("PREWARM_TIMEOUT_S", "10"))
+
 
 # ============ RAG API 配置 ============
 RAG_API_URL = os.getenv(
@@ -51,6 +183,41 @@ RAG_API_URL = os.getenv(
 )
 RAG_TENANT_ID = os.getenv("RAG_TENANT_ID", "help-center")
 RAG_SITE_ID = os.getenv("RAG_SITE_ID", "help-center")
+# RAG SSE 超时（秒）：建连 / 首字节（响应头 + 首个事件，包含检索耗时）/ 事件间空闲
+RAG_CONNECT_TIMEOUT_S = float(os.getenv("RAG_CONNECT_TIMEOUT_S", "5"))
+RAG_SSE_FIRST_BYTE_TIMEOUT_S = float(os.getenv("RAG_SSE_FIRST_BYTE_TIMEOUT_S", "30"))
+RAG_SSE_IDLE_TIMEOUT_S = float(os.getenv("RAG_SSE_IDLE_TIMEOUT_S", "60"))
+RAG_HTTP_MAX_CONNECTIONS = int(os.getenv("RAG_HTTP_MAX_CONNECTIONS", "50"))
+
+# RAG 答案缓存：后端 memory（默认）/ sqlite（内存 + 本地 SQLite）/ off
+RAG_ANSWER_CACHE_BACKEND = os.getenv("RAG_ANSWER_CACHE_BACKEND", "memory").strip().lower()
+RAG_ANSWER_CACHE_PATH = os.getenv(
+    "RAG_ANSWER_CACHE_PATH",
+    os.path.join(tempfile.gettempdir(), "agent-cache", "rag_answers.sqlite3"),
+)
+RAG_ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("RAG_ANSWER_CACHE_MAX_ENTRIES", "1024"))
+RAG_ANSWER_CACHE_TTL_S = float(os.getenv("RAG_ANSWER_CACHE_TTL_S", "86400"))
+# 缓存范围：help-center（仅默认的公共帮助中心知识库）/ all（所有租户站点）
+RAG_ANSWER_CACHE_SCOPE = os.getenv("RAG_ANSWER_CACHE_SCOPE", "help-center").strip().lower()
+# 语义近似命中：off（仅精确匹配）/ hashing / openai；相似度不低于阈值时复用答案
+RAG_ANSWER_CACHE_SEMANTIC = os.getenv("RAG_ANSWER_CACHE_SEMANTIC", "off").strip().lower()
+RAG_ANSWER_CACHE_SIMILARITY = float(os.getenv("RAG_ANSWER_CACHE_SIMILARITY", "0.92"))
+# 命中缓存后问题会在后台补发给上游会话；同一会话的追问最多等待补发这么久
+RAG_ANSWER_CACHE_REPLAY_WAIT_S = float(os.getenv("RAG_ANSWER_CACHE_REPLAY_WAIT_S", "30"))
+# 知识库版本：知识库更新后修改此值，旧答案全部失效
+RAG_KB_VERSION = os.getenv("RAG_KB_VERSION", "1")
+
+
+# ============ 共享 HTTP 客户端配置 ============
+# 上游（RAG / SEO / 授权）共享连接池；HTTPS 上游协商 HTTP/2 时可多路复用同一连接
+HTTP_CLIENT_HTTP2 = os.getenv("HTTP_CLIENT_HTTP2", "true").strip().lower() in {"1", "true", "yes", "on"}
+HTTP_CLIENT_KEEPALIVE_EXPIRY_S = float(os.getenv("HTTP_CLIENT_KEEPALIVE_EXPIRY_S", "60"))
+
+
+# ============ UI 推送配置 ============
+# 流式 UI 更新合并：距上次发送超过 INTERVAL 或累积文本超过 MAX_CHARS 时才下发一次
+UI_COALESCE_INTERVAL_S = float(os.getenv("UI_COALESCE_INTERVAL_MS", "50")) / 1000
+UI_COALESCE_MAX_CHARS = int(os.getenv("UI_COALESCE_MAX_CHARS", "200"))
 
 
 # ============ 网关和授权配置 ============
@@ -8,6 +8,7 @@ from langgraph.graph import END, START, StateGraph
 from agent.config import get_logger
 from agent.nodes.article import handle_article, start_article_ui
 from agent.nodes.entry import entry_node
+from agent.nodes.history import archive_history
 from agent.nodes.introduction import handle_introduction
 from agent.nodes.rag import handle_rag, start_rag_ui
 from agent.nodes.report import start_report_ui
@@ -27,6 +28,7 @@ def build_graph():
     builder = StateGraph(CopilotState)
 
     # ============ 添加节点 ============
+    builder.add_node("history", archive_history)
     builder.add_node("entry", entry_node)
     builder.add_node("router_ui", start_intent_ui)
     builder.add_node("router", route_intent)
@@ -55,8 +57,9 @@ def build_graph():
 
     # ============ 定义边 ============
 
-    # 从 START 进入 entry
-    builder.add_edge(START, "entry")
+    # 从 START 进入 history（归档超出窗口的旧消息），再进入 entry
+    builder.add_edge(START, "history")
+    builder.add_edge("history", "entry")
 
     # entry 后的条件边：根据 resume_target 决定跳转
     def _entry_route(state: CopilotState):
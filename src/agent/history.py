@@ -0,0 +1,147 @@
+"""消息历史窗口模块。
+
+长会话中 `messages` 会不断增长（每轮还会追加若干空内容的 UI 锚点 AIMessage），
+按 id 查找锚点、倒序扫描提交消息等操作都会随会话变慢。这里提供：
+
+- IndexedMessages: 带 id -> 下标映射的消息列表，`find(id)` 为 O(1)
+- windowed_messages: 替代 add_messages 的 reducer（纯内存操作）：构造 id 索引，并保证归档标记位于开头
+- archive_messages: 由 history 节点在每轮开始时调用；超过 MESSAGE_HISTORY_WINDOW 条时，
+  把最旧的一批消息写入 Blob 存储（非本地后端在线程池中写入），返回删除这批消息 + 更新归档标记的 update
+- 归档标记记录被归档的 UI 锚点 id，`find_message()` 对这些 id 仍返回同 id 的锚点消息，
+  已有 UI 卡片可以继续按原锚点 merge 更新
+"""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Sequence
+
+from langchain_core.messages import AIMessage, BaseMessage, RemoveMessage, ToolMessage
+from langgraph.graph.message import add_messages
+
+from agent.config import MESSAGE_HISTORY_WINDOW, get_logger
+
+logger = get_logger(__name__)
+
+HISTORY_ARCHIVE_ID = "history-archive"
+HISTORY_ARCHIVE_KEY = "history_archive"
+# 归档标记中最多记录的锚点 id 数（保留最新的）
+MAX_ARCHIVED_ANCHORS = 200
+
+
+class IndexedMessages(list):
+    """带 id 索引的消息列表（由 reducer 构造；checkpoint 反序列化后是普通 list，查找时回退线性扫描）。"""
+
+    def __init__(self, messages: Sequence[BaseMessage] = ()) -> None:
+        """复制 messages 并建立 id -> 下标索引。"""
+        super().__init__(messages)
+        self._index = self._build_index()
+
+    def _build_index(self) -> dict[str, int]:
+        return {m.id: i for i, m in enumerate(self) if getattr(m, "id", None)}
+
+    def find(self, message_id: str) -> BaseMessage | None:
+        """按 id 查找消息；索引失效（列表被原地修改）时重建。"""
+        i = self._index.get(message_id)
+        if i is not None and i < len(self) and getattr(self[i], "id", None) == message_id:
+            return self[i]
+        # 列表被原地修改过：重建索引
+        self._index = self._build_index()
+        i = self._index.get(message_id)
+        return self[i] if i is not None else None
+
+
+def is_archive_marker(msg: Any) -> bool:
+    """是否为历史归档标记消息。"""
+    return isinstance(msg, AIMessage) and msg.id == HISTORY_ARCHIVE_ID
+
+
+def _is_ui_anchor(msg: BaseMessage) -> bool:
+    return isinstance(msg, AIMessage) and not msg.content and not msg.tool_calls
+
+
+def _archive_marker(marker: AIMessage | None, dropped: list[BaseMessage], batch: dict[str, Any] | None) -> AIMessage:
+    """在旧归档标记的基础上记录本批归档（Blob 引用、锚点 id、累计条数）。"""
+    info = dict((marker.additional_kwargs.get(HISTORY_ARCHIVE_KEY) or {}) if marker is not None else {})
+    batches = list(info.get("batches") or [])
+    if batch is not None:
+        batches.append(batch)
+    anchors = list(info.get("anchor_ids") or [])
+    anchors.extend(m.id for m in dropped if _is_ui_anchor(m) and m.id)
+    info.update(
+        {
+            "count": int(info.get("count") or 0) + len(dropped),
+            "batches": batches,
+            "anchor_ids": anchors[-MAX_ARCHIVED_ANCHORS:],
+        }
+    )
+    return AIMessage(id=HISTORY_ARCHIVE_ID, content="", additional_kwargs={HISTORY_ARCHIVE_KEY: info})
+
+
+def split_window(
+    messages: Sequence[BaseMessage], window: int | None = None
+) -> tuple[AIMessage | None, list[BaseMessage]]:
+    """返回 (归档标记, 需归档的最旧一批)；未超出窗口时第二项为空。
+
+    超出窗口时保留最近约 3/4 窗口（避免之后每条新消息都触发一次归档）。
+    """
+    window = MESSAGE_HISTORY_WINDOW if window is None else window
+    marker = messages[0] if messages and is_archive_marker(messages[0]) else None
+    body = list(messages[1:] if marker is not None else messages)
+    if window <= 0 or len(body) <= window:
+        return marker, []
+    cut = len(body) - max(1, window * 3 // 4)
+    # 不把 ToolMessage 与其对应的 tool_call 拆开
+    while cut < len(body) - 1 and isinstance(body[cut], ToolMessage):
+        cut += 1
+    return marker, body[:cut]
+
+
+async def archive_messages(messages: Sequence[BaseMessage], window: int | None = None) -> list[BaseMessage]:
+    """超出窗口时归档最旧的一批，返回供 messages reducer 应用的 update（无需归档时为空列表）。"""
+    # 延迟导入：state 模块加载时避免循环依赖
+    from agent.utils.blobstore import get_blob_store
+
+    marker, dropped = split_window(messages, window)
+    if not dropped:
+        return []
+    batch = None
+    store = get_blob_store()
+    if store is not None:
+        payload = [m.model_dump() for m in dropped]
+        try:
+            if store.is_local:
+                batch = store.put(payload, kind="messages")
+            else:
+                batch = await asyncio.to_thread(store.put, payload, kind="messages")
+        except Exception as e:
+            logger.warning(f"[History][archive] 归档 {len(dropped)} 条消息失败，直接丢弃: {e}")
+    return [*(RemoveMessage(id=m.id) for m in dropped), _archive_marker(marker, dropped, batch)]
+
+
+def windowed_messages(left: Sequence[Any], right: Sequence[Any] | Any) -> IndexedMessages:
+    """Messages reducer：add_messages 语义 + id 索引，归档标记始终位于开头。
+
+    首次归档时标记作为新消息追加在末尾，这里把它移到开头；之后按 id 原位替换。
+    """
+    merged = list(add_messages(left, right))
+    if len(merged) > 1 and is_archive_marker(merged[-1]):
+        merged.insert(0, merged.pop())
+    return IndexedMessages(merged)
+
+
+def find_message(messages: Sequence[BaseMessage], message_id: str | None) -> BaseMessage | None:
+    """按 id 查找消息；已归档的 UI 锚点返回同 id 的空锚点消息。"""
+    if not message_id:
+        return None
+    if isinstance(messages, IndexedMessages):
+        found = messages.find(message_id)
+    else:
+        found = next((m for m in messages if getattr(m, "id", None) == message_id), None)
+    if found is not None:
+        return found
+    if messages and is_archive_marker(messages[0]):
+        info = messages[0].additional_kwargs.get(HISTORY_ARCHIVE_KEY) or {}
+        if message_id in (info.get("anchor_ids") or []):
+            return AIMessage(id=message_id, content="")
+    return None
@@ -9,16 +9,25 @@
 from __future__ import annotations
 
 import json
-import os
+import time
 from typing import Any, Literal
 
 from langchain_core.messages import HumanMessage
-from langchain_google_genai import ChatGoogleGenerativeAI
+from langchain_core.output_parsers import JsonOutputParser
 from pydantic import BaseModel, Field
 
-from agent.utils.llm import llm_nostream, llm_nano
-from agent.prompts.report import REPORT_INTERPRETER_PROMPT
+from agent.config import REPORT_INSIGHTS_PLANNER, get_logger
+from agent.insights.reporting.insights_stream import InsightsStreamParser
+from agent.insights.reporting.plan_template import template_plan_steps
+from agent.insights.reporting.prompt_pack import DATASETS_FORMAT_NOTE, serialize_datasets, serialize_evidence_pack
+from agent.insights.reporting.rules import run_plan
+from agent.utils import metrics
+from agent.utils.blobstore import aresolve
+from agent.utils.model_router import get_model_router
+from agent.prompts.assembly import assemble, static_section
+from agent.prompts.report import REPORT_INTERPRETER_PROMPT, REPORT_INTERPRETER_PROMPT_VERSION
 
+logger = get_logger(__name__)
 
 _PLANNER = None
 _SUMMARIZER = None
@@ -88,7 +97,7 @@ def _get_planner():
     """生成分析计划（plan）。"""
     global _PLANNER
     if _PLANNER is None:
-        _PLANNER = llm_nostream.with_structured_output(AnalysisPlanModel)
+        _PLANNER = get_model_router().structured("plan", AnalysisPlanModel)
     return _PLANNER
 
 
@@ -96,170 +105,59 @@ def _get_summarizer():
     """基于 step_outputs 生成洞察/建议（summarize）。"""
     global _SUMMARIZER
     if _SUMMARIZER is None:
-        _SUMMARIZER = llm_nostream.with_structured_output(InsightsOutputModel)
+        _SUMMARIZER = get_model_router().structured("summarize", InsightsOutputModel)
     return _SUMMARIZER
 
-def _fmt_int(v: Any) -> str:
-    try:
-        return f"{int(v):,}"
-    except Exception:
-        return str(v)
-
-
-def _fmt_pct(v: float) -> str:
-    try:
-        return f"{v*100:.1f}%"
-    except Exception:
-        return str(v)
-
-
-def _extract_pie_distribution(chart: dict[str, Any]) -> tuple[int, list[tuple[str, int, float]]]:
-    """从 pie chart data 提取总数与占比。"""
-    data = chart.get("data") or []
-    items: list[tuple[str, int]] = []
-    total = 0
-    for r in data:
-        if not isinstance(r, dict):
-            continue
-        name = str(r.get("name") or r.get("label") or "")
-        val = r.get("value")
-        try:
-            iv = int(val)
-        except Exception:
-            continue
-        if not name:
-            name = "—"
-        items.append((name, iv))
-        total += iv
-    dist: list[tuple[str, int, float]] = []
-    if total > 0:
-        for name, iv in sorted(items, key=lambda x: x[1], reverse=True)[:5]:
-            dist.append((name, iv, iv / total))
-    return total, dist
-
-
 def execute_plan(
     *,
     evidence_pack: dict[str, Any],
     plan: AnalysisPlanModel,
 ) -> list[dict[str, Any]]:
-    """Deterministic execution: generate step_outputs from EvidencePack based on plan."""
-    out: list[dict[str, Any]] = []
-    summary = (evidence_pack or {}).get("summary") or {}
-    charts = (evidence_pack or {}).get("charts") or {}
-    dq = (evidence_pack or {}).get("data_quality") or {}
-
-    for step in plan.steps:
-        title = step.title
-        title_l = title.lower()
-        result_lines: list[str] = []
-        evidence_ref: str | None = None
-
-        # Core metrics
-        if ("core" in title_l) or ("metric" in title_l) or ("summary" in " ".join(step.evidence_refs).lower()):
-            tv = summary.get("total_visits")
-            tu = summary.get("total_unique_visitors")
-            tpv = summary.get("total_page_views")
-            pps = summary.get("pages_per_session")
-            if tv is not None:
-                result_lines.append(f"Total sessions: {_fmt_int(tv)}")
-            if tu is not None:
-                result_lines.append(f"Active users: {_fmt_int(tu)}")
-            if tpv is not None:
-                result_lines.append(f"Page views: {_fmt_int(tpv)}")
-            if pps is not None:
-                result_lines.append(f"Pages per session: {pps}")
-            evidence_ref = "summary"
-
-        # Device distribution
-        if ("device" in title_l) or ("charts.device" in " ".join(step.evidence_refs).lower()):
-            chart = charts.get("device_stats") or {}
-            total, dist = _extract_pie_distribution(chart) if isinstance(chart, dict) else (0, [])
-            if total and dist:
-                parts = [f"{name} {_fmt_int(val)} ({_fmt_pct(p)})" for name, val, p in dist]
-                result_lines.append(f"Device total: {_fmt_int(total)}; Top: " + ", ".join(parts))
-            evidence_ref = "charts.device_stats"
-
-        # Traffic sources
-        if ("source" in title_l) or ("channel" in title_l) or ("traffic" in title_l) or ("charts.traffic" in " ".join(step.evidence_refs).lower()):
-            chart = charts.get("traffic_sources") or {}
-            total, dist = _extract_pie_distribution(chart) if isinstance(chart, dict) else (0, [])
-            if total and dist:
-                parts = [f"{name} {_fmt_int(val)} ({_fmt_pct(p)})" for name, val, p in dist]
-                result_lines.append(f"Traffic total: {_fmt_int(total)}; Top: " + ", ".join(parts))
-            evidence_ref = "charts.traffic_sources"
-
-        # Trend analysis
-        if ("trend" in title_l) or ("charts.daily" in " ".join(step.evidence_refs).lower()):
-            chart = charts.get("daily_visits") or {}
-            data = (chart.get("data") or []) if isinstance(chart, dict) else []
-            if isinstance(data, list) and data:
-                first = data[0]
-                last = data[-1]
-                xk = chart.get("x_key") or "date"
-                y_keys = chart.get("y_keys") or []
-                if isinstance(first, dict) and isinstance(last, dict) and y_keys:
-                    y0 = y_keys[0]
-                    try:
-                        v0 = float(first.get(y0))
-                        v1 = float(last.get(y0))
-                        delta = v1 - v0
-                        result_lines.append(
-                            f"{y0} from {first.get(xk)} at {int(v0)} changed to {last.get(xk)} at {int(v1)} (Δ {int(delta):+d})"
-                        )
-                    except Exception:
-                        pass
-            evidence_ref = "charts.daily_visits"
-
-        # Data quality
-        if ("quality" in title_l) or ("data_quality" in " ".join(step.evidence_refs).lower()):
-            notes = dq.get("notes") or []
-            warns = dq.get("warnings") or []
-            if warns:
-                result_lines.append("Warnings: " + "; ".join([str(w) for w in warns[:3]]))
-            if notes:
-                result_lines.append("Notes: " + "; ".join([str(n) for n in notes[:3]]))
-            evidence_ref = "data_quality"
-
-        if not result_lines:
-            # No matching rule - provide minimal traceable output
-            result_lines.append(f"(No deterministic rule implemented for: {step.output_expectation})")
-            evidence_ref = step.evidence_refs[0] if step.evidence_refs else None
-
-        out.append(
-            {
-                "step": title,
-                "result": "\n".join(result_lines),
-                "evidence_ref": evidence_ref,
-            }
-        )
+    """Deterministic execution: generate step_outputs from EvidencePack based on plan (rule registry dispatch)."""
+    return run_plan(evidence_pack or {}, list(plan.steps))
 
-    return out
+
+async def plan_insights(
+    *,
+    evidence_pack: dict[str, Any],
+    user_text: str | None = None,
+    mode: str | None = None,
+) -> AnalysisPlanModel:
+    """生成分析计划：标准证据包按模板生成（省一次模型调用），其余交给 LLM planner。"""
+    mode = (mode or REPORT_INSIGHTS_PLANNER).lower()
+    started = time.perf_counter()
+    steps = template_plan_steps(evidence_pack) if mode != "llm" else None
+    if steps:
+        plan = AnalysisPlanModel.model_validate({"steps": steps})
+        source = "template"
+    else:
+        charts_keys = sorted(list(((evidence_pack or {}).get("charts") or {}).keys()))
+        plan_prompt = (
+            "You are a GA report analysis planner.\n"
+            "Based on the available fields in EvidencePack, generate 1-4 analysis steps (steps).\n"
+            "Each step should specify: title, evidence_refs to reference, and expected output.\n"
+            "Do not invent fields that don't exist.\n"
+            f"Available charts keys: {charts_keys}\n"
+            f"User query (optional): {user_text or ''}\n"
+            "EvidencePack (compact; charts as CSV tables):\n"
+            + serialize_evidence_pack(evidence_pack).text
+        )
+        plan = await _get_planner().ainvoke([HumanMessage(content=plan_prompt)], config={"callbacks": []})
+        source = "llm"
+    metrics.incr(f"report_insights.planner.{source}")
+    metrics.observe(f"report_insights.plan_ms.{source}", (time.perf_counter() - started) * 1000)
+    return plan
 
 
 async def generate_report_insights(
     *,
     evidence_pack: dict[str, Any],
     user_text: str | None = None,
+    planner_mode: str | None = None,
 ) -> dict[str, Any]:
     """plan→execute: Generate plan, execute to get step_outputs, then summarize into insights/actions."""
-    charts_keys = sorted(list(((evidence_pack or {}).get("charts") or {}).keys()))
-    planner = _get_planner()
     summarizer = _get_summarizer()
-
-    plan_prompt = (
-        "You are a GA report analysis planner.\n"
-        "Based on the available fields in EvidencePack, generate 1-4 analysis steps (steps).\n"
-        "Each step should specify: title, evidence_refs to reference, and expected output.\n"
-        "Do not invent fields that don't exist.\n"
-        f"Available charts keys: {charts_keys}\n"
-        f"User query (optional): {user_text or ''}\n"
-        "EvidencePack (JSON):\n"
-        + json.dumps(evidence_pack, ensure_ascii=False)
-    )
-    plan: AnalysisPlanModel = await planner.ainvoke(
-        [HumanMessage(content=plan_prompt)], config={"callbacks": []}
-    )
+    plan = await plan_insights(evidence_pack=evidence_pack, user_text=user_text, mode=planner_mode)
 
     step_outputs = execute_plan(evidence_pack=evidence_pack, plan=plan)
 
@@ -293,7 +191,61 @@ async def generate_report_insights(
 
 
 from typing import Callable, Awaitable
-from agent.utils.llm import llm_nano, llm_nostream
+
+
+def _summarizer_llm(**kwargs: Any) -> Any:
+    """洞察总结模型（任务 summarize.insights，默认 Gemini Flash；客户端由模型路由复用）。"""
+    return get_model_router().model("summarize.insights", streaming=True, **kwargs)
+
+
+def _interpreter_prefix() -> str:
+    return (
+        f"{REPORT_INTERPRETER_PROMPT}\n"
+        f"{DATASETS_FORMAT_NOTE}\n\n"
+        f"{JsonOutputParser(pydantic_object=InsightsOutputModel).get_format_instructions()}\n"
+        "Emit the fields in this order: insights.one_liner, insights.evidence, insights.hypotheses, actions."
+    )
+
+
+async def _stream_insights(
+    summary_prompt: str,
+    *,
+    started: float,
+    on_update: Callable[[dict[str, Any]], Awaitable[None]] | None,
+    llm: Any | None = None,
+    fallback_llm: Any | None = None,
+) -> tuple[InsightsOutputModel, float | None]:
+    """流式生成 InsightsOutputModel（JSON 输出 + 增量解析）；返回 (结果, 首条洞察耗时 ms)。
+
+    summary_prompt 需已包含 JSON 输出格式说明（见 _interpreter_prefix）。
+
+    流式输出无法解析为完整模型时回退到一次结构化调用（with_structured_output）。
+    """
+    parser = InsightsStreamParser({"hypotheses": HypothesisModel, "actions": ActionModel})
+    ttfi_ms: float | None = None
+    llm = llm or _summarizer_llm(response_mime_type="application/json")
+    try:
+        async for chunk in llm.astream([HumanMessage(content=summary_prompt)], config={"callbacks": []}):
+            view = parser.feed(getattr(chunk, "text", "") or "")
+            if view is None:
+                continue
+            if ttfi_ms is None and parser.has_insight:
+                ttfi_ms = (time.perf_counter() - started) * 1000
+                metrics.observe("report_insights.ttfi_ms", ttfi_ms)
+            if on_update:
+                await on_update(view)
+        return InsightsOutputModel.model_validate(parser.result()), ttfi_ms
+    except Exception as e:
+        logger.warning(f"[ReportInsights][streaming] 流式结构化输出失败，回退一次性结构化调用: {e}")
+        metrics.incr("report_insights.stream_fallback")
+    if fallback_llm is not None:
+        summarizer = fallback_llm.with_structured_output(InsightsOutputModel)
+    else:
+        summarizer = get_model_router().structured("summarize.insights", InsightsOutputModel)
+    final: InsightsOutputModel = await summarizer.ainvoke(
+        [HumanMessage(content=summary_prompt)], config={"callbacks": []}
+    )
+    return final, ttfi_ms
 
 
 async def generate_report_insights_streaming(
@@ -301,113 +253,57 @@ async def generate_report_insights_streaming(
     evidence_pack: dict[str, Any],
     user_text: str | None = None,
     on_update: Callable[[dict[str, Any]], Awaitable[None]] | None = None,
+    planner_mode: str | None = None,
 ) -> dict[str, Any]:
     """
     Streaming version of generate_report_insights.
     
     Calls on_update callback with partial report data as content is generated:
-    - First streams the one_liner text token by token
-    - Then generates structured actions/hypotheses
+    - The summarizer streams InsightsOutputModel JSON; the partial JSON is parsed incrementally
+    - one_liner is pushed token by token, evidence / hypotheses / actions item by item as they complete
+    - Time-to-first-insight and total time are recorded in metrics and trace["timing"]
     """
-    charts_keys = sorted(list(((evidence_pack or {}).get("charts") or {}).keys()))
-    planner = _get_planner()
-
-    # Step 1: Generate plan (structured, non-streaming)
-    plan_prompt = (
-        "You are a GA report analysis planner.\n"
-        "Based on the available fields in EvidencePack, generate 1-4 analysis steps (steps).\n"
-        "Each step should specify: title, evidence_refs to reference, and expected output.\n"
-        "Do not invent fields that don't exist.\n"
-        f"Available charts keys: {charts_keys}\n"
-        f"User query (optional): {user_text or ''}\n"
-        "EvidencePack (JSON):\n"
-        + json.dumps(evidence_pack, ensure_ascii=False)
-    )
-    plan: AnalysisPlanModel = await planner.ainvoke(
-        [HumanMessage(content=plan_prompt)], config={"callbacks": []}
-    )
+    started = time.perf_counter()
+    # Step 1: Generate plan (template for standard packs, otherwise structured LLM call)
+    plan = await plan_insights(evidence_pack=evidence_pack, user_text=user_text, mode=planner_mode)
 
     step_outputs = execute_plan(evidence_pack=evidence_pack, plan=plan)
     
-    # Step 2: Stream the one_liner summary
-    one_liner_prompt = (
-        "You are a GA report insights assistant.\n"
-        "Based ONLY on the step_outputs provided, write a single concise sentence summarizing the key insight.\n"
-        "This should be the most important finding from the data analysis.\n"
-        "Do NOT use any markdown formatting. Just output a plain sentence in English.\n"
-        "step_outputs (JSON):\n"
-        + json.dumps(step_outputs, ensure_ascii=False)
-    )
-    
-    one_liner_parts: list[str] = []
-    try:
-        async for chunk in llm_nano.astream(one_liner_prompt, config={"callbacks": []}):
-            piece = getattr(chunk, "content", chunk)
-            if not isinstance(piece, str) or not piece:
-                continue
-            one_liner_parts.append(piece)
-            # Push partial update with streaming one_liner
-            if on_update:
-                partial_report = {
-                    "insights": {
-                        "one_liner": "".join(one_liner_parts),
-                        "evidence": [],
-                        "hypotheses": [],
-                        "_streaming": True,
-                    },
-                    "actions": [],
-                    "todos": [],
-                }
-                await on_update(partial_report)
-    except Exception as e:
-        print(f"[ReportInsights] Streaming one_liner failed: {e}")
-    
-    one_liner = "".join(one_liner_parts).strip()
-    
-    # Step 3: Generate structured insights and actions
-    # Step 3: Generate structured insights and actions
+    # Step 2: Stream structured insights; each field is pushed as soon as it completes
     raws = (evidence_pack or {}).get("raws") or []
-    
-    # 将 raws 转换为 prompt 要求的 tool/request/response 格式
-    datasets_json_str = "[]"
-    if raws:
-        datasets = []
-        for r in raws:
-            datasets.append({
-                "tool": r.get("tool"),
-                "request": r.get("args"),
-                "response": r.get("result")
-            })
-        datasets_json_str = json.dumps(datasets, ensure_ascii=False)
 
-    summary_prompt = (
-        f"{REPORT_INTERPRETER_PROMPT}\n"
-        "Input Datasets (JSON):\n"
-        + datasets_json_str
-    )
-    
-    # summarizer = _get_summarizer()
-    # 使用 Gemini Flash Thinking 模型 (Directly instantiated as per requirement)
-    llm_gemini = ChatGoogleGenerativeAI(
-        model=os.getenv("GOOGLE_FLASH_MODEL", "gemini-3-flash-preview"),
-        google_api_key=os.getenv("GOOGLE_API_KEY"),
-        thinking_level=os.getenv("REPORT_INSIGHTS_LEVEL"),
-        temperature=0,
+    # 将 raws 转换为 prompt 要求的 tool/request/response 数据集（紧凑表格形式，受 token 预算约束）
+    # 外置的 GA 结果取不回时 aresolve 抛 BlobNotFoundError（report 节点记为洞察失败），不在缺数据时继续分析
+    datasets = [{**r, "result": await aresolve(r.get("result"))} for r in raws if isinstance(r, dict)]
+    datasets_text = serialize_datasets(datasets).text if datasets else "(no datasets)"
+
+    # 静态部分（解读规则 / 数据格式说明 / JSON 输出格式）在前，数据集与 step_outputs 在后
+    summary_prompt = assemble(
+        "report_interpreter",
+        static_section("report_interpreter", REPORT_INTERPRETER_PROMPT_VERSION, _interpreter_prefix),
+        "Input Datasets:\n"
+        + datasets_text
+        + "\n\nPrecomputed facts (step_outputs, verified by code; prefer these numbers):\n"
+        + json.dumps(step_outputs, ensure_ascii=False),
+    ).text
+
+    final, ttfi_ms = await _stream_insights(summary_prompt, started=started, on_update=on_update)
+    insights_dict = final.insights.model_dump()
+    total_ms = (time.perf_counter() - started) * 1000
+    metrics.observe("report_insights.total_ms", total_ms)
+    logger.info(
+        f"[ReportInsights][streaming] time_to_first_insight_ms="
+        f"{'n/a' if ttfi_ms is None else f'{ttfi_ms:.0f}'} total_ms={total_ms:.0f}"
     )
-    summarizer = llm_gemini.with_structured_output(InsightsOutputModel)
 
-    final: InsightsOutputModel = await summarizer.ainvoke(
-        [HumanMessage(content=summary_prompt)], config={"callbacks": []}
-    )
-    
-    # Merge one_liner with structured output
-    insights_dict = final.insights.model_dump()
-    insights_dict["one_liner"] = one_liner if one_liner else insights_dict.get("one_liner", "")
-    
     todos = [{"content": s.title, "status": "completed"} for s in plan.steps]
     trace = {
         "todo_summary": "Analysis completed following planned steps.",
         "used_todos": [s.title for s in plan.steps],
+        "timing": {
+            "time_to_first_insight_ms": None if ttfi_ms is None else round(ttfi_ms),
+            "total_ms": round(total_ms),
+        },
     }
     
     result = {
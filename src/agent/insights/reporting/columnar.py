@@ -0,0 +1,377 @@
+"""GA report 列式表示（一次解码，图表 / 摘要 / TopN 共用）。
+
+GA MCP 返回的 rows 是逐行逐单元格的 `{"value": "..."}` 结构。这里一次性解码为：
+- 维度：分类编码（int32 codes）+ 去重后的取值；人类可读翻译只对去重值执行一次
+- 指标：float64 数组（无法解析为 NaN），并记录每列是否为整数（决定输出 int 还是 float）
+
+输出与逐行解析保持一致：单元格含 "." 输出 float，否则输出 int；解析失败保留原值；
+行内缺失的单元格不出现在该行的 dict 中。
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from operator import itemgetter
+from typing import Any
+
+import numpy as np
+
+# 行内缺失单元格（区别于 value 为 None）
+_MISSING = object()
+_VALUE = itemgetter("value")
+
+CHART_COLORS = ["#3b82f6", "#10b981", "#f59e0b", "#8b5cf6", "#ef4444"]
+
+# 单指标分布：仅在“分布类维度”下使用饼图；页面/内容类维度用柱状图更符合预期
+PIE_FRIENDLY_DIMS = frozenset(
+    {
+        "deviceCategory",
+        "sessionDefaultChannelGroup",
+        "country",
+        "city",
+        "region",
+        "browser",
+        "operatingSystem",
+        "platform",
+        "language",
+    }
+)
+PIE_MAX_SLICES = 12
+
+_CHANNEL_GROUP_LABELS = {
+    "Organic Search": "Organic Search",
+    "Direct": "Direct",
+    "Paid Search": "Paid Search",
+    "Organic Social": "Social Media",
+    "Referral": "Referral",
+    "Email": "Email",
+    "Paid Social": "Paid Social",
+    "Display": "Display",
+    "Organic Shopping": "Organic Shopping",
+    "Paid Shopping": "Paid Shopping",
+    "Organic Video": "Video",
+    "(Other)": "Other",
+    "(not set)": "Not Set",
+}
+_DEVICE_CATEGORY_LABELS = {
+    "desktop": "Desktop",
+    "mobile": "Mobile",
+    "tablet": "Tablet",
+}
+# 需要翻译取值的维度；其余维度原样展示
+_HUMANIZED_DIMS = frozenset({"sessionDefaultChannelGroup", "deviceCategory"})
+
+
+def humanize_ga_value(dim_name: str, value: str) -> str:
+    """把 GA 技术名称转换为人类可读的描述。"""
+    if not value:
+        return value
+    if dim_name == "sessionDefaultChannelGroup":
+        return _CHANNEL_GROUP_LABELS.get(value, value)
+    if dim_name == "deviceCategory":
+        return _DEVICE_CATEGORY_LABELS.get(value.lower(), value)
+    # 其他维度（如有需要可继续扩展）
+    return value
+
+
+@dataclass(slots=True)
+class DimensionColumn:
+    """分类维度列：codes[i] 指向 values / labels 中的下标。"""
+
+    name: str
+    codes: np.ndarray
+    values: list[Any]
+    labels: list[Any]
+    # 行内缺失该单元格的行（None 表示全部存在）
+    missing: np.ndarray | None = None
+
+
+@dataclass(slots=True)
+class MetricColumn:
+    """指标列：values 为 float64（无法解析为 NaN）。"""
+
+    name: str
+    values: np.ndarray
+    # 全列为整数（无 "."）时输出 int；cells 非空时表示存在混合 / 非法值，需逐格输出
+    is_int: bool = True
+    cells: list[Any] | None = None
+    missing: np.ndarray | None = None
+
+    def python_values(self) -> list[Any]:
+        """按逐行解析的规则转换为 Python 值列表。"""
+        if self.cells is not None:
+            return self.cells
+        if self.is_int:
+            return self.values.astype(np.int64).tolist()
+        return self.values.tolist()
+
+
+@dataclass(slots=True)
+class GAFrame:
+    """一次 GA report 的列式表示。"""
+
+    n_rows: int
+    dimensions: list[DimensionColumn] = field(default_factory=list)
+    metrics: list[MetricColumn] = field(default_factory=list)
+
+    @property
+    def dimension_names(self) -> list[str]:
+        """维度列名（按报表顺序）。"""
+        return [d.name for d in self.dimensions]
+
+    @property
+    def metric_names(self) -> list[str]:
+        """指标列名（按报表顺序）。"""
+        return [m.name for m in self.metrics]
+
+    def metric(self, name: str) -> MetricColumn | None:
+        """按名称取指标列；不存在时返回 None。"""
+        return next((m for m in self.metrics if m.name == name), None)
+
+    def dimension(self, name: str) -> DimensionColumn | None:
+        """按名称取维度列；不存在时返回 None。"""
+        return next((d for d in self.dimensions if d.name == name), None)
+
+    def totals(self) -> dict[str, float]:
+        """各指标合计（忽略无法解析的单元格）。"""
+        return {m.name: float(np.nansum(m.values)) if self.n_rows else 0.0 for m in self.metrics}
+
+    def top_n(self, metric: str, n: int, *, dimension: str | None = None) -> list[tuple[Any, float]]:
+        """按指标降序取前 n 行，返回 (维度可读值, 指标值)；dimension 默认为第一个维度。"""
+        col = self.metric(metric)
+        if col is None or not self.n_rows or n <= 0:
+            return []
+        dim = self.dimension(dimension) if dimension else (self.dimensions[0] if self.dimensions else None)
+        vals = np.where(np.isnan(col.values), -np.inf, col.values)
+        n = min(n, self.n_rows)
+        idx = np.argpartition(-vals, n - 1)[:n] if n < self.n_rows else np.arange(self.n_rows)
+        # 稳定排序：同值保持原始行序
+        idx = idx[np.lexsort((idx, -vals[idx]))]
+        out: list[tuple[Any, float]] = []
+        for i in idx.tolist():
+            label = dim.labels[dim.codes[i]] if dim is not None else i
+            out.append((label, float(col.values[i])))
+        return out
+
+    def take(self, indices: np.ndarray | list[int]) -> GAFrame:
+        """按行下标取子集（保持给定顺序）。"""
+        idx = np.asarray(indices, dtype=np.intp)
+        rows = idx.tolist()
+        return GAFrame(
+            n_rows=len(rows),
+            dimensions=[
+                DimensionColumn(
+                    name=d.name,
+                    codes=d.codes[idx],
+                    values=d.values,
+                    labels=d.labels,
+                    missing=None if d.missing is None else d.missing[idx],
+                )
+                for d in self.dimensions
+            ],
+            metrics=[
+                MetricColumn(
+                    name=m.name,
+                    values=m.values[idx],
+                    is_int=m.is_int,
+                    cells=None if m.cells is None else [m.cells[i] for i in rows],
+                    missing=None if m.missing is None else m.missing[idx],
+                )
+                for m in self.metrics
+            ],
+        )
+
+    def records(self) -> list[dict[str, Any]]:
+        """还原为逐行 dict（维度为可读值，指标为 int / float）。"""
+        keys: list[str] = []
+        columns: list[list[Any]] = []
+        masks: list[np.ndarray | None] = []
+        for d in self.dimensions:
+            labels = d.labels
+            keys.append(d.name)
+            columns.append(list(map(labels.__getitem__, d.codes.tolist())))
+            masks.append(d.missing)
+        for m in self.metrics:
+            keys.append(m.name)
+            columns.append(m.python_values())
+            masks.append(m.missing)
+
+        if not keys:
+            return [{} for _ in range(self.n_rows)]
+        if all(mask is None for mask in masks):
+            return [dict(zip(keys, row)) for row in zip(*columns)]
+        missing = [mask.tolist() if mask is not None else None for mask in masks]
+        return [
+            {k: col[i] for k, col, miss in zip(keys, columns, missing) if miss is None or not miss[i]}
+            for i in range(self.n_rows)
+        ]
+
+
+def _cell_values(rows_cells: list[list[Any]], i: int) -> tuple[list[Any], np.ndarray | None]:
+    """取第 i 列的原始值，同时返回缺失掩码（全部存在时为 None）。"""
+    try:
+        # 快路径：每行都有该单元格且为 {"value": ...}（C 层 itemgetter，无逐格 Python 字节码）
+        return list(map(_VALUE, map(itemgetter(i), rows_cells))), None
+    except (IndexError, KeyError, TypeError):
+        raw = [((cells[i] or {}).get("value") if i < len(cells) else _MISSING) for cells in rows_cells]
+    if not any(v is _MISSING for v in raw):
+        return raw, None
+    return raw, np.fromiter((v is _MISSING for v in raw), dtype=bool, count=len(raw))
+
+
+def _decode_dimension(name: str, raw: list[Any], missing: np.ndarray | None) -> DimensionColumn:
+    # 按首次出现顺序去重编码：dict 去重与 codes 映射都在 C 层完成，Python 循环只跑去重值
+    try:
+        index: dict[Any, int] = dict.fromkeys(raw)
+    except TypeError:
+        # 不可哈希的异常取值：不去重，逐行一个编码
+        codes = np.arange(len(raw), dtype=np.int32)
+        values = list(raw)
+    else:
+        for code, value in enumerate(index):
+            index[value] = code
+        codes = np.fromiter(map(index.__getitem__, raw), dtype=np.int32, count=len(raw))
+        values = list(index)
+    if name in _HUMANIZED_DIMS:
+        labels = [None if v is _MISSING else humanize_ga_value(name, v) for v in values]
+    else:
+        labels = [None if v is _MISSING else v for v in values]
+    return DimensionColumn(name=name, codes=codes, values=values, labels=labels, missing=missing)
+
+
+def _parse_cell(v: Any) -> Any:
+    try:
+        return float(v) if "." in str(v) else int(v)
+    except Exception:
+        return v
+
+
+def _to_float(v: Any) -> float:
+    # 合计沿用 float() 的解析规则（如 "1e3"），无法解析时为 NaN
+    try:
+        return float(v)
+    except Exception:
+        return np.nan
+
+
+def _decode_metric(name: str, raw: list[Any], missing: np.ndarray | None) -> MetricColumn:
+    n = len(raw)
+    if missing is None:
+        try:
+            values = np.fromiter(map(float, raw), dtype=np.float64, count=n)
+            joined = "".join(raw)
+        except (ValueError, TypeError):
+            values = None
+        # 指数写法 int() 无法解析，交给慢路径保持与逐行解析一致
+        if values is not None and "e" not in joined and "E" not in joined and np.isfinite(values).all():
+            # 能被解析的单元格最多含一个 "."，因此总数即含 "." 的单元格数
+            dots = joined.count(".")
+            if dots == n:
+                return MetricColumn(name=name, values=values, is_int=False)
+            if dots == 0 and (values == np.trunc(values)).all():
+                return MetricColumn(name=name, values=values, is_int=True)
+
+    # 慢路径：混合 / 非法 / 缺失单元格，逐格按原规则解析
+    cells = [None if v is _MISSING else _parse_cell(v) for v in raw]
+    values = np.fromiter(map(_to_float, raw), dtype=np.float64, count=n)
+    return MetricColumn(name=name, values=values, is_int=False, cells=cells, missing=missing)
+
+
+def decode_ga_report(result: dict[str, Any]) -> GAFrame:
+    """把 GA report（rows / dimension_headers / metric_headers）解码为 GAFrame。"""
+    rows = result.get("rows") or []
+    dim_names = [h.get("name") for h in (result.get("dimension_headers") or []) if h.get("name")]
+    metric_names = [h.get("name") for h in (result.get("metric_headers") or []) if h.get("name")]
+
+    dim_cells = [r.get("dimension_values") or [] for r in rows] if dim_names else []
+    met_cells = [r.get("metric_values") or [] for r in rows] if metric_names else []
+    return GAFrame(
+        n_rows=len(rows),
+        dimensions=[_decode_dimension(dn, *_cell_values(dim_cells, i)) for i, dn in enumerate(dim_names)],
+        metrics=[_decode_metric(mn, *_cell_values(met_cells, i)) for i, mn in enumerate(metric_names)],
+    )
+
+
+def chart_kind(frame: GAFrame) -> str | None:
+    """图表类型：date 维度为折线；分布类单指标且行数不多时为饼图；其余为柱状图。"""
+    metric_names = frame.metric_names
+    if not metric_names:
+        return None
+    x_key = frame.dimensions[0].name if frame.dimensions else "x"
+    if "date" in (x_key or "").lower():
+        return "line"
+    if len(metric_names) == 1 and frame.n_rows <= PIE_MAX_SLICES and x_key in PIE_FRIENDLY_DIMS:
+        return "pie"
+    return "bar"
+
+
+def build_chart(
+    frame: GAFrame,
+    *,
+    kind: str | None = None,
+    extra: list[dict[str, Any]] | None = None,
+) -> dict[str, Any] | None:
+    """GAFrame -> chart（line / pie / bar）。
+
+    kind 默认按 chart_kind(frame) 判定；对子集 frame 出图时应传入按完整 frame 判定的类型。
+    extra 为追加在末尾的行（如 "Other" 汇总行，按 records() 的格式）。
+    """
+    kind = kind or chart_kind(frame)
+    if kind is None:
+        return None
+    metric_names = frame.metric_names
+    x_key = frame.dimensions[0].name if frame.dimensions else "x"
+    if kind == "line":
+        return {
+            "chart_type": "line",
+            "title": "Trend",
+            "data": frame.records() + (extra or []),
+            "x_key": x_key,
+            "y_keys": metric_names,
+            "y_labels": metric_names,
+            "colors": list(CHART_COLORS),
+        }
+
+    if kind == "pie":
+        dim = frame.dimensions[0]
+        metric = frame.metrics[0]
+        names = list(map(dim.labels.__getitem__, dim.codes.tolist()))
+        values = metric.python_values()
+        if metric.missing is not None:
+            values = [0 if miss else v for v, miss in zip(values, metric.missing.tolist())]
+        data = [{"name": name, "value": value} for name, value in zip(names, values)]
+        data.extend({"name": row.get(x_key), "value": row.get(metric.name, 0)} for row in extra or [])
+        return {
+            "chart_type": "pie",
+            "title": f"{x_key} Distribution",
+            "data": data,
+            "value_key": "value",
+            "label_key": "name",
+        }
+
+    y_key = metric_names[0]
+    return {
+        "chart_type": "bar",
+        "title": f"{x_key} - {y_key}",
+        "data": frame.records() + (extra or []),
+        "x_key": x_key,
+        "y_key": y_key,
+        "color": "#6366f1",
+        "show_change": False,
+    }
+
+
+def build_summary(frame: GAFrame) -> dict[str, Any]:
+    """GAFrame -> 前端摘要区（总访问 / 独立访客 / 浏览量）。"""
+    totals = frame.totals()
+    total_visits = int(totals.get("sessions", 0))
+    total_unique = int(totals.get("activeUsers", 0))
+    total_pv = int(totals.get("screenPageViews", 0))
+    return {
+        "total_visits": total_visits,
+        "total_unique_visitors": total_unique,
+        "total_page_views": total_pv,
+        "avg_session_duration": 0,
+        "bounce_rate": 0.0,
+        "pages_per_session": round(total_pv / total_visits, 2) if total_visits > 0 else 0,
+    }
@@ -0,0 +1,206 @@
+"""环比对比：上一周期的 GA 数据与当前周期对齐，预先算好差值 / Top movers / 异常点。
+
+report 节点对每个 run_report 调用再发起一次“上一周期”查询（与当前周期并发），两份结果
+一次解码为 GAFrame 后在这里向量化对比，写入 EvidencePack.comparisons：
+
+- totals: 可加性指标的本期 / 上期合计、差值与变化率
+- movers: 非日期维度（如 pagePath / deviceCategory）按主指标变化绝对值排序的前 N 项；只比较两期都出现的
+  取值（查询带 limit 时只拿到 Top N，某项只在一期出现多半是跌出 / 挤进了 Top N，而不是真的新增 / 消失）
+- anomalies: 日期维度按天汇总后，以上一周期为基线计算 z-score（上一周期数据不足时以本期自身为基线）
+
+洞察阶段的规则直接引用这些事实，不再依赖模型自行推算环比。
+"""
+
+from __future__ import annotations
+
+import re
+from datetime import date, timedelta
+from typing import Any
+
+import numpy as np
+
+from agent.insights.reporting.columnar import GAFrame
+from agent.insights.reporting.rules import ANOMALY_Z
+from agent.insights.reporting.shaping import is_additive_metric
+
+_DAYS_AGO_RE = re.compile(r"^(\d+)daysago$")
+# 以上一周期为基线计算 z-score 所需的最少天数
+MIN_BASELINE_POINTS = 7
+MAX_ANOMALY_FLAGS = 5
+# 基线标准差下限（相对均值）：基线几乎持平时避免把普通波动标成异常
+MIN_RELATIVE_STD = 0.05
+
+
+def _parse_day(value: Any, today: date) -> tuple[date, bool] | None:
+    """GA 日期表达式 -> (日期, 是否为相对日期)。"""
+    v = str(value or "").strip().lower()
+    if v == "today":
+        return today, True
+    if v == "yesterday":
+        return today - timedelta(days=1), True
+    m = _DAYS_AGO_RE.match(v)
+    if m:
+        return today - timedelta(days=int(m.group(1))), True
+    try:
+        return date.fromisoformat(v), False
+    except ValueError:
+        return None
+
+
+def previous_period_range(date_range: dict[str, Any], *, today: date | None = None) -> dict[str, str] | None:
+    """紧邻当前区间之前、等长的区间；相对日期（NdaysAgo）仍输出相对日期，避免时区偏差。"""
+    today = today or date.today()
+    start = _parse_day((date_range or {}).get("start_date"), today)
+    end = _parse_day((date_range or {}).get("end_date"), today)
+    if start is None or end is None or start[0] > end[0]:
+        return None
+    span = (end[0] - start[0]).days + 1
+    prev_end = start[0] - timedelta(days=1)
+    prev_start = prev_end - timedelta(days=span - 1)
+    if start[1] and end[1]:
+        return {
+            "start_date": f"{(today - prev_start).days}daysAgo",
+            "end_date": f"{(today - prev_end).days}daysAgo",
+        }
+    return {"start_date": prev_start.isoformat(), "end_date": prev_end.isoformat()}
+
+
+def previous_period_args(tool_name: str, args: dict[str, Any]) -> dict[str, Any] | None:
+    """run_report 参数 -> 上一周期的参数；实时报表 / 多个 date_ranges / 无法解析的日期返回 None。"""
+    if tool_name != "run_report":
+        return None
+    ranges = args.get("date_ranges") or []
+    if not isinstance(ranges, list) or len(ranges) != 1 or not isinstance(ranges[0], dict):
+        return None
+    prev = previous_period_range(ranges[0])
+    return {**args, "date_ranges": [prev]} if prev else None
+
+
+def _num(v: float) -> int | float:
+    return int(v) if float(v).is_integer() else round(float(v), 4)
+
+
+def _is_date_dim(name: str) -> bool:
+    return "date" in name.lower()
+
+
+def _keys(frame: GAFrame, dims: list[str]) -> np.ndarray:
+    """各行在 dims 上的可读取值（多维以 " / " 连接）。"""
+    cols = []
+    for name in dims:
+        dim = frame.dimension(name)
+        if dim is None:
+            cols.append(np.full(frame.n_rows, "", dtype=object))
+            continue
+        labels = np.array(["" if v is None else str(v) for v in dim.labels], dtype=object)
+        cols.append(labels[dim.codes])
+    if len(cols) == 1:
+        return cols[0].astype(str)
+    return np.array([" / ".join(parts) for parts in zip(*cols)], dtype=str)
+
+
+def _aligned(
+    current: GAFrame, previous: GAFrame, dims: list[str], metric: str
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """按 dims 汇总两期的 metric：返回两期都出现的 (keys, 本期值, 上期值)。"""
+    cur_keys, prev_keys = _keys(current, dims), _keys(previous, dims)
+    keys, inverse = np.unique(np.concatenate([cur_keys, prev_keys]), return_inverse=True)
+    n = len(cur_keys)
+    cur_col, prev_col = current.metric(metric), previous.metric(metric)
+    cur = np.bincount(inverse[:n], weights=np.nan_to_num(cur_col.values), minlength=len(keys))
+    prev_w = np.nan_to_num(prev_col.values) if prev_col is not None else np.zeros(len(prev_keys))
+    prev = np.bincount(inverse[n:], weights=prev_w, minlength=len(keys))
+    both = (np.bincount(inverse[:n], minlength=len(keys)) > 0) & (np.bincount(inverse[n:], minlength=len(keys)) > 0)
+    return keys[both], cur[both], prev[both]
+
+
+def _change(cur: float, prev: float) -> dict[str, Any]:
+    return {
+        "current": _num(cur),
+        "previous": _num(prev),
+        "delta": _num(cur - prev),
+        "delta_pct": round(float((cur - prev) / prev), 4) if prev else None,
+    }
+
+
+def _movers(current: GAFrame, previous: GAFrame, dims: list[str], metric: str, top_n: int) -> list[dict[str, Any]]:
+    keys, cur, prev = _aligned(current, previous, dims, metric)
+    delta = cur - prev
+    order = np.argsort(-np.abs(delta), kind="stable")[:top_n]
+    return [{"key": str(keys[i]), **_change(cur[i], prev[i])} for i in order.tolist() if delta[i] != 0]
+
+
+def _grouped(frame: GAFrame, dims: list[str], metric: str) -> tuple[np.ndarray, np.ndarray]:
+    """按 dims 汇总 metric：返回 (有序 keys, 合计值)。"""
+    keys, inverse = np.unique(_keys(frame, dims), return_inverse=True)
+    col = frame.metric(metric)
+    weights = np.nan_to_num(col.values) if col is not None else np.zeros(frame.n_rows)
+    return keys, np.bincount(inverse, weights=weights, minlength=len(keys))
+
+
+def _anomalies(current: GAFrame, previous: GAFrame, dim: str, metric: str) -> dict[str, Any] | None:
+    keys, cur = _grouped(current, [dim], metric)
+    baseline, source = cur, "current_period"
+    if previous.metric(metric) is not None:
+        prev = _grouped(previous, [dim], metric)[1]
+        if len(prev) >= MIN_BASELINE_POINTS:
+            baseline, source = prev, "previous_period"
+    if len(cur) < 3 or len(baseline) < 3:
+        return None
+    mean = float(np.mean(baseline))
+    std = max(float(np.std(baseline)), abs(mean) * MIN_RELATIVE_STD)
+    if not std:
+        return {"metric": metric, "baseline": source, "baseline_mean": _num(mean), "flags": []}
+    z = (cur - mean) / std
+    idx = np.flatnonzero(np.abs(z) >= ANOMALY_Z)
+    idx = idx[np.argsort(-np.abs(z[idx]), kind="stable")][:MAX_ANOMALY_FLAGS]
+    return {
+        "metric": metric,
+        "baseline": source,
+        "baseline_mean": _num(mean),
+        "baseline_std": _num(std),
+        "flags": [{"key": str(keys[i]), "value": _num(cur[i]), "z": round(float(z[i]), 2)} for i in idx.tolist()],
+    }
+
+
+def compare_frames(current: GAFrame, previous: GAFrame, *, top_n: int = 5) -> dict[str, Any]:
+    """本期 / 上期 GAFrame -> totals / movers / anomalies（无法对比的部分省略）。"""
+    additive = [m.name for m in current.metrics if is_additive_metric(m.name)]
+    totals = {
+        name: _change(float(np.nansum(current.metric(name).values)), float(np.nansum(previous.metric(name).values)))
+        for name in additive
+        if previous.metric(name) is not None
+    }
+    out: dict[str, Any] = {"totals": totals}
+    primary = "sessions" if "sessions" in totals else next(iter(totals), None)
+    if primary is None:
+        return out
+    out["metric"] = primary
+    dims = current.dimension_names
+    other_dims = [d for d in dims if not _is_date_dim(d)]
+    if other_dims and all(previous.dimension(d) is not None for d in other_dims):
+        out["movers"] = _movers(current, previous, other_dims, primary, top_n)
+    date_dim = next((d for d in dims if _is_date_dim(d)), None)
+    if date_dim and previous.dimension(date_dim) is not None:
+        anomalies = _anomalies(current, previous, date_dim, primary)
+        if anomalies is not None:
+            out["anomalies"] = anomalies
+    return out
+
+
+def build_comparison(
+    current: GAFrame,
+    previous: GAFrame,
+    *,
+    current_args: dict[str, Any],
+    previous_args: dict[str, Any],
+    top_n: int = 5,
+) -> dict[str, Any]:
+    """在 compare_frames 的结果上附加本期与上期的日期范围。"""
+    return {
+        "period": {
+            "current": (current_args.get("date_ranges") or [None])[0],
+            "previous": (previous_args.get("date_ranges") or [None])[0],
+        },
+        **compare_frames(current, previous, top_n=top_n),
+    }
@@ -2,7 +2,7 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Any
 
 
@@ -17,6 +17,8 @@ class EvidencePack:
     raws: list[Any] | None
     notes: list[str]
     warnings: list[str]
+    # 环比（chart key -> totals / movers / anomalies，见 comparison.py）
+    comparisons: dict[str, Any] = field(default_factory=dict)
 
     def to_dict(self) -> dict[str, Any]:
         return {
@@ -25,6 +27,7 @@ class EvidencePack:
             "summary": self.summary,
             "charts": self.charts,
             "raws": self.raws,
+            "comparisons": self.comparisons,
             "data_quality": {"notes": self.notes, "warnings": self.warnings},
         }
 
@@ -39,13 +42,15 @@ def build_evidence_pack(
 
     约束：
     - 不做因果归因，只做“可直接从数据读出的事实”与“数据质量提示”。
-    - 当前实现先提供稳定骨架，后续再逐步丰富（例如：环比、TopN、异常点）。
+    - 环比 / Top movers / 异常点由 report 节点并发拉取上一周期数据后预先算好（tool_result.comparisons），
+      这里只做透传。
     """
 
     tool_result = tool_result or {}
     summary = tool_result.get("summary") if isinstance(tool_result, dict) else {}
     charts = tool_result.get("charts") if isinstance(tool_result, dict) else {}
     raws = tool_result.get("raws") if isinstance(tool_result, dict) else None
+    comparisons = tool_result.get("comparisons") if isinstance(tool_result, dict) else None
 
     # 估计 window_days（优先从 raws[0].args.date_ranges 推断，否则 fallback）
     window_days: int | None = default_window_days
@@ -86,5 +91,6 @@ def build_evidence_pack(
         raws=raws if isinstance(raws, list) else [],
         notes=notes,
         warnings=warnings,
+        comparisons=comparisons if isinstance(comparisons, dict) else {},
     )
 
@@ -0,0 +1,118 @@
+"""洞察 summarizer 的流式结构化输出：增量解析部分 JSON，字段一完成就推送到 report_insights 卡。
+
+summarizer 按 InsightsOutputModel 的 JSON 结构流式输出（insights.one_liner → evidence → hypotheses → actions）。
+每收到一段文本就用 parse_partial_json 解析当前前缀：
+
+- one_liner 边生成边推送（与原先单独流式生成的一句话体验一致）
+- 列表字段只推送“已完成”的条目：后面已经出现下一个条目，或已经出现更靠后的字段
+- hypotheses / actions 的条目用对应 pydantic 模型校验，校验不过的不推送（最终结果以完整 JSON 为准）
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any
+
+from langchain_core.utils.json import parse_partial_json
+from pydantic import BaseModel, ValidationError
+
+# 字段在 JSON 中的预期顺序；某字段之后的字段出现即视为该字段已完成
+FIELD_ORDER = (("insights", "one_liner"), ("insights", "evidence"), ("insights", "hypotheses"), ("actions",))
+
+
+def _json_body(text: str) -> str:
+    """去掉模型可能附带的 ```json 代码块标记。"""
+    start = text.find("{")
+    if start < 0:
+        return ""
+    body = text[start:]
+    end = body.rfind("}")
+    fence = body.rfind("```")
+    return body[: end + 1] if fence > end >= 0 else body
+
+
+def _lookup(parsed: dict[str, Any], path: tuple[str, ...]) -> Any:
+    node: Any = parsed
+    for key in path:
+        if not isinstance(node, dict) or key not in node:
+            return None
+        node = node[key]
+    return node
+
+
+class InsightsStreamParser:
+    """增量解析 summarizer 输出；feed() 在可见内容变化时返回新的 partial report。"""
+
+    def __init__(self, item_models: dict[str, type[BaseModel]] | None = None) -> None:
+        """初始化解析器；item_models 为列表字段名 -> 条目校验模型。"""
+        self.item_models = item_models or {}
+        self._text = ""
+        self._last: dict[str, Any] | None = None
+        # 已有完整字段 / 条目（首条洞察）
+        self.has_insight = False
+
+    @property
+    def text(self) -> str:
+        """目前为止累积的原始输出文本。"""
+        return self._text
+
+    def feed(self, piece: str) -> dict[str, Any] | None:
+        """追加一段输出；可见内容有变化时返回新的 partial report，否则返回 None。"""
+        self._text += piece
+        try:
+            parsed = parse_partial_json(_json_body(self._text))
+        except Exception:
+            return None
+        if not isinstance(parsed, dict):
+            return None
+        view = self._view(parsed)
+        if view == self._last:
+            return None
+        self._last = view
+        return view
+
+    def result(self) -> dict[str, Any]:
+        """完整输出（严格 JSON 解析，失败时抛出异常）。"""
+        parsed = json.loads(_json_body(self._text))
+        if not isinstance(parsed, dict):
+            raise ValueError("summarizer output is not a JSON object")
+        return parsed
+
+    def _items(self, name: str, value: Any, closed: bool) -> list[Any]:
+        items = value if isinstance(value, list) else []
+        complete = items if closed else items[:-1]
+        model = self.item_models.get(name)
+        out: list[Any] = []
+        for item in complete:
+            if model is None:
+                if isinstance(item, str) and item.strip():
+                    out.append(item)
+                continue
+            try:
+                out.append(model.model_validate(item).model_dump())
+            except ValidationError:
+                continue
+        return out
+
+    def _view(self, parsed: dict[str, Any]) -> dict[str, Any]:
+        present = [_lookup(parsed, path) is not None for path in FIELD_ORDER]
+
+        def closed(i: int) -> bool:
+            return any(present[i + 1 :])
+
+        one_liner = _lookup(parsed, FIELD_ORDER[0])
+        one_liner = one_liner if isinstance(one_liner, str) else ""
+        evidence = self._items("evidence", _lookup(parsed, FIELD_ORDER[1]), closed(1))
+        hypotheses = self._items("hypotheses", _lookup(parsed, FIELD_ORDER[2]), closed(2))
+        actions = self._items("actions", _lookup(parsed, FIELD_ORDER[3]), closed(3))
+        if (one_liner.strip() and closed(0)) or evidence or hypotheses or actions:
+            self.has_insight = True
+        return {
+            "insights": {
+                "one_liner": one_liner,
+                "evidence": evidence,
+                "hypotheses": hypotheses,
+                "_streaming": True,
+            },
+            "actions": actions,
+        }
@@ -0,0 +1,236 @@
+"""图表分析文本（narration）生成：批量模式与结果缓存。
+
+per_chart 模式下每张图表各自流式调用一次 narrate 任务模型（默认 nano，见 report 节点）；batched 模式把一份报表的
+全部图表预览放进一次结构化请求，再把每张图表的文本分发回对应的 chart_analysis 卡：
+
+- BatchNarrator: 收集本轮所有 plan item 的图表（没有图表的 item 调用 skip），全部到齐后发起一次调用
+- 批量调用失败 / 漏掉某张图表时对应的 future 返回 None，由调用方回退到逐图表流式生成
+- 调用次数、耗时与 token 用量记入 metrics（report_narration.<mode>.*），便于对比两种模式
+- NarrationCache: 相同图表（类型 / 标题 / 数据预览）在同一模型与 prompt 版本下复用已生成的文本，
+  命中后直接回放到 chart_analysis 卡；命中率与节省的 token 记入 report_narration.cache.*
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+from typing import Any
+
+from pydantic import BaseModel, Field
+
+from agent.config import (
+    REPORT_NARRATION_CACHE_BACKEND,
+    REPORT_NARRATION_CACHE_MAX_ENTRIES,
+    REPORT_NARRATION_CACHE_PATH,
+    REPORT_NARRATION_CACHE_TTL_S,
+    get_logger,
+)
+from agent.utils import metrics
+from agent.utils.cache import (
+    LazyCache,
+    TieredCache,
+    make_tiered_cache,
+)
+
+logger = get_logger(__name__)
+
+# 每张图表放进 prompt 的最大数据行数
+PREVIEW_ROWS = 10
+# narration prompt 变更时递增，使旧缓存失效
+NARRATION_PROMPT_VERSION = "1"
+
+
+class ChartNarration(BaseModel):
+    """单张图表的分析结论。"""
+
+    id: int = Field(description="Chart id as given in the input")
+    text: str = Field(description="Short English analysis conclusion for this chart")
+
+
+class ChartNarrations(BaseModel):
+    """批量 narration 的结构化输出。"""
+
+    items: list[ChartNarration] = Field(default_factory=list)
+
+
+def chart_preview(chart: dict[str, Any]) -> list[Any]:
+    """图表数据预览（只取前 PREVIEW_ROWS 行，减少 token）。"""
+    data = chart.get("data") or []
+    return data[:PREVIEW_ROWS] if isinstance(data, list) else data
+
+
+def build_batch_prompt(charts: dict[int, dict[str, Any]]) -> str:
+    """构造一次分析多张图表的 prompt。"""
+    blocks = [
+        f"### Chart {i}\n"
+        f"Title: {chart.get('title')}\n"
+        f"Type: {chart.get('chart_type')}\n"
+        f"Data Overview: {json.dumps(chart_preview(chart), ensure_ascii=False)}"
+        for i, chart in sorted(charts.items())
+    ]
+    return (
+        "You are a professional Data Analyst. For EACH chart below, write a short English analysis conclusion.\n"
+        "Focus on maximum values, trend changes, or outliers. The language should be natural and professional, "
+        "like reporting to a client. Analyze each chart independently.\n"
+        "Return exactly one item per chart, using the chart id shown in its heading.\n\n" + "\n\n".join(blocks)
+    )
+
+
+def record_usage(mode: str, message: Any) -> None:
+    """从 AIMessage(Chunk).usage_metadata 累加 token 用量（模型未返回时跳过）。"""
+    usage = getattr(message, "usage_metadata", None)
+    if not usage:
+        return
+    metrics.incr(f"report_narration.{mode}.input_tokens", usage.get("input_tokens", 0))
+    metrics.incr(f"report_narration.{mode}.output_tokens", usage.get("output_tokens", 0))
+
+
+class BatchNarrator:
+    """一份报表内的批量 narration：expected 个 item 全部 submit / skip 后发起一次结构化调用。"""
+
+    def __init__(self, expected: int, *, llm: Any | None = None) -> None:
+        """初始化批量器；expected 为本报表待处理的图表数。"""
+        self.expected = expected
+        self._llm = llm
+        self._charts: dict[int, dict[str, Any]] = {}
+        self._futures: dict[int, asyncio.Future[str | None]] = {}
+        self._done: set[int] = set()
+        self._task: asyncio.Task[None] | None = None
+
+    def submit(self, idx: int, chart: dict[str, Any]) -> asyncio.Future[str | None]:
+        """登记一张图表，返回其分析文本的 Future（失败时结果为 None）。"""
+        fut: asyncio.Future[str | None] = asyncio.get_running_loop().create_future()
+        self._charts[idx] = chart
+        self._futures[idx] = fut
+        self._mark(idx)
+        return fut
+
+    def skip(self, idx: int) -> None:
+        """标记一张图表无需分析。"""
+        self._mark(idx)
+
+    def _mark(self, idx: int) -> None:
+        self._done.add(idx)
+        if self._task is None and len(self._done) >= self.expected:
+            self._task = asyncio.create_task(self._run())
+
+    def cancel(self) -> None:
+        """取消批量调用及所有未完成的 Future。"""
+        if self._task is not None:
+            self._task.cancel()
+        for fut in self._futures.values():
+            fut.cancel()
+
+    async def _run(self) -> None:
+        texts: dict[int, str] = {}
+        pending = {i: c for i, c in self._charts.items() if not self._futures[i].done()}
+        try:
+            if pending:
+                texts = await self._narrate(pending)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"[Report][narration] 批量生成失败，回退逐图表生成: {e}")
+        finally:
+            for idx, fut in self._futures.items():
+                if not fut.done():
+                    fut.set_result(texts.get(idx))
+        missing = len(pending) - len([i for i in pending if texts.get(i)])
+        if missing:
+            metrics.incr("report_narration.batched.fallback", missing)
+
+    async def _narrate(self, charts: dict[int, dict[str, Any]]) -> dict[int, str]:
+        metrics.incr("report_narration.batched.llm_calls")
+        if self._llm is not None:
+            structured = self._llm.with_structured_output(ChartNarrations, include_raw=True)
+        else:
+            from agent.utils.model_router import get_model_router
+
+            structured = get_model_router().structured("narrate", ChartNarrations, include_raw=True)
+        out = await structured.ainvoke(build_batch_prompt(charts), config={"callbacks": []})
+        record_usage("batched", out.get("raw"))
+        parsed = out.get("parsed")
+        if not isinstance(parsed, ChartNarrations):
+            raise ValueError(f"unparseable narration output: {out.get('parsing_error')}")
+        return {item.id: item.text.strip() for item in parsed.items if item.id in charts and item.text.strip()}
+
+
+def narration_cache_key(chart: dict[str, Any], *, model: str | None = None) -> str:
+    """图表指纹：只包含 prompt 实际看到的内容（类型 / 标题 / 数据预览）+ 模型 + prompt 版本。
+
+    model 默认取 narrate 任务当前路由到的模型（MODEL_ROUTES_OVERRIDES 切换模型后旧缓存不再命中）。
+    """
+    if model is None:
+        from agent.utils.model_router import get_model_router
+
+        model = get_model_router().model_name("narrate")
+    payload = {
+        "chart_type": chart.get("chart_type"),
+        "title": chart.get("title"),
+        "preview": chart_preview(chart),
+        "model": model,
+        "prompt_version": NARRATION_PROMPT_VERSION,
+    }
+    raw = json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(",", ":"), default=str)
+    return "narration:" + hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def estimate_tokens(chart: dict[str, Any], text: str) -> int:
+    """粗略估算一次 narration 的 token 数（约 4 字符 / token，含固定的 prompt 说明）。"""
+    preview = json.dumps(chart_preview(chart), ensure_ascii=False, default=str)
+    return (400 + len(str(chart.get("title") or "")) + len(preview) + len(text)) // 4
+
+
+class NarrationCache:
+    """图表分析文本缓存（内存 LRU + 可选磁盘层）。"""
+
+    def __init__(self, backend: TieredCache, *, ttl_s: float = REPORT_NARRATION_CACHE_TTL_S) -> None:
+        """初始化缓存；ttl_s <= 0 时只读不写。"""
+        self.backend = backend
+        self.ttl_s = ttl_s
+
+    def stats(self) -> dict[str, Any]:
+        """底层缓存的命中统计。"""
+        return self.backend.stats()
+
+    async def _call(self, fn: Any, *args: Any) -> Any:
+        if self.backend.disk is None:
+            return fn(*args)
+        return await asyncio.to_thread(fn, *args)
+
+    async def lookup(self, chart: dict[str, Any]) -> str | None:
+        """查找图表的缓存分析文本；未命中时返回 None。"""
+        value = await self._call(self.backend.get, narration_cache_key(chart))
+        if not isinstance(value, dict) or not value.get("text"):
+            metrics.incr("report_narration.cache.miss")
+            return None
+        metrics.incr("report_narration.cache.hit")
+        metrics.incr("report_narration.cache.saved_tokens_est", int(value.get("tokens") or 0))
+        return str(value["text"])
+
+    async def store(self, chart: dict[str, Any], text: str) -> None:
+        """写入图表的分析文本（空文本不缓存）。"""
+        if not text.strip() or self.ttl_s <= 0:
+            return
+        value = {"text": text, "tokens": estimate_tokens(chart, text)}
+        await self._call(self.backend.set, narration_cache_key(chart), value, self.ttl_s)
+
+
+def _build_cache() -> NarrationCache | None:
+    tiered = make_tiered_cache(
+        REPORT_NARRATION_CACHE_BACKEND,
+        path=REPORT_NARRATION_CACHE_PATH,
+        table="report_narrations",
+        max_entries=REPORT_NARRATION_CACHE_MAX_ENTRIES,
+        setting="REPORT_NARRATION_CACHE_BACKEND",
+    )
+    return NarrationCache(tiered) if tiered is not None else None
+
+
+_CACHE: LazyCache[NarrationCache] = LazyCache(_build_cache)
+
+
+def get_narration_cache() -> NarrationCache | None:
+    """按 REPORT_NARRATION_CACHE_BACKEND 懒加载缓存：memory / sqlite / off。"""
+    return _CACHE.get()
@@ -0,0 +1,66 @@
+"""洞察分析计划模板：标准证据包直接按模板生成 plan，跳过 LLM planner。
+
+report 节点产出的 EvidencePack 绝大多数只包含标准槽位（summary / daily_visits / traffic_sources /
+device_stats / top_pages），此时 LLM 规划出的步骤几乎固定。这里按实际存在的槽位拼出 1-4 个步骤，
+步骤标题与 evidence_refs 对应规则注册表（rules.py）中的关键词与路径；出现非标准图表时返回 None，
+由调用方回退到 LLM planner。
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+STANDARD_CHART_SLOTS = frozenset({"daily_visits", "traffic_sources", "device_stats", "top_pages"})
+
+
+def is_standard_pack(evidence_pack: dict[str, Any]) -> bool:
+    """证据包是否只包含标准图表槽位。"""
+    charts = (evidence_pack or {}).get("charts") or {}
+    return bool(charts) and set(charts) <= STANDARD_CHART_SLOTS
+
+
+def template_plan_steps(evidence_pack: dict[str, Any]) -> list[dict[str, Any]] | None:
+    """标准证据包 -> plan steps（与 PlanStepModel 字段一致）；非标准证据包返回 None。"""
+    if not is_standard_pack(evidence_pack):
+        return None
+    charts = evidence_pack.get("charts") or {}
+    warnings = ((evidence_pack.get("data_quality") or {}).get("warnings")) or []
+
+    steps: list[dict[str, Any]] = []
+    core_refs = ["summary"] + (["data_quality"] if warnings else [])
+    if evidence_pack.get("summary") or warnings:
+        steps.append(
+            {
+                "title": "Core metrics overview",
+                "evidence_refs": core_refs,
+                "output_expectation": "Totals for sessions, users, page views and pages per session",
+            }
+        )
+    if "daily_visits" in charts:
+        # 有上一周期对比时一并引用（period_comparison 规则）
+        trend_refs = ["charts.daily_visits"] + (["comparisons"] if evidence_pack.get("comparisons") else [])
+        steps.append(
+            {
+                "title": "Daily trend, period change and anomalies",
+                "evidence_refs": trend_refs,
+                "output_expectation": "Trend summary, period-over-period delta and outlier days",
+            }
+        )
+    mix_refs = [f"charts.{k}" for k in ("traffic_sources", "device_stats") if k in charts]
+    if mix_refs:
+        steps.append(
+            {
+                "title": "Traffic source and device mix",
+                "evidence_refs": mix_refs,
+                "output_expectation": "Top channels / devices with share and concentration",
+            }
+        )
+    if "top_pages" in charts:
+        steps.append(
+            {
+                "title": "Top pages concentration",
+                "evidence_refs": ["charts.top_pages"],
+                "output_expectation": "Top pages with share of sessions and concentration",
+            }
+        )
+    return steps or None
@@ -0,0 +1,242 @@
+"""EvidencePack -> LLM prompt 文本（紧凑序列化 + token 预算 + 按内容哈希缓存）。
+
+直接 `json.dumps(evidence_pack)` 会把 raws（每次 GA 调用的全部行与参数）一并送进 prompt，
+token 数随报表规模线性增长。这里把证据包序列化为紧凑文本：
+
+- raws 默认不输出（图表 / 摘要已由 raws 计算得到）；需要时以数据集表格输出，优先级最低
+- 图表转为 CSV 风格表格（表头一次，数值取整 / 保留有限小数）
+- 按优先级（summary / data_quality / comparisons -> 标准图表 -> 其他图表 -> raws）装入 token 预算，
+  放不下的图表先截断行（折线图等距抽样，其余保留前 N 行），仍放不下则整段省略并在结尾注明
+- 同一证据包（内容哈希）+ 同一预算只序列化一次；序列化前后的 token 估算记入 metrics（report_prompt.*）
+"""
+
+from __future__ import annotations
+
+import csv
+import hashlib
+import io
+import json
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from agent.config import (
+    REPORT_PROMPT_CACHE_MAX_ENTRIES,
+    REPORT_PROMPT_TOKEN_BUDGET,
+    get_logger,
+)
+from agent.insights.reporting.columnar import decode_ga_report
+from agent.prompts.assembly import approx_tokens
+from agent.utils import metrics
+from agent.utils.cache import MemoryLRUCache
+
+logger = get_logger(__name__)
+
+# 标准图表优先，其余按 key 排序
+CHART_PRIORITY = ("daily_visits", "traffic_sources", "device_stats", "top_pages")
+# 截断时每张图表 / 每个数据集至少保留的行数（放不下则整段省略）
+MIN_TABLE_ROWS = 5
+# 数据集表格的格式说明（追加在 REPORT_INTERPRETER_PROMPT 之后）
+DATASETS_FORMAT_NOTE = (
+    "Note: datasets are given in a compact table form. Each dataset lists `request` (the call parameters), "
+    "any response metadata (e.g. row_count / totals) and `metric types`, followed by a CSV table whose header "
+    "holds the dimension columns then the metric columns (same order as dimensionHeaders / metricHeaders). "
+    "Numbers are rounded; a '... (N more rows omitted)' line means rows were trimmed for length, not missing in GA."
+)
+# 图表中只用于前端渲染的字段
+_RENDER_ONLY_KEYS = frozenset({"colors", "color", "fill"})
+_GA_TABLE_KEYS = frozenset({"rows", "dimension_headers", "metric_headers"})
+
+_memo = MemoryLRUCache(REPORT_PROMPT_CACHE_MAX_ENTRIES)
+
+
+@dataclass(frozen=True, slots=True)
+class PromptPack:
+    """序列化结果：text 为 prompt 片段；tokens_before 为原 json.dumps 的估算 token 数。"""
+
+    text: str
+    tokens_before: int
+    tokens_after: int
+    # 被截断 / 省略的段落（如 "charts.top_pages (12/50 rows)"）
+    trimmed: tuple[str, ...] = ()
+
+
+def compact_number(v: Any) -> Any:
+    """数值取整：整数值输出 int；|v| >= 1 保留 2 位小数；更小的值保留 3 位有效数字。"""
+    if isinstance(v, bool) or not isinstance(v, float):
+        return v
+    if v != v or v in (float("inf"), float("-inf")):
+        return v
+    if v.is_integer():
+        return int(v)
+    return round(v, 2) if abs(v) >= 1 else float(f"{v:.3g}")
+
+
+def _compact_json(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+def _csv_lines(columns: list[str], rows: list[dict[str, Any]]) -> tuple[str, list[str]]:
+    buf = io.StringIO()
+    writer = csv.writer(buf, lineterminator="\n")
+    writer.writerow(columns)
+    for row in rows:
+        writer.writerow([compact_number(row.get(c, "")) for c in columns])
+    header, *lines = buf.getvalue().splitlines()
+    return header, lines
+
+
+@dataclass(slots=True)
+class _Section:
+    name: str
+    head: list[str]
+    rows: list[str]
+    sample_evenly: bool = False
+
+    def render(self, rows: list[str]) -> str:
+        return "\n".join([*self.head, *rows])
+
+
+def _chart_columns(chart: dict[str, Any], data: list[dict[str, Any]]) -> list[str]:
+    preferred = [chart.get("x_key"), *(chart.get("y_keys") or [chart.get("y_key")])]
+    if chart.get("chart_type") == "pie":
+        preferred = [chart.get("label_key") or "name", chart.get("value_key") or "value"]
+    columns = [c for c in preferred if isinstance(c, str)]
+    for row in data:
+        columns.extend(k for k in row if k not in columns and k not in _RENDER_ONLY_KEYS)
+    return columns
+
+
+def _chart_section(key: str, chart: Any) -> _Section:
+    name = f"charts.{key}"
+    if not isinstance(chart, dict):
+        return _Section(name, [f"## {name}", _compact_json(chart)], [])
+    data = [r for r in (chart.get("data") or []) if isinstance(r, dict)]
+    meta = f"## {name} ({chart.get('chart_type')}; {len(data)} rows)"
+    if chart.get("title"):
+        meta += f" title={chart.get('title')}"
+    header, lines = _csv_lines(_chart_columns(chart, data), data)
+    return _Section(name, [meta, header], lines, sample_evenly=chart.get("chart_type") == "line")
+
+
+def _dataset_section(i: int, raw: Any) -> _Section:
+    """raws[i]（tool / args / result）-> 数据集表格；result 非 GA report 结构时输出紧凑 JSON。"""
+    name = f"raws[{i}]"
+    raw = raw if isinstance(raw, dict) else {"result": raw}
+    head = [f"## Dataset {i + 1}: {raw.get('tool') or 'unknown'}", f"request: {_compact_json(raw.get('args'))}"]
+    result = raw.get("result")
+    if not isinstance(result, dict) or not isinstance(result.get("rows"), list):
+        return _Section(name, [*head, f"response: {_compact_json(result)}"], [])
+    for k, v in result.items():
+        if k not in _GA_TABLE_KEYS:
+            head.append(f"{k}: {_compact_json(v)}")
+    frame = decode_ga_report(result)
+    types = {h.get("name"): h.get("type") for h in (result.get("metric_headers") or []) if isinstance(h, dict)}
+    head.append("metric types: " + _compact_json({m: types.get(m) for m in frame.metric_names}))
+    header, lines = _csv_lines(frame.dimension_names + frame.metric_names, frame.records())
+    return _Section(name, [*head, header], lines)
+
+
+def _fit_rows(section: _Section, budget: int) -> list[str] | None:
+    """在 budget 内能放下的行；连 MIN_TABLE_ROWS 行都放不下时返回 None。"""
+    rows = section.rows
+    if approx_tokens(section.render(rows)) <= budget:
+        return rows
+    per_row = max(1, approx_tokens("\n".join(rows)) // max(1, len(rows)))
+    n = min(len(rows) - 1, (budget - approx_tokens(section.render([])) - 10) // per_row)
+    while n >= min(MIN_TABLE_ROWS, len(rows)) and n > 0:
+        if section.sample_evenly:
+            step = len(rows) / n
+            picked = [rows[int(j * step)] for j in range(n - 1)] + [rows[-1]]
+        else:
+            picked = rows[:n]
+        kept = [*picked, f"... ({len(rows) - n} more rows omitted)"]
+        if approx_tokens(section.render(kept)) <= budget:
+            return kept
+        n -= max(1, n // 10)
+    return None
+
+
+def _pack(sections: list[_Section], budget: int) -> tuple[str, tuple[str, ...]]:
+    parts: list[str] = []
+    trimmed: list[str] = []
+    # 预留结尾 "trimmed for token budget" 说明行
+    used = 30
+    for section in sections:
+        remaining = budget - used
+        rows = _fit_rows(section, remaining) if section.rows else None
+        if rows is None:
+            text = section.render([])
+            if section.rows or approx_tokens(text) > remaining:
+                trimmed.append(f"{section.name} (omitted)")
+                continue
+        else:
+            text = section.render(rows)
+            if len(rows) != len(section.rows):
+                trimmed.append(f"{section.name} ({len(rows) - 1}/{len(section.rows)} rows)")
+        parts.append(text)
+        used += approx_tokens(text) + 1
+    if trimmed:
+        parts.append("## trimmed for token budget: " + ", ".join(trimmed))
+    return "\n".join(parts), tuple(trimmed)
+
+
+def _memoized(
+    kind: str, payload: Any, budget: int, build: Callable[[], list[_Section]], variant: str = ""
+) -> PromptPack:
+    # 原 prompt 的序列化方式即 json.dumps(payload)，同一次 dumps 兼作缓存键与 tokens_before
+    raw = json.dumps(payload, ensure_ascii=False, sort_keys=True, default=str)
+    key = f"{kind}:{variant}:{budget}:" + hashlib.sha256(raw.encode("utf-8")).hexdigest()
+    cached = _memo.get(key)
+    if isinstance(cached, PromptPack):
+        metrics.incr("report_prompt.cache.hit")
+        return cached
+    metrics.incr("report_prompt.cache.miss")
+    text, trimmed = _pack(build(), budget)
+    result = PromptPack(text=text, tokens_before=approx_tokens(raw), tokens_after=approx_tokens(text), trimmed=trimmed)
+    _memo.set(key, result, float("inf"))
+    metrics.observe(f"report_prompt.{kind}.tokens_before", result.tokens_before)
+    metrics.observe(f"report_prompt.{kind}.tokens_after", result.tokens_after)
+    logger.info(
+        f"[ReportPrompt][{kind}] tokens {result.tokens_before} -> {result.tokens_after}"
+        + (f", trimmed: {', '.join(trimmed)}" if trimmed else "")
+    )
+    return result
+
+
+def serialize_evidence_pack(
+    evidence_pack: dict[str, Any],
+    *,
+    budget_tokens: int | None = None,
+    include_raws: bool = False,
+) -> PromptPack:
+    """证据包 -> 紧凑 prompt 文本（summary / data_quality / 图表表格，raws 默认省略）。"""
+    pack = evidence_pack or {}
+    budget = REPORT_PROMPT_TOKEN_BUDGET if budget_tokens is None else budget_tokens
+
+    def build() -> list[_Section]:
+        meta = {k: pack.get(k) for k in ("property_id", "window_days") if pack.get(k) is not None}
+        summary = {k: compact_number(v) for k, v in (pack.get("summary") or {}).items()}
+        sections = [
+            _Section("summary", [f"## summary {_compact_json({**meta, **summary})}"], []),
+            _Section("data_quality", [f"## data_quality {_compact_json(pack.get('data_quality') or {})}"], []),
+        ]
+        if pack.get("comparisons"):
+            sections.append(
+                _Section("comparisons", [f"## comparisons (vs previous period) {_compact_json(pack['comparisons'])}"], [])
+            )
+        charts = pack.get("charts") or {}
+        order = [k for k in CHART_PRIORITY if k in charts] + sorted(k for k in charts if k not in CHART_PRIORITY)
+        sections.extend(_chart_section(k, charts[k]) for k in order)
+        if include_raws:
+            sections.extend(_dataset_section(i, r) for i, r in enumerate(pack.get("raws") or []))
+        return sections
+
+    return _memoized("evidence_pack", pack, budget, build, variant="raws" if include_raws else "")
+
+
+def serialize_datasets(raws: list[Any], *, budget_tokens: int | None = None) -> PromptPack:
+    """raws（result 已解析出 Blob 引用）-> 紧凑数据集表格，供 REPORT_INTERPRETER_PROMPT 使用。"""
+    budget = REPORT_PROMPT_TOKEN_BUDGET if budget_tokens is None else budget_tokens
+    return _memoized(
+        "datasets", raws or [], budget, lambda: [_dataset_section(i, r) for i, r in enumerate(raws or [])]
+    )
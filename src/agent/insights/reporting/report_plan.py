@@ -0,0 +1,126 @@
+"""报表规划（GA 调用计划）：结构化输出 + 计划缓存。
+
+report 节点先让模型根据 MCP 工具目录规划 `{"plan": [{"tool", "args", "desc"}]}`，再批量执行：
+
+- 规划模型为模型路由的 plan.report 任务（默认 Gemini Flash，进程内复用一个客户端），
+  以原生 JSON schema 结构化输出 ReportPlanModel，不再手工拼接 / json.loads 文本块
+- 结构化输出失败时回退一次普通调用，宽松解析文本中的 JSON（去掉代码块标记）
+- 成功的计划按（规范化问题 + 工具目录哈希 + property + 日期）缓存，重复的报表问题直接跳过规划；
+  命中率与规划耗时记入 metrics（report_plan.*）
+"""
+
+from __future__ import annotations
+
+import copy
+import hashlib
+import json
+import time
+from datetime import date
+from typing import Any
+
+from pydantic import BaseModel, Field
+
+from agent.config import (
+    REPORT_PLAN_CACHE_MAX_ENTRIES,
+    REPORT_PLAN_CACHE_TTL_S,
+    get_logger,
+)
+from agent.intent.rules import normalize_intent_text
+from agent.utils import metrics
+from agent.utils.cache import MemoryLRUCache
+from agent.utils.model_router import get_model_router
+
+logger = get_logger(__name__)
+
+PLAN_TASK = "plan.report"
+
+
+class ReportPlanItem(BaseModel):
+    """单个工具调用步骤。"""
+
+    tool: str = Field(..., description="MCP tool name, e.g. run_report")
+    args: dict[str, Any] = Field(default_factory=dict, description="Tool arguments (snake_case request fields)")
+    desc: str = Field("", description="Short description of what this call fetches")
+
+
+class ReportPlanModel(BaseModel):
+    """报表规划的结构化输出。"""
+
+    plan: list[ReportPlanItem] = Field(default_factory=list)
+
+
+def tool_catalog_hash(tool_specs: list[Any]) -> str:
+    """工具名 + 描述 + input_schema 的摘要（与 MCP 目录版本同口径）。"""
+    payload = [
+        [getattr(s, "name", ""), getattr(s, "description", "") or "", getattr(s, "input_schema", None) or {}]
+        for s in sorted(tool_specs, key=lambda s: getattr(s, "name", ""))
+    ]
+    raw = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def plan_cache_key(user_text: str, catalog_hash: str, property_id: Any, *, today: date | None = None) -> str:
+    """报表计划缓存键：归一化问题 + 工具目录摘要 + property + 当天日期。"""
+    # 计划里可能含由“本月 / 上周”推算出的绝对日期，按天隔离
+    raw = json.dumps(
+        [normalize_intent_text(user_text), catalog_hash, str(property_id or ""), (today or date.today()).isoformat()],
+        ensure_ascii=False,
+    )
+    return "report_plan:" + hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def parse_plan_text(content: Any) -> list[dict[str, Any]] | None:
+    """普通调用的输出（str 或 content blocks）-> plan 列表；无法解析返回 None。"""
+    if isinstance(content, list):
+        content = "".join(
+            item.get("text", "") for item in content if isinstance(item, dict) and item.get("type") == "text"
+        )
+    text = str(content or "")
+    start, end = text.find("{"), text.rfind("}")
+    if start < 0 or end < start:
+        return None
+    try:
+        parsed = ReportPlanModel.model_validate_json(text[start : end + 1])
+    except ValueError:
+        return None
+    return [item.model_dump() for item in parsed.plan] or None
+
+
+_PLAN_CACHE = MemoryLRUCache(REPORT_PLAN_CACHE_MAX_ENTRIES)
+_PLANNER = None
+
+
+def get_report_planner() -> Any:
+    """规划模型（plan.report 任务的结构化输出），惰性初始化。"""
+    global _PLANNER
+    if _PLANNER is None:
+        _PLANNER = get_model_router().structured(PLAN_TASK, ReportPlanModel)
+    return _PLANNER
+
+
+async def _plan_with_model(planning_prompt: str) -> tuple[list[dict[str, Any]] | None, str]:
+    try:
+        out: ReportPlanModel = await get_report_planner().ainvoke(planning_prompt, config={"callbacks": []})
+        return [item.model_dump() for item in out.plan] or None, "structured"
+    except ValueError as e:
+        logger.warning(f"[Report][plan] 结构化输出无效，回退文本解析: {e}")
+    metrics.incr("report_plan.text_fallback")
+    resp = await get_model_router().ainvoke(PLAN_TASK, planning_prompt, config={"callbacks": []})
+    return parse_plan_text(getattr(resp, "content", resp)), "text"
+
+
+async def generate_report_plan(planning_prompt: str, *, cache_key: str | None = None) -> list[dict[str, Any]] | None:
+    """生成 GA 调用计划（命中缓存时不调用模型）；失败或空计划返回 None。"""
+    use_cache = bool(cache_key) and REPORT_PLAN_CACHE_TTL_S > 0
+    if use_cache:
+        cached = _PLAN_CACHE.get(cache_key)
+        if cached is not None:
+            metrics.incr("report_plan.cache.hit")
+            return copy.deepcopy(cached)
+        metrics.incr("report_plan.cache.miss")
+    started = time.perf_counter()
+    items, source = await _plan_with_model(planning_prompt)
+    metrics.observe(f"report_plan.ms.{source}", (time.perf_counter() - started) * 1000)
+    if items and use_cache:
+        _PLAN_CACHE.set(cache_key, copy.deepcopy(items), REPORT_PLAN_CACHE_TTL_S)
+    return items
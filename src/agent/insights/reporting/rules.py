@@ -0,0 +1,519 @@
+"""洞察分析规则注册表：plan step → 确定性规则。
+
+execute_plan 原先对每个 step 逐条做子串匹配并反复拼接 evidence_refs；这里改为：
+
+- AnalysisRule: 一条确定性规则（纯函数，只读 EvidencePack），声明自己关注的 evidence 路径与关键词
+- RuleRegistry: 按路径 / 关键词建索引，step 的标题分词与 refs 规范化各做一次后查表分发
+- RuleContext: 图表数据按需转成 numpy 数组并缓存，同一份数据被多条规则复用
+- 同一规则在同一组图表上只执行一次；执行失败的规则只记日志，不把异常文本当作事实交给 summarizer
+
+内置规则：核心指标、设备 / 渠道分布、首尾趋势、数据质量（沿用原有逻辑），以及
+周期环比（前后半段）、Top movers（日环比最大变动）、异常点（z-score）、集中度（Top1/Top3 占比与 HHI），
+以及上一周期对比（直接读取 report 节点预先算好的 comparisons）。
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterable
+
+import numpy as np
+
+from agent.config import get_logger
+from agent.insights.reporting.shaping import OTHER_LABEL
+
+logger = get_logger(__name__)
+
+# z-score 超过该值视为异常点
+ANOMALY_Z = 2.5
+# 集中度规则在未指定图表时最多分析的分类图表数
+MAX_CONCENTRATION_CHARTS = 3
+
+_TREND_CHART = "charts.daily_visits"
+_WORD_RE = re.compile(r"[a-z0-9_]+")
+
+
+@dataclass(frozen=True, slots=True)
+class RuleResult:
+    """单条规则的输出：分析文本行 + 主要证据路径。"""
+
+    lines: list[str]
+    evidence_ref: str | None
+
+
+@dataclass(frozen=True, slots=True)
+class AnalysisRule:
+    """一条确定性规则；fn(ctx, refs) 中 refs 为 step 引用且本规则关注的 evidence 路径。"""
+
+    name: str
+    fn: Callable[[RuleContext, tuple[str, ...]], RuleResult | None]
+    paths: tuple[str, ...] = ()
+    keywords: tuple[str, ...] = ()
+    # 路径前缀匹配（如 "charts." 匹配任意图表）
+    path_prefixes: tuple[str, ...] = ()
+
+
+def _fmt_int(v: Any) -> str:
+    try:
+        return f"{int(v):,}"
+    except Exception:
+        return str(v)
+
+
+def _fmt_pct(v: float) -> str:
+    try:
+        return f"{v*100:.1f}%"
+    except Exception:
+        return str(v)
+
+
+def _fmt_num(v: float) -> str:
+    return _fmt_int(v) if float(v).is_integer() else f"{v:,.2f}"
+
+
+@dataclass
+class RuleContext:
+    """EvidencePack 的只读视图；图表列按需向量化并缓存。"""
+
+    summary: dict[str, Any]
+    charts: dict[str, Any]
+    data_quality: dict[str, Any]
+    comparisons: dict[str, Any] = field(default_factory=dict)
+    _columns: dict[tuple[str, str], np.ndarray] = field(default_factory=dict)
+    _labels: dict[tuple[str, str], list[Any]] = field(default_factory=dict)
+
+    @classmethod
+    def from_evidence(cls, evidence_pack: dict[str, Any]) -> RuleContext:
+        """从 EvidencePack dict 构造（缺失字段按空处理）。"""
+        pack = evidence_pack or {}
+        return cls(
+            summary=pack.get("summary") or {},
+            charts=pack.get("charts") or {},
+            data_quality=pack.get("data_quality") or {},
+            comparisons=pack.get("comparisons") or {},
+        )
+
+    def chart(self, path: str) -> dict[str, Any]:
+        """"charts.<key>" 对应的图表（不存在时为空 dict）。"""
+        chart = self.charts.get(path.split(".", 1)[-1]) if path.startswith("charts.") else None
+        return chart if isinstance(chart, dict) else {}
+
+    def chart_paths(self) -> list[str]:
+        """全部图表的 evidence 路径。"""
+        return [f"charts.{k}" for k, v in self.charts.items() if isinstance(v, dict)]
+
+    def rows(self, path: str) -> list[dict[str, Any]]:
+        """图表的数据行（忽略非 dict 行）。"""
+        data = self.chart(path).get("data") or []
+        return [r for r in data if isinstance(r, dict)] if isinstance(data, list) else []
+
+    def column(self, path: str, key: str) -> np.ndarray:
+        """数值列（无法转换的值为 NaN）。"""
+        cached = self._columns.get((path, key))
+        if cached is None:
+            rows = self.rows(path)
+            cached = np.fromiter((_as_float(r.get(key)) for r in rows), dtype=np.float64, count=len(rows))
+            self._columns[(path, key)] = cached
+        return cached
+
+    def labels(self, path: str, key: str) -> list[Any]:
+        """标签列（原值）。"""
+        cached = self._labels.get((path, key))
+        if cached is None:
+            cached = self._labels[(path, key)] = [r.get(key) for r in self.rows(path)]
+        return cached
+
+    def category_keys(self, path: str) -> tuple[str, str] | None:
+        """分类图表的 (label_key, value_key)：饼图为 name/value，柱状图为 x_key/y_key。"""
+        chart = self.chart(path)
+        kind = chart.get("chart_type")
+        if kind == "pie":
+            return str(chart.get("label_key") or "name"), str(chart.get("value_key") or "value")
+        if kind == "bar" and chart.get("x_key") and chart.get("y_key"):
+            return str(chart["x_key"]), str(chart["y_key"])
+        return None
+
+    def trend_keys(self, path: str = _TREND_CHART) -> tuple[str, str] | None:
+        """趋势图的 (x_key, 首个 y_key)。"""
+        chart = self.chart(path)
+        y_keys = chart.get("y_keys") or []
+        if not y_keys:
+            return None
+        return str(chart.get("x_key") or "date"), str(y_keys[0])
+
+
+def _as_float(v: Any) -> float:
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return float("nan")
+
+
+class RuleRegistry:
+    """规则注册表：路径 / 关键词 → 规则（按注册顺序输出）。"""
+
+    def __init__(self) -> None:
+        """创建空注册表。"""
+        self.rules: list[AnalysisRule] = []
+        self._order: dict[str, int] = {}
+        self._by_path: dict[str, list[AnalysisRule]] = {}
+        self._by_keyword: dict[str, list[AnalysisRule]] = {}
+        self._by_prefix: list[tuple[str, AnalysisRule]] = []
+
+    def register(self, rule: AnalysisRule) -> AnalysisRule:
+        """登记规则并建立路径 / 关键词 / 前缀索引；规则名重复时抛 ValueError。"""
+        if rule.name in self._order:
+            raise ValueError(f"duplicate analysis rule: {rule.name}")
+        self._order[rule.name] = len(self.rules)
+        self.rules.append(rule)
+        for path in rule.paths:
+            self._by_path.setdefault(path, []).append(rule)
+        for kw in rule.keywords:
+            self._by_keyword.setdefault(kw, []).append(rule)
+        for prefix in rule.path_prefixes:
+            self._by_prefix.append((prefix, rule))
+        return rule
+
+    @staticmethod
+    def normalize_ref(ref: str) -> str:
+        """"charts.device_stats.data[0]" -> "charts.device_stats"；"summary.total_visits" -> "summary"。"""
+        parts = re.split(r"[.\[]", str(ref).strip().lower())
+        if parts and parts[0] == "charts" and len(parts) > 1:
+            return f"charts.{parts[1]}"
+        return parts[0] if parts else ""
+
+    @staticmethod
+    def tokens(title: str) -> set[str]:
+        """标题分词（小写，附带去掉末尾 s 的形式）。"""
+        words = _WORD_RE.findall(title.lower())
+        # 简单复数归一：metrics -> metric, sources -> source
+        return {w for word in words for w in (word, word[:-1] if word.endswith("s") else word)}
+
+    def match(self, title: str, evidence_refs: Iterable[str]) -> list[tuple[AnalysisRule, tuple[str, ...]]]:
+        """返回 [(rule, 该规则关注的 refs)]，按注册顺序。"""
+        refs = [self.normalize_ref(r) for r in evidence_refs if r]
+        hits: dict[str, list[str]] = {}
+        for ref in refs:
+            for rule in self._by_path.get(ref, ()):
+                hits.setdefault(rule.name, []).append(ref)
+            for prefix, rule in self._by_prefix:
+                if ref.startswith(prefix):
+                    hits.setdefault(rule.name, []).append(ref)
+        for token in self.tokens(title):
+            for rule in self._by_keyword.get(token, ()):
+                hits.setdefault(rule.name, [])
+        ordered = sorted(hits, key=self._order.__getitem__)
+        return [(self.rules[self._order[name]], tuple(dict.fromkeys(hits[name]))) for name in ordered]
+
+
+# ============ 内置规则 ============
+
+
+def _core_metrics(ctx: RuleContext, refs: tuple[str, ...]) -> RuleResult | None:
+    s = ctx.summary
+    lines = []
+    if s.get("total_visits") is not None:
+        lines.append(f"Total sessions: {_fmt_int(s['total_visits'])}")
+    if s.get("total_unique_visitors") is not None:
+        lines.append(f"Active users: {_fmt_int(s['total_unique_visitors'])}")
+    if s.get("total_page_views") is not None:
+        lines.append(f"Page views: {_fmt_int(s['total_page_views'])}")
+    if s.get("pages_per_session") is not None:
+        lines.append(f"Pages per session: {s['pages_per_session']}")
+    return RuleResult(lines, "summary")
+
+
+def _distribution(path: str, label: str) -> Callable[[RuleContext, tuple[str, ...]], RuleResult | None]:
+    def run(ctx: RuleContext, refs: tuple[str, ...]) -> RuleResult | None:
+        lines = []
+        keys = ctx.category_keys(path)
+        if keys is not None:
+            values = np.nan_to_num(ctx.column(path, keys[1]))
+            total = values.sum()
+            if total > 0:
+                names = ctx.labels(path, keys[0])
+                top = np.argsort(-values, kind="stable")[:5]
+                parts = [
+                    f"{names[i] or '—'} {_fmt_int(values[i])} ({_fmt_pct(values[i] / total)})" for i in top.tolist()
+                ]
+                lines.append(f"{label} total: {_fmt_int(total)}; Top: " + ", ".join(parts))
+        return RuleResult(lines, path)
+
+    return run
+
+
+def _trend(ctx: RuleContext, refs: tuple[str, ...]) -> RuleResult | None:
+    lines = []
+    keys = ctx.trend_keys()
+    rows = ctx.rows(_TREND_CHART)
+    if keys is not None and rows:
+        x_key, y_key = keys
+        y = ctx.column(_TREND_CHART, y_key)
+        if not np.isnan(y[0]) and not np.isnan(y[-1]):
+            delta = y[-1] - y[0]
+            lines.append(
+                f"{y_key} from {rows[0].get(x_key)} at {int(y[0])} changed to "
+                f"{rows[-1].get(x_key)} at {int(y[-1])} (Δ {int(delta):+d})"
+            )
+    return RuleResult(lines, _TREND_CHART)
+
+
+def _data_quality(ctx: RuleContext, refs: tuple[str, ...]) -> RuleResult | None:
+    lines = []
+    warns = ctx.data_quality.get("warnings") or []
+    notes = ctx.data_quality.get("notes") or []
+    if warns:
+        lines.append("Warnings: " + "; ".join(str(w) for w in warns[:3]))
+    if notes:
+        lines.append("Notes: " + "; ".join(str(n) for n in notes[:3]))
+    return RuleResult(lines, "data_quality")
+
+
+def _period_delta(ctx: RuleContext, refs: tuple[str, ...]) -> RuleResult | None:
+    """把日趋势分成前后两个等长周期，比较各指标合计。"""
+    chart = ctx.chart(_TREND_CHART)
+    n = len(ctx.rows(_TREND_CHART))
+    if n < 4:
+        return None
+    half = n // 2
+    lines = []
+    for y_key in chart.get("y_keys") or []:
+        y = ctx.column(_TREND_CHART, str(y_key))
+        prev, cur = np.nansum(y[n - 2 * half : n - half]), np.nansum(y[n - half :])
+        change = f"{_fmt_pct((cur - prev) / prev)}" if prev else "n/a"
+        lines.append(
+            f"{y_key}: last {half} days {_fmt_num(cur)} vs previous {half} days {_fmt_num(prev)} "
+            f"(Δ {_fmt_num(cur - prev)}, {change})"
+        )
+    return RuleResult(lines, _TREND_CHART) if lines else None
+
+
+def _top_movers(ctx: RuleContext, refs: tuple[str, ...]) -> RuleResult | None:
+    """日环比变动最大的日期（涨 / 跌各取前 3）。"""
+    keys = ctx.trend_keys()
+    if keys is None or len(ctx.rows(_TREND_CHART)) < 3:
+        return None
+    x_key, y_key = keys
+    y = ctx.column(_TREND_CHART, y_key)
+    diff = np.diff(y)
+    valid = ~np.isnan(diff)
+    if not valid.any():
+        return None
+    labels = ctx.labels(_TREND_CHART, x_key)
+    order = np.argsort(np.where(valid, diff, 0.0), kind="stable")
+    ups = [i for i in order[::-1][:3].tolist() if diff[i] > 0]
+    downs = [i for i in order[:3].tolist() if diff[i] < 0]
+    lines = []
+    if ups:
+        lines.append(f"Largest {y_key} increases: " + ", ".join(f"{labels[i + 1]} (+{_fmt_num(diff[i])})" for i in ups))
+    if downs:
+        lines.append(f"Largest {y_key} drops: " + ", ".join(f"{labels[i + 1]} ({_fmt_num(diff[i])})" for i in downs))
+    return RuleResult(lines, _TREND_CHART) if lines else None
+
+
+def _anomalies(ctx: RuleContext, refs: tuple[str, ...]) -> RuleResult | None:
+    """z-score 超过 ANOMALY_Z 的点。"""
+    keys = ctx.trend_keys()
+    if keys is None or len(ctx.rows(_TREND_CHART)) < 7:
+        return None
+    x_key, y_key = keys
+    y = ctx.column(_TREND_CHART, y_key)
+    mean, std = np.nanmean(y), np.nanstd(y)
+    if not std or np.isnan(std):
+        return RuleResult([f"No {y_key} anomalies (flat series)"], _TREND_CHART)
+    z = (y - mean) / std
+    idx = np.flatnonzero(np.abs(np.nan_to_num(z)) >= ANOMALY_Z)
+    if idx.size == 0:
+        return RuleResult([f"No {y_key} anomalies (|z| < {ANOMALY_Z}, mean {_fmt_num(round(mean, 2))})"], _TREND_CHART)
+    labels = ctx.labels(_TREND_CHART, x_key)
+    top = idx[np.argsort(-np.abs(z[idx]), kind="stable")][:5]
+    parts = [f"{labels[i]} {_fmt_num(y[i])} (z {z[i]:+.1f})" for i in top.tolist()]
+    return RuleResult([f"{y_key} anomalies vs mean {_fmt_num(round(mean, 2))}: " + ", ".join(parts)], _TREND_CHART)
+
+
+def _fmt_change(change: dict[str, Any]) -> str:
+    delta = float(change.get("delta") or 0)
+    pct = change.get("delta_pct")
+    rel = f"{'+' if pct >= 0 else ''}{_fmt_pct(pct)}" if pct is not None else "new"
+    return f"{'+' if delta >= 0 else ''}{_fmt_num(delta)}, {rel}"
+
+
+def _period_comparison(ctx: RuleContext, refs: tuple[str, ...]) -> RuleResult | None:
+    """上一周期对比：合计变化、各图表 Top movers 与以上一周期为基线的异常点（report 节点预先算好）。"""
+    comps = {k: v for k, v in ctx.comparisons.items() if isinstance(v, dict)}
+    if not comps:
+        return None
+    lines = []
+    # 各图表的合计口径相同，只取一份（优先日趋势）
+    first = comps.get(_TREND_CHART.split(".", 1)[1]) or next(iter(comps.values()))
+    for metric, change in (first.get("totals") or {}).items():
+        lines.append(
+            f"{metric}: {_fmt_num(change['current'])} vs previous period {_fmt_num(change['previous'])} "
+            f"({_fmt_change(change)})"
+        )
+    for key, comp in comps.items():
+        metric = comp.get("metric")
+        movers = comp.get("movers") or []
+        if movers:
+            parts = [f"{m['key'] or '—'} ({_fmt_change(m)})" for m in movers]
+            lines.append(f"{key} top {metric} movers vs previous period: " + ", ".join(parts))
+        anomalies = comp.get("anomalies") or {}
+        flags = anomalies.get("flags") or []
+        if flags:
+            parts = [f"{f['key']} {_fmt_num(f['value'])} (z {f['z']:+.1f})" for f in flags]
+            baseline = str(anomalies.get("baseline", "")).replace("_", " ")
+            lines.append(
+                f"{key} {metric} anomalies vs {baseline} baseline "
+                f"(mean {_fmt_num(anomalies.get('baseline_mean', 0))}): " + ", ".join(parts)
+            )
+    return RuleResult(lines, "comparisons") if lines else None
+
+
+def _concentration(ctx: RuleContext, refs: tuple[str, ...]) -> RuleResult | None:
+    """Top1 / Top3 占比与 HHI（"Other" 计入总量但不参与排名）；step 未引用图表时分析前几张分类图表。"""
+    candidates = refs or tuple(ctx.chart_paths())
+    paths = [p for p in candidates if ctx.category_keys(p)][:MAX_CONCENTRATION_CHARTS]
+    lines = []
+    for path in paths:
+        label_key, value_key = ctx.category_keys(path)  # type: ignore[misc]
+        values = np.clip(np.nan_to_num(ctx.column(path, value_key)), 0, None)
+        total = values.sum()
+        if total <= 0:
+            continue
+        names = ctx.labels(path, label_key)
+        ranked = np.array([i for i in np.argsort(-values, kind="stable").tolist() if names[i] != OTHER_LABEL], dtype=np.intp)
+        if ranked.size == 0:
+            continue
+        shares = values / total
+        top1, top3 = shares[ranked[0]], shares[ranked[:3]].sum()
+        hhi = float(np.square(shares[ranked]).sum())
+        level = "high" if hhi >= 0.25 else "moderate" if hhi >= 0.15 else "low"
+        lines.append(
+            f"{path.split('.', 1)[1]}: top item {names[ranked[0]]} holds {_fmt_pct(top1)}, "
+            f"top 3 hold {_fmt_pct(top3)}; HHI {hhi:.2f} ({level} concentration)"
+        )
+    return RuleResult(lines, paths[0] if paths else None) if lines else None
+
+
+def default_registry() -> RuleRegistry:
+    """内置规则的注册表。"""
+    registry = RuleRegistry()
+    registry.register(AnalysisRule("core_metrics", _core_metrics, paths=("summary",), keywords=("core", "metric", "kpi")))
+    registry.register(
+        AnalysisRule(
+            "device_distribution",
+            _distribution("charts.device_stats", "Device"),
+            paths=("charts.device_stats",),
+            keywords=("device",),
+        )
+    )
+    registry.register(
+        AnalysisRule(
+            "traffic_sources",
+            _distribution("charts.traffic_sources", "Traffic"),
+            paths=("charts.traffic_sources",),
+            keywords=("source", "channel", "traffic"),
+        )
+    )
+    registry.register(AnalysisRule("trend", _trend, paths=(_TREND_CHART,), keywords=("trend",)))
+    registry.register(
+        AnalysisRule(
+            "period_delta",
+            _period_delta,
+            paths=(_TREND_CHART,),
+            keywords=("period", "delta", "change", "growth", "compare", "comparison", "wow", "mom"),
+        )
+    )
+    registry.register(
+        AnalysisRule(
+            "period_comparison",
+            _period_comparison,
+            paths=("comparisons",),
+            keywords=("previous", "prior", "period", "comparison", "compare", "mover", "wow", "mom", "yoy"),
+        )
+    )
+    registry.register(AnalysisRule("top_movers", _top_movers, keywords=("mover", "jump", "drop", "swing")))
+    registry.register(
+        AnalysisRule(
+            "anomalies",
+            _anomalies,
+            paths=(_TREND_CHART,),
+            keywords=("anomaly", "anomalies", "outlier", "unusual", "spike"),
+        )
+    )
+    registry.register(
+        AnalysisRule(
+            "concentration",
+            _concentration,
+            path_prefixes=("charts.",),
+            keywords=("concentration", "share", "distribution", "dependence", "dependency", "top"),
+        )
+    )
+    registry.register(
+        AnalysisRule("data_quality", _data_quality, paths=("data_quality",), keywords=("quality",))
+    )
+    return registry
+
+
+REGISTRY = default_registry()
+
+
+# ============ 执行 ============
+
+
+def _step_output(step: Any, results: list[RuleResult | None]) -> dict[str, Any] | None:
+    """汇总一个 step 的规则结果；匹配到的规则全部执行失败时返回 None（该 step 不输出）。"""
+    if results and all(result is None for result in results):
+        return None
+    lines: list[str] = []
+    evidence_ref: str | None = None
+    for result in results:
+        if result is None:
+            continue
+        lines.extend(result.lines)
+        # 与旧实现一致：多条规则命中时以最后一条的引用为准
+        if result.evidence_ref:
+            evidence_ref = result.evidence_ref
+    if not lines:
+        # 没有规则产出：保留可追溯的最小输出
+        lines.append(f"(No deterministic rule implemented for: {step.output_expectation})")
+        evidence_ref = step.evidence_refs[0] if step.evidence_refs else None
+    return {"step": step.title, "result": "\n".join(lines), "evidence_ref": evidence_ref}
+
+
+def _dispatch(
+    registry: RuleRegistry, steps: list[Any]
+) -> tuple[list[list[tuple[str, tuple[str, ...]]]], dict[tuple[str, tuple[str, ...]], AnalysisRule]]:
+    """每个 step 的 (规则名, refs) 调用键；相同调用键在所有 step 间只执行一次。"""
+    per_step: list[list[tuple[str, tuple[str, ...]]]] = []
+    calls: dict[tuple[str, tuple[str, ...]], AnalysisRule] = {}
+    for step in steps:
+        keys = []
+        for rule, refs in registry.match(step.title, step.evidence_refs):
+            key = (rule.name, refs)
+            calls.setdefault(key, rule)
+            keys.append(key)
+        per_step.append(keys)
+    return per_step, calls
+
+
+def _safe_run(rule: AnalysisRule, ctx: RuleContext, refs: tuple[str, ...]) -> RuleResult | None:
+    try:
+        return rule.fn(ctx, refs)
+    except Exception as e:
+        # 单条规则失败不影响其余步骤；异常文本不能进入 step_outputs（summarizer 会把它当作事实）
+        logger.exception(f"[Insights][rules] 规则执行失败 rule={rule.name} refs={refs}: {e}")
+        return None
+
+
+def run_plan(evidence_pack: dict[str, Any], steps: list[Any], registry: RuleRegistry = REGISTRY) -> list[dict[str, Any]]:
+    """按 plan 顺序执行各 step 匹配到的规则（同一规则 + 路径只执行一次）。
+
+    规则都是微秒级的 numpy 计算，直接在调用方线程内执行（线程池调度的开销比计算本身更大）。
+    """
+    ctx = RuleContext.from_evidence(evidence_pack)
+    per_step, calls = _dispatch(registry, steps)
+    results = {key: _safe_run(rule, ctx, key[1]) for key, rule in calls.items()}
+    outputs = (_step_output(step, [results[k] for k in keys]) for step, keys in zip(steps, per_step))
+    return [out for out in outputs if out is not None]
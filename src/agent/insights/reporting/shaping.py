@@ -0,0 +1,160 @@
+"""图表整形：按点数预算裁剪 GA 图表与原始结果，使载荷大小与报表基数无关。
+
+- 柱状图 / 饼图：按首个指标取 TopN，其余行合并为一行 "Other"（仅累加可加性指标）
+- 折线图（date 维度）：按时间排序后用 LTTB（Largest-Triangle-Three-Buckets）降采样，
+  保留峰谷等视觉特征；多维折线（如 date × country）退化为等间隔抽样
+- GA 原始结果：写入 state 前只保留预算内的行，并用 rows_truncated 标明裁剪方式与原始行数
+"""
+
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+
+from agent.config import (
+    REPORT_CHART_MAX_BARS,
+    REPORT_CHART_MAX_LINE_POINTS,
+    REPORT_CHART_MAX_PIE_SLICES,
+)
+from agent.insights.reporting.columnar import GAFrame, build_chart, chart_kind
+
+OTHER_LABEL = "Other"
+
+# 比率 / 均值类指标不可直接相加，"Other" 行中不出现
+_NON_ADDITIVE_HINTS = ("rate", "average", "avg", "per", "ratio", "percent")
+
+
+@dataclass(frozen=True, slots=True)
+class ChartBudget:
+    """各图表类型的最大点数。"""
+
+    bars: int = REPORT_CHART_MAX_BARS
+    pie_slices: int = REPORT_CHART_MAX_PIE_SLICES
+    line_points: int = REPORT_CHART_MAX_LINE_POINTS
+
+    def limit(self, kind: str) -> int:
+        """kind（bar / pie / line）对应的点数上限。"""
+        return {"bar": self.bars, "pie": self.pie_slices, "line": self.line_points}.get(kind, self.bars)
+
+
+def is_additive_metric(name: str) -> bool:
+    """计数类指标可相加；比率 / 均值 / 人均类不可。"""
+    lowered = name.lower()
+    return not any(hint in lowered for hint in _NON_ADDITIVE_HINTS)
+
+
+def lttb_indices(y: np.ndarray, threshold: int) -> np.ndarray:
+    """LTTB 降采样，返回保留点的下标（x 取等间隔，首尾点必留）。"""
+    n = len(y)
+    if threshold >= n:
+        return np.arange(n)
+    if threshold < 3:
+        return np.array([0, n - 1][:max(threshold, 0)], dtype=np.intp)
+
+    y = np.nan_to_num(np.asarray(y, dtype=np.float64))
+    x = np.arange(n, dtype=np.float64)
+    every = (n - 2) / (threshold - 2)
+    out = np.empty(threshold, dtype=np.intp)
+    out[0] = a = 0
+    for i in range(threshold - 2):
+        # 下一个桶的均值点
+        nxt_start = int(math.floor((i + 1) * every)) + 1
+        nxt_end = min(int(math.floor((i + 2) * every)) + 1, n)
+        avg_x = x[nxt_start:nxt_end].mean()
+        avg_y = y[nxt_start:nxt_end].mean()
+        # 当前桶中与上一个选中点、下一桶均值点构成最大三角形的点
+        start = int(math.floor(i * every)) + 1
+        end = int(math.floor((i + 1) * every)) + 1
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        out[i + 1] = a
+    out[-1] = n - 1
+    return out
+
+
+def _time_order(frame: GAFrame) -> np.ndarray:
+    """按首个维度（date 等）的取值排序的行下标（稳定排序）。"""
+    dim = frame.dimensions[0]
+    keys = ["" if v is None or not isinstance(v, str) else v for v in dim.values]
+    rank = np.empty(len(keys), dtype=np.int64)
+    rank[np.argsort(np.array(keys, dtype=object), kind="stable")] = np.arange(len(keys))
+    return np.argsort(rank[dim.codes], kind="stable")
+
+
+def _top_indices(frame: GAFrame, n: int) -> np.ndarray:
+    """按首个指标降序的前 n 行下标（同值保持原始行序）。"""
+    values = frame.metrics[0].values
+    vals = np.where(np.isnan(values), -np.inf, values)
+    return np.lexsort((np.arange(frame.n_rows), -vals))[:n]
+
+
+def _other_row(frame: GAFrame, rest: np.ndarray) -> dict[str, Any]:
+    x_key = frame.dimensions[0].name if frame.dimensions else "x"
+    row: dict[str, Any] = {x_key: OTHER_LABEL}
+    for m in frame.metrics:
+        if not is_additive_metric(m.name):
+            continue
+        total = float(np.nansum(m.values[rest]))
+        row[m.name] = int(total) if m.is_int and m.cells is None else total
+    return row
+
+
+def select_rows(frame: GAFrame, kind: str, limit: int) -> tuple[np.ndarray, np.ndarray, str]:
+    """在预算内选出要保留的行：返回 (保留下标, 被合并 / 丢弃的下标, 方法)。"""
+    n = frame.n_rows
+    if kind == "line" and frame.dimensions:
+        order = _time_order(frame)
+        if len(frame.dimensions) == 1:
+            y = frame.metrics[0].values[order] if frame.metrics else np.zeros(n)
+            picked = order[lttb_indices(y, limit)]
+            method = "lttb"
+        else:
+            picked = order[np.unique(np.linspace(0, n - 1, limit).round().astype(np.intp))]
+            method = "stride"
+    else:
+        picked = _top_indices(frame, limit)
+        method = "top_n"
+    mask = np.ones(n, dtype=bool)
+    mask[picked] = False
+    return picked, np.flatnonzero(mask), method
+
+
+def shape_chart(frame: GAFrame, budget: ChartBudget | None = None) -> dict[str, Any] | None:
+    """GAFrame -> 点数受限的 chart；裁剪过的图表带 `shaping` 说明（方法 / 总行数 / 展示行数）。"""
+    budget = budget or ChartBudget()
+    kind = chart_kind(frame)
+    if kind is None:
+        return None
+    limit = max(1, budget.limit(kind))
+    if frame.n_rows <= limit:
+        return build_chart(frame, kind=kind)
+
+    if kind == "line":
+        picked, _, method = select_rows(frame, kind, limit)
+        chart = build_chart(frame.take(picked), kind=kind)
+    else:
+        # 留一个位置给 "Other"
+        picked, rest, method = select_rows(frame, kind, max(1, limit - 1))
+        chart = build_chart(frame.take(picked), kind=kind, extra=[_other_row(frame, rest)])
+    assert chart is not None
+    chart["shaping"] = {"method": method, "total_rows": frame.n_rows, "shown_rows": len(picked)}
+    return chart
+
+
+def bound_ga_result(result: dict[str, Any], frame: GAFrame, *, max_rows: int) -> dict[str, Any]:
+    """裁剪 GA 原始结果的 rows（折线按 LTTB，其余按首个指标 TopN），并记录裁剪信息。
+
+    返回的新 dict 不修改入参；未超出预算时原样返回。
+    """
+    rows = result.get("rows") or []
+    if frame.n_rows <= max_rows or len(rows) != frame.n_rows or not frame.metrics:
+        return result
+    kind = chart_kind(frame) or "bar"
+    picked, _, method = select_rows(frame, kind, max_rows)
+    bounded = {k: v for k, v in result.items() if k != "rows"}
+    bounded["rows"] = [rows[i] for i in picked.tolist()]
+    bounded["rows_truncated"] = {"method": method, "total_rows": frame.n_rows, "shown_rows": len(picked)}
+    return bounded
@@ -0,0 +1,26 @@
+"""意图识别模块。
+
+分层分类：规则打分 → 历史结果缓存 →（可选）本地向量索引 → LLM → 兜底。
+"""
+
+from agent.intent.classifier import IntentDecision, classify_intent, clear_intent_cache
+from agent.intent.index import (
+    HashingEmbedder,
+    IntentIndex,
+    IntentIndexRegistry,
+    get_intent_index_registry,
+)
+from agent.intent.rules import RuleDecision, normalize_intent_text, score_intent
+
+__all__ = [
+    "HashingEmbedder",
+    "IntentIndex",
+    "IntentIndexRegistry",
+    "get_intent_index_registry",
+    "IntentDecision",
+    "RuleDecision",
+    "classify_intent",
+    "clear_intent_cache",
+    "normalize_intent_text",
+    "score_intent",
+]
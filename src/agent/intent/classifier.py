@@ -0,0 +1,198 @@
+"""分层意图分类器。
+
+按顺序尝试，命中即返回：
+1. rules：关键词/正则 + n-gram 打分，置信度 >= INTENT_RULES_MIN_CONFIDENCE 时直接采用
+2. cache：历史 LLM 分类结果（精确文本 / 规范化文本）
+3. index：本地向量索引最近邻（仅 INTENT_ROUTER_MODE=index），top1 分数与 top1/top2 差值足够时采用
+4. llm：模型路由 classify 任务（默认 nano）分类（结果写回 cache）
+5. fallback：LLM 失败或输出异常时使用规则层的最佳猜测
+
+每层的耗时记录在 `IntentDecision.tiers`，并上报到 `agent.utils.metrics`。
+"""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass, field
+
+from agent.config import (
+    INTENT_CACHE_MAX_ENTRIES,
+    INTENT_CACHE_TTL_S,
+    INTENT_INDEX_MIN_MARGIN,
+    INTENT_INDEX_MIN_SCORE,
+    INTENT_INDEX_TOP_K,
+    INTENT_ROUTER_MODE,
+    INTENT_RULES_MIN_CONFIDENCE,
+    get_logger,
+)
+from agent.intent.rules import RuleDecision, normalize_intent_text, score_intent
+from agent.prompts.assembly import assemble
+from agent.prompts.router import ROUTER_SYSTEM_PROMPT, ROUTER_USER_PROMPT
+from agent.utils import metrics
+from agent.utils.cache import MemoryLRUCache
+
+logger = get_logger(__name__)
+
+_intent_cache = MemoryLRUCache(INTENT_CACHE_MAX_ENTRIES)
+
+
+@dataclass(frozen=True, slots=True)
+class IntentDecision:
+    """一次意图分类的结果及来源。"""
+
+    label: str
+    source: str  # rules / cache / index / llm / fallback
+    confidence: float
+    latency_ms: float
+    raw: str = ""
+    # 各层耗时（毫秒），按尝试顺序
+    tiers: dict[str, float] = field(default_factory=dict)
+    # 规则层的候选排序，供下游（如预热）参考
+    candidates: tuple[tuple[str, float], ...] = ()
+
+
+def parse_intent_label(raw: str) -> str | None:
+    """把 LLM 输出映射为意图标签；无法识别返回 None。"""
+    label = raw.strip().lower()
+    if "article_task" in label or label == "article":
+        return "article_task"
+    if "shortcut" in label:
+        return "shortcut"
+    if "seo_planning" in label:
+        return "seo_planning"
+    if "site_report" in label or "report" in label:
+        return "site_report"
+    if "introduction" in label:
+        return "introduction"
+    if "rag" in label:
+        return "rag"
+    return None
+
+
+def _cache_keys(user_text: str) -> tuple[str, str]:
+    return "exact:" + user_text, "norm:" + normalize_intent_text(user_text)
+
+
+def _lookup_cache(user_text: str) -> str | None:
+    exact, norm = _cache_keys(user_text)
+    return _intent_cache.get(exact) or _intent_cache.get(norm)
+
+
+def _store_cache(user_text: str, label: str) -> None:
+    if INTENT_CACHE_TTL_S <= 0:
+        return
+    for key in _cache_keys(user_text):
+        _intent_cache.set(key, label, INTENT_CACHE_TTL_S)
+
+
+def clear_intent_cache() -> None:
+    """清空意图分类缓存。"""
+    _intent_cache.clear()
+
+
+async def _classify_with_index(user_text: str) -> tuple[str, float] | None:
+    """向量索引分类；分数或区分度不足、索引不可用时返回 None。"""
+    from agent.intent.index import get_intent_index_registry
+
+    try:
+        index = await get_intent_index_registry().get()
+        match = await index.classify(user_text, INTENT_INDEX_TOP_K)
+    except Exception as e:
+        logger.warning(f"[IntentRouter][index] 向量索引不可用: {e}")
+        return None
+    if match.score < INTENT_INDEX_MIN_SCORE or match.margin < INTENT_INDEX_MIN_MARGIN:
+        return None
+    return match.label, match.score
+
+
+async def _classify_with_llm(user_text: str) -> str:
+    # 延迟导入：避免仅使用规则层时初始化 LLM 客户端
+    from agent.utils.model_router import get_model_router
+
+    resp = await get_model_router().ainvoke(
+        "classify",
+        # few-shot system prompt 为静态前缀，用户输入单独放在 user 消息
+        assemble("router", ROUTER_SYSTEM_PROMPT, ROUTER_USER_PROMPT.format(user_text=user_text)).messages(),
+        config={"callbacks": []},
+    )
+    return getattr(resp, "content", str(resp)).strip()
+
+
+def _finish(
+    label: str,
+    source: str,
+    confidence: float,
+    started: float,
+    tiers: dict[str, float],
+    rule: RuleDecision,
+    raw: str = "",
+) -> IntentDecision:
+    latency_ms = (time.perf_counter() - started) * 1000
+    metrics.incr(f"intent_router.source.{source}")
+    metrics.observe(f"intent_router.latency_ms.{source}", latency_ms)
+    logger.info(
+        f"[IntentRouter][classify] intent={label} source={source} "
+        f"confidence={confidence:.2f} latency_ms={latency_ms:.1f}"
+    )
+    return IntentDecision(
+        label=label,
+        source=source,
+        confidence=round(confidence, 3),
+        latency_ms=round(latency_ms, 2),
+        raw=raw,
+        tiers={k: round(v, 2) for k, v in tiers.items()},
+        candidates=tuple((lbl, round(s, 3)) for lbl, s in rule.ranked),
+    )
+
+
+async def classify_intent(user_text: str, *, hint: str | None = None) -> IntentDecision:
+    """分层分类用户输入。
+
+    hint 为显式触发的意图（direct_intent）：此时跳过规则与缓存层，把提示拼进 LLM 输入作为参考。
+    """
+    started = time.perf_counter()
+    tiers: dict[str, float] = {}
+
+    t0 = time.perf_counter()
+    rule = score_intent(user_text)
+    tiers["rules"] = (time.perf_counter() - t0) * 1000
+
+    if not hint:
+        if rule.confidence >= INTENT_RULES_MIN_CONFIDENCE:
+            return _finish(rule.label, "rules", rule.confidence, started, tiers, rule)
+
+        t0 = time.perf_counter()
+        cached = _lookup_cache(user_text)
+        tiers["cache"] = (time.perf_counter() - t0) * 1000
+        if cached:
+            return _finish(cached, "cache", 1.0, started, tiers, rule)
+
+        if INTENT_ROUTER_MODE == "index":
+            t0 = time.perf_counter()
+            hit = await _classify_with_index(user_text)
+            tiers["index"] = (time.perf_counter() - t0) * 1000
+            if hit is not None:
+                return _finish(hit[0], "index", hit[1], started, tiers, rule)
+
+    llm_input = user_text
+    if hint:
+        llm_input += f"\n(System Hint: User explicitly triggered intent '{hint}')"
+
+    raw = ""
+    t0 = time.perf_counter()
+    try:
+        raw = await _classify_with_llm(llm_input)
+        label = parse_intent_label(raw)
+    except Exception as e:
+        logger.warning(f"[IntentRouter][classify] LLM 分类失败，使用规则兜底: {e}")
+        label = None
+    tiers["llm"] = (time.perf_counter() - t0) * 1000
+
+    if label is None:
+        # LLM 失败或输出异常：规则层最佳猜测；完全无信号时默认 rag
+        label = rule.label if rule.ranked and rule.ranked[0][1] > 0 else "rag"
+        return _finish(label, "fallback", rule.confidence, started, tiers, rule, raw)
+
+    if not hint:
+        _store_cache(user_text, label)
+    return _finish(label, "llm", 1.0, started, tiers, rule, raw)
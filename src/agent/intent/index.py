@@ -0,0 +1,330 @@
+"""本地意图向量索引（最近邻路由）。
+
+- 语料：路由 prompt 的 few-shot 种子 + 可选的标注文件（INTENT_INDEX_PATH，JSONL 每行 {"text", "label"}）
+- 向量：可插拔 Embedder；默认 HashingEmbedder（字符 n-gram 哈希，离线、确定性），可选 OpenAI Embedding
+- 检索：归一化后的 NumPy 矩阵，点积即余弦相似度，argpartition 取 top-k，按意图聚合最高分
+- 热加载：定期检查语料文件 mtime，变化后后台重建并原子替换，无需重启服务
+"""
+
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import json
+import os
+import threading
+import time
+import zlib
+from collections.abc import Sequence
+from dataclasses import dataclass
+from typing import Protocol
+
+import numpy as np
+
+from agent.config import (
+    INTENT_INDEX_EMBEDDER,
+    INTENT_INDEX_PATH,
+    INTENT_INDEX_RELOAD_CHECK_S,
+    get_logger,
+)
+from agent.intent.rules import normalize_intent_text
+from agent.prompts.router import INTENT_LABELS, INTENT_SEED_EXAMPLES
+
+logger = get_logger(__name__)
+
+
+class Embedder(Protocol):
+    """文本向量化后端。返回 shape=(len(texts), dim) 的 float32 矩阵（无需归一化）。"""
+
+    name: str
+
+    async def aembed(self, texts: Sequence[str]) -> np.ndarray:
+        """批量向量化 texts。"""
+        ...
+
+
+class HashingEmbedder:
+    """字符 n-gram + 词袋的有符号特征哈希（无词表、无网络，适合离线与测试）。"""
+
+    def __init__(self, dim: int = 2048, ngram_range: tuple[int, int] = (2, 4)) -> None:
+        """哈希桶数为 dim；ngram_range 为字符 n-gram 长度范围（含两端）。"""
+        self.dim = dim
+        self.ngram_range = ngram_range
+        self.name = f"hashing-{dim}"
+
+    def _features(self, text: str) -> list[str]:
+        text = normalize_intent_text(text)
+        feats = [f"w:{w}" for w in text.split()]
+        padded = f" {text} "
+        lo, hi = self.ngram_range
+        for n in range(lo, hi + 1):
+            feats.extend(padded[i : i + n] for i in range(len(padded) - n + 1))
+        return feats
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """同步向量化（纯 CPU，耗时在微秒级）。"""
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feat in self._features(text):
+                h = zlib.crc32(feat.encode("utf-8"))
+                out[row, h % self.dim] += 1.0 if (h >> 31) & 1 else -1.0
+        # 次线性 tf，削弱长文本里重复 n-gram 的权重
+        return np.sign(out) * np.log1p(np.abs(out))
+
+    async def aembed(self, texts: Sequence[str]) -> np.ndarray:
+        """同 embed（不涉及 IO）。"""
+        return self.embed(texts)
+
+
+class OpenAIEmbedder:
+    """基于 LLM_EMBEDDING_MODEL 的远程向量化。"""
+
+    def __init__(self) -> None:
+        """模型名取自 LLM_EMBEDDING_MODEL（客户端在首次调用时创建）。"""
+        from agent.config import LLM_EMBEDDING_MODEL
+
+        self.name = f"openai-{LLM_EMBEDDING_MODEL}"
+
+    async def aembed(self, texts: Sequence[str]) -> np.ndarray:
+        """调用 embeddings 接口批量向量化。"""
+        from agent.utils.llm import get_embeddings
+
+        vectors = await get_embeddings().aembed_documents(list(texts))
+        return np.asarray(vectors, dtype=np.float32)
+
+
+def make_embedder(kind: str = INTENT_INDEX_EMBEDDER) -> Embedder:
+    """按名称创建 Embedder：hashing / openai。"""
+    if kind == "openai":
+        return OpenAIEmbedder()
+    if kind != "hashing":
+        logger.warning(f"[IntentIndex][embedder] 未知的 INTENT_INDEX_EMBEDDER={kind!r}，使用 hashing")
+    return HashingEmbedder()
+
+
+def _l2_normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (matrix / norms).astype(np.float32, copy=False)
+
+
+@dataclass(frozen=True, slots=True)
+class Neighbour:
+    """检索到的一条标注语料。"""
+
+    text: str
+    label: str
+    score: float
+
+
+@dataclass(frozen=True, slots=True)
+class IndexMatch:
+    """最近邻分类结果：margin 为 top1 与 top2 意图的相似度差。"""
+
+    label: str
+    score: float
+    margin: float
+    neighbours: tuple[Neighbour, ...]
+
+
+class IntentIndex:
+    """不可变的意图向量索引；重建时整体替换。"""
+
+    def __init__(
+        self,
+        texts: Sequence[str],
+        labels: Sequence[str],
+        matrix: np.ndarray,
+        *,
+        embedder: Embedder,
+        source_mtime: float | None = None,
+    ) -> None:
+        """保存语料与向量矩阵（按行 L2 归一化）。"""
+        self.texts = tuple(texts)
+        self.labels = tuple(labels)
+        self.matrix = _l2_normalize(matrix)
+        self.embedder = embedder
+        self.source_mtime = source_mtime
+        self.built_at = time.time()
+
+    def __len__(self) -> int:
+        """索引中的语料条数。"""
+        return len(self.texts)
+
+    @classmethod
+    async def build(
+        cls,
+        examples: Sequence[tuple[str, str]],
+        embedder: Embedder,
+        *,
+        source_mtime: float | None = None,
+    ) -> IntentIndex:
+        """向量化全部语料并建立索引。"""
+        texts = [t for t, _ in examples]
+        labels = [lbl for _, lbl in examples]
+        matrix = await embedder.aembed(texts)
+        return cls(texts, labels, matrix, embedder=embedder, source_mtime=source_mtime)
+
+    def search(self, query: np.ndarray, k: int) -> list[Neighbour]:
+        """余弦 top-k（query 为单条向量，无需预先归一化）。"""
+        if not len(self):
+            return []
+        q = _l2_normalize(np.asarray(query, dtype=np.float32).reshape(1, -1))[0]
+        scores = self.matrix @ q
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [Neighbour(self.texts[i], self.labels[i], float(scores[i])) for i in top]
+
+    async def classify(self, text: str, k: int) -> IndexMatch:
+        """对文本做最近邻分类：每个意图取其邻居中的最高分。"""
+        query = (await self.embedder.aembed([text]))[0]
+        neighbours = self.search(query, k)
+        best: dict[str, float] = {}
+        for n in neighbours:
+            best[n.label] = max(best.get(n.label, -1.0), n.score)
+        ranked = sorted(best.items(), key=lambda kv: kv[1], reverse=True)
+        if not ranked:
+            return IndexMatch(label="rag", score=0.0, margin=0.0, neighbours=())
+        top_label, top = ranked[0]
+        second = ranked[1][1] if len(ranked) > 1 else 0.0
+        return IndexMatch(
+            label=top_label,
+            score=top,
+            margin=top - max(second, 0.0),
+            neighbours=tuple(neighbours),
+        )
+
+
+def load_labelled_utterances(path: str) -> list[tuple[str, str]]:
+    """读取标注语料：JSONL（每行一个对象）或 JSON 数组，字段 text / label；非法行跳过。"""
+    with open(path, encoding="utf-8") as f:
+        content = f.read()
+    stripped = content.lstrip()
+    if stripped.startswith("["):
+        records = json.loads(stripped)
+    else:
+        records = [json.loads(line) for line in content.splitlines() if line.strip()]
+
+    examples: list[tuple[str, str]] = []
+    skipped = 0
+    for rec in records:
+        text = str((rec or {}).get("text") or "").strip() if isinstance(rec, dict) else ""
+        label = rec.get("label") if isinstance(rec, dict) else None
+        if not text or label not in INTENT_LABELS:
+            skipped += 1
+            continue
+        examples.append((text, label))
+    if skipped:
+        logger.warning(f"[IntentIndex][load] 跳过 {skipped} 条无效语料 path={path}")
+    return examples
+
+
+class IntentIndexRegistry:
+    """持有当前索引；按 mtime 检测语料文件变化并热重建（同一时刻只有一个重建任务）。"""
+
+    def __init__(
+        self,
+        path: str = INTENT_INDEX_PATH,
+        embedder: Embedder | None = None,
+        *,
+        check_interval_s: float = INTENT_INDEX_RELOAD_CHECK_S,
+    ) -> None:
+        """索引在首次使用时构建。"""
+        self.path = path
+        self.embedder = embedder or make_embedder()
+        self.check_interval_s = check_interval_s
+        self._index: IntentIndex | None = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._inflight: concurrent.futures.Future[IntentIndex] | None = None
+        self._background: set[asyncio.Task[IntentIndex]] = set()
+
+    def _source_mtime(self) -> float | None:
+        if not self.path:
+            return None
+        try:
+            return os.stat(self.path).st_mtime
+        except OSError:
+            return None
+
+    def _is_stale(self) -> bool:
+        if self._index is None:
+            return True
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval_s:
+            return False
+        self._checked_at = now
+        return self._source_mtime() != self._index.source_mtime
+
+    async def get(self) -> IntentIndex:
+        """返回当前索引；仅首次访问时等待构建，语料文件变化时后台重建，期间继续使用旧索引。"""
+        with self._lock:
+            stale = self._is_stale()
+            index = self._index
+        if index is None:
+            return await self.reload()
+        if stale:
+            self._reload_in_background()
+        return index
+
+    def _reload_in_background(self) -> None:
+        if self._inflight is not None:
+            return
+        task = asyncio.get_running_loop().create_task(self.reload())
+        self._background.add(task)
+
+        def _done(t: asyncio.Task[IntentIndex]) -> None:
+            self._background.discard(t)
+            if not t.cancelled() and t.exception() is not None:
+                logger.warning(f"[IntentIndex][reload] 后台重建失败，继续使用旧索引: {t.exception()}")
+
+        task.add_done_callback(_done)
+
+    async def reload(self) -> IntentIndex:
+        """强制从种子 + 语料文件重建索引。"""
+        with self._lock:
+            fut = self._inflight
+            leader = fut is None
+            if leader:
+                fut = self._inflight = concurrent.futures.Future()
+        assert fut is not None
+        if not leader:
+            return await asyncio.wrap_future(fut)
+
+        try:
+            t0 = time.perf_counter()
+            mtime = self._source_mtime()
+            examples = list(INTENT_SEED_EXAMPLES)
+            if mtime is not None:
+                examples.extend(await asyncio.to_thread(load_labelled_utterances, self.path))
+            index = await IntentIndex.build(examples, self.embedder, source_mtime=mtime)
+            with self._lock:
+                self._index = index
+                self._checked_at = time.monotonic()
+            logger.info(
+                f"[IntentIndex][reload] 索引已重建 size={len(index)} embedder={self.embedder.name} "
+                f"耗时={(time.perf_counter() - t0) * 1000:.0f}ms"
+            )
+            fut.set_result(index)
+            return index
+        except BaseException as e:
+            fut.set_exception(e if isinstance(e, Exception) else RuntimeError("意图索引重建被取消"))
+            raise
+        finally:
+            with self._lock:
+                self._inflight = None
+
+
+_REGISTRY: IntentIndexRegistry | None = None
+_REGISTRY_LOCK = threading.Lock()
+
+
+def get_intent_index_registry() -> IntentIndexRegistry:
+    """获取进程级意图索引（懒加载单例）。"""
+    global _REGISTRY
+    if _REGISTRY is None:
+        with _REGISTRY_LOCK:
+            if _REGISTRY is None:
+                _REGISTRY = IntentIndexRegistry()
+    return _REGISTRY
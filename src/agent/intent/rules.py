@@ -0,0 +1,131 @@
+"""意图快速分类：关键词/正则 + 字符 n-gram 打分（第一层，无网络调用）。
+
+- 每个意图一组预编译正则，命中权重按 noisy-or 合并
+- 与种子示例（路由 prompt 的 few-shot）做字符 trigram 余弦相似度，近似复述可直接命中
+- 置信度 = top1 分数 × (1 - top2 分数)：只有“强命中且无竞争意图”时才足够高
+"""
+
+from __future__ import annotations
+
+import math
+import re
+import unicodedata
+from collections import Counter
+from dataclasses import dataclass
+
+from agent.prompts.router import INTENT_LABELS, INTENT_SEED_EXAMPLES
+
+_PUNCT_EDGES = " \t\r\n!！?？.。,，~～、;；:：'\"“”‘’()（）"
+
+# (pattern, weight)：weight 越接近 1 表示越确定；包含原 `_classify_intent_fallback` 的全部关键词
+_PATTERNS: dict[str, list[tuple[str, float]]] = {
+    "introduction": [
+        (r"^(hi|hello|hey|hiya|hi there|hello there|你好|您好|嗨|哈喽|在吗)$", 0.97),
+        (r"what can you do|who are you|introduce yourself|你能做什么|你可以做什么|你是谁|介绍一下你|介绍你自己", 0.92),
+        (r"^(help|帮助)$", 0.85),
+        (r"介绍|帮助|\bhelp\b|\bhello\b|\bhi\b", 0.35),
+    ],
+    "article_task": [
+        (r"\b(write|generate|compose)\b.{0,20}\b(blog|article|post|news|copy|story)\b", 0.9),
+        (r"(写|撰写|生成|创作).{0,10}(文章|博客|稿件|文案|新闻)", 0.9),
+        (r"marketing copy|文案", 0.6),
+        (r"文章|\barticle\b|写", 0.4),
+    ],
+    "shortcut": [
+        (r"\b(change|update|set|modify|rename|replace|upload)\b.{0,30}\b(logo|title|favicon|settings?|name|description|footer|header|language|timezone|domain)\b", 0.85),
+        (r"\b(create|add)\b.{0,10}\bdraft\b", 0.9),
+        (r"(修改|更改|更新|设置|替换|上传).{0,10}(logo|标题|名称|描述|图标|页脚|页眉|语言|时区|域名)", 0.85),
+        (r"草稿|新建", 0.6),
+    ],
+    "seo_planning": [
+        (r"weekly plan|weekly tasks?|this week'?s tasks|周计划|本周任务|每周任务", 0.9),
+        (r"\bseo\b", 0.75),
+        (r"优化建议|seo\s*优化|关键词排名", 0.8),
+        (r"优化", 0.4),
+    ],
+    "site_report": [
+        (r"how many (visitors|users|sessions|views|page ?views)", 0.95),
+        (r"\b(traffic|visitors?|page ?views|sessions|analytics|bounce rate)\b|访问量|流量|访客|浏览量|跳出率|报表", 0.8),
+        (r"报告|统计|数据|\breport\b", 0.45),
+    ],
+    "rag": [
+        (r"^(how (do|can|to|should)|where (can|do|is)|what is|what's|why)\b|^(怎么|如何|怎样|为什么|什么是)|在哪", 0.6),
+        (r"\b(configure|documentation|docs|guide|tutorial|api keys?)\b|配置|教程|文档", 0.5),
+    ],
+}
+
+_COMPILED: dict[str, list[tuple[re.Pattern[str], float]]] = {
+    label: [(re.compile(p, re.IGNORECASE), w) for p, w in patterns]
+    for label, patterns in _PATTERNS.items()
+}
+
+# n-gram 相似度低于该值视为无信号；高于时线性映射到 (0, 1]
+_NGRAM_FLOOR = 0.5
+
+
+def normalize_intent_text(text: str) -> str:
+    """NFKC + 小写 + 合并空白 + 去掉首尾标点，用于打分与缓存 key。"""
+    text = unicodedata.normalize("NFKC", text or "").lower()
+    text = re.sub(r"\s+", " ", text)
+    return text.strip(_PUNCT_EDGES)
+
+
+def _char_ngrams(text: str, n: int = 3) -> Counter[str]:
+    padded = f" {text} "
+    if len(padded) < n:
+        return Counter({padded: 1})
+    return Counter(padded[i : i + n] for i in range(len(padded) - n + 1))
+
+
+def _cosine(a: Counter[str], b: Counter[str]) -> float:
+    if not a or not b:
+        return 0.0
+    dot = sum(v * b.get(k, 0) for k, v in a.items())
+    if not dot:
+        return 0.0
+    na = math.sqrt(sum(v * v for v in a.values()))
+    nb = math.sqrt(sum(v * v for v in b.values()))
+    return dot / (na * nb)
+
+
+_SEED_NGRAMS: list[tuple[str, Counter[str]]] = [
+    (label, _char_ngrams(normalize_intent_text(text))) for text, label in INTENT_SEED_EXAMPLES
+]
+
+
+@dataclass(frozen=True, slots=True)
+class RuleDecision:
+    """规则层打分结果。"""
+
+    label: str
+    confidence: float
+    # 按分数降序的 (label, score)，供下游（如预热）参考
+    ranked: tuple[tuple[str, float], ...]
+
+
+def score_intent(user_text: str) -> RuleDecision:
+    """对文本打分，返回最可能的意图与置信度（不做阈值判断）。"""
+    text = normalize_intent_text(user_text)
+    scores = {label: 0.0 for label in INTENT_LABELS}
+    if not text:
+        return RuleDecision(label="rag", confidence=0.0, ranked=tuple(scores.items()))
+
+    for label, patterns in _COMPILED.items():
+        miss = 1.0
+        for pattern, weight in patterns:
+            if pattern.search(text):
+                miss *= 1.0 - weight
+        scores[label] = 1.0 - miss
+
+    grams = _char_ngrams(text)
+    best_sim: dict[str, float] = {}
+    for label, seed in _SEED_NGRAMS:
+        best_sim[label] = max(best_sim.get(label, 0.0), _cosine(grams, seed))
+    for label, sim in best_sim.items():
+        if sim > _NGRAM_FLOOR:
+            w = (sim - _NGRAM_FLOOR) / (1.0 - _NGRAM_FLOOR)
+            scores[label] = 1.0 - (1.0 - scores[label]) * (1.0 - w)
+
+    ranked = tuple(sorted(scores.items(), key=lambda kv: kv[1], reverse=True))
+    (top_label, top), (_, second) = ranked[0], ranked[1]
+    return RuleDecision(label=top_label, confidence=top * (1.0 - second), ranked=ranked)
@@ -18,8 +18,13 @@ from agent.state import CopilotState
 from agent.tools.article import call_cloud_article_workflow
 from agent.tools.auth import ensure_mcp_token
 from agent.tools.lowcode_app import list_apps
-from agent.utils.helpers import find_ai_message_by_id, latest_user_message, message_text
-from agent.utils.llm import llm_nostream
+from agent.utils.helpers import (
+    find_ai_message_by_id,
+    latest_message_kwarg,
+    latest_user_message,
+    message_text,
+)
+from agent.utils.model_router import get_model_router
 
 logger = get_logger(__name__)
 
@@ -89,7 +94,7 @@ collected (historically collected, empty if none):
 {json.dumps(collected, ensure_ascii=False)}
 """
 
-    structured = llm_nostream.with_structured_output(ArticleClarifyResult)
+    structured = get_model_router().structured("extract", ArticleClarifyResult)
     return await structured.ainvoke(
         [
             {
@@ -120,17 +125,7 @@ async def article_clarify_parse(state: CopilotState) -> dict[str, Any]:
     intent_anchor_msg = find_ai_message_by_id(state, intent_anchor_id)
 
     # Detect direct_intent from latest real message (skip UI anchor AIMessage)
-    direct_intent = None
-    messages = state.get("messages", []) or []
-    for m in reversed(messages):
-        kwargs = None
-        if isinstance(m, dict):
-            kwargs = m.get("additional_kwargs")
-        else:
-            kwargs = getattr(m, "additional_kwargs", None)
-        if isinstance(kwargs, dict) and kwargs.get("direct_intent"):
-            direct_intent = kwargs.get("direct_intent")
-            break
+    direct_intent = latest_message_kwarg(state, "direct_intent", truthy=True)
     is_direct_article_task = direct_intent == "article_task"
     
     thinking_ui_id = None
@@ -11,7 +11,7 @@ from langgraph.graph.ui import push_ui_message
 
 from agent.config import get_logger
 from agent.state import CopilotState
-from agent.utils.helpers import latest_user_message
+from agent.utils.helpers import latest_message_kwarg, latest_user_message
 from agent.utils.website_header import get_extra_headers
 
 logger = get_logger(__name__)
@@ -99,17 +99,7 @@ async def entry_node(state: CopilotState) -> dict[str, Any]:
     )
     if pending_report_confirm:
         # 更稳：从后往前找最近一次带 payload 的提交消息（避免最后一条是 UI anchor/空消息）
-        messages = state.get("messages", []) or []
-        confirmed = None
-        for m in reversed(messages):
-            kwargs = None
-            if isinstance(m, dict):
-                kwargs = m.get("additional_kwargs")
-            else:
-                kwargs = getattr(m, "additional_kwargs", None)
-            if isinstance(kwargs, dict) and "report_insights_confirmed" in kwargs:
-                confirmed = kwargs.get("report_insights_confirmed")
-                break
+        confirmed = latest_message_kwarg(state, "report_insights_confirmed")
 
         if confirmed is not None:
             logger.info("[entry_node] resume report insights via submit (confirmed=%s)", confirmed)
@@ -0,0 +1,15 @@
+"""History 节点模块。
+
+每轮开始时把超出窗口的旧消息归档到 Blob 存储（messages reducer 中不做 I/O）。
+"""
+
+from typing import Any
+
+from agent.history import archive_messages
+from agent.state import CopilotState
+
+
+async def archive_history(state: CopilotState) -> dict[str, Any]:
+    """超出 MESSAGE_HISTORY_WINDOW 时归档最旧的一批消息，并更新开头的归档标记。"""
+    update = await archive_messages(state.get("messages") or [])
+    return {"messages": update} if update else {}
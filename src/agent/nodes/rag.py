@@ -11,15 +11,69 @@ from langchain_core.messages import AIMessage, AIMessageChunk
 from langchain_core.runnables import RunnableConfig
 from langgraph.config import get_stream_writer
 from langgraph.graph.message import push_message
-from langgraph.graph.ui import push_ui_message
 
-from agent.config import RAG_API_URL, RAG_SITE_ID, RAG_TENANT_ID, get_logger
+from agent.config import (
+    RAG_ANSWER_CACHE_REPLAY_WAIT_S,
+    RAG_API_URL,
+    RAG_SITE_ID,
+    RAG_TENANT_ID,
+    get_logger,
+)
 from agent.state import CopilotState
 from agent.tools.rag import rag_sse_events
+from agent.tools.rag_cache import (
+    get_rag_answer_cache,
+    iter_answer_chunks,
+    rag_cache_enabled_for,
+)
 from agent.utils.helpers import find_ai_message_by_id, latest_user_message, message_text
+from agent.utils.ui import UICoalescer
 
 logger = get_logger(__name__)
 
+# session_id -> 命中缓存后补发给上游的后台任务（完成即移除）
+_REPLAYS: dict[str, asyncio.Task[None]] = {}
+
+
+async def _replay_upstream(*, question: str, tenant_id: str, site_id: str, session_id: str) -> None:
+    """把缓存命中的问题补发给上游会话（答案丢弃），让上游会话里也有这一轮问答。"""
+    async for ev in rag_sse_events(
+        question=question,
+        tenant_id=tenant_id,
+        site_id=site_id,
+        session_id=session_id,
+        rag_api_url=RAG_API_URL,
+        node_types=("final_answer",),
+    ):
+        if ev.node_name == "final_answer":
+            break
+
+
+def _start_replay(*, question: str, tenant_id: str, site_id: str, session_id: str) -> None:
+    task = asyncio.get_running_loop().create_task(
+        _replay_upstream(question=question, tenant_id=tenant_id, site_id=site_id, session_id=session_id)
+    )
+    _REPLAYS[session_id] = task
+
+    def _done(t: asyncio.Task[None]) -> None:
+        if _REPLAYS.get(session_id) is t:
+            del _REPLAYS[session_id]
+        if not t.cancelled() and t.exception() is not None:
+            logger.warning(f"[RAG][cache] 补发上游会话失败 session_id={session_id}: {t.exception()}")
+
+    task.add_done_callback(_done)
+
+
+async def _wait_replay(session_id: str) -> None:
+    """追问发往上游前，等待同一会话尚未完成的补发（超时或失败时直接继续）。"""
+    task = _REPLAYS.get(session_id)
+    if task is None or task.get_loop() is not asyncio.get_running_loop():
+        return
+    try:
+        await asyncio.wait_for(asyncio.shield(task), timeout=RAG_ANSWER_CACHE_REPLAY_WAIT_S)
+    except Exception as e:
+        logger.warning(f"[RAG][cache] 等待补发上游会话未完成，直接发送追问 session_id={session_id}: {e!r}")
+
 
 async def start_rag_ui(state: CopilotState, config: RunnableConfig | None = None) -> dict:
     """Prepare for RAG, ensuring we have a session ID, but do NOT create a separate card."""
@@ -73,16 +127,18 @@ async def handle_rag(state: CopilotState, config: RunnableConfig | None = None)
     intent_anchor_id = state.get("intent_anchor_id")
     intent_anchor_msg = find_ai_message_by_id(state, intent_anchor_id)
 
+    # 流式阶段的状态更新按时间合并、相同内容去重；终态更新立即发送并写入 state
+    intent_ui = UICoalescer()
+
     def _update_intent_ui(props_patch: dict) -> None:
         """Helper to update the intent_router card."""
         if intent_ui_id and intent_anchor_msg is not None:
-            push_ui_message(
-                "intent_router",
-                props_patch,
-                id=intent_ui_id,
-                message=intent_anchor_msg,
-                merge=True,
-            )
+            intent_ui.push("intent_router", intent_ui_id, props_patch, message=intent_anchor_msg)
+
+    def _stream_intent_ui(props_patch: dict) -> None:
+        """Coalesced update for the intent_router card while the answer streams."""
+        if intent_ui_id and intent_anchor_msg is not None:
+            intent_ui.update("intent_router", intent_ui_id, props_patch, message=intent_anchor_msg)
 
     # Indicate start of RAG
     _update_intent_ui({
@@ -95,55 +151,89 @@ async def handle_rag(state: CopilotState, config: RunnableConfig | None = None)
     if writer is not None:
         writer({"messages": [stream_anchor]})
 
-    try:
-        async for ev in rag_sse_events(
+    # 公共知识库先查答案缓存：命中则按片段回放，走与实时答案相同的流式路径。
+    # 上游按 session_id 保留对话上下文，缓存 key 不含上下文，因此只有会话内首个提问读写缓存；
+    # 命中时问题在后台补发给上游会话，保证后续追问有首轮上下文
+    prior_turns = int(state.get("rag_turns") or 0)
+    state["rag_turns"] = prior_turns + 1
+    cacheable = prior_turns == 0 and rag_cache_enabled_for(str(tenant_id), str(site_id))
+    cache = get_rag_answer_cache() if cacheable else None
+    cached = await cache.lookup(str(tenant_id), str(site_id), question) if cache is not None else None
+    completed = False
+
+    if cached is not None:
+        logger.info(f"[RAG][cache] 命中 match={cached.match} similarity={cached.similarity}")
+        _update_intent_ui({
+            "rag_status": "running",
+            "rag_message": "Processing: generate_answer",
+        })
+        for piece in iter_answer_chunks(cached.answer):
+            answer_parts.append(piece)
+            push_message(
+                AIMessageChunk(id=stream_anchor.id, content=piece),
+                state_key="messages",
+            )
+            await asyncio.sleep(0)
+        _start_replay(
             question=question,
             tenant_id=str(tenant_id or ""),
             site_id=str(site_id or ""),
             session_id=session_id,
-            rag_api_url=RAG_API_URL,
-        ):
-            ev_count += 1
-            # Ignore initializing steps as requested
-            if ev.node_name in ["workflow", "analysis_language", "detect_language", "initialize"]:
-                continue
-
-            if ev.node_name == "generate_answer":
-                answer = ev.data.get("answer")
-                if isinstance(answer, str) and answer:
-                    answer_parts.append(answer)
-                    # Update status to show we are generating
+        )
+    else:
+        await _wait_replay(session_id)
+        try:
+            async for ev in rag_sse_events(
+                question=question,
+                tenant_id=str(tenant_id or ""),
+                site_id=str(site_id or ""),
+                session_id=session_id,
+                rag_api_url=RAG_API_URL,
+                # 只有这两类事件会被消费；其余事件（workflow / sources 等）跳过 JSON 解码
+                node_types=("generate_answer", "final_answer"),
+            ):
+                ev_count += 1
+                # Ignore initializing steps as requested
+                if ev.node_name in ["workflow", "analysis_language", "detect_language", "initialize"]:
+                    continue
+
+                if ev.node_name == "generate_answer":
+                    answer = ev.data.get("answer")
+                    if isinstance(answer, str) and answer:
+                        answer_parts.append(answer)
+                        # Update status to show we are generating
+                        _stream_intent_ui({
+                             "rag_status": "running",
+                             "rag_message": "Processing: generate_answer"
+                        })
+                    
+                        # Push chunk
+                        push_message(
+                            AIMessageChunk(id=stream_anchor.id, content=answer),
+                            state_key="messages",
+                        )
+                        await asyncio.sleep(0)
+
+                elif ev.node_name == "final_answer":
                     _update_intent_ui({
-                         "rag_status": "running",
-                         "rag_message": "Processing: generate_answer"
+                         "rag_status": "done", # or keep running until very end?
+                         "rag_message": "Processing: final_answer"
                     })
-                    
-                    # Push chunk
-                    push_message(
-                        AIMessageChunk(id=stream_anchor.id, content=answer),
-                        state_key="messages",
-                    )
-                    await asyncio.sleep(0)
-
-            elif ev.node_name == "final_answer":
-                _update_intent_ui({
-                     "rag_status": "done", # or keep running until very end?
-                     "rag_message": "Processing: final_answer"
-                })
-                break
+                    completed = True
+                    break
                 
-    except (httpx.ConnectError, httpx.ConnectTimeout):
-        friendly = "RAG 服务连接失败，请检查 RAG_API_URL 配置或网络是否可达。"
-        _update_intent_ui({"rag_status": "error", "rag_message": friendly})
-        stream_anchor.content = friendly
-        push_message(stream_anchor, state_key="messages")
-        return state
-    except Exception as exc:
-        _update_intent_ui({
-            "rag_status": "error",
-            "rag_message": str(exc),
-        })
-        raise
+        except (httpx.ConnectError, httpx.ConnectTimeout):
+            friendly = "RAG 服务连接失败，请检查 RAG_API_URL 配置或网络是否可达。"
+            _update_intent_ui({"rag_status": "error", "rag_message": friendly})
+            stream_anchor.content = friendly
+            push_message(stream_anchor, state_key="messages")
+            return state
+        except Exception as exc:
+            _update_intent_ui({
+                "rag_status": "error",
+                "rag_message": str(exc),
+            })
+            raise
 
     # 如果没有获取到答案，使用默认提示
     if not answer_parts:
@@ -158,6 +248,9 @@ async def handle_rag(state: CopilotState, config: RunnableConfig | None = None)
 
     answer_text = "".join(answer_parts)
     stream_anchor.content = answer_text
+    # 只缓存正常结束（收到 final_answer）的完整答案
+    if cache is not None and completed:
+        await cache.store(str(tenant_id), str(site_id), question, answer_text)
     
     # Final completion update
     _update_intent_ui({
@@ -9,26 +9,43 @@
 
 from __future__ import annotations
 
+import asyncio
 import json
 import os
 import re
+import time
 import uuid
 from typing import Any, Awaitable, Callable
 
-from langchain_google_genai import ChatGoogleGenerativeAI
-
 from langchain_core.messages import AIMessage
 from langchain_core.tools import ToolException
 from langgraph.config import get_stream_writer
 from langgraph.graph.ui import UIMessage, push_ui_message
 
-from agent.config import get_logger
+from agent.config import (
+    REPORT_COMPARISON_ENABLED,
+    REPORT_COMPARISON_TIMEOUT_S,
+    REPORT_COMPARISON_TOP_N,
+    REPORT_NARRATION_MODE,
+    REPORT_RAW_MAX_ROWS,
+    get_logger,
+)
 from agent.insights.report_insights_agent import (
     generate_report_insights_streaming,
 )
+from agent.insights.reporting.columnar import GAFrame, build_summary, decode_ga_report
+from agent.insights.reporting.comparison import build_comparison, previous_period_args
 from agent.insights.reporting.evidence import build_evidence_pack
+from agent.insights.reporting.narration import BatchNarrator, chart_preview, get_narration_cache, record_usage
+from agent.insights.reporting.report_plan import generate_report_plan, plan_cache_key, tool_catalog_hash
+from agent.insights.reporting.shaping import bound_ga_result, shape_chart
 from agent.state import CopilotState, ReportState
-from agent.prompts.report import REPORT_PLANNING_PROMPT
+from agent.prompts.assembly import assemble, static_section
+from agent.prompts.report import (
+    REPORT_PLANNING_PROMPT,
+    REPORT_PLANNING_PROMPT_VERSION,
+    REPORT_PLANNING_USER_PROMPT,
+)
 from agent.tools.ga_mcp import (
     check_ga_tool_error,
     is_token_expired_error,
@@ -36,12 +53,17 @@ from agent.tools.ga_mcp import (
     normalize_ga_tool_result,
     with_ga_tools,
 )
+from agent.utils import metrics
+from agent.utils.blobstore import aoffload
 from agent.utils.helpers import find_ai_message_by_id, latest_user_message, message_text
-from agent.utils.llm import llm_nano, llm_nano_nostream, llm_nostream
+from agent.utils.ui import UICoalescer
+from agent.utils.model_router import get_model_router
 
 logger = get_logger(__name__)
 
 DEFAULT_DAYS = int(os.getenv("CMS_GA_DEFAULT_DAYS", "7"))
+# 单次报告内并发执行的 GA 调用数上限
+REPORT_TOOL_CONCURRENCY = int(os.getenv("REPORT_TOOL_CONCURRENCY", "4"))
 
 
 def _default_run_report_args(property_id: str, days: int = 7) -> dict[str, Any]:
@@ -61,11 +83,8 @@ def _extract_property_id(text: str) -> str | None:
 
 
 def _get_anchor_msg_by_id(state: ReportState, anchor_id: str | None) -> AIMessage:
-    if anchor_id:
-        for m in state.get("messages", []):
-            if isinstance(m, AIMessage) and getattr(m, "id", None) == anchor_id:
-                return m
-    return AIMessage(id=str(uuid.uuid4()), content="")
+    anchor = find_ai_message_by_id(state, anchor_id)
+    return anchor if anchor is not None else AIMessage(id=str(uuid.uuid4()), content="")
 
 
 def _get_anchor_msg(state: ReportState) -> AIMessage:
@@ -157,33 +176,10 @@ def _extract_json_object(text: str) -> dict[str, Any] | None:
     return None
 
 
-def _try_build_summary_from_report(result: dict[str, Any]) -> dict[str, Any] | None:
-    """从 GA report rows 推导 summary（用于前端摘要区）。"""
+def _try_build_summary_from_report(result: dict[str, Any], frame: GAFrame | None = None) -> dict[str, Any] | None:
+    """从 GA report rows 推导 summary（用于前端摘要区）；已解码的 frame 可直接传入复用。"""
     try:
-        metric_headers = result.get("metric_headers") or []
-        metric_names = [h.get("name") for h in metric_headers if h.get("name")]
-        rows = result.get("rows") or []
-        totals: dict[str, float] = {mn: 0.0 for mn in metric_names}
-        for r in rows:
-            met_vals = r.get("metric_values") or []
-            for i, mn in enumerate(metric_names):
-                if i < len(met_vals):
-                    v = (met_vals[i] or {}).get("value")
-                    try:
-                        totals[mn] += float(v)
-                    except Exception:
-                        pass
-        total_visits = int(totals.get("sessions", 0))
-        total_unique = int(totals.get("activeUsers", 0))
-        total_pv = int(totals.get("screenPageViews", 0))
-        return {
-            "total_visits": total_visits,
-            "total_unique_visitors": total_unique,
-            "total_page_views": total_pv,
-            "avg_session_duration": 0,
-            "bounce_rate": 0.0,
-            "pages_per_session": round(total_pv / total_visits, 2) if total_visits > 0 else 0,
-        }
+        return build_summary(frame if frame is not None else decode_ga_report(result))
     except Exception:
         return None
 
@@ -294,119 +290,13 @@ def _normalize_ga_tool_args(tool_name: str, args: Any, *, property_id: str) -> d
     return normalized
 
 
-def _humanize_ga_value(dim_name: str, value: str) -> str:
-    """把 GA 技术名称转换为人类可读的中文描述。"""
-    if not value:
-        return value
-    
-    # sessionDefaultChannelGroup 翻译
-    if dim_name == "sessionDefaultChannelGroup":
-        mapping = {
-            "Organic Search": "Organic Search",
-            "Direct": "Direct",
-            "Paid Search": "Paid Search",
-            "Organic Social": "Social Media",
-            "Referral": "Referral",
-            "Email": "Email",
-            "Paid Social": "Paid Social",
-            "Display": "Display",
-            "Organic Shopping": "Organic Shopping",
-            "Paid Shopping": "Paid Shopping",
-            "Organic Video": "Video",
-            "(Other)": "Other",
-            "(not set)": "Not Set",
-        }
-        return mapping.get(value, value)
-    
-    # deviceCategory 翻译
-    if dim_name == "deviceCategory":
-        mapping = {
-            "desktop": "Desktop",
-            "mobile": "Mobile",
-            "tablet": "Tablet",
-        }
-        return mapping.get(value.lower(), value)
-    
-    # 其他维度（如有需要可继续扩展）
-    return value
-
-
-def _build_chart_from_ga_report(result: dict[str, Any]) -> dict[str, Any] | None:
-    """通用 GA report -> chart（line/bar/pie），并翻译技术名称为人类可读。"""
-    rows = result.get("rows") or []
-    dim_headers = result.get("dimension_headers") or []
-    metric_headers = result.get("metric_headers") or []
-
-    dim_names = [h.get("name") for h in dim_headers if h.get("name")]
-    metric_names = [h.get("name") for h in metric_headers if h.get("name")]
-    if not metric_names:
-        return None
+def _build_chart_from_ga_report(result: dict[str, Any], frame: GAFrame | None = None) -> dict[str, Any] | None:
+    """通用 GA report -> chart（line/bar/pie），并翻译技术名称为人类可读。
 
-    data: list[dict[str, Any]] = []
-    for r in rows:
-        row: dict[str, Any] = {}
-        dim_vals = r.get("dimension_values") or []
-        met_vals = r.get("metric_values") or []
-        for i, dn in enumerate(dim_names):
-            if i < len(dim_vals):
-                raw_val = (dim_vals[i] or {}).get("value")
-                # 翻译维度值为人类可读
-                row[dn] = _humanize_ga_value(dn, raw_val)
-        for i, mn in enumerate(metric_names):
-            if i < len(met_vals):
-                v = (met_vals[i] or {}).get("value")
-                try:
-                    row[mn] = float(v) if "." in str(v) else int(v)
-                except Exception:
-                    row[mn] = v
-        data.append(row)
-
-    # 维度为 date：折线
-    x_key = dim_names[0] if dim_names else "x"
-    if "date" in (x_key or "").lower():
-        return {
-            "chart_type": "line",
-            "title": "Trend",
-            "data": data,
-            "x_key": x_key,
-            "y_keys": metric_names,
-            "y_labels": metric_names,
-            "colors": ["#3b82f6", "#10b981", "#f59e0b", "#8b5cf6", "#ef4444"],
-        }
-
-    # 单指标分布：仅在“分布类维度”下使用饼图；页面/内容类维度用柱状图更符合预期
-    PIE_FRIENDLY_DIMS = {
-        "deviceCategory",
-        "sessionDefaultChannelGroup",
-        "country",
-        "city",
-        "region",
-        "browser",
-        "operatingSystem",
-        "platform",
-        "language",
-    }
-    if len(metric_names) == 1 and len(data) <= 12 and (x_key in PIE_FRIENDLY_DIMS):
-        pie_data = [{"name": r.get(x_key), "value": r.get(metric_names[0], 0)} for r in data]
-        return {
-            "chart_type": "pie",
-            "title": f"{x_key} Distribution",
-            "data": pie_data,
-            "value_key": "value",
-            "label_key": "name",
-        }
-
-    # 否则：柱状图
-    y_key = metric_names[0]
-    return {
-        "chart_type": "bar",
-        "title": f"{x_key} - {y_key}",
-        "data": data,
-        "x_key": x_key,
-        "y_key": y_key,
-        "color": "#6366f1",
-        "show_change": False,
-    }
+    基于列式解码（decode_ga_report）：同一份 report 的图表与摘要共用一次解码；
+    数据点按 ChartBudget 裁剪（TopN + "Other" / LTTB 降采样），载荷大小与报表行数无关。
+    """
+    return shape_chart(frame if frame is not None else decode_ga_report(result))
 
 
 def _chart_key_for_report(result: dict[str, Any], chart: dict[str, Any] | None) -> str | None:
@@ -458,17 +348,14 @@ async def _stream_chart_description_with_llm(
     *,
     on_update: Callable[[str], Awaitable[None]] | None = None,
 ) -> str | None:
-    """使用 LLM 流式生成图表分析，并支持按 chunk 更新 UI。"""
+    """使用 LLM 流式生成图表分析，并支持按 chunk 更新 UI（on_update 收到的是新增片段）。"""
     if not chart or not chart.get("data"):
         return None
 
     try:
-        # 简化数据以减少 token
-        # 如果数据量过大，只取前N条或汇总信息
-        data_preview = chart["data"]
-        if isinstance(data_preview, list) and len(data_preview) > 10:
-            data_preview = data_preview[:10]
-        
+        # 简化数据以减少 token：只取前 N 条
+        data_preview = chart_preview(chart)
+
         prompt = f"""You are a professional Data Analyst. Based on the following chart data, write a short English analysis conclusion.
 Focus on maximum values, trend changes, or outliers. The language should be natural and professional, like reporting to a client.
 
@@ -479,14 +366,18 @@ Data Overview: {json.dumps(data_preview, ensure_ascii=False)}
 Analysis Conclusion:"""
 
         parts: list[str] = []
+        metrics.incr("report_narration.per_chart.llm_calls")
         try:
-            async for chunk in llm_nano.astream(prompt, config={"callbacks": []}):
+            async for chunk in get_model_router().model("narrate", streaming=True).astream(
+                prompt, config={"callbacks": []}
+            ):
+                record_usage("per_chart", chunk)
                 piece = getattr(chunk, "content", chunk)
                 if not isinstance(piece, str) or not piece:
                     continue
                 parts.append(piece)
                 if on_update:
-                    await on_update("".join(parts))
+                    await on_update(piece)
         except Exception as e:
             # astream 失败时降级到非流式
             logger.warning(f"[Report] Streaming description failed, fallback to nostream: {e}")
@@ -496,7 +387,9 @@ Analysis Conclusion:"""
         if content:
             return content
 
-        resp = await llm_nano_nostream.ainvoke(prompt, config={"callbacks": []})
+        metrics.incr("report_narration.per_chart.llm_calls")
+        resp = await get_model_router().ainvoke("narrate", prompt, config={"callbacks": []})
+        record_usage("per_chart", resp)
         return getattr(resp, "content", str(resp)).strip() or None
     except Exception as e:
         logger.warning(f"[Report] Generated description failed: {e}")
@@ -632,8 +525,6 @@ async def report_init(state: ReportState) -> dict[str, Any]:
     # ============ LLM 意图分类：判断是能力询问还是数据请求 ============
     is_capability_inquiry = False
     try:
-        from agent.utils.llm import llm_nano_nostream
-        
         intent_prompt = f"""You are an Intent Classifier. Determine which category the user's question belongs to:
 
 1. capability_inquiry: User asks what the system can do, what reports are supported, what functions are available, what data can be queried, etc.
@@ -643,7 +534,7 @@ User Question: {user_text}
 
 Output only one label: capability_inquiry or data_request"""
         
-        resp = await llm_nano_nostream.ainvoke(intent_prompt, config={"callbacks": []})
+        resp = await get_model_router().ainvoke("classify", intent_prompt, config={"callbacks": []})
         intent_label = getattr(resp, "content", str(resp)).strip().lower()
         is_capability_inquiry = "capability_inquiry" in intent_label
     except Exception as e:
@@ -686,6 +577,66 @@ Output only one label: capability_inquiry or data_request"""
     }
 
 
+class _ReportToolError(Exception):
+    """GA 工具调用失败（触发 first-error 取消其余调用）。"""
+
+    def __init__(self, message: str, *, is_auth: bool) -> None:
+        super().__init__(message)
+        self.message = message
+        self.is_auth = is_auth
+
+
+async def _fetch_report_item(tool_obj: Any, tool_name: str, args: dict[str, Any]) -> Any:
+    """执行单个 plan item 的 GA 调用并规范化结果；出错时抛出 _ReportToolError。"""
+    # 打印调用参数
+    logger.debug("[MCP Debug] 调用工具: %s", tool_name)
+    logger.debug("[MCP Debug] 调用参数: %s", json.dumps(args, indent=2, ensure_ascii=False))
+    try:
+        out = await tool_obj.ainvoke(args)
+    except ToolException as e:
+        # 特定处理 LangChain Tool 执行异常（如 Validation Error / input_value=None）
+        # 这通常意味着 MCP 连接问题、授权过期导致返回空、或参数严重错误
+        err_msg = str(e)
+        logger.warning("[MCP Error] ToolException caught: %s", err_msg)
+        if "input_value=None" in err_msg or "validation error" in err_msg:
+            # Suspect Auth failure or server no response
+            raise _ReportToolError(
+                "Please check your Google Analytics authorization status. The service returned an empty response, which usually indicates an expired token.",
+                is_auth=True,  # Assume auth issue, guide to check
+            ) from e
+        raise _ReportToolError(f"Tool execution error: {err_msg}", is_auth=False) from e
+    except Exception as e:
+        logger.exception("[MCP Debug] ❌ 调用工具时发生异常: %s", e)
+        error_msg = str(e)
+        # 检查是否为 token 过期错误
+        if is_token_expired_error(error_msg):
+            logger.warning("[Report] 检测到 TOKEN_REFRESH_FAILED (from exception): %s", error_msg)
+            raise _ReportToolError(error_msg, is_auth=True) from e
+        logger.warning("[Report] 工具调用异常: %s", error_msg)
+        raise _ReportToolError(error_msg, is_auth=False) from e
+
+    # 统一判断 GA MCP 错误返回（token 过期 / 一般错误）
+    is_err, err_msg, is_auth_err = check_ga_tool_error(out)
+    if is_err:
+        logger.warning("[Report] GA MCP tool error (auth=%s): %s", is_auth_err, err_msg)
+        raise _ReportToolError(err_msg, is_auth=is_auth_err)
+
+    # 打印原始 MCP 返回结果
+    logger.debug("[MCP Debug] 原始返回结果 (type: %s): %s", type(out), out)
+
+    norm = normalize_ga_tool_result(out)
+
+    # 检查关键字段
+    if isinstance(norm, dict):
+        rows_count = len(norm.get("rows") or [])
+        dim_headers = norm.get("dimension_headers") or []
+        metric_headers = norm.get("metric_headers") or []
+        logger.debug("[MCP Debug] 数据统计: rows=%s, dimensions=%s, metrics=%s", rows_count, len(dim_headers), len(metric_headers))
+        if rows_count == 0:
+            logger.debug("[MCP Debug] ⚠️ 警告: 返回的数据行数为 0，可能没有匹配的数据")
+    return norm
+
+
 async def report_execute_tool(state: ReportState) -> dict[str, Any]:
     """Planning + Execution：先基于 MCP 工具列表规划，再批量执行。"""
     anchor_msg = _get_anchor_msg(state)
@@ -714,24 +665,29 @@ async def report_execute_tool(state: ReportState) -> dict[str, Any]:
     # 收集每个图表的 chart_analysis UI，用于：1) 流式推送 2) 返回 ui 做持久化/回放
     chart_ui_updates: list[UIMessage] = []
 
-    # 构建工具详情（给 LLM 参考）
-    tool_details = []
-    for spec in tool_specs: # 不要限制数量，除非真的装不下
-        # 既然我们重构了，input_schema 里会有极其详细的定义
-        # 直接转成 JSON 字符串贴进去
-        schema_str = json.dumps(spec.input_schema, indent=2, ensure_ascii=False)
-        
-        tool_details.append(f"### Tool: {spec.name}\n")
-        tool_details.append(f"Description: {spec.description}\n")
-        tool_details.append(f"Args Definition (Schema):\n```json\n{schema_str}\n```\n")
-    tool_info = "\n".join(tool_details)
+    def _planning_prefix() -> str:
+        # 构建工具详情（给 LLM 参考）
+        tool_details = []
+        for spec in tool_specs: # 不要限制数量，除非真的装不下
+            # 既然我们重构了，input_schema 里会有极其详细的定义
+            # 直接转成 JSON 字符串贴进去
+            schema_str = json.dumps(spec.input_schema, indent=2, ensure_ascii=False)
+
+            tool_details.append(f"### Tool: {spec.name}\n")
+            tool_details.append(f"Description: {spec.description}\n")
+            tool_details.append(f"Args Definition (Schema):\n```json\n{schema_str}\n```\n")
+        return REPORT_PLANNING_PROMPT.format(tool_info="\n".join(tool_details), property_id=property_id)
 
     # Planning + Execution 模式：先让 AI 规划出需要哪些数据
-    planning_prompt = REPORT_PLANNING_PROMPT.format(
-        user_text=user_text,
-        tool_info=tool_info,
-        property_id=property_id
-    )
+    # 静态部分（规则 / 工具 schema / 示例）按工具目录 + property 只构建一次并放在前面，用户问题放在最后
+    catalog_hash = tool_catalog_hash(tool_specs)
+    planning_prompt = assemble(
+        "report_planning",
+        static_section(
+            "report_planning", REPORT_PLANNING_PROMPT_VERSION, _planning_prefix, key=f"{catalog_hash}:{property_id}"
+        ),
+        REPORT_PLANNING_USER_PROMPT.format(user_text=user_text),
+    ).text
 
     # 构建工具名到 schema 的映射
     tool_schema_map: dict[str, dict[str, Any]] = {
@@ -743,34 +699,16 @@ async def report_execute_tool(state: ReportState) -> dict[str, Any]:
         plan_items: list[dict[str, Any]] | None = None
         plan_descs: list[str] = []
 
-        # Step 1: LLM 规划（内部 JSON）
+        # Step 1: LLM 规划（结构化输出；相同问题 / 工具目录 / property 命中计划缓存时跳过）
         try:
-            # 使用 LangChain + Gemini
-            llm_gemini = ChatGoogleGenerativeAI(
-                model=os.getenv("GOOGLE_FLASH_MODEL"),
-                google_api_key=os.getenv("GOOGLE_API_KEY"),
-                thinking_level=os.getenv("REPORT_THINKING_LEVEL"),
+            plan_items = await generate_report_plan(
+                planning_prompt,
+                cache_key=plan_cache_key(user_text, catalog_hash, property_id),
             )
-            plan_resp = await llm_gemini.ainvoke(planning_prompt,config={"callbacks": []})
-            plan_content = plan_resp.content
-            
-            # Handle case where content is a list of blocks (e.g. [{'type': 'text', 'text': '...'}])
-            if isinstance(plan_content, list):
-                plan_text = "".join([
-                    item.get("text", "") for item in plan_content 
-                    if isinstance(item, dict) and item.get("type") == "text"
-                ])
-            else:
-                plan_text = str(plan_content)
-
-            plan_json = json.loads(plan_text)
-            maybe_items = plan_json.get("plan") if isinstance(plan_json, dict) else None
-            if isinstance(maybe_items, list) and maybe_items:
-                plan_items = maybe_items
         except Exception as e:
             logger.error(f"Gemini Planning Failed: {e}")
             plan_items = None
-        
+
         if not plan_items:
             # Plan generation failed (empty or None), notify user to retry
             ui_fail_msg = _make_ui_message(
@@ -803,32 +741,30 @@ async def report_execute_tool(state: ReportState) -> dict[str, Any]:
                 seen_dims.add(dims_key)
                 unique_plan.append(item)
 
-        # 步骤 3：依次执行 plan 中的工具调用
+        # 步骤 3：并发执行 plan 中的工具调用（同一个 MCP session，并发数受 REPORT_TOOL_CONCURRENCY 限制）
+        # - 每个图表的数据一到就开始生成分析文本
+        # - 卡片按 plan 顺序推送（item i 等 item i-1 推完卡片后再推），保证 UI 顺序稳定
+        # - 任一调用出错即取消其余调用（auth 错误优先上报）
         charts: dict[str, Any] = {}
         summary: dict[str, Any] | None = None
         raws: list[Any] = []
+        comparisons: dict[str, Any] = {}
         tool_error_message: str | None = None  # GA MCP 错误文案（token 过期或一般错误）
         tool_error_is_auth: bool = False  # True=需重新 OAuth，False=一般错误
 
         writer = get_stream_writer()
 
-        for idx, item in enumerate(unique_plan):
-            if tool_error_message is not None:
-                break
+        prepared: list[tuple[str | None, dict[str, Any], Any]] = []
+        for item in unique_plan:
             tool_name = item.get("tool")
             args = item.get("args") or {}
             desc = item.get("desc") or tool_name
             if desc:
                 plan_descs.append(str(desc))
 
-            # “处理中…”提示：在 MCP 调用开始时显示，但隐藏时机保持在“开始输出分析内容/分析结束”等位置
-            loading_ui_id = f"chart_analysis_loading:{getattr(anchor_msg, 'id', '')}:mcp:{idx}"
-            loading_title = str(desc or tool_name or "Data Query")
-            loading_shown = False
-
             if tool_name in {"run_report", "run_realtime_report"}:
                 args = _normalize_ga_tool_args(str(tool_name), args, property_id=property_id)
-            
+
             # 根据工具的 schema 过滤参数，移除工具不支持的参数
             tool_schema = tool_schema_map.get(tool_name)
             if tool_schema:
@@ -838,195 +774,202 @@ async def report_execute_tool(state: ReportState) -> dict[str, Any]:
                     removed_keys = set(args_before_filter.keys()) - set(args.keys())
                     if removed_keys:
                         logger.debug("[MCP Debug] ⚠️ 已过滤工具 %s 不支持的参数: %s", tool_name, removed_keys)
-
-            tool_obj = tools_by_name.get(tool_name)
-            if tool_obj is None:
-                norm = {"error": f"unknown tool: {tool_name}"}
+            prepared.append((tool_name, args, desc))
+
+        anchor_id = getattr(anchor_msg, "id", "")
+        results: list[Any] = [None] * len(prepared)
+        frames: list[GAFrame | None] = [None] * len(prepared)
+        chart_keys: list[str | None] = [None] * len(prepared)
+        # 环比：上一周期查询（best-effort，失败 / 超时不影响报表）
+        previous: dict[int, tuple[dict[str, Any], asyncio.Task[GAFrame | None]]] = {}
+        # 每个 item 推送给前端（并持久化）的卡片，按 plan 顺序汇总
+        item_ui: list[list[UIMessage]] = [[] for _ in prepared]
+        turns = [asyncio.Event() for _ in range(len(prepared) + 1)]
+        turns[0].set()
+        loading_visible: dict[int, bool] = {}
+        semaphore = asyncio.Semaphore(max(1, REPORT_TOOL_CONCURRENCY))
+        # 分析文本流式更新：按时间/字数合并，只下发新增片段
+        analysis_ui = UICoalescer(text_fields=("description",), writer=writer)
+        # batched 模式：所有图表到齐后一次调用生成全部分析文本
+        narration_mode = "batched" if REPORT_NARRATION_MODE == "batched" else "per_chart"
+        narrator = BatchNarrator(len(prepared)) if narration_mode == "batched" else None
+        narration_started: list[float] = []
+        narration_cache = get_narration_cache()
+
+        async def _narrate(
+            chart: dict[str, Any],
+            on_update: Callable[[str], Awaitable[None]],
+            batched: asyncio.Future[str | None] | None,
+            cached: str | None = None,
+        ) -> str | None:
+            if not narration_started:
+                narration_started.append(time.perf_counter())
+            if cached:
+                # 缓存命中：直接回放到分析卡
+                await on_update(cached)
+                return cached
+            text = await batched if batched is not None else None
+            if text:
+                await on_update(text)
             else:
+                text = await _stream_chart_description_with_llm(chart, on_update=on_update)
+            if text and narration_cache is not None:
+                await narration_cache.store(chart, text)
+            return text
+
+        async def _fetch_previous(idx: int, prev_args: dict[str, Any]) -> GAFrame | None:
+            tool_name = str(prepared[idx][0])
+            try:
+                async with semaphore:
+                    norm = await _fetch_report_item(tools_by_name[tool_name], tool_name, prev_args)
+            except _ReportToolError as e:
+                metrics.incr("report_comparison.failed")
+                logger.warning(f"[Report][comparison] 上一周期查询失败（忽略环比）: {e.message}")
+                return None
+            if isinstance(norm, dict) and "rows" in norm:
+                return decode_ga_report(norm)
+            return None
+
+        def _start_previous_fetches() -> None:
+            """在当前周期的调用之后创建，排队时当前周期的查询优先拿到并发名额。"""
+            if not REPORT_COMPARISON_ENABLED:
+                return
+            for idx, (tool_name, args, _) in enumerate(prepared):
+                prev_args = previous_period_args(str(tool_name), args) if tool_name in tools_by_name else None
+                if prev_args:
+                    previous[idx] = (prev_args, asyncio.create_task(_fetch_previous(idx, prev_args)))
+
+        async def _collect_comparisons() -> None:
+            """当前周期完成后最多再等 REPORT_COMPARISON_TIMEOUT_S，对齐两期数据写入 comparisons。"""
+            tasks = [task for _, task in previous.values()]
+            if not tasks:
+                return
+            started = time.perf_counter()
+            _, pending = await asyncio.wait(tasks, timeout=max(0.0, REPORT_COMPARISON_TIMEOUT_S))
+            for task in pending:
+                task.cancel()
+            metrics.observe("report_comparison.wait_ms", (time.perf_counter() - started) * 1000)
+            if pending:
+                metrics.incr("report_comparison.timeout", len(pending))
+            for idx, (prev_args, task) in previous.items():
+                key, frame = chart_keys[idx], frames[idx]
+                if task in pending or task.cancelled() or task.exception() is not None:
+                    continue
+                prev_frame = task.result()
+                if key is None or frame is None or prev_frame is None:
+                    continue
                 try:
-                    # MCP 开始调用前：先显示“处理中…”提示（用 desc 作为标题）
-                    loading_ui_msg = _make_ui_message(
-                        name="chart_analysis_loading",
-                        ui_id=loading_ui_id,
-                        anchor_msg=anchor_msg,
-                        props={
-                            "chart_key": str(tool_name or ""),
-                            "chart_title": loading_title,
-                            "hidden": False,
+                    comparisons[key] = build_comparison(
+                        frame,
+                        prev_frame,
+                        current_args=prepared[idx][1],
+                        previous_args=prev_args,
+                        top_n=REPORT_COMPARISON_TOP_N,
+                    )
+                except Exception as e:
+                    logger.warning(f"[Report][comparison] 环比计算失败（{key}）: {e}")
+            metrics.incr("report_comparison.charts", len(comparisons))
+
+        def _set_loading(idx: int, hidden: bool) -> None:
+            """“处理中…”提示：MCP 调用开始时显示，开始输出分析内容/分析结束时隐藏。"""
+            tool_name, _, desc = prepared[idx]
+            if hidden and not loading_visible.get(idx):
+                return
+            loading_visible[idx] = not hidden
+            loading_ui_msg = _make_ui_message(
+                name="chart_analysis_loading",
+                ui_id=f"chart_analysis_loading:{anchor_id}:mcp:{idx}",
+                anchor_msg=anchor_msg,
+                props={
+                    "chart_key": str(tool_name or ""),
+                    "chart_title": str(desc or tool_name or "Data Query"),
+                    "hidden": hidden,
+                },
+            )
+            if writer:
+                writer({"ui": [loading_ui_msg]})
+
+        async def _execute_item(idx: int) -> None:
+            nonlocal summary
+            tool_name, args, _ = prepared[idx]
+            tool_obj = tools_by_name.get(tool_name)
+            narration: asyncio.Task[str | None] | None = None
+            try:
+                if tool_obj is None:
+                    norm: Any = {"error": f"unknown tool: {tool_name}"}
+                else:
+                    async with semaphore:
+                        norm = await _fetch_report_item(tool_obj, str(tool_name), args)
+                results[idx] = norm
+
+                chart: dict[str, Any] | None = None
+                key: str | None = None
+                frame: GAFrame | None = None
+                if isinstance(norm, dict) and ("rows" in norm or "dimension_headers" in norm):
+                    frame = frames[idx] = decode_ga_report(norm)
+                    chart = _build_chart_from_ga_report(norm, frame)
+                    key = _chart_key_for_report(norm, chart)
+
+                streamed: list[str] = []
+                card_pushed = False
+                analysis_ui_id = f"chart_analysis:{anchor_id}:{key}"
+
+                def _analysis_msg(text: str) -> UIMessage:
+                    assert chart is not None
+                    return analysis_ui.push(
+                        "chart_analysis",
+                        analysis_ui_id,
+                        {
+                            "chart_key": key,
+                            "chart_title": chart.get("title", key),
+                            "chart_type": chart.get("chart_type", "chart"),
+                            "description": text,
                         },
+                        message=anchor_msg,
                     )
-                    if writer:
-                        writer({"ui": [loading_ui_msg]})
-                        loading_shown = True
-
-                    # 打印调用参数
-                    logger.debug("[MCP Debug] 调用工具: %s", tool_name)
-                    logger.debug("[MCP Debug] 调用参数: %s", json.dumps(args, indent=2, ensure_ascii=False))
-                    
-                    out = await tool_obj.ainvoke(args)
-
-                    # 统一判断 GA MCP 错误返回（token 过期 / 一般错误）
-                    is_err, err_msg, is_auth_err = check_ga_tool_error(out)
-                    if is_err:
-                        tool_error_message = err_msg
-                        tool_error_is_auth = is_auth_err
-                        logger.warning(
-                            "[Report] GA MCP tool error (auth=%s): %s",
-                            is_auth_err,
-                            tool_error_message,
-                        )
-                        break
-
-                    # 打印原始 MCP 返回结果
-                    logger.debug("[MCP Debug] 原始返回结果 (type: %s):", type(out))
-                    if isinstance(out, dict):
-                        logger.debug("%s", json.dumps(out, indent=2, ensure_ascii=False))
-                    elif isinstance(out, str):
-                        logger.debug("%s", out)
-                    else:
-                        logger.debug("%s", out)
-                    
-                    norm = normalize_ga_tool_result(out)
-                    
-                    # 打印规范化后的结果
-                    logger.debug("[MCP Debug] 规范化后的结果: %s", json.dumps(norm, indent=2, ensure_ascii=False))
-                    
-                    # 检查关键字段
-                    if isinstance(norm, dict):
-                        rows_count = len(norm.get("rows") or [])
-                        dim_headers = norm.get("dimension_headers") or []
-                        metric_headers = norm.get("metric_headers") or []
-                        logger.debug("[MCP Debug] 数据统计: rows=%s, dimensions=%s, metrics=%s", rows_count, len(dim_headers), len(metric_headers))
-                        if rows_count == 0:
-                            logger.debug("[MCP Debug] ⚠️ 警告: 返回的数据行数为 0，可能没有匹配的数据")
-                    
-                except ToolException as e:
-                    # 特定处理 LangChain Tool 执行异常（如 Validation Error / input_value=None）
-                    # 这通常意味着 MCP 连接问题、授权过期导致返回空、或参数严重错误
-                    err_msg = str(e)
-                    logger.warning("[MCP Error] ToolException caught: %s", err_msg)
-                    if "input_value=None" in err_msg or "validation error" in err_msg:
-                        # Suspect Auth failure or server no response
-                        tool_error_message = "Please check your Google Analytics authorization status. The service returned an empty response, which usually indicates an expired token."
-                        tool_error_is_auth = True # Assume auth issue, guide to check
-                    else:
-                        tool_error_message = f"Tool execution error: {err_msg}"
-                    
-                    # 记录详细日志但不崩溃
-                    norm = {"error": tool_error_message}
-                    break # 发生严重工具错误，通常中断后续执行比较安全
 
-                except Exception as e:
-                    logger.exception("[MCP Debug] ❌ 调用工具时发生异常: %s", e)
-                    error_msg = str(e)
-                    norm = {"error": error_msg}
-                    
-                    # 检查是否为 token 过期错误
-                    if is_token_expired_error(error_msg):
-                        tool_error_message = error_msg
-                        tool_error_is_auth = True
-                        logger.warning(
-                            "[Report] 检测到 TOKEN_REFRESH_FAILED (from exception): %s",
-                            error_msg,
-                        )
-                        break
-                    else:
-                        # 其他异常，也设置为工具错误
-                        tool_error_message = error_msg
-                        tool_error_is_auth = False
-                        logger.warning(
-                            "[Report] 工具调用异常: %s",
-                            error_msg,
-                        )
-                        break
-
-            raws.append({"desc": desc, "tool": tool_name, "args": args, "result": norm})
-            if summary is None:
-                summary = _try_build_summary_from_report(norm)
-            if isinstance(norm, dict) and ("rows" in norm or "dimension_headers" in norm):
-                chart = _build_chart_from_ga_report(norm)
-                key = _chart_key_for_report(norm, chart)
+                async def _update_analysis(piece: str) -> None:
+                    streamed.append(piece)
+                    # 卡片尚未轮到推送时只记录文本，轮到时一次性带上
+                    if not card_pushed:
+                        return
+                    _set_loading(idx, hidden=True)
+                    # 只下发新增片段，按时间/字数合并后推送
+                    analysis_ui.update("chart_analysis", analysis_ui_id, append={"description": piece})
+
                 if key and chart:
+                    # 数据一到就开始生成分析，不必等前面的图表（batched 模式下等全部图表到齐）
+                    cached = await narration_cache.lookup(chart) if narration_cache is not None else None
+                    # 同步登记到 narrator：即使 narration 任务随后被取消，批量调用也不会一直等它
+                    batched = None
+                    if narrator is not None:
+                        if cached:
+                            narrator.skip(idx)
+                        else:
+                            batched = narrator.submit(idx, chart)
+                    narration = asyncio.create_task(_narrate(chart, _update_analysis, batched, cached))
+                elif narrator is not None:
+                    narrator.skip(idx)
+
+                # 按 plan 顺序推送：等待前一个 item 推完卡片
+                await turns[idx].wait()
+                try:
+                    if summary is None:
+                        summary = _try_build_summary_from_report(norm, frame)
                     # 如果 key 已存在，跳过（避免覆盖）
-                    if key not in charts:
-                        chart_title = chart.get("title", key)
-                        chart_type = chart.get("chart_type", "chart")
+                    owns_chart = bool(key and chart and key not in charts)
+                    if owns_chart:
+                        assert key is not None and chart is not None
                         charts[key] = chart
-
-                        # 1) 先推一个空分析卡，随后流式更新同一张卡
-                        analysis_ui_id = f"chart_analysis:{getattr(anchor_msg, 'id', '')}:{key}"
-                        analysis_props = {
-                            "chart_key": key,
-                            "chart_title": chart_title,
-                            "chart_type": chart_type,
-                            "description": "",
-                        }
-                        analysis_ui_msg = _make_ui_message(
-                            name="chart_analysis",
-                            ui_id=analysis_ui_id,
-                            anchor_msg=anchor_msg,
-                            props=analysis_props,
-                        )
-                        if writer:
-                            writer({"ui": [analysis_ui_msg]})
-
-                        last_analysis_ui: UIMessage | None = None
-                        loading_hidden = False
-
-                        async def _update_analysis(text: str) -> None:
-                            nonlocal last_analysis_ui, loading_hidden
-                            # 隐藏位置保持不变：开始输出分析内容时隐藏“处理中…”
-                            if loading_shown and not loading_hidden:
-                                loading_hidden = True
-                                loading_hide_msg = _make_ui_message(
-                                    name="chart_analysis_loading",
-                                    ui_id=loading_ui_id,
-                                    anchor_msg=anchor_msg,
-                                    props={
-                                        "chart_key": str(tool_name or ""),
-                                        "chart_title": loading_title,
-                                        "hidden": True,
-                                    },
-                                )
-                                if writer:
-                                    writer({"ui": [loading_hide_msg]})
-                            ui_msg = _make_ui_message(
-                                name="chart_analysis",
-                                ui_id=analysis_ui_id,
-                                anchor_msg=anchor_msg,
-                                props={
-                                    "chart_key": key,
-                                    "chart_title": chart_title,
-                                    "chart_type": chart_type,
-                                    "description": text,
-                                },
-                            )
-                            last_analysis_ui = ui_msg
-                            if writer:
-                                writer({"ui": [ui_msg]})
-
-                        # 2) 流式生成分析文本，并在流结束后落盘到 chart
-                        desc_text = await _stream_chart_description_with_llm(chart, on_update=_update_analysis)
-                        if desc_text:
-                            chart["description"] = desc_text
-                            if last_analysis_ui is None:
-                                last_analysis_ui = _make_ui_message(
-                                    name="chart_analysis",
-                                    ui_id=analysis_ui_id,
-                                    anchor_msg=anchor_msg,
-                                    props={
-                                        "chart_key": key,
-                                        "chart_title": chart_title,
-                                        "chart_type": chart_type,
-                                        "description": desc_text,
-                                    },
-                                )
-                        if last_analysis_ui is not None:
-                            chart_ui_updates.append(last_analysis_ui)
-                        # 注意：loading 卡已前置到 MCP 调用阶段，这里不再显示
-
-                        # 3) 紧跟着输出单图表卡，实现“分析 → 图表”成对结构
-                        chart_ui_id = f"report_charts:{getattr(anchor_msg, 'id', '')}:{key}"
+                        chart_keys[idx] = key
+                        # 1) 先推分析卡（带上已生成的文本），随后流式更新同一张卡
+                        card_pushed = True
+                        latest_text = "".join(streamed)
+                        _analysis_msg(latest_text)
+                        if latest_text:
+                            _set_loading(idx, hidden=True)
+
+                        # 2) 紧跟着输出单图表卡，实现“分析 → 图表”成对结构
                         report_snapshot = {
                             "site_id": state.get("site_id"),
                             "report_type": "overview",
@@ -1036,7 +979,7 @@ async def report_execute_tool(state: ReportState) -> dict[str, Any]:
                         }
                         chart_ui_msg = _make_ui_message(
                             "report_charts",
-                            chart_ui_id,
+                            f"report_charts:{anchor_id}:{key}",
                             anchor_msg,
                             {
                                 "status": "done",
@@ -1045,85 +988,98 @@ async def report_execute_tool(state: ReportState) -> dict[str, Any]:
                                 "report": report_snapshot,
                             },
                         )
-                        chart_ui_updates.append(chart_ui_msg)
                         if writer:
                             writer({"ui": [chart_ui_msg]})
+                finally:
+                    turns[idx + 1].set()
+
+                if not owns_chart:
+                    # 重复 key / 非图表数据：不会进入分析流程，避免“处理中…”卡悬挂
+                    if narration is not None:
+                        narration.cancel()
+                    analysis_ui.discard(analysis_ui_id)
+                    _set_loading(idx, hidden=True)
+                    return
+
+                # 3) 等待分析文本生成结束，落盘到 chart
+                assert narration is not None
+                desc_text = await narration
+                if desc_text:
+                    chart["description"] = desc_text
+                item_ui[idx] = [_analysis_msg(desc_text or "".join(streamed)), chart_ui_msg]
+                analysis_ui.discard(analysis_ui_id)
+                # 兜底：如果流式没有任何 chunk（未触发 _update_analysis），在本图表结束时隐藏“处理中…”
+                _set_loading(idx, hidden=True)
+            except BaseException:
+                turns[idx + 1].set()
+                if narration is not None:
+                    narration.cancel()
+                if narrator is not None:
+                    narrator.cancel()
+                for _, task in previous.values():
+                    task.cancel()
+                analysis_ui.discard()
+                raise
+
+        # MCP 调用开始前：按 plan 顺序先显示“处理中…”提示（用 desc 作为标题）
+        for idx, (tool_name, _, _) in enumerate(prepared):
+            if tool_name in tools_by_name:
+                _set_loading(idx, hidden=False)
 
-                        # 兜底：如果流式没有任何 chunk（未触发 _update_analysis），在本图表结束时隐藏“处理中…”
-                        if loading_shown and not loading_hidden:
-                            loading_hidden = True
-                            loading_hide_msg = _make_ui_message(
-                                name="chart_analysis_loading",
-                                ui_id=loading_ui_id,
-                                anchor_msg=anchor_msg,
-                                props={
-                                    "chart_key": str(tool_name or ""),
-                                    "chart_title": loading_title,
-                                    "hidden": True,
-                                },
-                            )
-                            if writer:
-                                writer({"ui": [loading_hide_msg]})
-                    else:
-                        # 重复 key：不会进入分析流程，避免“处理中…”卡悬挂
-                        if loading_shown:
-                            loading_hide_msg = _make_ui_message(
-                                name="chart_analysis_loading",
-                                ui_id=loading_ui_id,
-                                anchor_msg=anchor_msg,
-                                props={
-                                    "chart_key": str(tool_name or ""),
-                                    "chart_title": loading_title,
-                                    "hidden": True,
-                                },
-                            )
-                            if writer:
-                                writer({"ui": [loading_hide_msg]})
-                else:
-                    # tool 返回非图表数据：隐藏“处理中…”卡，避免悬挂
-                    if loading_shown:
-                        loading_hide_msg = _make_ui_message(
-                            name="chart_analysis_loading",
-                            ui_id=loading_ui_id,
-                            anchor_msg=anchor_msg,
-                            props={
-                                "chart_key": str(tool_name or ""),
-                                "chart_title": loading_title,
-                                "hidden": True,
-                            },
-                        )
-                        if writer:
-                            writer({"ui": [loading_hide_msg]})
-            else:
-                # norm 不是 dict：隐藏“处理中…”卡，避免悬挂
-                if loading_shown:
-                    loading_hide_msg = _make_ui_message(
-                        name="chart_analysis_loading",
-                        ui_id=loading_ui_id,
-                        anchor_msg=anchor_msg,
-                        props={
-                            "chart_key": str(tool_name or ""),
-                            "chart_title": loading_title,
-                            "hidden": True,
-                        },
-                    )
-                    if writer:
-                        writer({"ui": [loading_hide_msg]})
+        try:
+            async with asyncio.TaskGroup() as tg:
+                for idx in range(len(prepared)):
+                    tg.create_task(_execute_item(idx))
+                _start_previous_fetches()
+        except* _ReportToolError as eg:
+            errors = [e for e in eg.exceptions if isinstance(e, _ReportToolError)]
+            first = next((e for e in errors if e.is_auth), errors[0])
+            tool_error_message = first.message
+            tool_error_is_auth = first.is_auth
+            # 其余调用已被取消：隐藏仍在显示的“处理中…”卡
+            for idx in list(loading_visible):
+                _set_loading(idx, hidden=True)
+        if not tool_error_message:
+            await _collect_comparisons()
+        if narration_started:
+            narration_ms = (time.perf_counter() - narration_started[0]) * 1000
+            metrics.observe(f"report_narration.{narration_mode}.wall_ms", narration_ms)
+            logger.info(f"[Report][narration] mode={narration_mode} charts={len(charts)} wall_ms={narration_ms:.0f}")
+
+        for idx, (tool_name, args, desc) in enumerate(prepared):
+            if results[idx] is not None:
+                result = results[idx]
+                frame = frames[idx]
+                if frame is not None:
+                    # state 里只保留预算内的行（图表与证据包只用到裁剪后的行）
+                    result = bound_ga_result(result, frame, max_rows=REPORT_RAW_MAX_ROWS)
+                # 超过阈值的结果外置到 Blob 存储，state / checkpoint 中只保留引用
+                result = await aoffload(result, kind="ga_result")
+                raws.append({"desc": desc, "tool": tool_name, "args": args, "result": result})
+            chart_ui_updates.extend(item_ui[idx])
 
         return (
             f"已完成 {len(unique_plan)} 次数据获取（{', '.join(str(p.get('desc','')) for p in unique_plan)}）",
             charts,
             summary or {},
             raws,
+            comparisons,
             plan_descs,
             tool_error_message,
             tool_error_is_auth,
         )
 
     try:
-        final_text, charts, summary, raws, plan_descs, tool_error_msg, tool_error_auth = await with_ga_tools(
-            site_id=site_id, tenant_id=tenant_id, fn=_run
-        )
+        (
+            final_text,
+            charts,
+            summary,
+            raws,
+            comparisons,
+            plan_descs,
+            tool_error_msg,
+            tool_error_auth,
+        ) = await with_ga_tools(site_id=site_id, tenant_id=tenant_id, fn=_run)
         
         # ============ GA MCP 返回错误：按类型展示（重新 OAuth / 一般错误）============
         if tool_error_msg:
@@ -1212,7 +1168,13 @@ async def report_execute_tool(state: ReportState) -> dict[str, Any]:
             writer({"ui": [progress_hide]})
         return {
             "ui": [ui_fetch, ui_plan, progress_done, progress_hide, *chart_ui_updates],
-            "tool_result": {"final": final_text, "charts": charts, "summary": summary, "raws": raws},
+            "tool_result": {
+                "final": final_text,
+                "charts": charts,
+                "summary": summary,
+                "raws": raws,
+                "comparisons": comparisons,
+            },
             "tool_error": None,
         }
     except Exception as e:
@@ -1588,7 +1550,7 @@ Please reply in markdown format, including:
 
 Reply:"""
         
-        resp = await llm_nostream.ainvoke(response_prompt, config={"callbacks": []})
+        resp = await get_model_router().ainvoke("summarize", response_prompt, config={"callbacks": []})
         raw_content = getattr(resp, "content", str(resp)).strip()
         
         # 去除可能存在的 markdown 代码块标记
@@ -21,11 +21,13 @@ from langgraph.types import interrupt
 from pydantic import BaseModel, Field
 
 from agent.config import get_logger
+from agent.prompts.assembly import assemble, astatic_section, content_hash
 from agent.state import ShortcutState
 from agent.tools.auth import ensure_mcp_token
-from agent.tools.site_mcp import call_mcp_tool, get_mcp_tools, is_mcp_error_result
+from agent.tools.site_mcp import call_mcp_tool, get_mcp_tool_catalog, is_mcp_error_result
+from agent.utils.blobstore import BlobNotFoundError, aoffload, aresolve, offload
 from agent.utils.helpers import message_text, find_ai_message_by_id
-from agent.utils.llm import llm_nano, llm_nostream
+from agent.utils.model_router import get_model_router
 
 logger = get_logger(__name__)
 
@@ -64,12 +66,8 @@ class IntentClassificationResult(BaseModel):
 # ============ 内部工具函数 ============
 
 def _get_anchor_msg(state: ShortcutState) -> AIMessage:
-    anchor_id = state.get("shortcut_anchor_id")
-    if anchor_id:
-        for m in state.get("messages", []):
-            if isinstance(m, AIMessage) and getattr(m, "id", None) == anchor_id:
-                return m
-    return AIMessage(id=str(uuid.uuid4()), content="")
+    anchor = find_ai_message_by_id(state, state.get("shortcut_anchor_id"))
+    return anchor if anchor is not None else AIMessage(id=str(uuid.uuid4()), content="")
 
 
 def _push_workflow_ui(
@@ -225,8 +223,10 @@ def _format_plan_brief(steps: list[dict[str, Any]]) -> str:
 
 
 def _extract_tool_schema(tool: Any) -> dict[str, Any]:
-    """尽力从 LangChain Tool 提取 input schema（参考 ga_mcp 的简洁写法）。"""
+    """尽力从 LangChain Tool / MCP Tool 定义提取 input schema（参考 ga_mcp 的简洁写法）。"""
     args_schema = getattr(tool, "args_schema", None)
+    if args_schema is None:
+        args_schema = getattr(tool, "inputSchema", None)
     schema = args_schema if isinstance(args_schema, dict) else {}
     if not schema and hasattr(args_schema, "model_json_schema"):
         try:
@@ -263,8 +263,8 @@ def _tool_to_spec(tool: Any) -> dict[str, Any]:
         "desc": desc,
         # 给 LLM 用：字段/required 摘要（默认）
         "input_schema": _schema_brief(schema),
-        # 给前端/调试用：完整 schema（可能较大）
-        "input_schema_full": schema,
+        # 给前端/调试用：完整 schema（可能较大，超过阈值时外置为 Blob 引用）
+        "input_schema_full": offload(schema, kind="tool_schema"),
     }
 
 
@@ -443,7 +443,8 @@ async def shortcut_init(state: ShortcutState) -> dict[str, Any]:
         try:
             # Shortcut v2 仅允许使用 site-setting-basic 的 MCP tools
             # （ShortcutState 不包含 intent 字段，因此这里必须显式传入）
-            mcp_tools = await get_mcp_tools(tenant_id=tenant_id, site_id=site_id, intent="shortcut", token=token)
+            # 工具目录来自进程级缓存，热租户不会每轮都 tools/list
+            catalog = await get_mcp_tool_catalog(tenant_id=tenant_id, site_id=site_id, intent="shortcut", token=token)
         except Exception as e:
             ui_err = push_ui_message(
                 "mcp_workflow",
@@ -468,8 +469,9 @@ async def shortcut_init(state: ShortcutState) -> dict[str, Any]:
                 "error": f"get_tools_failed: {e}",
             }
 
-        for t in mcp_tools or []:
-            tools.append(_tool_to_spec(t))
+        for entry in catalog:
+            specs = entry.view("shortcut_specs", lambda ts: [_tool_to_spec(t) for t in ts])
+            tools.extend(dict(spec) for spec in specs)
         tools_fetched_at = now_ts
 
     ui_ready = push_ui_message(
@@ -504,43 +506,10 @@ async def shortcut_init(state: ShortcutState) -> dict[str, Any]:
     }
 
 
-async def shortcut_plan(state: ShortcutState) -> dict[str, Any]:
-    """生成 plan_steps（多步），并标记 is_risky。如果检测到能力询问，则生成能力说明。"""
-    tools = state.get("tools") or []
-    user_text = _last_user_text(state)
-    conversation_history = _format_conversation_history(state)
-
-    # ============ LLM 意图分类和能力说明生成============
-    is_capability_inquiry = False
-    capability_response = ""
-    
-    # 构建工具摘要和 schema 供 LLM 参考
-    tool_summaries = []
-    tool_lines = []
-    for tool in tools:
-        code = str(tool.get("code") or tool.get("name") or "")
-        desc = str(tool.get("desc") or tool.get("description") or "")
-        if code:
-            tool_summaries.append(f"- {code}: {desc}")
-        schema = tool.get("input_schema") or {}
-        input_schema_full = tool.get("input_schema_full") or {}
-        if code:
-            tool_lines.append(
-                f"- {code}: {desc}\n"
-                f"  input_schema: {json.dumps(schema, ensure_ascii=False)}\n"
-                f"  input_schema_full: {json.dumps(input_schema_full, ensure_ascii=False)}"
-            )
-    tools_info = "\n".join(tool_summaries) if tool_summaries else "No available tools"
-    tools_info_full = "\n".join(tool_lines) if tool_lines else "- (No available tools)"
-
-    result = IntentClassificationResult(intent="action_request")
-    try:
-        unified_prompt = f"""You are a background operation assistant. Please analyze the user's intent and generate an appropriate response.
-
-Conversation History (Latest {8}):
-{conversation_history}
-
-Current User Question: {user_text}
+# shortcut_plan 的静态 prompt（说明 + 工具 schema）；修改时递增 SHORTCUT_PLAN_PROMPT_VERSION
+SHORTCUT_PLAN_PROMPT_VERSION = "1"
+SHORTCUT_PLAN_PROMPT = """You are a background operation assistant. Please analyze the user's intent and generate an appropriate response.
+The conversation history and the current user question are given at the end of this prompt.
 
 Available Tools List:
 {tools_info}
@@ -589,7 +558,62 @@ Plan Output Requirements:
    - If no missing params, leave param_prompt empty.
 """
 
-        structured_llm = llm_nostream.with_structured_output(schema=IntentClassificationResult )
+SHORTCUT_PLAN_USER_PROMPT = """Conversation History (Latest 8):
+{conversation_history}
+
+Current User Question: {user_text}
+"""
+
+
+def _tool_summaries(tools: list[dict[str, Any]]) -> str:
+    lines = []
+    for tool in tools:
+        code = str(tool.get("code") or tool.get("name") or "")
+        if code:
+            lines.append(f"- {code}: {str(tool.get('desc') or tool.get('description') or '')}")
+    return "\n".join(lines) if lines else "No available tools"
+
+
+async def shortcut_plan(state: ShortcutState) -> dict[str, Any]:
+    """生成 plan_steps（多步），并标记 is_risky。如果检测到能力询问，则生成能力说明。"""
+    tools = state.get("tools") or []
+    user_text = _last_user_text(state)
+    conversation_history = _format_conversation_history(state)
+
+    # ============ LLM 意图分类和能力说明生成============
+    is_capability_inquiry = False
+    capability_response = ""
+    
+    # 工具摘要（静态前缀与能力询问的降级回复共用；不依赖前缀缓存是否命中）
+    tools_info = _tool_summaries(tools)
+
+    async def _tools_prefix() -> str:
+        # 构建工具 schema 供 LLM 参考
+        tool_lines = []
+        for tool in tools:
+            code = str(tool.get("code") or tool.get("name") or "")
+            desc = str(tool.get("desc") or tool.get("description") or "")
+            schema = tool.get("input_schema") or {}
+            input_schema_full = await aresolve(tool.get("input_schema_full")) or {}
+            if code:
+                tool_lines.append(
+                    f"- {code}: {desc}\n"
+                    f"  input_schema: {json.dumps(schema, ensure_ascii=False)}\n"
+                    f"  input_schema_full: {json.dumps(input_schema_full, ensure_ascii=False)}"
+                )
+        tools_info_full = "\n".join(tool_lines) if tool_lines else "- (No available tools)"
+        return SHORTCUT_PLAN_PROMPT.format(tools_info=tools_info, tools_info_full=tools_info_full)
+
+    result = IntentClassificationResult(intent="action_request")
+    try:
+        # 静态部分（说明 + 全部工具 schema）按工具目录只构建一次并放在前面；对话历史 / 用户问题放在最后
+        unified_prompt = assemble(
+            "shortcut_plan",
+            await astatic_section("shortcut_plan", SHORTCUT_PLAN_PROMPT_VERSION, _tools_prefix, key=content_hash(tools)),
+            SHORTCUT_PLAN_USER_PROMPT.format(conversation_history=conversation_history, user_text=user_text),
+        ).text
+
+        structured_llm = get_model_router().structured("extract", IntentClassificationResult)
         result: IntentClassificationResult = await structured_llm.ainvoke(
             [
                 {"role": "system", "content": "Only output structured JSON matching the schema, no extra text."},
@@ -608,6 +632,9 @@ Plan Output Requirements:
             capability_response = re.sub(r"\s*```$", "", capability_response, flags=re.MULTILINE).strip()
             logger.info(f"[Shortcut] Generated capability_response (first 200 chars): {capability_response[:200]}...")
             
+    except BlobNotFoundError:
+        # 工具 schema 取不回时不能带着残缺的工具说明继续规划
+        raise
     except Exception as e:
         logger.error(f"[Shortcut] Intent classification and response generation failed: {e}")
         is_capability_inquiry = False
@@ -972,7 +999,8 @@ async def shortcut_execute_step(state: ShortcutState) -> dict[str, Any]:
             "args": args,
             "ok": success,
             "error": error_msg if not success else None,
-            "result": result_obj,
+            # 大结果外置到 Blob 存储，step_outputs 里只保留引用
+            "result": await aoffload(result_obj, kind="shortcut_step"),
             "duration_ms": dur_ms,
         }
         
@@ -1085,11 +1113,12 @@ async def shortcut_finalize(state: ShortcutState) -> dict[str, Any]:
         # 提取所有成功步骤的结果
         successful_outputs = [o for o in outputs if isinstance(o, dict) and o.get("ok")]
         if successful_outputs:
+            # 步骤结果可能外置在 Blob 存储中；取不回时直接抛出 BlobNotFoundError，不带着缺失的结果生成回复
+            resolved = [(out, await aresolve(out.get("result"))) for out in successful_outputs]
             try:
                 # 构建结果摘要供 LLM 参考
                 results_summary = []
-                for out in successful_outputs:
-                    result = out.get("result")
+                for out, result in resolved:
                     title = out.get("title") or out.get("tool") or ""
                     if isinstance(result, dict):
                         # 提取关键信息
@@ -1100,7 +1129,7 @@ async def shortcut_finalize(state: ShortcutState) -> dict[str, Any]:
                         }
                         results_summary.append(summary)
 
-                # 使用 LLM 生成用户友好的回复（流式：llm_nano SSE）
+                # 使用 LLM 生成用户友好的回复（流式：narrate 任务，默认 nano SSE）
                 response_prompt = f"""You are a background operation assistant. The user's request has been completed. Please generate a friendly reply based on the execution results.
 
 User Request: {user_text}
@@ -1130,7 +1159,7 @@ Reply:"""
                         pass
 
                 parts: list[str] = []
-                async for chunk in llm_nano.astream(response_prompt):
+                async for chunk in get_model_router().model("narrate", streaming=True).astream(response_prompt):
                     # chunk 可能是 MessageChunk，也可能是 str；尽量兼容
                     piece = getattr(chunk, "content", chunk)
                     if not isinstance(piece, str) or not piece:
@@ -1159,9 +1188,8 @@ Reply:"""
                 logger.error(f"[Shortcut] Finalize response generation failed: {e}")
                 # 降级：直接格式化结果
                 response_parts = ["✅ Completed following operations:\n"]
-                for out in successful_outputs:
+                for out, result in resolved:
                     title = out.get("title") or out.get("tool") or ""
-                    result = out.get("result")
                     if isinstance(result, dict):
                         response_parts.append(f"### {title}\n")
                         response_parts.append(f"```json\n{json.dumps(result, ensure_ascii=False, indent=2)}\n```\n")
@@ -0,0 +1,104 @@
+"""Prompt 组装：静态（带版本）内容在前，每次请求的内容在后。
+
+模型提供方的 prompt 前缀缓存（OpenAI 自动缓存 / Gemini 隐式缓存）只对逐字节相同的前缀生效；
+把用户问题、对话历史等动态内容夹在工具 schema 之类的大段静态内容中间会让缓存整体失效。
+
+- static_section / astatic_section: 按（名称, 版本, key）缓存静态段落（key 通常为工具目录哈希），
+  同一工具目录只构建一次（包括解析 Blob 引用、json.dumps schema 等）
+- assemble: 拼成 AssembledPrompt（prefix + suffix），可缓存前缀与动态部分的 token 估算记入
+  metrics（prompt_prefix.<name>.prefix_tokens / suffix_tokens）
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable
+
+from agent.config import get_logger
+from agent.utils import metrics
+from agent.utils.cache import MemoryLRUCache
+
+logger = get_logger(__name__)
+
+# 静态段落缓存条目数（名称 × 版本 × 工具目录）
+MAX_STATIC_SECTIONS = 128
+# prefix 与 suffix 之间的固定分隔
+SEPARATOR = "\n\n"
+
+_sections = MemoryLRUCache(MAX_STATIC_SECTIONS)
+
+
+def approx_tokens(text: str) -> int:
+    """粗略估算 token 数（约 4 字符 / token）。"""
+    return (len(text) + 3) // 4
+
+
+def content_hash(payload: Any) -> str:
+    """任意 JSON 可序列化内容的短摘要（用作静态段落的 key，如工具目录）。"""
+    raw = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+
+@dataclass(frozen=True, slots=True)
+class AssembledPrompt:
+    """组装好的 prompt：可缓存的静态前缀 + 每次请求的动态后缀。"""
+
+    name: str
+    # 可缓存前缀：同一版本 / 同一工具目录下逐字节相同
+    prefix: str
+    # 每次请求的内容
+    suffix: str
+
+    @property
+    def text(self) -> str:
+        """完整 prompt 文本（前缀 + 分隔 + 后缀）。"""
+        return f"{self.prefix}{SEPARATOR}{self.suffix}" if self.suffix else self.prefix
+
+    @property
+    def prefix_tokens(self) -> int:
+        """可缓存前缀的 token 估算。"""
+        return approx_tokens(self.prefix)
+
+    def messages(self) -> list[dict[str, str]]:
+        """拆成消息列表：system 为静态前缀，user 为动态内容。"""
+        return [{"role": "system", "content": self.prefix}, {"role": "user", "content": self.suffix}]
+
+
+def _section_key(name: str, version: str, key: str) -> str:
+    return f"{name}:{version}:{key}"
+
+
+def _cached(cache_key: str) -> str | None:
+    text = _sections.get(cache_key)
+    metrics.incr("prompt_prefix.static." + ("hit" if text is not None else "miss"))
+    return text
+
+
+def static_section(name: str, version: str, build: Callable[[], str], *, key: str = "") -> str:
+    """静态段落（同一 name / version / key 只构建一次）。"""
+    cache_key = _section_key(name, version, key)
+    text = _cached(cache_key)
+    if text is None:
+        text = build()
+        _sections.set(cache_key, text, float("inf"))
+    return text
+
+
+async def astatic_section(name: str, version: str, build: Callable[[], Awaitable[str]], *, key: str = "") -> str:
+    """static_section 的异步版本（构建过程需要 await，如解析 Blob 引用）。"""
+    cache_key = _section_key(name, version, key)
+    text = _cached(cache_key)
+    if text is None:
+        text = await build()
+        _sections.set(cache_key, text, float("inf"))
+    return text
+
+
+def assemble(name: str, prefix: str, suffix: str) -> AssembledPrompt:
+    """prefix（静态）+ suffix（动态）-> AssembledPrompt，并记录可缓存前缀的 token 估算。"""
+    prompt = AssembledPrompt(name=name, prefix=prefix, suffix=suffix)
+    metrics.observe(f"prompt_prefix.{name}.prefix_tokens", prompt.prefix_tokens)
+    metrics.observe(f"prompt_prefix.{name}.suffix_tokens", approx_tokens(suffix))
+    return prompt
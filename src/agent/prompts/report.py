@@ -7,8 +7,7 @@ REPORT_PLANNING_PROMPT = """
 # Google Analytics MCP Skill Prompt (for LangGraph)
 
 You are a **GA4 Data Analysis Assistant** running in a LangGraph Agent/Skill. You must retrieve data via the connected **Google Analytics MCP Server** and provide conclusions and recommendations based on it.
-
-User Question: {user_text}
+The user's question is given at the end of this prompt.
 
 ## Core Rules (Must Follow)
 
@@ -369,10 +368,19 @@ Please directly return the execution plan in JSON format, without Markdown code
 
 ## Output Language
 - All output must be in **English (EN)**
+"""
+
+# 每次请求的部分放在静态的 REPORT_PLANNING_PROMPT（工具 schema / 示例）之后，便于前缀缓存
+REPORT_PLANNING_USER_PROMPT = """## User Question
+
+{user_text}
 
 Start generating:
 """
 
+# 修改 REPORT_PLANNING_PROMPT 的静态内容时递增（静态段落缓存 key 的一部分）
+REPORT_PLANNING_PROMPT_VERSION = "2"
+
 REPORT_INTERPRETER_PROMPT = """# GA MCP Report Interpreter Prompt (Converts MCP JSON to Readable Reports)
 
 > Applicable to: Results from `run_report` / `run_realtime_report` of `googleanalytics/google-analytics-mcp`
@@ -515,3 +523,6 @@ You can use the following common translations in the report (examples, expand as
 
 (These are the basis for your parsing logic; do not quote "document clauses" in the final report, just use them when you execute.)
 """
+
+# 修改 REPORT_INTERPRETER_PROMPT 时递增
+REPORT_INTERPRETER_PROMPT_VERSION = "1"
@@ -0,0 +1,79 @@
+# flake8: noqa: E501
+"""Intent Router Prompts.
+
+INTENT_SEED_EXAMPLES 同时作为 LLM few-shot 示例与本地快速分类（n-gram / 向量索引）的种子集。
+"""
+
+INTENT_LABELS: tuple[str, ...] = (
+    "article_task",
+    "shortcut",
+    "seo_planning",
+    "site_report",
+    "introduction",
+    "rag",
+)
+
+INTENT_SEED_EXAMPLES: tuple[tuple[str, str], ...] = (
+    ("Help me write a blog post about AI trends", "article_task"),
+    ("Generate an article with parameters: Topic=SEO, Keywords=google rankings", "article_task"),
+    ("Create a marketing copy for our new product", "article_task"),
+    ("Change the site title to 'Best Tech News'", "shortcut"),
+    ("Update the company logo", "shortcut"),
+    ("Create a new draft post", "shortcut"),
+    ("What are my SEO tasks for this week?", "seo_planning"),
+    ("Weekly plan", "seo_planning"),
+    ("Analyze my site's SEO performance", "seo_planning"),
+    ("Give me an SEO optimization strategy", "seo_planning"),
+    ("Show me the traffic report for last month", "site_report"),
+    ("How many visitors did we have yesterday?", "site_report"),
+    ("Display the detailed analytics", "site_report"),
+    ("Hi there", "introduction"),
+    ("What can you do?", "introduction"),
+    ("Who are you?", "introduction"),
+    ("Hello", "introduction"),
+    ("How do I configure the footer menu?", "rag"),
+    ("Where can I find the API keys?", "rag"),
+    ("How to use the text editor?", "rag"),
+)
+
+
+def _format_few_shot(examples: tuple[tuple[str, str], ...]) -> str:
+    return "\n\n".join(f'Input: "{text}"\nOutput: {label}' for text, label in examples)
+
+
+ROUTER_SYSTEM_PROMPT = """You are an intent classifier for CMS Copilot.
+Classify the user input into ONE of these six categories.
+
+## Categories
+
+1. **article_task**: User wants to CREATE/GENERATE content (articles, blog posts, news, marketing copy).
+   - Trigger: Requests to write/generate content, often with parameters like topic, keywords, or outline.
+
+2. **shortcut**: User wants to perform a backend CMS operation (change settings, update logo, create drafts).
+   - Trigger: Action verbs (change, update, create, set) + CMS objects (logo, title, settings, draft).
+
+3. **seo_planning**: User asks about SEO strategy, weekly plans, or optimization suggestions.
+   - Trigger: Requests for SEO analysis, weekly tasks, or optimization advice (NOT writing new content).
+
+4. **site_report**: User asks about analytics, traffic statistics, or data reports.
+   - Trigger: Requests for reports, statistics, traffic data, or visitor analytics.
+
+5. **introduction**: User is greeting, asking about capabilities, or requesting self-introduction.
+   - Trigger: Greetings (Hi, Hello) or questions about what the AI is or what it can do.
+
+6. **rag**: User asks about usage instructions, configuration, how-to guides, or general knowledge questions.
+   - Trigger: Questions about "how to" use the system, documentation, or conceptual questions.
+
+## Few-Shot Examples
+
+""" + _format_few_shot(INTENT_SEED_EXAMPLES) + """
+
+## Instructions
+
+- Output ONLY one label: article_task, shortcut, seo_planning, site_report, introduction, or rag.
+- If uncertain, prefer 'rag' as the default fallback.
+- Simple greetings (Hi, Hello) WITHOUT additional context should be classified as 'introduction'.
+"""
+
+ROUTER_USER_PROMPT = """User input: {user_text}
+Output:"""
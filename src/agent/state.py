@@ -6,16 +6,17 @@
 from typing import Any, Sequence
 
 from langchain_core.messages import BaseMessage
-from langgraph.graph.message import add_messages
 from langgraph.graph.ui import AnyUIMessage, ui_message_reducer
 from typing_extensions import Annotated, TypedDict
 
+from agent.history import windowed_messages
+
 
 class CopilotState(TypedDict):
     """主图状态。"""
 
-    # 消息列表
-    messages: Annotated[Sequence[BaseMessage], add_messages]
+    # 消息列表（带 id 索引；超出 MESSAGE_HISTORY_WINDOW 的旧消息由 history 节点归档）
+    messages: Annotated[Sequence[BaseMessage], windowed_messages]
     # UI 消息列表（Generative UI）
     ui: Annotated[Sequence[AnyUIMessage], ui_message_reducer]
     # 网站相关信息
@@ -33,6 +34,8 @@ class CopilotState(TypedDict):
     rag_anchor_id: str | None
     rag_started_at: float | None
     rag_session_id: str | None
+    # 本会话已发起的 RAG 提问数（上游按 session_id 保留上下文，后续提问不走答案缓存）
+    rag_turns: int
 
     # SEO 规划工作流
     seo_ui_id: str | None
@@ -93,7 +96,7 @@ class ShortcutState(TypedDict):
     """
 
     # 与父图共享的字段
-    messages: Annotated[Sequence[BaseMessage], add_messages]
+    messages: Annotated[Sequence[BaseMessage], windowed_messages]
     ui: Annotated[Sequence[AnyUIMessage], ui_message_reducer]
     tenant_id: str | None
     site_id: str | None
@@ -128,7 +131,7 @@ class ReportState(TypedDict):
     """
 
     # 与父图共享的字段
-    messages: Annotated[Sequence[BaseMessage], add_messages]
+    messages: Annotated[Sequence[BaseMessage], windowed_messages]
     ui: Annotated[Sequence[AnyUIMessage], ui_message_reducer]
     tenant_id: str | None
     site_id: str | None
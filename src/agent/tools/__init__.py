@@ -14,7 +14,7 @@ from agent.tools.seo import (
     get_mock_request_body,
     get_mock_weekly_tasks_response,
 )
-from agent.tools.site_mcp import call_mcp_tool, get_mcp_tools
+from agent.tools.site_mcp import call_mcp_tool, get_mcp_tool_catalog, get_mcp_tools
 
 __all__ = [
     "rag_query",
@@ -45,6 +45,7 @@ __all__ = [
     "list_apps",
     "call_mcp_tool",
     "get_mcp_tools",
+    "get_mcp_tool_catalog",
     "get_mcp_token",
     "ensure_mcp_token",
     "TokenResponse",
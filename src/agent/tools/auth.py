@@ -1,22 +1,26 @@
 """授权工具模块。
 
 提供获取访问令牌的功能。
+token 在进程内按 (site_id, tenant_id, aud) 缓存（并发请求合并为一次），
+预热阶段提前取到的 token 可被后续节点直接复用。
 """
 
 from __future__ import annotations
 
+import asyncio
+import concurrent.futures
+import threading
 import time
 from dataclasses import dataclass
 from typing import Any
 
-import httpx
-
 from agent.config import (
     AUTHORIZATION_API_URL,
     AUTHORIZATION_CLIENT_ID,
     AUTHORIZATION_CLIENT_SECRET,
     get_logger,
 )
+from agent.utils.http import get_http_client
 
 logger = get_logger(__name__)
 
@@ -76,28 +80,75 @@ async def get_mcp_token(
         "aud": aud,
     }
 
-    async with httpx.AsyncClient(timeout=timeout_s) as client:
-        response = await client.post(
-            url,
-            headers={
-                "Content-Type": "application/json",
-                "Accept": "application/json",
-            },
-            json=payload,
-        )
-        response.raise_for_status()
+    response = await get_http_client("auth").post(
+        url,
+        headers={
+            "Content-Type": "application/json",
+            "Accept": "application/json",
+        },
+        json=payload,
+        timeout=timeout_s,
+    )
+    response.raise_for_status()
+
+    data: dict[str, Any] = response.json()
+
+    # 验证必需的字段
+    if "access_token" not in data:
+        raise ValueError(f"响应中缺少 access_token 字段: {data}")
+
+    return TokenResponse(
+        token_type=data.get("token_type", "Bearer"),
+        expires_in=int(data.get("expires_in", 0)),
+        access_token=str(data["access_token"]),
+    )
 
-        data: dict[str, Any] = response.json()
 
-        # 验证必需的字段
-        if "access_token" not in data:
-            raise ValueError(f"响应中缺少 access_token 字段: {data}")
+# 提前刷新的余量（秒），避免边界情况下使用即将过期的 token
+_TOKEN_REFRESH_MARGIN_S = 60
 
-        return TokenResponse(
-            token_type=data.get("token_type", "Bearer"),
-            expires_in=int(data.get("expires_in", 0)),
-            access_token=str(data["access_token"]),
+_token_lock = threading.Lock()
+_token_cache: dict[tuple[str, str, str], tuple[str, float]] = {}
+_token_inflight: dict[tuple[str, str, str], concurrent.futures.Future[tuple[str, float]]] = {}
+
+
+async def get_cached_mcp_token(
+    *,
+    site_id: str,
+    tenant_id: str,
+    site_url: str,
+    aud: str = "site:mcp",
+) -> tuple[str, float]:
+    """获取访问令牌（进程内缓存 + 并发合并），返回 (access_token, expires_at)。"""
+    key = (site_id, tenant_id, aud)
+    with _token_lock:
+        cached = _token_cache.get(key)
+        if cached and time.time() < cached[1] - _TOKEN_REFRESH_MARGIN_S:
+            return cached
+        fut = _token_inflight.get(key)
+        leader = fut is None
+        if leader:
+            fut = _token_inflight[key] = concurrent.futures.Future()
+    assert fut is not None
+    if not leader:
+        return await asyncio.wrap_future(fut)
+
+    try:
+        requested_at = time.time()
+        token_response = await get_mcp_token(
+            site_id=site_id, tenant_id=tenant_id, site_url=site_url, aud=aud
         )
+        entry = (token_response.access_token, requested_at + token_response.expires_in)
+        with _token_lock:
+            _token_cache[key] = entry
+        fut.set_result(entry)
+        return entry
+    except BaseException as e:
+        fut.set_exception(e if isinstance(e, Exception) else RuntimeError("token 请求被取消"))
+        raise
+    finally:
+        with _token_lock:
+            _token_inflight.pop(key, None)
 
 
 async def ensure_mcp_token(
@@ -117,7 +168,7 @@ async def ensure_mcp_token(
     expires_at = state.get("mcp_token_expires_at")
     
     # 检查 token 是否存在且未过期（提前 60 秒刷新，避免边界情况）
-    if token and expires_at and current_time < (expires_at - 60):
+    if token and expires_at and current_time < (expires_at - _TOKEN_REFRESH_MARGIN_S):
         return token, {}
     
     # Token 不存在或已过期，需要重新获取
@@ -138,21 +189,19 @@ async def ensure_mcp_token(
             f"[{context}] Fetching new MCP token for "
             f"site_id={site_id}, tenant_id={tenant_id}"
         )
-        token_response = await get_mcp_token(
+        # 进程内缓存：预热阶段或其他会话已取到的有效 token 直接复用
+        access_token, expires_at = await get_cached_mcp_token(
             site_id=site_id,
             tenant_id=tenant_id,
             site_url="https://site-dev",
         )
         
-        # 计算过期时间戳
-        expires_at = current_time + token_response.expires_in
-        
         logger.info(
-            f"[{context}] MCP token fetched successfully, "
-            f"expires in {token_response.expires_in}s"
+            f"[{context}] MCP token ready, "
+            f"expires in {int(expires_at - current_time)}s"
         )
-        return token_response.access_token, {
-            "mcp_token": token_response.access_token,
+        return access_token, {
+            "mcp_token": access_token,
             "mcp_token_expires_at": expires_at,
         }
     except Exception as e:
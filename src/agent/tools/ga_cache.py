@@ -0,0 +1,204 @@
+"""GA 报表结果缓存模块。
+
+位于 call_ga_tool / with_ga_tools 之下，缓存成功的 run_report 结果：
+- key：site/tenant + 工具名 + 规范化后的参数（`_normalize_ga_tool_args` / `_filter_args_by_schema` 之后）
+- TTL 由 date_ranges 决定：实时报表不缓存；含今天的区间短 TTL；已结束的历史区间长 TTL；
+  相对日期（7daysAgo / yesterday）最多缓存到当天结束，跨天后同一 key 含义已变
+- 后端：内存 LRU，可选叠加 SQLite（GA_REPORT_CACHE_BACKEND=sqlite）
+"""
+
+from __future__ import annotations
+
+import asyncio
+import datetime as dt
+import hashlib
+import json
+import re
+from typing import Any
+
+from agent.config import (
+    GA_REPORT_CACHE_BACKEND,
+    GA_REPORT_CACHE_MAX_ENTRIES,
+    GA_REPORT_CACHE_PATH,
+    GA_REPORT_CACHE_TTL_HISTORICAL_S,
+    GA_REPORT_CACHE_TTL_REALTIME_S,
+    GA_REPORT_CACHE_TTL_RECENT_S,
+    GA_REPORT_CACHE_TTL_TODAY_S,
+    get_logger,
+)
+from agent.utils.cache import (
+    LazyCache,
+    TieredCache,
+    make_tiered_cache,
+)
+
+logger = get_logger(__name__)
+
+# 只缓存只读的报表类工具
+CACHEABLE_GA_TOOLS = frozenset({"run_report", "run_realtime_report"})
+
+_DAYS_AGO_RE = re.compile(r"^(\d+)daysago$")
+# GA 数据通常需要 24~48 小时才完全处理完，此前的区间视为仍可能变化
+_SETTLED_AFTER_DAYS = 2
+
+
+def _resolve_date(value: Any, today: dt.date) -> tuple[dt.date | None, bool]:
+    """把 GA 日期表达式解析为 (日期, 是否相对日期)；无法解析返回 (None, False)。"""
+    text = str(value or "").strip().lower()
+    if text == "today":
+        return today, True
+    if text == "yesterday":
+        return today - dt.timedelta(days=1), True
+    m = _DAYS_AGO_RE.match(text)
+    if m:
+        return today - dt.timedelta(days=int(m.group(1))), True
+    try:
+        return dt.date.fromisoformat(text), False
+    except ValueError:
+        return None, False
+
+
+def ga_report_ttl(tool_name: str, args: dict[str, Any], *, now: dt.datetime | None = None) -> float:
+    """按工具与 date_ranges 计算缓存 TTL（秒）；<=0 表示不缓存。"""
+    if tool_name == "run_realtime_report":
+        return GA_REPORT_CACHE_TTL_REALTIME_S
+    if tool_name not in CACHEABLE_GA_TOOLS:
+        return 0
+
+    now = now or dt.datetime.now()
+    today = now.date()
+    ranges = args.get("date_ranges") or []
+    if isinstance(ranges, dict):
+        ranges = [ranges]
+    if not ranges:
+        return GA_REPORT_CACHE_TTL_RECENT_S
+
+    ttl = GA_REPORT_CACHE_TTL_HISTORICAL_S
+    relative = False
+    for r in ranges:
+        if not isinstance(r, dict):
+            return GA_REPORT_CACHE_TTL_RECENT_S
+        end, end_relative = _resolve_date(r.get("end_date") or r.get("endDate"), today)
+        _, start_relative = _resolve_date(r.get("start_date") or r.get("startDate"), today)
+        relative = relative or end_relative or start_relative
+        if end is None:
+            ttl = min(ttl, GA_REPORT_CACHE_TTL_RECENT_S)
+        elif end >= today:
+            ttl = min(ttl, GA_REPORT_CACHE_TTL_TODAY_S)
+        elif (today - end).days < _SETTLED_AFTER_DAYS:
+            ttl = min(ttl, GA_REPORT_CACHE_TTL_RECENT_S)
+
+    if relative:
+        tomorrow = dt.datetime.combine(today + dt.timedelta(days=1), dt.time.min, tzinfo=now.tzinfo)
+        ttl = min(ttl, (tomorrow - now).total_seconds())
+    return ttl
+
+
+def ga_report_cache_key(
+    *, site_id: str | None, tenant_id: str | None, tool_name: str, args: dict[str, Any]
+) -> str:
+    """规范化参数生成缓存 key（dict 键排序；列表保持顺序，因为顺序影响返回列序）。"""
+    canonical = json.dumps(
+        {"site_id": site_id or "", "tenant_id": tenant_id or "", "tool": tool_name, "args": args},
+        sort_keys=True,
+        ensure_ascii=False,
+        separators=(",", ":"),
+        default=str,
+    )
+    return "ga:" + hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class GAReportCache:
+    """GA 报表结果缓存（TieredCache 的薄封装，磁盘 IO 放到线程池执行）。"""
+
+    def __init__(self, backend: TieredCache) -> None:
+        """包装给定的分层缓存。"""
+        self.backend = backend
+
+    def stats(self) -> dict[str, Any]:
+        """底层缓存的命中统计。"""
+        return self.backend.stats()
+
+    async def get(self, key: str) -> Any | None:
+        """读取缓存（有磁盘层时在线程池中执行）。"""
+        if self.backend.disk is None:
+            return self.backend.get(key)
+        return await asyncio.to_thread(self.backend.get, key)
+
+    async def set(self, key: str, value: Any, ttl_s: float) -> None:
+        """写入缓存（ttl_s<=0 时跳过；有磁盘层时在线程池中执行）。"""
+        if ttl_s <= 0:
+            return
+        if self.backend.disk is None:
+            self.backend.set(key, value, ttl_s)
+        else:
+            await asyncio.to_thread(self.backend.set, key, value, ttl_s)
+
+
+class CachedGATool:
+    """包装 GA LangChain tool：ainvoke 前查缓存，成功结果写回缓存。
+
+    其余属性（name / description / args_schema ...）透传给原 tool。
+    """
+
+    def __init__(self, tool: Any, cache: GAReportCache, *, site_id: str | None, tenant_id: str | None) -> None:
+        """site_id / tenant_id 参与缓存 key，不同站点互不命中。"""
+        self._tool = tool
+        self._cache = cache
+        self._site_id = site_id
+        self._tenant_id = tenant_id
+
+    def __getattr__(self, name: str) -> Any:
+        """未包装的属性透传给原 tool。"""
+        return getattr(self._tool, name)
+
+    async def ainvoke(self, args: dict[str, Any], *rest: Any, **kwargs: Any) -> Any:
+        """可缓存的调用先查缓存；未命中时调用原 tool，成功结果写回缓存。"""
+        # 延迟导入：ga_mcp 依赖本模块
+        from agent.tools.ga_mcp import check_ga_tool_error
+
+        tool_name = self._tool.name
+        ttl = ga_report_ttl(tool_name, args) if isinstance(args, dict) else 0
+        if ttl <= 0:
+            return await self._tool.ainvoke(args, *rest, **kwargs)
+
+        key = ga_report_cache_key(
+            site_id=self._site_id, tenant_id=self._tenant_id, tool_name=tool_name, args=args
+        )
+        cached = await self._cache.get(key)
+        if cached is not None:
+            logger.info(f"[GA_MCP][cache] 命中 tool={tool_name} site_id={self._site_id}")
+            return cached
+
+        out = await self._tool.ainvoke(args, *rest, **kwargs)
+        is_err, _, _ = check_ga_tool_error(out)
+        if not is_err:
+            await self._cache.set(key, out, ttl)
+        return out
+
+
+def wrap_ga_tool(tool: Any, *, site_id: str | None, tenant_id: str | None) -> Any:
+    """对可缓存的 GA 工具加缓存包装；缓存关闭或工具不可缓存时原样返回。"""
+    cache = get_ga_report_cache()
+    if cache is None or getattr(tool, "name", None) not in CACHEABLE_GA_TOOLS:
+        return tool
+    return CachedGATool(tool, cache, site_id=site_id, tenant_id=tenant_id)
+
+
+def _build_cache() -> GAReportCache | None:
+    tiered = make_tiered_cache(
+        GA_REPORT_CACHE_BACKEND,
+        path=GA_REPORT_CACHE_PATH,
+        table="ga_reports",
+        max_entries=GA_REPORT_CACHE_MAX_ENTRIES,
+        setting="GA_REPORT_CACHE_BACKEND",
+    )
+    return GAReportCache(tiered) if tiered is not None else None
+
+
+_CACHE: LazyCache[GAReportCache] = LazyCache(_build_cache)
+
+
+def get_ga_report_cache() -> GAReportCache | None:
+    """按 GA_REPORT_CACHE_BACKEND 懒加载缓存：memory / sqlite / off。"""
+    return _CACHE.get()
@@ -11,10 +11,14 @@ import json
 from dataclasses import dataclass
 from typing import Any
 
-from langchain_mcp_adapters.client import MultiServerMCPClient
-from langchain_mcp_adapters.tools import load_mcp_tools
-
 from agent.config import GA_MCP_URL, LLM_API_KEY, get_logger
+from agent.tools.ga_cache import wrap_ga_tool
+from agent.tools.mcp_catalog import ToolCatalogEntry, get_tool_catalog, make_catalog_key
+from agent.tools.mcp_pool import (
+    PooledMCPSession,
+    get_mcp_session_pool,
+    make_session_key,
+)
 from agent.tools.mcp_utils import (
     ensure_langchain_globals,
     extract_mcp_error_message,
@@ -112,44 +116,45 @@ class GAToolSpec:
     input_schema: dict[str, Any]
 
 
+_GA_SERVER = "ga-report"
+
+
+def _ga_connection(site_id: str, tenant_id: str | None) -> dict[str, Any]:
+    return {
+        "url": GA_MCP_URL,
+        "transport": "streamable_http",
+        "headers": _ga_headers(site_id, tenant_id),
+    }
+
+
+async def _ga_catalog_entry(connection: dict[str, Any]) -> ToolCatalogEntry:
+    """GA 工具目录（进程级缓存；未命中时在池化会话上 tools/list）。"""
+    pool = get_mcp_session_pool()
+    key = make_session_key(_GA_SERVER, connection)
+    return await get_tool_catalog().get(
+        make_catalog_key(connection),
+        lambda: pool.run(key, connection, lambda pooled: pooled.list_tools(), idempotent=True),
+    )
+
+
+def _to_ga_specs(tools: tuple[Any, ...]) -> list[GAToolSpec]:
+    return [
+        GAToolSpec(
+            name=t.name,
+            description=t.description or "",
+            input_schema=dict(t.inputSchema or {}),
+        )
+        for t in tools
+    ]
+
+
 async def list_ga_tool_specs(
     *, site_id: str , tenant_id: str | None = None
 ) -> list[GAToolSpec]:
-    """列出 GA MCP tools（用于 UI 展示）。"""
+    """列出 GA MCP tools（用于 UI 展示；命中目录缓存时不发起 tools/list）。"""
     ensure_langchain_globals()
-    client = MultiServerMCPClient(
-        {
-            "ga-report": {
-                "url": GA_MCP_URL,
-                "transport": "streamable_http",
-                "headers": _ga_headers(site_id, tenant_id),
-            }
-        }
-    )
-    async with client.session("ga-report") as session:
-        tools = await load_mcp_tools(session)
-        specs: list[GAToolSpec] = []
-        for t in tools:
-            try:
-                args_schema = getattr(t, "args_schema", None)
-                # args_schema 可能是 dict 或 Pydantic model
-                if isinstance(args_schema, dict):
-                    schema = args_schema
-                elif args_schema is not None and hasattr(args_schema, "model_json_schema"):
-                    schema = args_schema.model_json_schema()
-                else:
-                    schema = {}
-            except Exception as e:
-                logger.info(f"[GA_MCP] Failed to extract schema for {t.name}: {e}")
-                schema = {}
-            specs.append(
-                GAToolSpec(
-                    name=t.name,
-                    description=t.description or "",
-                    input_schema=schema,
-                )
-            )
-        return specs
+    entry = await _ga_catalog_entry(_ga_connection(site_id, tenant_id))
+    return list(entry.view("ga_tool_specs", _to_ga_specs))
 
 
 async def call_ga_tool(
@@ -159,7 +164,7 @@ async def call_ga_tool(
     site_id: str ,
     tenant_id: str | None = None,
 ) -> Any:
-    """调用 GA MCP 工具（每次调用建立一次会话，确保正确释放资源）。
+    """调用 GA MCP 工具（复用会话池中的会话，连接失效时自动重连一次）。
     
     如果 MCP 返回错误（isError=True），会捕获 ToolException 并转换为字典格式：
     {"success": False, "error": "错误消息", "isError": True, "errorCode": "..."}
@@ -169,64 +174,61 @@ async def call_ga_tool(
     logger.info(f"[GA_MCP][call_ga_tool] 调用工具: {tool_name}, site_id={site_id}")
     
     ensure_langchain_globals()
-    client = MultiServerMCPClient(
-        {
-            "ga-report": {
-                "url": GA_MCP_URL,
-                "transport": "streamable_http",
-                "headers": _ga_headers(site_id, tenant_id),
-            }
-        }
-    )
+    connection = _ga_connection(site_id, tenant_id)
     
     try:
-        async with client.session("ga-report") as session:
-            tools = await load_mcp_tools(session)
-            target = next((t for t in tools if t.name == tool_name), None)
-            if target is None:
-                error_msg = f"GA MCP 未找到工具: {tool_name}"
-                logger.error(f"[GA_MCP][call_ga_tool] {error_msg}")
-                raise RuntimeError(error_msg)
+        entry = await _ga_catalog_entry(connection)
+        if tool_name not in entry.names:
+            error_msg = f"GA MCP 未找到工具: {tool_name}"
+            logger.error(f"[GA_MCP][call_ga_tool] {error_msg}")
+            raise RuntimeError(error_msg)
+
+        async def _invoke(pooled: PooledMCPSession) -> Any:
+            target = next(t for t in pooled.bind_tools(entry) if t.name == tool_name)
+            target = wrap_ga_tool(target, site_id=site_id, tenant_id=tenant_id)
+            return await target.ainvoke(tool_input)
+
+        logger.info(f"[GA_MCP][call_ga_tool] 正在调用工具...")
+        try:
+            result = await get_mcp_session_pool().run(
+                make_session_key(_GA_SERVER, connection), connection, _invoke
+            )
+            logger.info(f"[GA_MCP][call_ga_tool] 工具调用完成")
+            return result
             
-            logger.info(f"[GA_MCP][call_ga_tool] 正在调用工具...")
-            try:
-                result = await target.ainvoke(tool_input)
-                logger.info(f"[GA_MCP][call_ga_tool] 工具调用完成")
-                return result
+        except Exception as tool_error:
+            # langchain_mcp_adapters 会在 MCP 返回 isError=True 时抛出 ToolException
+            from langchain_core.tools.base import ToolException
+            
+            if isinstance(tool_error, ToolException):
+                error_msg = str(tool_error)
+                logger.error(f"[GA_MCP][call_ga_tool] MCP 工具返回错误")
+                logger.error(f"[GA_MCP][call_ga_tool] 错误消息: {error_msg}")
+                logger.error(f"[GA_MCP][call_ga_tool] 工具名: {tool_name}")
+                logger.error(f"[GA_MCP][call_ga_tool] 输入参数: {json.dumps(tool_input, ensure_ascii=False, indent=2)}")
                 
-            except Exception as tool_error:
-                # langchain_mcp_adapters 会在 MCP 返回 isError=True 时抛出 ToolException
-                from langchain_core.tools.base import ToolException
+                # 构造错误字典
+                error_dict = {
+                    "success": False,
+                    "error": error_msg,
+                    "tool_name": tool_name,
+                    "isError": True
+                }
                 
-                if isinstance(tool_error, ToolException):
-                    error_msg = str(tool_error)
-                    logger.error(f"[GA_MCP][call_ga_tool] MCP 工具返回错误")
-                    logger.error(f"[GA_MCP][call_ga_tool] 错误消息: {error_msg}")
-                    logger.error(f"[GA_MCP][call_ga_tool] 工具名: {tool_name}")
-                    logger.error(f"[GA_MCP][call_ga_tool] 输入参数: {json.dumps(tool_input, ensure_ascii=False, indent=2)}")
-                    
-                    # 构造错误字典
-                    error_dict = {
-                        "success": False,
-                        "error": error_msg,
-                        "tool_name": tool_name,
-                        "isError": True
-                    }
-                    
-                    # 检查错误消息内容判断是否为 token 刷新失败
-                    if is_token_expired_error(error_msg):
-                        error_dict["errorCode"] = ERROR_CODE_TOKEN_REFRESH_FAILED
-                        logger.warning(f"[GA_MCP][call_ga_tool] 检测到 TOKEN_REFRESH_FAILED: {error_msg}")
-                    
-                    return error_dict
-                else:
-                    # 其他异常（如网络错误、超时等）
-                    logger.error(f"[GA_MCP][call_ga_tool] 工具调用异常: {type(tool_error).__name__}: {tool_error}", exc_info=True)
-                    return {
-                        "success": False,
-                        "error": f"工具调用异常: {str(tool_error)}",
-                        "tool_name": tool_name
-                    }
+                # 检查错误消息内容判断是否为 token 刷新失败
+                if is_token_expired_error(error_msg):
+                    error_dict["errorCode"] = ERROR_CODE_TOKEN_REFRESH_FAILED
+                    logger.warning(f"[GA_MCP][call_ga_tool] 检测到 TOKEN_REFRESH_FAILED: {error_msg}")
+                
+                return error_dict
+            else:
+                # 其他异常（如网络错误、超时等）
+                logger.error(f"[GA_MCP][call_ga_tool] 工具调用异常: {type(tool_error).__name__}: {tool_error}", exc_info=True)
+                return {
+                    "success": False,
+                    "error": f"工具调用异常: {str(tool_error)}",
+                    "tool_name": tool_name
+                }
                     
     except Exception as e:
         logger.error(f"[GA_MCP][call_ga_tool] 调用失败: {type(e).__name__}: {e}", exc_info=True)
@@ -242,20 +244,18 @@ async def with_ga_tools(
     """在同一个 MCP session 内加载 tools 并执行回调。
 
     适用于 ReAct：一次用户请求内连续调用多个工具，避免重复建连。
+    会话来自会话池（借出前校验可用性），tools 定义来自目录缓存；
+    报表类工具带结果缓存（见 ga_cache）。
     """
     ensure_langchain_globals()
-    client = MultiServerMCPClient(
-        {
-            "ga-report": {
-                "url": GA_MCP_URL,
-                "transport": "streamable_http",
-                "headers": _ga_headers(site_id, tenant_id),
-            }
+    connection = _ga_connection(site_id, tenant_id)
+    entry = await _ga_catalog_entry(connection)
+    pool = get_mcp_session_pool()
+    async with pool.session(make_session_key(_GA_SERVER, connection), connection, verify=True) as pooled:
+        tools_by_name = {
+            t.name: wrap_ga_tool(t, site_id=site_id, tenant_id=tenant_id)
+            for t in pooled.bind_tools(entry)
         }
-    )
-    async with client.session("ga-report") as session:
-        tools = await load_mcp_tools(session)
-        tools_by_name = {t.name: t for t in tools}
         return await fn(tools_by_name)
 
 
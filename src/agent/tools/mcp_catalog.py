@@ -0,0 +1,201 @@
+"""MCP 工具目录缓存模块。
+
+进程级缓存 tools/list 结果（原始 MCP Tool 定义），跨线程、跨 run 共享：
+- key 为 server url + site_id + tenant_id
+- TTL 内直接命中；过期但仍在 stale 窗口内时先返回旧值，并在后台刷新（stale-while-revalidate）
+- 同一 key 的并发请求合并为一次上游 tools/list（singleflight，跨事件循环同样生效）
+- 派生视图（GAToolSpec、shortcut spec、LangChain tools）通过 `ToolCatalogEntry.view` 按条目缓存
+"""
+
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import hashlib
+import json
+import threading
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from typing import Any, TypeVar
+
+from agent.config import MCP_TOOLS_CACHE_STALE_S, MCP_TOOLS_CACHE_TTL_S, get_logger
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True, slots=True)
+class ToolCatalogKey:
+    """工具目录缓存 key：同一 MCP server url 下按站点 / 租户隔离。"""
+
+    url: str
+    site_id: str
+    tenant_id: str
+
+
+def make_catalog_key(connection: dict[str, Any]) -> ToolCatalogKey:
+    """根据连接配置（url + X-Site-Id / X-Tenant-Id headers）生成目录 key；不含 token。"""
+    headers = connection.get("headers") or {}
+    return ToolCatalogKey(
+        url=str(connection.get("url") or ""),
+        site_id=str(headers.get("X-Site-Id") or ""),
+        tenant_id=str(headers.get("X-Tenant-Id") or ""),
+    )
+
+
+@dataclass(eq=False)
+class ToolCatalogEntry:
+    """一次 tools/list 的结果；条目不可变，刷新时整体替换。"""
+
+    key: ToolCatalogKey
+    tools: tuple[Any, ...]
+    fetched_at: float
+    version: str
+    _views: dict[str, Any] = field(default_factory=dict, repr=False)
+    _views_lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    @property
+    def names(self) -> list[str]:
+        """目录中的工具名（保持 tools/list 返回顺序）。"""
+        return [t.name for t in self.tools]
+
+    def view(self, name: str, build: Callable[[tuple[Any, ...]], T]) -> T:
+        """按名称缓存由工具定义派生的结构（如 spec 列表），每个条目只构建一次。"""
+        with self._views_lock:
+            if name not in self._views:
+                self._views[name] = build(self.tools)
+            return self._views[name]
+
+
+def _catalog_version(tools: list[Any]) -> str:
+    """工具名 + 描述 + inputSchema 的摘要，目录内容不变时版本不变。"""
+    payload = [
+        [t.name, t.description or "", t.inputSchema or {}]
+        for t in sorted(tools, key=lambda t: t.name)
+    ]
+    raw = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+
+class MCPToolCatalog:
+    """tools/list 结果的 TTL + singleflight 缓存（线程安全）。"""
+
+    def __init__(self, *, ttl_s: float = MCP_TOOLS_CACHE_TTL_S, stale_s: float = MCP_TOOLS_CACHE_STALE_S) -> None:
+        """ttl_s 内直接命中；其后 stale_s 内返回旧值并后台刷新。"""
+        self.ttl_s = ttl_s
+        self.stale_s = stale_s
+        self._lock = threading.Lock()
+        self._entries: dict[ToolCatalogKey, ToolCatalogEntry] = {}
+        self._inflight: dict[ToolCatalogKey, concurrent.futures.Future[ToolCatalogEntry]] = {}
+        self._background: set[asyncio.Task[Any]] = set()
+        self._stats = {"hits": 0, "stale_hits": 0, "misses": 0, "fetches": 0, "errors": 0}
+
+    def stats(self) -> dict[str, int]:
+        """计数器快照（hits / stale_hits / misses / fetches / errors / entries）。"""
+        with self._lock:
+            return {**self._stats, "entries": len(self._entries)}
+
+    def invalidate(self, key: ToolCatalogKey | None = None) -> None:
+        """丢弃 key 对应的条目（key 为空时清空全部）；进行中的请求不受影响。"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    async def get(
+        self,
+        key: ToolCatalogKey,
+        loader: Callable[[], Awaitable[list[Any]]],
+        *,
+        force_refresh: bool = False,
+    ) -> ToolCatalogEntry:
+        """返回 key 对应的工具目录；loader 负责执行一次上游 tools/list。"""
+        refresh = False
+        with self._lock:
+            entry = None if force_refresh else self._entries.get(key)
+            if entry is not None:
+                age = time.time() - entry.fetched_at
+                if age < self.ttl_s:
+                    self._stats["hits"] += 1
+                    return entry
+                if age < self.ttl_s + self.stale_s:
+                    self._stats["stale_hits"] += 1
+                    refresh = key not in self._inflight
+                else:
+                    entry = None
+            if entry is None:
+                self._stats["misses"] += 1
+
+        if entry is not None:
+            if refresh:
+                self._refresh_in_background(key, loader)
+            return entry
+        return await self._fetch(key, loader)
+
+    def _refresh_in_background(self, key: ToolCatalogKey, loader: Callable[[], Awaitable[list[Any]]]) -> None:
+        task = asyncio.get_running_loop().create_task(self._fetch(key, loader))
+        self._background.add(task)
+
+        def _done(t: asyncio.Task[Any]) -> None:
+            self._background.discard(t)
+            if not t.cancelled() and t.exception() is not None:
+                logger.warning(f"[MCP][catalog] 后台刷新失败 url={key.url} site_id={key.site_id}: {t.exception()}")
+
+        task.add_done_callback(_done)
+
+    async def _fetch(self, key: ToolCatalogKey, loader: Callable[[], Awaitable[list[Any]]]) -> ToolCatalogEntry:
+        with self._lock:
+            fut = self._inflight.get(key)
+            leader = fut is None
+            if leader:
+                fut = concurrent.futures.Future()
+                self._inflight[key] = fut
+        assert fut is not None
+        if not leader:
+            # 跟随者：等待 leader 的结果（concurrent Future 可跨事件循环/线程等待）
+            return await asyncio.wrap_future(fut)
+
+        try:
+            t0 = time.perf_counter()
+            tools = list(await loader())
+            entry = ToolCatalogEntry(
+                key=key,
+                tools=tuple(tools),
+                fetched_at=time.time(),
+                version=_catalog_version(tools),
+            )
+            with self._lock:
+                self._entries[key] = entry
+                self._stats["fetches"] += 1
+            logger.info(
+                f"[MCP][catalog] tools/list 完成 url={key.url} site_id={key.site_id} "
+                f"tools={len(tools)} 耗时={(time.perf_counter() - t0) * 1000:.0f}ms"
+            )
+            fut.set_result(entry)
+            return entry
+        except BaseException as e:
+            with self._lock:
+                self._stats["errors"] += 1
+            # leader 被取消时不把 CancelledError 传给跟随者，避免其误以为自身被取消
+            fut.set_exception(e if isinstance(e, Exception) else RuntimeError("tools/list 请求被取消"))
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+
+_CATALOG: MCPToolCatalog | None = None
+_CATALOG_LOCK = threading.Lock()
+
+
+def get_tool_catalog() -> MCPToolCatalog:
+    """获取进程级工具目录缓存（懒加载单例）。"""
+    global _CATALOG
+    if _CATALOG is None:
+        with _CATALOG_LOCK:
+            if _CATALOG is None:
+                _CATALOG = MCPToolCatalog()
+    return _CATALOG
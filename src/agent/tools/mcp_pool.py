@@ -0,0 +1,429 @@
+"""MCP 会话池模块。
+
+进程内复用已完成 initialize 的 MCP ClientSession（streamable HTTP），避免每次调用
+都重新走 initialize → notifications/initialized 握手（tools/list 结果由 mcp_catalog 缓存）：
+- 会话按 (server, site_id, tenant_id, url + headers 指纹) 复用，token 变化即换新会话
+- 每个会话由独立的 owner task 持有（anyio 要求 context 在同一 task 内进入/退出）
+- 空闲保活（ping）、空闲超时淘汰、最大会话数上限（LRU 淘汰空闲会话）
+- 复用的会话调用失败时丢弃并重连一次，仅限可证明请求未到达服务端的错误（建连失败、
+  流已关闭、会话已被服务端终止）；幂等调用（如 tools/list）对任意连接错误重试
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import time
+import weakref
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import AbstractAsyncContextManager, asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, TypeVar
+
+import anyio
+import httpx
+from langchain_core.tools.base import ToolException
+from langchain_mcp_adapters.client import MultiServerMCPClient
+from langchain_mcp_adapters.tools import convert_mcp_tool_to_langchain_tool
+from mcp.shared.exceptions import McpError
+from mcp.types import CONNECTION_CLOSED
+
+from agent.config import (
+    MCP_POOL_CONNECT_TIMEOUT_S,
+    MCP_POOL_IDLE_TTL_S,
+    MCP_POOL_KEEPALIVE_S,
+    MCP_POOL_MAX_SESSIONS,
+    get_logger,
+)
+from agent.tools.mcp_catalog import ToolCatalogEntry
+from agent.tools.mcp_utils import (
+    ensure_langchain_globals,
+    patch_mcp_streamable_http_bom,
+)
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+_MAX_LIST_PAGES = 100
+# 借出前校验：复用会话空闲超过该时长才 ping，避免热路径上多一次往返
+_VERIFY_AFTER_IDLE_S = 10.0
+# streamable HTTP 客户端在服务端返回 404（会话已失效）时合成的错误码
+_SESSION_TERMINATED_CODE = 32600
+
+SessionFactory = Callable[[str, dict[str, Any]], AbstractAsyncContextManager[Any]]
+
+
+def open_client_session(server: str, connection: dict[str, Any]) -> AbstractAsyncContextManager[Any]:
+    """默认会话工厂：通过 langchain-mcp-adapters 建立并初始化 ClientSession。"""
+    return MultiServerMCPClient({server: connection}).session(server)
+
+
+def _is_unsent_error(exc: BaseException) -> bool:
+    """错误是否可证明请求未被服务端处理（建连失败、写入已关闭的流、服务端已终止该会话）。"""
+    while exc is not None:
+        if isinstance(exc, (httpx.ConnectError, anyio.ClosedResourceError, anyio.BrokenResourceError)):
+            return True
+        if isinstance(exc, McpError) and exc.error.code == _SESSION_TERMINATED_CODE:
+            return True
+        exc = exc.__cause__
+    return False
+
+
+def _is_connection_error(exc: BaseException) -> bool:
+    """连接层错误（请求可能已送达）；仅幂等调用据此重试。"""
+    if _is_unsent_error(exc):
+        return True
+    if isinstance(exc, McpError):
+        return exc.error.code == CONNECTION_CLOSED
+    return isinstance(exc, (httpx.TransportError, anyio.EndOfStream, ConnectionError))
+
+
+@dataclass(frozen=True, slots=True)
+class MCPSessionKey:
+    """会话池 key：同一 server / 站点 / 租户 / 连接配置共用一个会话。"""
+
+    server: str
+    site_id: str
+    tenant_id: str
+    fingerprint: str
+
+
+def make_session_key(server: str, connection: dict[str, Any]) -> MCPSessionKey:
+    """根据 server 名与连接配置生成会话池 key。
+
+    fingerprint 覆盖 url 与全部 headers（含 Authorization），token 本身不会出现在日志中。
+    """
+    headers = connection.get("headers") or {}
+    raw = json.dumps(
+        {"url": connection.get("url"), "headers": headers},
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return MCPSessionKey(
+        server=server,
+        site_id=str(headers.get("X-Site-Id") or ""),
+        tenant_id=str(headers.get("X-Tenant-Id") or ""),
+        fingerprint=hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16],
+    )
+
+
+class PooledMCPSession:
+    """单个长连接会话。
+
+    `client.session()` 的上下文在 owner task 中进入并一直挂起，直到 aclose()；
+    其它 task 通过 `session` 发送请求（ClientSession 支持并发请求复用）。
+    """
+
+    def __init__(
+        self,
+        key: MCPSessionKey,
+        connection: dict[str, Any],
+        factory: SessionFactory = open_client_session,
+    ) -> None:
+        """创建未连接的会话；调用 start() 后才可用。"""
+        self.key = key
+        self.connection = connection
+        self.factory = factory
+        self.session: Any = None
+        self.created_at = time.monotonic()
+        self.last_used_at = self.created_at
+        self.in_use = 0
+        self.uses = 0
+        # 已移出池：归还（in_use 归零）后关闭
+        self.retired = False
+        self._bound: tuple[ToolCatalogEntry, list[Any]] | None = None
+        self._ready = asyncio.Event()
+        self._closing = asyncio.Event()
+        self._error: BaseException | None = None
+        self._owner: asyncio.Task[None] | None = None
+
+    @property
+    def alive(self) -> bool:
+        """会话已初始化且 owner task 仍在运行。"""
+        return (
+            self.session is not None
+            and self._owner is not None
+            and not self._owner.done()
+            and not self._closing.is_set()
+        )
+
+    async def start(self, timeout_s: float) -> None:
+        """启动 owner task 并等待会话初始化完成（超时或失败时关闭并抛出）。"""
+        self._owner = asyncio.create_task(
+            self._run(), name=f"mcp-session:{self.key.server}:{self.key.site_id}"
+        )
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout=timeout_s)
+        except BaseException:
+            await self.aclose()
+            raise
+        if self._error is not None:
+            raise self._error
+
+    async def _run(self) -> None:
+        try:
+            async with self.factory(self.key.server, self.connection) as session:
+                self.session = session
+                self._ready.set()
+                await self._closing.wait()
+        except BaseException as e:
+            # owner task 不能把异常抛给事件循环
+            if not self._ready.is_set():
+                self._error = e
+            else:
+                logger.info(
+                    f"[MCP][pool] 会话已断开 server={self.key.server} site_id={self.key.site_id}: "
+                    f"{type(e).__name__}: {e}"
+                )
+        finally:
+            self.session = None
+            self._ready.set()
+
+    async def list_tools(self) -> list[Any]:
+        """在本会话上执行 tools/list（含分页），返回原始 MCP Tool 定义。"""
+        tools: list[Any] = []
+        cursor: str | None = None
+        for _ in range(_MAX_LIST_PAGES):
+            page = await self.session.list_tools(cursor=cursor)
+            tools.extend(page.tools or [])
+            cursor = page.nextCursor
+            if not cursor:
+                return tools
+        raise RuntimeError(f"tools/list 分页超过 {_MAX_LIST_PAGES} 页")
+
+    def bind_tools(self, entry: ToolCatalogEntry) -> list[Any]:
+        """把工具目录中的定义转换为绑定到本会话的 LangChain tools（按目录版本缓存，无网络请求）。"""
+        if self._bound is None or self._bound[0] is not entry:
+            self._bound = (
+                entry,
+                [convert_mcp_tool_to_langchain_tool(self.session, t) for t in entry.tools],
+            )
+        return self._bound[1]
+
+    async def ping(self, timeout_s: float) -> bool:
+        """发送 ping；会话已断开或 ping 失败时返回 False。"""
+        if not self.alive:
+            return False
+        try:
+            await asyncio.wait_for(self.session.send_ping(), timeout=timeout_s)
+            return True
+        except Exception as e:
+            logger.info(
+                f"[MCP][pool] ping 失败 server={self.key.server} site_id={self.key.site_id}: "
+                f"{type(e).__name__}: {e}"
+            )
+            return False
+
+    async def aclose(self) -> None:
+        """通知 owner task 退出会话上下文并等待其结束。"""
+        self._closing.set()
+        owner = self._owner
+        if owner is None or owner.done():
+            return
+        try:
+            # 超时时 wait_for 会取消 owner task
+            await asyncio.wait_for(owner, timeout=5)
+        except Exception:
+            pass
+
+
+class MCPSessionPool:
+    """按 MCPSessionKey 复用 MCP 会话的池（单个事件循环内使用）。"""
+
+    def __init__(
+        self,
+        *,
+        max_sessions: int = MCP_POOL_MAX_SESSIONS,
+        idle_ttl_s: float = MCP_POOL_IDLE_TTL_S,
+        keepalive_s: float = MCP_POOL_KEEPALIVE_S,
+        connect_timeout_s: float = MCP_POOL_CONNECT_TIMEOUT_S,
+        session_factory: SessionFactory = open_client_session,
+    ) -> None:
+        """创建空池；janitor 在首个会话入池时启动。"""
+        self.max_sessions = max(1, max_sessions)
+        self.idle_ttl_s = idle_ttl_s
+        self.keepalive_s = keepalive_s
+        self.connect_timeout_s = connect_timeout_s
+        self.session_factory = session_factory
+        self._sessions: OrderedDict[MCPSessionKey, PooledMCPSession] = OrderedDict()
+        # 仅在建连期间被持有；key 含 token 指纹，用弱引用避免随 token 轮换无限增长
+        self._key_locks: weakref.WeakValueDictionary[MCPSessionKey, asyncio.Lock] = weakref.WeakValueDictionary()
+        self._janitor: asyncio.Task[None] | None = None
+        self._stats = {"created": 0, "reused": 0, "evicted": 0, "reconnects": 0}
+
+    def stats(self) -> dict[str, int]:
+        """计数器快照（created / reused / evicted / reconnects / open）。"""
+        return {**self._stats, "open": len(self._sessions)}
+
+    async def _acquire(self, key: MCPSessionKey, connection: dict[str, Any]) -> tuple[PooledMCPSession, bool]:
+        """返回 (会话, 是否入池)。池满且无空闲会话时返回一个临时会话，用完即关。"""
+        pooled = self._sessions.get(key)
+        if pooled is not None and pooled.alive:
+            self._sessions.move_to_end(key)
+            self._stats["reused"] += 1
+            return pooled, True
+
+        lock = self._key_locks.get(key)
+        if lock is None:
+            lock = self._key_locks[key] = asyncio.Lock()
+        async with lock:
+            pooled = self._sessions.get(key)
+            if pooled is not None and pooled.alive:
+                self._sessions.move_to_end(key)
+                self._stats["reused"] += 1
+                return pooled, True
+            if pooled is not None:
+                await self.invalidate(key, pooled)
+
+            ensure_langchain_globals()
+            patch_mcp_streamable_http_bom()
+            fresh = PooledMCPSession(key, connection, self.session_factory)
+            t0 = time.perf_counter()
+            await fresh.start(self.connect_timeout_s)
+            self._stats["created"] += 1
+            logger.info(
+                f"[MCP][pool] 新建会话 server={key.server} site_id={key.site_id} "
+                f"耗时={(time.perf_counter() - t0) * 1000:.0f}ms"
+            )
+
+            if len(self._sessions) >= self.max_sessions and not await self._evict_lru():
+                logger.info(f"[MCP][pool] 会话数已达上限 {self.max_sessions}，本次使用临时会话")
+                return fresh, False
+            self._sessions[key] = fresh
+            self._ensure_janitor()
+            return fresh, True
+
+    async def _evict_lru(self) -> bool:
+        for key, pooled in list(self._sessions.items()):
+            if pooled.in_use == 0:
+                self._sessions.pop(key, None)
+                self._stats["evicted"] += 1
+                await pooled.aclose()
+                return True
+        return False
+
+    @asynccontextmanager
+    async def session(
+        self,
+        key: MCPSessionKey,
+        connection: dict[str, Any],
+        *,
+        verify: bool = False,
+    ) -> AsyncIterator[PooledMCPSession]:
+        """借出一个已初始化的会话（上下文结束即归还，不关闭）。
+
+        verify=True 时，对空闲超过 _VERIFY_AFTER_IDLE_S 的复用会话先 ping 一次，失败则换新会话；
+        适用于调用方无法整体重试的长流程（如一次报告内的多次工具调用）。
+        """
+        pooled, in_pool = await self._acquire(key, connection)
+        idle = time.monotonic() - pooled.last_used_at
+        if verify and in_pool and pooled.uses > 0 and pooled.in_use == 0 and idle > _VERIFY_AFTER_IDLE_S:
+            if not await pooled.ping(self.connect_timeout_s):
+                await self.invalidate(key, pooled)
+                pooled, in_pool = await self._acquire(key, connection)
+        pooled.in_use += 1
+        pooled.uses += 1
+        try:
+            yield pooled
+        finally:
+            pooled.in_use -= 1
+            pooled.last_used_at = time.monotonic()
+            if not in_pool or (pooled.retired and pooled.in_use == 0):
+                await pooled.aclose()
+
+    async def run(
+        self,
+        key: MCPSessionKey,
+        connection: dict[str, Any],
+        fn: Callable[[PooledMCPSession], Awaitable[T]],
+        *,
+        idempotent: bool = False,
+    ) -> T:
+        """在池化会话上执行 fn；复用的旧会话失效时丢弃并用新会话重试一次。
+
+        仅在错误可证明请求未到达服务端时重试（避免非幂等工具调用被执行两次）；
+        idempotent=True（如 tools/list）时对任意连接层错误重试。
+        """
+        used: PooledMCPSession | None = None
+        try:
+            async with self.session(key, connection) as pooled:
+                if pooled.uses > 1:
+                    used = pooled
+                return await fn(pooled)
+        except (ToolException, asyncio.CancelledError):
+            raise
+        except Exception as e:
+            retryable = _is_connection_error(e) if idempotent else _is_unsent_error(e)
+            if used is None or not retryable:
+                raise
+            logger.warning(
+                f"[MCP][pool] 复用会话已失效，重连后重试 server={key.server} "
+                f"site_id={key.site_id}: {type(e).__name__}: {e}"
+            )
+            self._stats["reconnects"] += 1
+            await self.invalidate(key, used)
+            async with self.session(key, connection) as pooled:
+                return await fn(pooled)
+
+    async def invalidate(self, key: MCPSessionKey, pooled: PooledMCPSession) -> None:
+        """丢弃失效的会话。
+
+        仅当 pooled 仍是池中实例时才移出（并发请求可能已换上新会话）；
+        仍被借出的会话延迟到最后一个借用方归还后关闭。
+        """
+        if self._sessions.get(key) is pooled:
+            self._sessions.pop(key, None)
+        pooled.retired = True
+        if pooled.in_use == 0:
+            await pooled.aclose()
+
+    async def aclose(self) -> None:
+        """关闭池内全部会话并停止 janitor。"""
+        if self._janitor is not None:
+            self._janitor.cancel()
+            self._janitor = None
+        sessions = list(self._sessions.values())
+        self._sessions.clear()
+        await asyncio.gather(*(s.aclose() for s in sessions), return_exceptions=True)
+
+    def _ensure_janitor(self) -> None:
+        if self._janitor is None or self._janitor.done():
+            self._janitor = asyncio.create_task(self._janitor_loop(), name="mcp-session-pool-janitor")
+
+    async def _janitor_loop(self) -> None:
+        """周期性清理空闲会话；池空即退出。"""
+        interval = max(1.0, min(self.keepalive_s, self.idle_ttl_s))
+        while self._sessions:
+            await asyncio.sleep(interval)
+            await self._sweep()
+
+    async def _sweep(self) -> None:
+        """淘汰空闲超时或已断开的会话，并对其余空闲会话发 ping 保活。"""
+        now = time.monotonic()
+        for key, pooled in list(self._sessions.items()):
+            if pooled.in_use:
+                continue
+            idle = now - pooled.last_used_at
+            if not pooled.alive or idle >= self.idle_ttl_s:
+                self._sessions.pop(key, None)
+                self._stats["evicted"] += 1
+                await pooled.aclose()
+            elif idle >= self.keepalive_s and not await pooled.ping(self.connect_timeout_s):
+                await self.invalidate(key, pooled)
+
+
+# 会话与 anyio stream 绑定在创建它的事件循环上，因此每个事件循环各自一个池
+_POOLS: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, MCPSessionPool] = weakref.WeakKeyDictionary()
+
+
+def get_mcp_session_pool() -> MCPSessionPool:
+    """获取当前事件循环的 MCP 会话池（懒加载）。"""
+    loop = asyncio.get_running_loop()
+    pool = _POOLS.get(loop)
+    if pool is None:
+        pool = MCPSessionPool()
+        _POOLS[loop] = pool
+    return pool
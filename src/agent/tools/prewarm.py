@@ -0,0 +1,135 @@
+"""下游分支预热模块。
+
+意图分类进行的同时，为最可能的 1~2 个意图提前执行廉价、无副作用的准备工作：
+- shortcut / article_task：获取 MCP token → tools/list（同时建立池化会话）
+- site_report：GA MCP tools/list（同时建立池化会话）
+- rag：建立到 RAG API 的连接
+
+预热结果都落在进程级缓存里（token 缓存 / 工具目录 / 会话池 / 连接池），
+命中分支的初始化节点直接复用；未命中分支的结果留在缓存中供后续请求使用，
+超过 PREWARM_TIMEOUT_S 仍未完成的预热任务会被取消。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections.abc import Awaitable, Callable, Sequence
+from typing import Any
+
+from agent.config import (
+    PREWARM_ENABLED,
+    PREWARM_MAX_INTENTS,
+    PREWARM_MIN_SCORE,
+    PREWARM_TIMEOUT_S,
+    get_logger,
+)
+from agent.utils import metrics
+
+logger = get_logger(__name__)
+
+Prewarmer = Callable[[dict[str, Any]], Awaitable[None]]
+
+
+async def _warm_mcp(state: dict[str, Any], intent: str) -> None:
+    from agent.tools.auth import ensure_mcp_token
+    from agent.tools.site_mcp import get_mcp_tool_catalog
+
+    site_id = state.get("site_id")
+    if not site_id:
+        return
+    token, _ = await ensure_mcp_token(state, context="Prewarm")
+    await get_mcp_tool_catalog(
+        site_id=site_id, tenant_id=state.get("tenant_id"), intent=intent, token=token
+    )
+
+
+async def _warm_shortcut(state: dict[str, Any]) -> None:
+    await _warm_mcp(state, "shortcut")
+
+
+async def _warm_article(state: dict[str, Any]) -> None:
+    await _warm_mcp(state, "article_task")
+
+
+async def _warm_report(state: dict[str, Any]) -> None:
+    from agent.tools.ga_mcp import list_ga_tool_specs
+
+    site_id = state.get("site_id")
+    if not site_id:
+        return
+    await list_ga_tool_specs(site_id=site_id, tenant_id=state.get("tenant_id"))
+
+
+async def _warm_rag(state: dict[str, Any]) -> None:
+    from agent.tools.rag import warm_rag_connection
+
+    await warm_rag_connection()
+
+
+# 意图 → 预热函数；未登记的意图（introduction / seo_planning）无需预热
+PREWARMERS: dict[str, Prewarmer] = {
+    "shortcut": _warm_shortcut,
+    "article_task": _warm_article,
+    "site_report": _warm_report,
+    "rag": _warm_rag,
+}
+
+# 持有后台任务的强引用，避免任务在完成前被 GC
+_tasks: set[asyncio.Task[None]] = set()
+
+
+async def _run_prewarm(intent: str, fn: Prewarmer, state: dict[str, Any]) -> None:
+    t0 = time.perf_counter()
+    try:
+        await asyncio.wait_for(fn(state), timeout=PREWARM_TIMEOUT_S)
+    except TimeoutError:
+        metrics.incr(f"prewarm.timeout.{intent}")
+        logger.info(f"[Prewarm][{intent}] 超时已取消（>{PREWARM_TIMEOUT_S}s）")
+        return
+    except Exception as e:
+        metrics.incr(f"prewarm.error.{intent}")
+        logger.info(f"[Prewarm][{intent}] 预热失败（不影响主流程）: {type(e).__name__}: {e}")
+        return
+    elapsed_ms = (time.perf_counter() - t0) * 1000
+    metrics.incr(f"prewarm.ok.{intent}")
+    metrics.observe(f"prewarm.latency_ms.{intent}", elapsed_ms)
+    logger.info(f"[Prewarm][{intent}] 完成 耗时={elapsed_ms:.0f}ms")
+
+
+def pick_prewarm_intents(candidates: Sequence[tuple[str, float]], hint: str | None = None) -> list[str]:
+    """从规则层候选 (label, score) 中选出需要预热的意图（显式触发的意图优先）。"""
+    picked: list[str] = [hint] if hint else []
+    for label, score in candidates:
+        if len(picked) >= PREWARM_MAX_INTENTS:
+            break
+        if score >= PREWARM_MIN_SCORE and label not in picked:
+            picked.append(label)
+    if not picked:
+        # 无明显信号时 LLM 多半会落到默认的 rag
+        picked.append("rag")
+    return picked
+
+
+def start_prewarm(intents: Sequence[str], state: dict[str, Any]) -> list[str]:
+    """在后台启动预热任务（不等待），返回实际启动的意图列表。"""
+    if not PREWARM_ENABLED:
+        return []
+    # 只取预热所需字段，避免持有整个 state
+    snapshot = {
+        k: state.get(k)
+        for k in ("site_id", "tenant_id", "mcp_token", "mcp_token_expires_at")
+    }
+    started: list[str] = []
+    for intent in intents:
+        fn = PREWARMERS.get(intent)
+        if fn is None:
+            continue
+        task = asyncio.create_task(_run_prewarm(intent, fn, snapshot), name=f"prewarm:{intent}")
+        _tasks.add(task)
+        task.add_done_callback(_tasks.discard)
+        metrics.incr(f"prewarm.started.{intent}")
+        started.append(intent)
+    if started:
+        logger.info(f"[Prewarm][start] intents={started} site_id={snapshot.get('site_id')}")
+    return started
@@ -3,12 +3,15 @@
 该模块负责：
 - 调用 RAG API（SSE / text/event-stream）
 - 解析事件流并产出统一事件结构（供 nodes 层消费）
+- 复用共享 httpx 连接池（`agent.utils.http`）；预热阶段可提前建立到 RAG API 的连接
 """
 
 from __future__ import annotations
 
+import asyncio
 import json
 import uuid
+from collections.abc import Collection
 from dataclasses import dataclass
 from datetime import datetime
 from typing import Any, AsyncIterator, Literal
@@ -16,7 +19,16 @@ from typing import Any, AsyncIterator, Literal
 import httpx
 from langchain_core.tools import tool
 
-from agent.config import RAG_API_URL
+from agent.config import (
+    RAG_API_URL,
+    RAG_SSE_FIRST_BYTE_TIMEOUT_S,
+    RAG_SSE_IDLE_TIMEOUT_S,
+    get_logger,
+)
+from agent.utils.http import aiter_with_deadlines, get_http_client
+from agent.utils.sse import aiter_sse, make_node_filter
+
+logger = get_logger(__name__)
 
 RAGNodeName = Literal["workflow", "analysis_language", "generate_answer", "final_answer"]
 
@@ -30,6 +42,18 @@ class RAGEvent:
     event_name: str | None = None
 
 
+async def warm_rag_connection(rag_api_url: str | None = None, *, timeout_s: float = 5.0) -> None:
+    """提前建立到 RAG API 的连接（DNS + TCP + TLS），连接留在共享连接池中。
+
+    只发 HEAD 请求，不关心状态码（SSE 接口通常只接受 POST）。
+    """
+    url = rag_api_url or RAG_API_URL
+    if not url:
+        return
+    response = await get_http_client("rag").head(url, timeout=timeout_s)
+    logger.debug(f"[RAG][warm] 连接已建立 url={url} status={response.status_code}")
+
+
 def _default_request_data(
     *,
     question: str,
@@ -64,13 +88,21 @@ async def rag_sse_events(
     site_id: str,
     session_id: str,
     rag_api_url: str | None = None,
-    timeout_s: float = 60.0,
+    timeout_s: float | None = None,
     request_data: dict[str, Any] | None = None,
+    first_byte_timeout_s: float = RAG_SSE_FIRST_BYTE_TIMEOUT_S,
+    idle_timeout_s: float = RAG_SSE_IDLE_TIMEOUT_S,
+    node_types: Collection[str] | None = None,
 ) -> AsyncIterator[RAGEvent]:
     """调用 RAG API 并以事件流形式产出 RAGEvent。
 
     注意：这里仅负责网络 + SSE 解析，不做 UI 推送，也不做文本拼接。
+    node_types 非空时只产出这些节点的事件，其余事件不做 JSON 解码。
+    超时：建连由共享客户端控制；首字节（响应头 + 首行）与事件间空闲分别限制，
+    传入 timeout_s 时两者都使用该值（兼容旧调用）。
     """
+    if timeout_s is not None:
+        first_byte_timeout_s = idle_timeout_s = timeout_s
     url = rag_api_url or RAG_API_URL
     payload = request_data or _default_request_data(
         question=question,
@@ -79,73 +111,66 @@ async def rag_sse_events(
         session_id=session_id,
     )
 
-    async with httpx.AsyncClient(timeout=timeout_s) as client:
-        async with client.stream(
-            "POST",
-            url,
-            headers={
-                "Accept": "text/event-stream",
-                "Content-Type": "application/json",
-            },
-            json=payload,
-        ) as response:
-            if response.status_code >= 400:
-                # 对于流式响应，尽量读一点错误详情（避免阻塞/读太多）
-                error_lines: list[str] = []
-                try:
-                    async for line in response.aiter_lines():
-                        error_lines.append(line)
-                        if len(error_lines) > 20:
-                            break
-                except Exception:
-                    pass
-
-                error_text = "\n".join(error_lines) if error_lines else "无错误详情"
-                raise httpx.HTTPStatusError(
-                    f"HTTP {response.status_code}: {error_text[:500]}",
-                    request=response.request,
-                    response=response,
-                )
-
-            event_name: str | None = None
-            data_lines: list[str] = []
-
-            async for line in response.aiter_lines():
-                if line.startswith("event:"):
-                    event_name = line[len("event:") :].strip()
-                    continue
-
-                if line.startswith("data:"):
-                    data_lines.append(line[len("data:") :].strip())
-                    continue
-
-                # 空行：一个事件结束
-                if line.strip():
-                    continue
-
-                if not data_lines:
-                    event_name = None
-                    continue
-
-                data_str = "\n".join(data_lines).strip()
-                data_lines = []
-                if not data_str:
-                    event_name = None
-                    continue
-
-                try:
-                    data = json.loads(data_str)
-                except json.JSONDecodeError:
-                    event_name = None
-                    continue
-
-                node_name = str(data.get("node_name") or "")
-                if not node_name:
-                    event_name = None
-                    continue
-
-                yield RAGEvent(node_name=node_name, data=data, event_name=event_name)
-                event_name = None
+    client = get_http_client("rag")
+    request = client.build_request(
+        "POST",
+        url,
+        headers={
+            "Accept": "text/event-stream",
+            "Content-Type": "application/json",
+        },
+        json=payload,
+    )
+    started_at = asyncio.get_running_loop().time()
+    try:
+        async with asyncio.timeout(first_byte_timeout_s):
+            response = await client.send(request, stream=True)
+    except TimeoutError as e:
+        raise httpx.ReadTimeout("SSE 首字节超时（等待响应头）", request=request) from e
+
+    try:
+        if response.status_code >= 400:
+            # 对于流式响应，尽量读一点错误详情（避免阻塞/读太多）
+            error_lines: list[str] = []
+            try:
+                async for line in response.aiter_lines():
+                    error_lines.append(line)
+                    if len(error_lines) > 20:
+                        break
+            except Exception:
+                pass
+
+            error_text = "\n".join(error_lines) if error_lines else "无错误详情"
+            raise httpx.HTTPStatusError(
+                f"HTTP {response.status_code}: {error_text[:500]}",
+                request=response.request,
+                response=response,
+            )
+
+        wants = make_node_filter(node_types)
+        chunks = aiter_with_deadlines(
+            response.aiter_bytes(),
+            first_byte_timeout_s=first_byte_timeout_s,
+            idle_timeout_s=idle_timeout_s,
+            started_at=started_at,
+        )
+        async for msg in aiter_sse(chunks):
+            if not msg.data or not wants(msg.data):
+                continue
+            try:
+                data = json.loads(msg.data.decode("utf-8", errors="replace"))
+            except json.JSONDecodeError:
+                continue
+            if not isinstance(data, dict):
+                continue
+
+            node_name = str(data.get("node_name") or "")
+            if not node_name or (node_types is not None and node_name not in node_types):
+                continue
+
+            yield RAGEvent(node_name=node_name, data=data, event_name=msg.event)
+    finally:
+        await response.aclose()
 
 
 async def rag_query_once(
@@ -173,6 +198,7 @@ async def rag_query_once(
         site_id=site_id,
         session_id=session_id,
         rag_api_url=rag_api_url,
+        node_types=("analysis_language", "generate_answer", "final_answer"),
     ):
         if ev.node_name == "analysis_language":
             dl = ev.data.get("detected_language")
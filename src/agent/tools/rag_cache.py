@@ -0,0 +1,244 @@
+"""RAG 答案缓存模块。
+
+位于 handle_rag 与 rag_sse_events 之间，缓存帮助中心这类公共知识库的完整答案：
+- key：tenant/site + 知识库版本 + 规范化后的问题（大小写 / 空白 / 首尾标点不敏感）
+- 可选语义命中：问题向量与已缓存问题的余弦相似度 >= 阈值时复用答案
+- 失效：TTL；知识库更新时调用 `bump_kb_version()`（或修改 RAG_KB_VERSION）使旧答案整体失效
+- 命中后由 handle_rag 按片段回放，前端仍走同一条 AIMessageChunk 流式路径
+- 仅缓存正常结束（收到 final_answer）的非空答案
+- 上游按 session_id 保留对话上下文，而 key 不含上下文：只有会话内首个提问读写缓存；
+  命中时 handle_rag 在后台把该问题补发给上游会话，追问因此仍有首轮上下文
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import threading
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+
+from agent.config import (
+    RAG_ANSWER_CACHE_BACKEND,
+    RAG_ANSWER_CACHE_MAX_ENTRIES,
+    RAG_ANSWER_CACHE_PATH,
+    RAG_ANSWER_CACHE_SCOPE,
+    RAG_ANSWER_CACHE_SEMANTIC,
+    RAG_ANSWER_CACHE_SIMILARITY,
+    RAG_ANSWER_CACHE_TTL_S,
+    RAG_KB_VERSION,
+    RAG_SITE_ID,
+    RAG_TENANT_ID,
+    get_logger,
+)
+from agent.intent.index import Embedder, make_embedder
+from agent.intent.rules import normalize_intent_text
+from agent.utils import metrics
+from agent.utils.cache import (
+    LazyCache,
+    TieredCache,
+    make_tiered_cache,
+)
+
+logger = get_logger(__name__)
+
+# 回放时每个 AIMessageChunk 的字符数（与线上 generate_answer 片段粒度相近）
+REPLAY_CHUNK_CHARS = 24
+
+
+@dataclass(frozen=True, slots=True)
+class CachedAnswer:
+    """命中的缓存答案；match 为 exact / semantic。"""
+
+    answer: str
+    question: str
+    match: str
+    similarity: float = 1.0
+
+
+def iter_answer_chunks(answer: str, size: int = REPLAY_CHUNK_CHARS) -> list[str]:
+    """把完整答案切成流式回放用的片段。"""
+    return [answer[i : i + size] for i in range(0, len(answer), size)] or [answer]
+
+
+class _SemanticIndex:
+    """单个 (tenant, site, kb_version) 下已缓存问题的向量（追加写，按容量淘汰最旧）。"""
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self.keys: list[str] = []
+        self.matrix: np.ndarray | None = None
+
+    def add(self, key: str, vec: np.ndarray) -> None:
+        vec = vec / (np.linalg.norm(vec) or 1.0)
+        if key in self.keys:
+            return
+        row = vec.astype(np.float32).reshape(1, -1)
+        self.matrix = row if self.matrix is None else np.vstack([self.matrix, row])
+        self.keys.append(key)
+        if len(self.keys) > self.max_entries:
+            drop = len(self.keys) - self.max_entries
+            self.keys = self.keys[drop:]
+            self.matrix = self.matrix[drop:]
+
+    def discard(self, key: str) -> None:
+        if key in self.keys and self.matrix is not None:
+            i = self.keys.index(key)
+            self.keys.pop(i)
+            self.matrix = np.delete(self.matrix, i, axis=0)
+
+    def nearest(self, vec: np.ndarray) -> tuple[str, float] | None:
+        if self.matrix is None or not self.keys:
+            return None
+        scores = self.matrix @ (vec / (np.linalg.norm(vec) or 1.0)).astype(np.float32)
+        i = int(np.argmax(scores))
+        return self.keys[i], float(scores[i])
+
+
+class RAGAnswerCache:
+    """RAG 完整答案缓存（精确 key + 可选语义近邻）。"""
+
+    def __init__(
+        self,
+        backend: TieredCache,
+        *,
+        ttl_s: float = RAG_ANSWER_CACHE_TTL_S,
+        embedder: Embedder | None = None,
+        similarity_threshold: float = RAG_ANSWER_CACHE_SIMILARITY,
+        kb_version: str = RAG_KB_VERSION,
+    ) -> None:
+        """未传入 embedder 时只做精确匹配。"""
+        self.backend = backend
+        self.ttl_s = ttl_s
+        self.embedder = embedder
+        self.similarity_threshold = similarity_threshold
+        self._default_version = kb_version
+        self._lock = threading.Lock()
+        self._versions: dict[tuple[str, str], str] = {}
+        self._semantic: dict[tuple[str, str, str], _SemanticIndex] = {}
+
+    def stats(self) -> dict[str, Any]:
+        """底层缓存的命中统计。"""
+        return self.backend.stats()
+
+    def kb_version(self, tenant_id: str, site_id: str) -> str:
+        """该知识库当前的版本号（参与缓存 key）。"""
+        with self._lock:
+            return self._versions.get((tenant_id, site_id), self._default_version)
+
+    def bump_kb_version(self, tenant_id: str, site_id: str, version: str | None = None) -> str:
+        """知识库更新后调用：切换版本号，旧版本下的答案不再命中（随 TTL / LRU 自然淘汰）。"""
+        with self._lock:
+            current = self._versions.get((tenant_id, site_id), self._default_version)
+            new = version or f"{current}+1"
+            self._versions[(tenant_id, site_id)] = new
+            for scope in [s for s in self._semantic if s[:2] == (tenant_id, site_id)]:
+                del self._semantic[scope]
+        logger.info(f"[RAG][cache] 知识库版本更新 tenant_id={tenant_id} site_id={site_id} version={new}")
+        return new
+
+    def _key(self, tenant_id: str, site_id: str, version: str, question: str) -> str:
+        digest = hashlib.sha256(normalize_intent_text(question).encode("utf-8")).hexdigest()
+        return f"rag:{tenant_id}:{site_id}:{version}:{digest}"
+
+    def _semantic_index(self, scope: tuple[str, str, str]) -> _SemanticIndex:
+        with self._lock:
+            index = self._semantic.get(scope)
+            if index is None:
+                index = self._semantic[scope] = _SemanticIndex(self.backend.memory.max_entries)
+            return index
+
+    async def _get(self, key: str) -> Any | None:
+        if self.backend.disk is None:
+            return self.backend.get(key)
+        return await asyncio.to_thread(self.backend.get, key)
+
+    async def _embed(self, question: str) -> np.ndarray | None:
+        if self.embedder is None:
+            return None
+        try:
+            return (await self.embedder.aembed([normalize_intent_text(question)]))[0]
+        except Exception as e:
+            logger.warning(f"[RAG][cache] 问题向量化失败，跳过语义匹配: {e}")
+            return None
+
+    async def lookup(self, tenant_id: str, site_id: str, question: str) -> CachedAnswer | None:
+        """先按规范化问题精确匹配，未命中时尝试语义近邻。"""
+        version = self.kb_version(tenant_id, site_id)
+        value = await self._get(self._key(tenant_id, site_id, version, question))
+        if value is not None:
+            metrics.incr("rag_cache.hit.exact")
+            return CachedAnswer(answer=value["answer"], question=value.get("question", ""), match="exact")
+
+        vec = await self._embed(question)
+        if vec is not None:
+            scope = (tenant_id, site_id, version)
+            index = self._semantic_index(scope)
+            with self._lock:
+                nearest = index.nearest(vec)
+            if nearest is not None and nearest[1] >= self.similarity_threshold:
+                value = await self._get(nearest[0])
+                if value is not None:
+                    metrics.incr("rag_cache.hit.semantic")
+                    return CachedAnswer(
+                        answer=value["answer"],
+                        question=value.get("question", ""),
+                        match="semantic",
+                        similarity=round(nearest[1], 4),
+                    )
+                # 底层条目已过期
+                with self._lock:
+                    index.discard(nearest[0])
+
+        metrics.incr("rag_cache.miss")
+        return None
+
+    async def store(self, tenant_id: str, site_id: str, question: str, answer: str) -> None:
+        """写入完整答案（空答案或 TTL<=0 时跳过），并登记问题向量。"""
+        if not answer.strip() or self.ttl_s <= 0:
+            return
+        version = self.kb_version(tenant_id, site_id)
+        key = self._key(tenant_id, site_id, version, question)
+        value = {"answer": answer, "question": question}
+        if self.backend.disk is None:
+            self.backend.set(key, value, self.ttl_s)
+        else:
+            await asyncio.to_thread(self.backend.set, key, value, self.ttl_s)
+        vec = await self._embed(question)
+        if vec is not None:
+            index = self._semantic_index((tenant_id, site_id, version))
+            with self._lock:
+                index.add(key, vec)
+
+
+def rag_cache_enabled_for(tenant_id: str, site_id: str) -> bool:
+    """按 RAG_ANSWER_CACHE_SCOPE 判断该知识库是否允许缓存答案。"""
+    if RAG_ANSWER_CACHE_SCOPE == "all":
+        return True
+    if RAG_ANSWER_CACHE_SCOPE == "help-center":
+        return (tenant_id, site_id) == (RAG_TENANT_ID, RAG_SITE_ID)
+    return False
+
+
+def _build_cache() -> RAGAnswerCache | None:
+    tiered = make_tiered_cache(
+        RAG_ANSWER_CACHE_BACKEND,
+        path=RAG_ANSWER_CACHE_PATH,
+        table="rag_answers",
+        max_entries=RAG_ANSWER_CACHE_MAX_ENTRIES,
+        setting="RAG_ANSWER_CACHE_BACKEND",
+    )
+    if tiered is None:
+        return None
+    embedder = make_embedder(RAG_ANSWER_CACHE_SEMANTIC) if RAG_ANSWER_CACHE_SEMANTIC != "off" else None
+    return RAGAnswerCache(tiered, embedder=embedder)
+
+
+_CACHE: LazyCache[RAGAnswerCache] = LazyCache(_build_cache)
+
+
+def get_rag_answer_cache() -> RAGAnswerCache | None:
+    """按 RAG_ANSWER_CACHE_BACKEND 懒加载缓存：memory / sqlite / off。"""
+    return _CACHE.get()
@@ -13,6 +13,7 @@ import httpx
 from pydantic import BaseModel, Field
 
 from agent.config import get_logger
+from agent.utils.http import get_http_client
 
 logger = get_logger(__name__)
 
@@ -117,16 +118,15 @@ async def fetch_weekly_tasks(
     logger.info(f"[SEO][fetch_weekly_tasks] headers: X-Site-Id={site_id}, X-Tenant-Id={tenant_id}")
 
     try:
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            response = await client.post(
-                url,
-                json=request_body or {},
-                headers=headers,
-            )
-            response.raise_for_status()
-            data = response.json()
-            logger.info(f"[SEO][fetch_weekly_tasks] 响应成功，任务数: {len(data.get('data', {}).get('tasks', []))}")
-            return WeeklyTasksResponse.model_validate(data)
+        response = await get_http_client("seo").post(
+            url,
+            json=request_body or {},
+            headers=headers,
+        )
+        response.raise_for_status()
+        data = response.json()
+        logger.info(f"[SEO][fetch_weekly_tasks] 响应成功，任务数: {len(data.get('data', {}).get('tasks', []))}")
+        return WeeklyTasksResponse.model_validate(data)
 
     except httpx.HTTPStatusError as e:
         logger.error(f"[SEO][fetch_weekly_tasks] HTTP 错误: {e.response.status_code} - {e.response.text}")
@@ -4,29 +4,33 @@
 - 自动处理 initialize → notifications/initialized → tools/list
 - 自动将 MCP 的 JSON Schema 转换为 LangChain Tool
 - 返回的 tools 可直接用于 llm.bind_tools()
+- 会话由 `mcp_pool` 进程内复用，避免每次调用重复握手
+- tools/list 结果由 `mcp_catalog` 进程级缓存（TTL + singleflight）
 """
 
 from __future__ import annotations
 
-import inspect
 import json
-import os
+from collections.abc import Awaitable, Callable
 from typing import Any
 
-from langchain_mcp_adapters.client import MultiServerMCPClient
-
 from agent.config import (
     GATEWAY_URL,
     MCP_LOWCODE_APP_URL,
     MCP_SITE_SETTING_BASIC_URL,
     get_logger,
 )
+from agent.tools.mcp_catalog import ToolCatalogEntry, get_tool_catalog, make_catalog_key
+from agent.tools.mcp_pool import (
+    PooledMCPSession,
+    get_mcp_session_pool,
+    make_session_key,
+)
 from agent.tools.mcp_utils import (
     extract_mcp_error_message,
     get_mcp_is_error,
     get_mcp_structured_content,
     is_mcp_debug_enabled,
-    patch_mcp_streamable_http_bom,
 )
 
 logger = get_logger(__name__)
@@ -65,24 +69,22 @@ def is_mcp_error_result(raw_result: Any) -> tuple[bool, str]:
     return False, ""
 
 
-def _create_mcp_client(
+def _build_mcp_connections(
     site_id: str,
     tenant_id: str | None = None,
     intent: str | None = None,
     token: str | None = None,
-) -> MultiServerMCPClient:
-    """创建 MCP Client 实例。
+) -> dict[str, dict[str, Any]]:
+    """按意图构建需要连接的 MCP server 配置。
 
     Args:
         tenant_id: 租户 ID
         site_id: 站点 ID（UUID）
         intent: 意图
     Returns:
-        MultiServerMCPClient 实例
+        {server_name: connection}，可直接用于 MultiServerMCPClient 或会话池
     """
-    patch_mcp_streamable_http_bom()
     headers = {"X-Site-Id": site_id}
-    logger.info(f"_create_mcp_client  site_id: {site_id} tenant_id: {tenant_id} intent: {intent}")
     if tenant_id:
         headers["X-Tenant-Id"] = tenant_id
 
@@ -98,20 +100,16 @@ def _create_mcp_client(
 
     def _enable_site_setting_basic() -> None:
         if MCP_SITE_SETTING_BASIC_URL:
-            url = f"{GATEWAY_URL}{MCP_SITE_SETTING_BASIC_URL}"
-            logger.info(f"MCP_SITE_SETTING_BASIC_URL url: {url}")
             servers["site-setting-basic"] = {
-                "url": url,
+                "url": f"{GATEWAY_URL}{MCP_SITE_SETTING_BASIC_URL}",
                 "transport": "streamable_http",  # langchain_mcp_adapters 将 http 和 streamable_http 视为同一种 transport
                 "headers": headers,
             }
 
     def _enable_lowcode_app() -> None:
         if MCP_LOWCODE_APP_URL:
-            url = f"{GATEWAY_URL}{MCP_LOWCODE_APP_URL}"
-            logger.info(f"MCP_LOWCODE_APP_URL url: {url}")
             servers["lowcode-app"] = {
-                "url": url,
+                "url": f"{GATEWAY_URL}{MCP_LOWCODE_APP_URL}",
                 "transport": "streamable_http",  # langchain_mcp_adapters 将 http 和 streamable_http 视为同一种 transport
                 "headers": headers,
             }
@@ -124,19 +122,45 @@ def _create_mcp_client(
         _enable_site_setting_basic()
         _enable_lowcode_app()
 
-    logger.info(f"[MCP][_create_mcp_client] intent={normalized_intent}, 启用的服务器: {list(servers.keys())}")
     if is_mcp_debug_enabled():
+        logger.info(f"[MCP][_build_mcp_connections] intent={normalized_intent}, 启用的服务器: {list(servers.keys())}")
         for server_name, server_config in servers.items():
-            logger.info(f"[MCP][_create_mcp_client]   - {server_name}: url={server_config.get('url')}, transport={server_config.get('transport')}")
-        logger.info(f"[MCP][_create_mcp_client] headers={headers}")
+            logger.info(f"[MCP][_build_mcp_connections]   - {server_name}: url={server_config.get('url')}, transport={server_config.get('transport')}")
+    return servers
+
+
+async def _load_catalog_entry(
+    server_name: str,
+    connection: dict[str, Any],
+    *,
+    force_refresh: bool = False,
+) -> ToolCatalogEntry:
+    """从进程级目录缓存取工具定义；未命中时在池化会话上执行一次 tools/list。"""
+    pool = get_mcp_session_pool()
+    key = make_session_key(server_name, connection)
+    return await get_tool_catalog().get(
+        make_catalog_key(connection),
+        lambda: pool.run(key, connection, lambda pooled: pooled.list_tools(), idempotent=True),
+        force_refresh=force_refresh,
+    )
+
+
+def _bind_entry(entry: ToolCatalogEntry) -> Callable[[PooledMCPSession], Awaitable[list[Any]]]:
+    async def _bind(pooled: PooledMCPSession) -> list[Any]:
+        return pooled.bind_tools(entry)
+
+    return _bind
 
-    try:
-        client = MultiServerMCPClient(servers)
-        logger.info(f"[MCP][_create_mcp_client] MultiServerMCPClient 创建成功")
-        return client
-    except Exception as e:
-        logger.error(f"[MCP][_create_mcp_client] 创建 MCP client 失败: {type(e).__name__}: {e}", exc_info=True)
-        raise
+
+async def get_mcp_tool_catalog(
+    site_id: str,
+    tenant_id: str | None = None,
+    intent: str | None = None,
+    token: str | None = None,
+) -> list[ToolCatalogEntry]:
+    """获取各 MCP server 的工具目录（原始定义，可通过 entry.view 派生并缓存 spec）。"""
+    connections = _build_mcp_connections(site_id, tenant_id, intent, token)
+    return [await _load_catalog_entry(name, conn) for name, conn in connections.items()]
 
 
 async def get_mcp_tools(
@@ -147,6 +171,8 @@ async def get_mcp_tools(
 ) -> list[Any]:
     """获取 MCP Server 提供的工具列表（LangChain Tool 格式）。
 
+    工具定义来自进程级目录缓存，并绑定到会话池中的长连接会话。
+
     Args:
         site_id: 站点 ID
         tenant_id: 租户 ID
@@ -158,12 +184,12 @@ async def get_mcp_tools(
     """
     logger.info(f"[MCP][get_mcp_tools] 开始获取工具列表 site_id={site_id}, tenant_id={tenant_id}, intent={intent}, has_token={token is not None}")
     try:
-        client = _create_mcp_client(tenant_id=tenant_id, site_id=site_id, intent=intent, token=token)
-        logger.info(f"[MCP][get_mcp_tools] MCP client 创建成功")
-        
-        tools = client.get_tools()
-        if inspect.isawaitable(tools):
-            tools = await tools
+        pool = get_mcp_session_pool()
+        tools: list[Any] = []
+        for server_name, connection in _build_mcp_connections(site_id, tenant_id, intent, token).items():
+            entry = await _load_catalog_entry(server_name, connection)
+            key = make_session_key(server_name, connection)
+            tools.extend(await pool.run(key, connection, _bind_entry(entry), idempotent=True))
 
         logger.info(f"[MCP][get_mcp_tools] 成功获取 {len(tools)} 个工具")
         if is_mcp_debug_enabled():
@@ -201,30 +227,40 @@ async def call_mcp_tool(
         logger.info(f"[MCP][call_mcp_tool] input={tool_input!r}")
 
     try:
-        client = _create_mcp_client(tenant_id=tenant_id, site_id=site_id, intent=intent, token=token)
-        tools = client.get_tools()
-        if inspect.isawaitable(tools):
-            tools = await tools
-
-        logger.info(f"[MCP][call_mcp_tool] 获取到 {len(tools)} 个工具: {[t.name for t in tools]}")
-
-        # 找到对应的工具
-        target_tool = None
-        for tool in tools:
-            if tool.name == tool_name:
-                target_tool = tool
+        pool = get_mcp_session_pool()
+        available: list[str] = []
+        target: tuple[str, dict[str, Any], ToolCatalogEntry] | None = None
+        connections = _build_mcp_connections(site_id, tenant_id, intent, token)
+        for refresh in (False, True):
+            # 缓存的目录里找不到目标工具时，强制刷新一次再确认
+            available = []
+            for server_name, connection in connections.items():
+                entry = await _load_catalog_entry(server_name, connection, force_refresh=refresh)
+                available.extend(entry.names)
+                if tool_name in entry.names:
+                    target = (server_name, connection, entry)
+                    break
+            if target is not None:
                 break
 
-        if not target_tool:
-            error_msg = f"未找到工具: {tool_name}, 可用工具: {[t.name for t in tools]}"
+        logger.info(f"[MCP][call_mcp_tool] 获取到 {len(available)} 个工具: {available}")
+
+        if target is None:
+            error_msg = f"未找到工具: {tool_name}, 可用工具: {available}"
             logger.error(f"[MCP][call_mcp_tool] {error_msg}")
             return {"success": False, "error": error_msg}
 
+        server_name, connection, entry = target
+
+        async def _invoke(pooled: PooledMCPSession) -> Any:
+            target_tool = next(t for t in pooled.bind_tools(entry) if t.name == tool_name)
+            return await target_tool.ainvoke(tool_input)
+
         # 调用工具
         logger.info(f"[MCP][call_mcp_tool] 正在调用工具 {tool_name}...")
         
         try:
-            result = await target_tool.ainvoke(tool_input)
+            result = await pool.run(make_session_key(server_name, connection), connection, _invoke)
             
             # 详细记录返回结果
             logger.info(f"[MCP][call_mcp_tool] 工具调用完成, result type={type(result).__name__}")
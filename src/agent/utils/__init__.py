@@ -5,6 +5,7 @@ from agent.utils.helpers import (
     is_cancel,
     is_confirm,
     latest_ai_message,
+    latest_message_kwarg,
     latest_user_message,
     message_text,
     parse_shortcut_selection,
@@ -31,6 +32,7 @@ __all__ = [
     "message_text",
     "latest_user_message",
     "latest_ai_message",
+    "latest_message_kwarg",
     "find_ai_message_by_id",
     "parse_shortcut_selection",
     "is_confirm",
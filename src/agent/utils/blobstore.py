@@ -0,0 +1,389 @@
+"""内容寻址 Blob 存储模块。
+
+大体积的工具结果（GA 原始结果、Shortcut 步骤结果、工具完整 schema 等）不再内联进图状态，
+而是按内容哈希存入 Blob 存储，state 里只保留一个很小的引用：
+
+    {"$blob": "sha256:<hex>", "bytes": <原始 JSON 字节数>, "kind": "ga_result"}
+
+- 后端：fs（本地目录，按哈希前缀分桶）/ sqlite（单文件）/ memory（仅进程内），前面挂一层内存 LRU
+- 内容寻址：相同内容只存一份；值不可变，不设 TTL，按保留期（BLOB_STORE_RETENTION_S，从最后一次写入算起）
+  在写入时后台清理；保留期应长于 checkpoint 可能被恢复的时间
+- 默认关闭（off）：checkpoint 保存的引用必须在任何副本上都能取回，fs / sqlite 后端需配置共享持久化目录
+- 只有真正需要数据的节点才调用 `resolve()` / `aresolve()` 取回原值；未超过阈值的小值原样内联；
+  引用无法取回（存储未启用 / Blob 已清理或不在本副本）时抛 BlobNotFoundError，调用方不得静默降级
+- 取回的值可能被内存层共享，调用方应视为只读
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Protocol
+
+from agent.config import (
+    BLOB_OFFLOAD_MIN_BYTES,
+    BLOB_STORE_BACKEND,
+    BLOB_STORE_MEMORY_MAX_ENTRIES,
+    BLOB_STORE_PATH,
+    BLOB_STORE_PURGE_INTERVAL_S,
+    BLOB_STORE_RETENTION_S,
+    get_logger,
+)
+from agent.utils import metrics
+from agent.utils.cache import MemoryLRUCache
+
+logger = get_logger(__name__)
+
+BLOB_REF_KEY = "$blob"
+
+
+class BlobNotFoundError(KeyError):
+    """引用指向的 Blob 无法取回（存储未启用、已被清理或不在本副本）。"""
+
+
+class BlobBackend(Protocol):
+    """持久化后端协议：按摘要存取压缩后的字节。"""
+
+    def get(self, digest: str) -> bytes | None:
+        """按摘要读取压缩数据；不存在时返回 None。"""
+        ...
+
+    def put(self, digest: str, data: bytes) -> None:
+        """写入压缩数据；摘要已存在时只刷新写入时间。"""
+        ...
+
+    def purge(self, cutoff: float) -> int:
+        """删除写入时间（time.time()）早于 cutoff 的 Blob，返回删除数量。"""
+        ...
+
+
+class MemoryBlobBackend:
+    """进程内后端（测试 / 无磁盘环境）；无容量上限，随进程结束丢失。"""
+
+    def __init__(self) -> None:
+        """初始化空的进程内存储。"""
+        self._lock = threading.Lock()
+        # digest -> (写入时间, 数据)
+        self._data: dict[str, tuple[float, bytes]] = {}
+
+    def get(self, digest: str) -> bytes | None:
+        """按摘要读取压缩数据；不存在时返回 None。"""
+        with self._lock:
+            item = self._data.get(digest)
+        return item[1] if item is not None else None
+
+    def put(self, digest: str, data: bytes) -> None:
+        """写入压缩数据；摘要已存在时只刷新写入时间。"""
+        with self._lock:
+            item = self._data.get(digest)
+            self._data[digest] = (time.time(), item[1] if item is not None else data)
+
+    def purge(self, cutoff: float) -> int:
+        """删除写入时间早于 cutoff 的 Blob。"""
+        with self._lock:
+            expired = [d for d, (ts, _) in self._data.items() if ts < cutoff]
+            for digest in expired:
+                del self._data[digest]
+        return len(expired)
+
+
+class FileBlobBackend:
+    """本地目录后端：<root>/<hex[:2]>/<hex>，先写临时文件再原子替换。"""
+
+    def __init__(self, root: str) -> None:
+        """初始化后端并确保根目录存在。"""
+        self.root = os.path.abspath(root)
+        os.makedirs(self.root, exist_ok=True)
+
+    def _path(self, digest: str) -> str:
+        hexdigest = digest.split(":", 1)[-1]
+        return os.path.join(self.root, hexdigest[:2], hexdigest)
+
+    def get(self, digest: str) -> bytes | None:
+        """按摘要读取压缩数据；不存在时返回 None。"""
+        try:
+            with open(self._path(digest), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def put(self, digest: str, data: bytes) -> None:
+        """写入压缩数据；文件已存在时只刷新 mtime（写入时间）。"""
+        path = self._path(digest)
+        try:
+            os.utime(path)
+            return
+        except FileNotFoundError:
+            pass
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def purge(self, cutoff: float) -> int:
+        """删除 mtime 早于 cutoff 的 Blob 文件（含遗留的临时文件）。"""
+        removed = 0
+        for bucket in os.scandir(self.root):
+            if not bucket.is_dir():
+                continue
+            for entry in os.scandir(bucket.path):
+                try:
+                    if entry.stat().st_mtime < cutoff:
+                        os.remove(entry.path)
+                        removed += 1
+                except FileNotFoundError:
+                    continue
+        return removed
+
+
+class SQLiteBlobBackend:
+    """SQLite 单文件后端。"""
+
+    def __init__(self, path: str, *, table: str = "blobs") -> None:
+        """打开（必要时创建）SQLite 文件与数据表。"""
+        if not table.isidentifier():
+            raise ValueError(f"invalid table name: {table!r}")
+        self.path = path
+        self.table = table
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} "
+            "(digest TEXT PRIMARY KEY, data BLOB NOT NULL, written_at REAL NOT NULL)"
+        )
+        self._conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_written_at ON {table} (written_at)")
+
+    def get(self, digest: str) -> bytes | None:
+        """按摘要读取压缩数据；不存在时返回 None。"""
+        with self._lock:
+            row = self._conn.execute(f"SELECT data FROM {self.table} WHERE digest = ?", (digest,)).fetchone()
+        return bytes(row[0]) if row is not None else None
+
+    def put(self, digest: str, data: bytes) -> None:
+        """写入压缩数据；摘要已存在时只刷新写入时间。"""
+        with self._lock:
+            self._conn.execute(
+                f"INSERT INTO {self.table} (digest, data, written_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(digest) DO UPDATE SET written_at = excluded.written_at",
+                (digest, data, time.time()),
+            )
+
+    def purge(self, cutoff: float) -> int:
+        """删除写入时间早于 cutoff 的 Blob。"""
+        with self._lock:
+            return self._conn.execute(f"DELETE FROM {self.table} WHERE written_at < ?", (cutoff,)).rowcount
+
+
+def is_blob_ref(value: Any) -> bool:
+    """判断值是否为 Blob 引用。"""
+    return isinstance(value, dict) and isinstance(value.get(BLOB_REF_KEY), str)
+
+
+def _encode(value: Any) -> bytes:
+    """规范化 JSON（键排序、紧凑分隔符），保证相同内容得到相同哈希。"""
+    return json.dumps(value, ensure_ascii=False, sort_keys=True, separators=(",", ":")).encode("utf-8")
+
+
+class BlobStore:
+    """内存 LRU + 持久化后端；put / offload 写入，get / resolve 读取。"""
+
+    def __init__(
+        self,
+        backend: BlobBackend | None = None,
+        *,
+        memory_max_entries: int = BLOB_STORE_MEMORY_MAX_ENTRIES,
+        min_bytes: int = BLOB_OFFLOAD_MIN_BYTES,
+        retention_s: float = BLOB_STORE_RETENTION_S,
+        purge_interval_s: float = BLOB_STORE_PURGE_INTERVAL_S,
+    ) -> None:
+        """初始化存储；未指定后端时使用进程内后端。retention_s <= 0 时不清理。"""
+        self.backend = backend or MemoryBlobBackend()
+        self.memory = MemoryLRUCache(memory_max_entries)
+        self.min_bytes = min_bytes
+        self.retention_s = retention_s
+        self.purge_interval_s = purge_interval_s
+        self._purge_lock = threading.Lock()
+        self._purged_at = time.monotonic()
+
+    @property
+    def is_local(self) -> bool:
+        """后端是否不涉及磁盘 IO（异步调用时可跳过线程池）。"""
+        return isinstance(self.backend, MemoryBlobBackend)
+
+    def _put_encoded(self, value: Any, payload: bytes, kind: str | None) -> dict[str, Any]:
+        digest = "sha256:" + hashlib.sha256(payload).hexdigest()
+        # 已存在的 Blob 也要经过后端：刷新写入时间，避免仍在使用的 Blob 被保留期清理
+        self.backend.put(digest, zlib.compress(payload, 1))
+        if self.memory.get(digest) is None:
+            self.memory.set(digest, value, math.inf)
+            metrics.incr("blobstore.put")
+            metrics.observe("blobstore.put_bytes", len(payload))
+        self._maybe_purge()
+        ref: dict[str, Any] = {BLOB_REF_KEY: digest, "bytes": len(payload)}
+        if kind:
+            ref["kind"] = kind
+        return ref
+
+    def purge(self) -> int:
+        """删除超过保留期的 Blob（同时清空内存层，避免继续返回已删除的值），返回删除数量。"""
+        if self.retention_s <= 0:
+            return 0
+        removed = self.backend.purge(time.time() - self.retention_s)
+        if removed:
+            self.memory.clear()
+            metrics.incr("blobstore.purged", removed)
+            logger.info(f"[BlobStore][purge] 已清理 {removed} 个超过保留期的 Blob")
+        return removed
+
+    def _maybe_purge(self) -> None:
+        """距上次清理超过 purge_interval_s 时在后台线程执行一次清理。"""
+        now = time.monotonic()
+        with self._purge_lock:
+            if now - self._purged_at < self.purge_interval_s:
+                return
+            self._purged_at = now
+        self.purge_in_background()
+
+    def purge_in_background(self) -> None:
+        """在后台线程执行一次 purge（不阻塞调用方）。"""
+        if self.retention_s <= 0:
+            return
+
+        def _run() -> None:
+            try:
+                self.purge()
+            except Exception as e:
+                logger.warning(f"[BlobStore][purge] 清理失败: {e}")
+
+        threading.Thread(target=_run, name="blobstore-purge", daemon=True).start()
+
+    def put(self, value: Any, *, kind: str | None = None) -> dict[str, Any]:
+        """无条件写入并返回引用；值必须可 JSON 序列化。"""
+        return self._put_encoded(value, _encode(value), kind)
+
+    def offload(self, value: Any, *, kind: str | None = None) -> Any:
+        """序列化后不小于 min_bytes 的值换成引用，其余原样返回（不可序列化的值同样原样返回）。"""
+        if value is None or isinstance(value, (bool, int, float)) or is_blob_ref(value):
+            return value
+        try:
+            payload = _encode(value)
+        except (TypeError, ValueError) as e:
+            logger.debug(f"[BlobStore][offload] 值不可序列化，保持内联 kind={kind}: {e}")
+            return value
+        if len(payload) < self.min_bytes:
+            return value
+        try:
+            return self._put_encoded(value, payload, kind)
+        except Exception as e:
+            logger.warning(f"[BlobStore][offload] 写入失败，保持内联 kind={kind}: {e}")
+            return value
+
+    def get(self, digest: str) -> Any:
+        """按摘要取回原值（先查内存层）；不存在时抛 BlobNotFoundError。"""
+        value = self.memory.get(digest)
+        if value is not None:
+            metrics.incr("blobstore.hit.memory")
+            return value
+        data = self.backend.get(digest)
+        if data is None:
+            metrics.incr("blobstore.miss")
+            raise BlobNotFoundError(digest)
+        metrics.incr("blobstore.hit.backend")
+        value = json.loads(zlib.decompress(data))
+        self.memory.set(digest, value, math.inf)
+        return value
+
+    def resolve(self, value: Any) -> Any:
+        """引用 -> 原值；非引用原样返回。Blob 丢失时抛 BlobNotFoundError。"""
+        if not is_blob_ref(value):
+            return value
+        return self.get(value[BLOB_REF_KEY])
+
+    async def aoffload(self, value: Any, *, kind: str | None = None) -> Any:
+        """异步版 offload；涉及磁盘 IO 时放到线程池执行。"""
+        if self.is_local:
+            return self.offload(value, kind=kind)
+        return await asyncio.to_thread(self.offload, value, kind=kind)
+
+    async def aresolve(self, value: Any) -> Any:
+        """异步版 resolve；涉及磁盘 IO 时放到线程池执行。"""
+        if not is_blob_ref(value) or self.is_local or self.memory.get(value[BLOB_REF_KEY]) is not None:
+            return self.resolve(value)
+        return await asyncio.to_thread(self.resolve, value)
+
+
+_STORE: BlobStore | None = None
+_STORE_INIT = False
+_STORE_LOCK = threading.Lock()
+
+
+def get_blob_store() -> BlobStore | None:
+    """按 BLOB_STORE_BACKEND 懒加载：fs / sqlite / memory / off（off 时所有值保持内联）。"""
+    global _STORE, _STORE_INIT
+    if _STORE_INIT:
+        return _STORE
+    with _STORE_LOCK:
+        if _STORE_INIT:
+            return _STORE
+        backend = BLOB_STORE_BACKEND
+        try:
+            if backend in ("fs", "sqlite") and not BLOB_STORE_PATH:
+                logger.warning(f"[BlobStore] BLOB_STORE_BACKEND={backend} 需要配置共享的 BLOB_STORE_PATH，大结果将保持内联")
+            elif backend == "fs":
+                _STORE = BlobStore(FileBlobBackend(BLOB_STORE_PATH))
+            elif backend == "sqlite":
+                _STORE = BlobStore(SQLiteBlobBackend(os.path.join(BLOB_STORE_PATH, "blobs.sqlite3")))
+            elif backend == "memory":
+                _STORE = BlobStore(MemoryBlobBackend())
+            elif backend != "off":
+                logger.warning(f"[BlobStore] 未知的 BLOB_STORE_BACKEND={backend!r}，大结果将保持内联")
+        except Exception as e:
+            logger.warning(f"[BlobStore] 初始化失败（backend={backend}），大结果将保持内联: {e}")
+            _STORE = None
+        if _STORE is not None:
+            # 启动时先清理一次（之后按 purge_interval_s 在写入时触发）
+            _STORE.purge_in_background()
+        _STORE_INIT = True
+        return _STORE
+
+
+def offload(value: Any, *, kind: str | None = None) -> Any:
+    """用全局 Blob 存储执行 offload；存储关闭时原样返回。"""
+    store = get_blob_store()
+    return store.offload(value, kind=kind) if store is not None else value
+
+
+def resolve(value: Any) -> Any:
+    """引用 -> 原值；非引用原样返回。Blob 存储未启用或 Blob 丢失时抛 BlobNotFoundError。"""
+    if not is_blob_ref(value):
+        return value
+    store = get_blob_store()
+    if store is None:
+        raise BlobNotFoundError(f"Blob 存储未启用，无法取回 {value[BLOB_REF_KEY]}")
+    return store.resolve(value)
+
+
+async def aoffload(value: Any, *, kind: str | None = None) -> Any:
+    """异步版 offload。"""
+    store = get_blob_store()
+    return await store.aoffload(value, kind=kind) if store is not None else value
+
+
+async def aresolve(value: Any) -> Any:
+    """异步版 resolve；同样在无法取回时抛 BlobNotFoundError。"""
+    if not is_blob_ref(value):
+        return value
+    store = get_blob_store()
+    if store is None:
+        return resolve(value)
+    return await store.aresolve(value)
@@ -0,0 +1,278 @@
+"""通用 KV 缓存模块。
+
+提供可插拔的缓存后端，供各类结果缓存复用：
+- MemoryLRUCache: 进程内 LRU（按条目 TTL 过期）
+- SQLiteCache: 本地 SQLite 文件（JSON 序列化，进程重启后仍可命中）
+- TieredCache: 内存层在前、磁盘层在后，磁盘命中会回填内存，并统计命中率
+- make_tiered_cache / LazyCache: 按 memory / sqlite / off 配置构造缓存，并以进程级单例懒加载
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from typing import Any, Generic, Protocol, TypeVar
+
+from agent.config import get_logger
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+
+class CacheBackend(Protocol):
+    """缓存后端协议（MemoryLRUCache / SQLiteCache 均满足）。"""
+
+    def get(self, key: str) -> Any | None:
+        """返回未过期的值；未命中返回 None。"""
+        ...
+
+    def get_entry(self, key: str) -> tuple[Any, float] | None:
+        """返回 (value, expires_at)；未命中或已过期返回 None。"""
+        ...
+
+    def set(self, key: str, value: Any, ttl_s: float) -> None:
+        """写入并设置 TTL（秒）；ttl_s<=0 时不写入。"""
+        ...
+
+    def delete(self, key: str) -> None:
+        """删除 key（不存在时忽略）。"""
+        ...
+
+    def clear(self) -> None:
+        """清空全部条目。"""
+        ...
+
+
+class MemoryLRUCache:
+    """线程安全的 LRU 缓存，条目各自带过期时间。"""
+
+    def __init__(self, max_entries: int = 512) -> None:
+        """max_entries 为条目数上限（至少 1）。"""
+        self.max_entries = max(1, max_entries)
+        self._lock = threading.Lock()
+        self._data: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+
+    def __len__(self) -> int:
+        """当前条目数（含尚未清理的过期条目）。"""
+        return len(self._data)
+
+    def get(self, key: str) -> Any | None:
+        """返回未过期的值；未命中返回 None。"""
+        entry = self.get_entry(key)
+        return entry[0] if entry is not None else None
+
+    def get_entry(self, key: str) -> tuple[Any, float] | None:
+        """返回 (value, expires_at) 并刷新 LRU 顺序；已过期的条目顺带删除。"""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at <= time.time():
+                self._data.pop(key, None)
+                return None
+            self._data.move_to_end(key)
+            return value, expires_at
+
+    def set(self, key: str, value: Any, ttl_s: float) -> None:
+        """写入并设置 TTL（秒）；超出容量时淘汰最久未用的条目。"""
+        if ttl_s <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.time() + ttl_s, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        """删除 key（不存在时忽略）。"""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """清空全部条目。"""
+        with self._lock:
+            self._data.clear()
+
+
+class SQLiteCache:
+    """SQLite 持久化缓存；值以 JSON 存储，无法序列化的值直接跳过。"""
+
+    def __init__(self, path: str, *, table: str = "cache") -> None:
+        """打开（必要时创建）path 处的数据库与缓存表。"""
+        if not table.isidentifier():
+            raise ValueError(f"invalid table name: {table!r}")
+        self.path = path
+        self.table = table
+        self._lock = threading.Lock()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+
+    def get(self, key: str) -> Any | None:
+        """返回未过期的值；未命中返回 None。"""
+        entry = self.get_entry(key)
+        return entry[0] if entry is not None else None
+
+    def get_entry(self, key: str) -> tuple[Any, float] | None:
+        """返回 (value, expires_at)；已过期的行顺带删除。"""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT value, expires_at FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] <= time.time():
+                self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                return None
+        try:
+            return json.loads(row[0]), row[1]
+        except ValueError:
+            return None
+
+    def set(self, key: str, value: Any, ttl_s: float) -> None:
+        """写入并设置 TTL（秒）；值无法 JSON 序列化时跳过。"""
+        if ttl_s <= 0:
+            return
+        try:
+            payload = json.dumps(value, ensure_ascii=False)
+        except (TypeError, ValueError) as e:
+            logger.debug(f"[Cache][sqlite] 跳过不可序列化的值 key={key}: {e}")
+            return
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, payload, time.time() + ttl_s),
+            )
+
+    def delete(self, key: str) -> None:
+        """删除 key（不存在时忽略）。"""
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+
+    def clear(self) -> None:
+        """清空缓存表。"""
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table}")
+
+    def purge_expired(self) -> int:
+        """删除全部过期行，返回删除条数。"""
+        with self._lock:
+            cur = self._conn.execute(f"DELETE FROM {self.table} WHERE expires_at <= ?", (time.time(),))
+            return cur.rowcount
+
+
+class TieredCache:
+    """内存 LRU + 可选磁盘层；记录 hits / misses / stores。"""
+
+    def __init__(self, memory: MemoryLRUCache, disk: CacheBackend | None = None) -> None:
+        """未传入 disk 时只使用内存层。"""
+        self.memory = memory
+        self.disk = disk
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "disk_hits": 0, "misses": 0, "stores": 0}
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._stats[name] += 1
+
+    def stats(self) -> dict[str, Any]:
+        """命中统计（含 hit_rate 与内存层条目数）。"""
+        with self._lock:
+            stats: dict[str, Any] = dict(self._stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+        stats["memory_entries"] = len(self.memory)
+        return stats
+
+    def get(self, key: str) -> Any | None:
+        """先查内存层，未命中再查磁盘层（命中时回填内存）。"""
+        value = self.memory.get(key)
+        if value is None and self.disk is not None:
+            try:
+                entry = self.disk.get_entry(key)
+            except Exception as e:
+                logger.warning(f"[Cache] 磁盘层读取失败 key={key}: {e}")
+                entry = None
+            if entry is not None:
+                value, expires_at = entry
+                self._count("disk_hits")
+                # 回填内存层，沿用磁盘条目的剩余 TTL
+                self.memory.set(key, value, expires_at - time.time())
+        self._count("hits" if value is not None else "misses")
+        return value
+
+    def set(self, key: str, value: Any, ttl_s: float) -> None:
+        """同时写入内存层与磁盘层（磁盘写入失败只记录日志）。"""
+        if ttl_s <= 0:
+            return
+        self.memory.set(key, value, ttl_s)
+        if self.disk is not None:
+            try:
+                self.disk.set(key, value, ttl_s)
+            except Exception as e:
+                logger.warning(f"[Cache] 磁盘层写入失败 key={key}: {e}")
+        self._count("stores")
+
+    def delete(self, key: str) -> None:
+        """从两层中删除 key。"""
+        self.memory.delete(key)
+        if self.disk is not None:
+            self.disk.delete(key)
+
+    def clear(self) -> None:
+        """清空两层缓存。"""
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+
+def make_tiered_cache(backend: str, *, path: str, table: str, max_entries: int, setting: str) -> TieredCache | None:
+    """按后端配置构造 TieredCache：memory / sqlite（内存 + SQLite）/ off。
+
+    off 或未知取值返回 None（未知取值记录告警，setting 为对应的配置项名）；
+    SQLite 初始化失败时只使用内存层。
+    """
+    if backend not in {"memory", "sqlite"}:
+        if backend != "off":
+            logger.warning(f"[Cache] 未知的 {setting}={backend!r}，已关闭缓存")
+        return None
+    disk = None
+    if backend == "sqlite":
+        try:
+            disk = SQLiteCache(path, table=table)
+        except Exception as e:
+            logger.warning(f"[Cache] {setting} 的 SQLite 缓存初始化失败，仅使用内存缓存: {e}")
+    return TieredCache(MemoryLRUCache(max_entries), disk)
+
+
+class LazyCache(Generic[T]):
+    """进程级懒加载单例：首次 get() 时调用 factory（返回 None 表示缓存关闭），之后复用结果。"""
+
+    def __init__(self, factory: Callable[[], T | None]) -> None:
+        """保存工厂函数；工厂只会被调用一次（线程安全）。"""
+        self._factory = factory
+        self._value: T | None = None
+        self._init = False
+        self._lock = threading.Lock()
+
+    def get(self) -> T | None:
+        """返回缓存实例；关闭时返回 None。"""
+        if self._init:
+            return self._value
+        with self._lock:
+            if not self._init:
+                self._value = self._factory()
+                self._init = True
+        return self._value
@@ -4,6 +4,7 @@ from typing import Any
 
 from langchain_core.messages import AIMessage, BaseMessage
 
+from agent.history import find_message
 from agent.state import CopilotState
 
 
@@ -51,11 +52,23 @@ def find_ai_message_by_id(
     state: CopilotState, message_id: str | None
 ) -> AIMessage | None:
     """根据 ID 查找 AIMessage。"""
-    if not message_id:
-        return None
-    for m in state["messages"]:
-        if isinstance(m, AIMessage) and getattr(m, "id", None) == message_id:
-            return m
+    m = find_message(state.get("messages") or [], message_id)
+    return m if isinstance(m, AIMessage) else None
+
+
+def latest_message_kwarg(state: Any, key: str, *, truthy: bool = False) -> Any | None:
+    """倒序查找最近一条 additional_kwargs 中带 key 的消息，返回该值。
+
+    前端 submit 会把结构化参数放在 additional_kwargs 里，之后可能还跟着若干 UI 锚点消息。
+    truthy=True 时跳过值为空（None / "" 等）的消息，继续向前查找。
+    """
+    for m in reversed(state.get("messages") or []):
+        kwargs = m.get("additional_kwargs") if isinstance(m, dict) else getattr(m, "additional_kwargs", None)
+        if not isinstance(kwargs, dict) or key not in kwargs:
+            continue
+        if truthy and not kwargs[key]:
+            continue
+        return kwargs[key]
     return None
 
 
@@ -0,0 +1,163 @@
+"""共享 httpx 客户端注册表。
+
+按上游（rag / seo / auth）维护长连接池，避免每次请求重新 TCP + TLS 握手：
+- 每个上游独立的连接数上限与超时配置；HTTPS 上游启用 HTTP/2
+- 客户端按事件循环隔离（httpx 连接绑定创建时的事件循环）
+- SSE 读取提供首字节 / 空闲两级超时（`aiter_with_deadlines`）
+- `aclose_http_clients()` 在服务关闭时由 `agent.webapp` 的 lifespan 调用（测试清理同样可用）；
+  进程退出时也会尽力关闭
+"""
+
+from __future__ import annotations
+
+import asyncio
+import atexit
+import weakref
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+from typing import TypeVar
+
+import httpx
+
+from agent.config import (
+    HTTP_CLIENT_HTTP2,
+    HTTP_CLIENT_KEEPALIVE_EXPIRY_S,
+    RAG_CONNECT_TIMEOUT_S,
+    RAG_HTTP_MAX_CONNECTIONS,
+    RAG_SSE_IDLE_TIMEOUT_S,
+    get_logger,
+)
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True, slots=True)
+class UpstreamConfig:
+    """单个上游的连接池与默认超时配置。"""
+
+    max_connections: int
+    max_keepalive_connections: int
+    connect_timeout_s: float
+    # None 表示不限制（由调用方的首字节/空闲超时控制，如 SSE）
+    read_timeout_s: float | None
+    write_timeout_s: float = 10.0
+    pool_timeout_s: float = 5.0
+
+
+UPSTREAMS: dict[str, UpstreamConfig] = {
+    # SSE：读超时交给 aiter_with_deadlines；这里只兜底一个较大的值防止连接永久挂起
+    "rag": UpstreamConfig(
+        max_connections=RAG_HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=max(1, RAG_HTTP_MAX_CONNECTIONS // 5),
+        connect_timeout_s=RAG_CONNECT_TIMEOUT_S,
+        read_timeout_s=max(RAG_SSE_IDLE_TIMEOUT_S * 2, 120.0),
+    ),
+    # 周计划生成耗时较长
+    "seo": UpstreamConfig(
+        max_connections=20,
+        max_keepalive_connections=5,
+        connect_timeout_s=5.0,
+        read_timeout_s=60.0,
+    ),
+    "auth": UpstreamConfig(
+        max_connections=20,
+        max_keepalive_connections=5,
+        connect_timeout_s=5.0,
+        read_timeout_s=30.0,
+    ),
+}
+
+_CLIENTS: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict[str, httpx.AsyncClient]] = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _make_client(upstream: str) -> httpx.AsyncClient:
+    cfg = UPSTREAMS[upstream]
+    return httpx.AsyncClient(
+        http2=HTTP_CLIENT_HTTP2,
+        limits=httpx.Limits(
+            max_connections=cfg.max_connections,
+            max_keepalive_connections=cfg.max_keepalive_connections,
+            keepalive_expiry=HTTP_CLIENT_KEEPALIVE_EXPIRY_S,
+        ),
+        timeout=httpx.Timeout(
+            connect=cfg.connect_timeout_s,
+            read=cfg.read_timeout_s,
+            write=cfg.write_timeout_s,
+            pool=cfg.pool_timeout_s,
+        ),
+    )
+
+
+def get_http_client(upstream: str) -> httpx.AsyncClient:
+    """获取当前事件循环中指定上游的共享客户端（懒加载）。
+
+    调用方不要用 `async with` 关闭它；单次请求的超时可通过 `timeout=` 覆盖。
+    """
+    if upstream not in UPSTREAMS:
+        raise ValueError(f"未知的上游: {upstream}")
+    loop = asyncio.get_running_loop()
+    clients = _CLIENTS.setdefault(loop, {})
+    client = clients.get(upstream)
+    if client is None or client.is_closed:
+        client = _make_client(upstream)
+        clients[upstream] = client
+    return client
+
+
+async def aclose_http_clients() -> None:
+    """关闭当前事件循环的全部共享客户端（服务关闭 / 测试清理时调用）。"""
+    loop = asyncio.get_running_loop()
+    clients = _CLIENTS.pop(loop, {})
+    for upstream, client in clients.items():
+        try:
+            await client.aclose()
+        except Exception as e:
+            logger.warning(f"[HTTP][aclose] 关闭客户端失败 upstream={upstream}: {e}")
+
+
+@atexit.register
+def _close_at_exit() -> None:
+    # 尽力而为：只处理仍可驱动的事件循环；已关闭的循环其连接已随之释放
+    for loop, clients in list(_CLIENTS.items()):
+        if not clients or loop.is_closed() or loop.is_running():
+            continue
+        try:
+            loop.run_until_complete(asyncio.gather(*(c.aclose() for c in clients.values())))
+        except Exception:
+            pass
+
+
+async def aiter_with_deadlines(
+    source: AsyncIterator[T],
+    *,
+    first_byte_timeout_s: float | None,
+    idle_timeout_s: float | None,
+    started_at: float | None = None,
+) -> AsyncIterator[T]:
+    """为异步迭代器加上首个元素 / 相邻元素之间的超时，超时抛出 httpx.ReadTimeout。
+
+    started_at 为 loop.time() 时间戳：首字节超时从该时刻起算（可把等待响应头的时间算进去）。
+    """
+    loop = asyncio.get_running_loop()
+    first = True
+    deadline: float | None = None
+    if first_byte_timeout_s is not None:
+        deadline = (started_at if started_at is not None else loop.time()) + first_byte_timeout_s
+    it = aiter(source)
+    while True:
+        if not first:
+            deadline = loop.time() + idle_timeout_s if idle_timeout_s is not None else None
+        try:
+            async with asyncio.timeout_at(deadline):
+                item = await anext(it)
+        except StopAsyncIteration:
+            return
+        except TimeoutError as e:
+            kind = "首字节" if first else "空闲"
+            raise httpx.ReadTimeout(f"SSE {kind}超时") from e
+        first = False
+        yield item
@@ -10,7 +10,13 @@ from typing import Any
 import httpx
 from langchain_openai import ChatOpenAI
 
-from agent.config import LLM_API_KEY, LLM_BASE_URL, LLM_MODEL, LLM_NANO_MODEL
+from agent.config import (
+    LLM_API_KEY,
+    LLM_BASE_URL,
+    LLM_EMBEDDING_MODEL,
+    LLM_MODEL,
+    LLM_NANO_MODEL,
+)
 
 # 进程内共享的 httpx 客户端（惰性初始化）
 _httpx_sync: httpx.Client | None = None
@@ -67,6 +73,7 @@ _llm: Any | None = None
 _llm_nostream: Any | None = None
 _llm_nano: Any | None = None
 _llm_nano_nostream: Any | None = None
+_embeddings: Any | None = None
 
 
 def get_llm() -> Any:
@@ -101,6 +108,25 @@ def get_llm_nano_nostream() -> Any:
     return _llm_nano_nostream
 
 
+def get_embeddings() -> Any:
+    """返回 Embedding 模型实例（复用共享 httpx 连接池），惰性初始化。"""
+    global _embeddings
+    if _embeddings is None:
+        from langchain_openai import OpenAIEmbeddings
+
+        http_client, http_async_client = _get_shared_httpx_clients()
+        _embeddings = OpenAIEmbeddings(
+            model=LLM_EMBEDDING_MODEL,
+            base_url=LLM_BASE_URL,
+            api_key=LLM_API_KEY,
+            # 兼容非 OpenAI 的网关：直接传文本，不做 tiktoken 切分
+            check_embedding_ctx_length=False,
+            http_client=http_client,
+            http_async_client=http_async_client,
+        )
+    return _embeddings
+
+
 # 向后兼容：保留原变量名（按需惰性初始化）
 class _LazyLLM:
     def __init__(self, getter):
@@ -0,0 +1,54 @@
+"""进程内轻量指标模块。
+
+计数器与耗时/数值观测，线程安全，供日志与调试接口读取：
+- incr("intent_router.source.rules")
+- observe("intent_router.latency_ms.rules", 0.4)
+- snapshot() → {"counters": {...}, "observations": {name: {count, sum, min, max, avg}}}
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import Any
+
+_lock = threading.Lock()
+_counters: dict[str, float] = {}
+_observations: dict[str, list[float]] = {}  # name -> [count, sum, min, max]
+
+
+def incr(name: str, value: float = 1) -> None:
+    """累加计数器。"""
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+
+def observe(name: str, value: float) -> None:
+    """记录一次数值观测（耗时等）。"""
+    with _lock:
+        obs = _observations.get(name)
+        if obs is None:
+            _observations[name] = [1, value, value, value]
+        else:
+            obs[0] += 1
+            obs[1] += value
+            obs[2] = min(obs[2], value)
+            obs[3] = max(obs[3], value)
+
+
+def snapshot(prefix: str = "") -> dict[str, Any]:
+    """返回以 prefix 开头的指标快照。"""
+    with _lock:
+        counters = {k: v for k, v in _counters.items() if k.startswith(prefix)}
+        observations = {
+            k: {"count": c, "sum": s, "min": lo, "max": hi, "avg": s / c if c else 0.0}
+            for k, (c, s, lo, hi) in _observations.items()
+            if k.startswith(prefix)
+        }
+    return {"counters": counters, "observations": observations}
+
+
+def reset() -> None:
+    """清空全部指标（测试用）。"""
+    with _lock:
+        _counters.clear()
+        _observations.clear()
@@ -0,0 +1,250 @@
+"""模型路由：调用方声明任务类型，由配置决定模型档位 / temperature / max tokens / 超时。
+
+任务类型：classify / extract / plan / narrate / summarize；可带作用域（如 "plan.report"），
+未单独配置的作用域回退到基础任务。档位：
+
+- nano / full: OpenAI 兼容模型（复用 agent.utils.llm 的单例与共享 httpx 连接池）
+- gemini: GOOGLE_FLASH_MODEL（进程内一个客户端）
+
+每个档位只创建一个底层客户端；任务级参数通过 model_copy 生成变体（共享 SDK 客户端）并缓存。
+结构化调用（structured / astructured）在输出无法解析或校验失败时按 cascade 升级档位
+（如 nano -> full），记入 metrics（model_router.*）。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from agent.config import (
+    GOOGLE_API_KEY,
+    GOOGLE_FLASH_MODEL,
+    LLM_MODEL,
+    LLM_NANO_MODEL,
+    MODEL_ROUTE_TIMEOUT_S,
+    MODEL_ROUTES,
+    MODEL_ROUTES_OVERRIDES,
+    get_logger,
+)
+from agent.utils import metrics
+
+logger = get_logger(__name__)
+
+TIERS = ("nano", "full", "gemini")
+# 各档位实际使用的模型名
+TIER_MODELS = {"nano": LLM_NANO_MODEL, "full": LLM_MODEL, "gemini": GOOGLE_FLASH_MODEL}
+# 流式 / 非流式共用一个客户端的档位
+_STREAM_AGNOSTIC_TIERS = frozenset({"gemini"})
+
+
+@dataclass(frozen=True, slots=True)
+class ModelRoute:
+    """单个任务的模型路由配置。"""
+
+    tier: str
+    # None 表示使用模型默认值
+    temperature: float | None = 0.0
+    max_tokens: int | None = None
+    timeout_s: float | None = None
+    # 结构化输出失败时依次尝试的档位
+    cascade: tuple[str, ...] = ()
+    # 仅 gemini 档位生效
+    thinking_level: str | None = None
+
+    @classmethod
+    def from_dict(cls, spec: dict[str, Any]) -> ModelRoute:
+        """从配置字典构造路由；档位未知时抛 ValueError。"""
+        tier = str(spec.get("tier") or "full")
+        if tier not in TIERS:
+            raise ValueError(f"unknown model tier: {tier}")
+        cascade = tuple(t for t in (spec.get("cascade") or ()) if t != tier)
+        unknown = [t for t in cascade if t not in TIERS]
+        if unknown:
+            raise ValueError(f"unknown cascade tier: {unknown}")
+        temperature = spec.get("temperature", 0.0)
+        max_tokens = spec.get("max_tokens")
+        timeout_s = spec.get("timeout_s", MODEL_ROUTE_TIMEOUT_S)
+        return cls(
+            tier=tier,
+            temperature=None if temperature is None else float(temperature),
+            max_tokens=int(max_tokens) if max_tokens else None,
+            timeout_s=float(timeout_s) if timeout_s else None,
+            cascade=cascade,
+            thinking_level=spec.get("thinking_level") or None,
+        )
+
+
+def _nano_client(streaming: bool) -> Any:
+    from agent.utils.llm import get_llm_nano, get_llm_nano_nostream
+
+    return get_llm_nano() if streaming else get_llm_nano_nostream()
+
+
+def _full_client(streaming: bool) -> Any:
+    from agent.utils.llm import get_llm, get_llm_nostream
+
+    return get_llm() if streaming else get_llm_nostream()
+
+
+def _gemini_client(streaming: bool) -> Any:
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
+    return ChatGoogleGenerativeAI(model=GOOGLE_FLASH_MODEL, google_api_key=GOOGLE_API_KEY)
+
+
+DEFAULT_FACTORIES: dict[str, Callable[[bool], Any]] = {
+    "nano": _nano_client,
+    "full": _full_client,
+    "gemini": _gemini_client,
+}
+
+
+def load_routes(overrides: str = MODEL_ROUTES_OVERRIDES) -> dict[str, ModelRoute]:
+    """MODEL_ROUTES 默认值 + MODEL_ROUTES_OVERRIDES（JSON，按任务合并）。"""
+    specs = {task: dict(spec) for task, spec in MODEL_ROUTES.items()}
+    if overrides:
+        try:
+            extra = json.loads(overrides)
+            for task, spec in extra.items():
+                specs[task] = {**specs.get(task, {}), **spec}
+        except Exception as e:
+            logger.warning(f"[ModelRouter][config] MODEL_ROUTES_OVERRIDES 无法解析，忽略: {e}")
+    return {task: ModelRoute.from_dict(spec) for task, spec in specs.items()}
+
+
+class ModelRouter:
+    """按任务类型路由模型；底层客户端每个档位（流式 / 非流式）各一个。"""
+
+    def __init__(
+        self,
+        routes: dict[str, ModelRoute] | None = None,
+        *,
+        factories: dict[str, Callable[[bool], Any]] | None = None,
+    ) -> None:
+        """初始化路由器；未传 routes 时从配置加载。"""
+        self.routes = routes if routes is not None else load_routes()
+        self.factories = factories or DEFAULT_FACTORIES
+        self._lock = threading.Lock()
+        self._clients: dict[tuple[str, bool], Any] = {}
+        self._variants: dict[tuple[Any, ...], Any] = {}
+
+    def route(self, task: str) -> ModelRoute:
+        """取任务的路由；"a.b" 未配置时回退到 "a"。"""
+        name = task
+        while name:
+            if name in self.routes:
+                return self.routes[name]
+            name = name.rpartition(".")[0]
+        raise KeyError(f"no model route for task: {task}")
+
+    def model_name(self, task: str) -> str:
+        """任务首选档位对应的模型名（用于缓存键等需要区分模型的场景）。"""
+        tier = self.route(task).tier
+        return TIER_MODELS.get(tier, tier)
+
+    def _client(self, tier: str, streaming: bool) -> Any:
+        key = (tier, streaming and tier not in _STREAM_AGNOSTIC_TIERS)
+        if key not in self._clients:
+            self._clients[key] = self.factories[tier](streaming)
+        return self._clients[key]
+
+    def model(self, task: str, *, streaming: bool = False, tier: str | None = None, **overrides: Any) -> Any:
+        """取任务对应的 chat model（已应用 temperature / max tokens / 思考等级）；overrides 为额外的模型字段。"""
+        route = self.route(task)
+        tier = tier or route.tier
+        key = (task, tier, streaming, tuple(sorted(overrides.items())))
+        with self._lock:
+            variant = self._variants.get(key)
+            if variant is None:
+                base = self._client(tier, streaming)
+                update: dict[str, Any] = dict(overrides)
+                if route.temperature is not None:
+                    update.setdefault("temperature", route.temperature)
+                if route.max_tokens:
+                    update["max_output_tokens" if tier == "gemini" else "max_tokens"] = route.max_tokens
+                if tier == "gemini" and route.thinking_level:
+                    # thinking_level 是 reasoning_effort 字段的别名
+                    update["reasoning_effort"] = route.thinking_level
+                variant = base.model_copy(update=update)
+                self._variants[key] = variant
+        return variant
+
+    async def ainvoke(self, task: str, input: Any, *, config: dict[str, Any] | None = None) -> Any:
+        """非流式调用（超时取 route.timeout_s）。"""
+        route = self.route(task)
+        started = time.perf_counter()
+        resp = await asyncio.wait_for(self.model(task).ainvoke(input, config=config), timeout=route.timeout_s)
+        metrics.observe(f"model_router.{task}.{route.tier}.ms", (time.perf_counter() - started) * 1000)
+        return resp
+
+    def structured(self, task: str, schema: Any, *, include_raw: bool = False) -> StructuredCall:
+        """与 with_structured_output(...) 用法一致的可调用对象（ainvoke），带档位升级。"""
+        return StructuredCall(self, task, schema, include_raw=include_raw)
+
+    async def astructured(
+        self,
+        task: str,
+        schema: Any,
+        input: Any,
+        *,
+        config: dict[str, Any] | None = None,
+        include_raw: bool = False,
+    ) -> Any:
+        """结构化调用；解析 / 校验失败（ValueError，含 ValidationError / OutputParserException）时升级档位。"""
+        route = self.route(task)
+        tiers = (route.tier, *route.cascade)
+        for i, tier in enumerate(tiers):
+            runnable = self.model(task, tier=tier).with_structured_output(schema, include_raw=include_raw)
+            started = time.perf_counter()
+            try:
+                out = await asyncio.wait_for(runnable.ainvoke(input, config=config), timeout=route.timeout_s)
+                parsed = out.get("parsed") if include_raw else out
+                if parsed is None:
+                    raise ValueError(
+                        f"no structured output: {out.get('parsing_error') if include_raw else 'empty response'}"
+                    )
+            except ValueError as e:
+                if i == len(tiers) - 1:
+                    metrics.incr(f"model_router.{task}.{tier}.failed")
+                    raise
+                logger.warning(f"[ModelRouter][{task}] {tier} 结构化输出无效，升级到 {tiers[i + 1]}: {e}")
+                metrics.incr(f"model_router.{task}.cascade")
+                continue
+            metrics.observe(f"model_router.{task}.{tier}.ms", (time.perf_counter() - started) * 1000)
+            return out
+        raise RuntimeError("unreachable")
+
+
+class StructuredCall:
+    """绑定到某个任务的结构化调用对象，ainvoke 时委托给 ModelRouter.astructured。"""
+
+    def __init__(self, router: ModelRouter, task: str, schema: Any, *, include_raw: bool = False) -> None:
+        """绑定路由器、任务与输出 schema。"""
+        self.router = router
+        self.task = task
+        self.schema = schema
+        self.include_raw = include_raw
+
+    async def ainvoke(self, input: Any, config: dict[str, Any] | None = None, **kwargs: Any) -> Any:
+        """结构化调用；kwargs 仅为兼容 Runnable 接口，会被忽略。"""
+        return await self.router.astructured(
+            self.task, self.schema, input, config=config, include_raw=self.include_raw
+        )
+
+
+_ROUTER: ModelRouter | None = None
+_ROUTER_LOCK = threading.Lock()
+
+
+def get_model_router() -> ModelRouter:
+    """进程内共享的 ModelRouter（惰性初始化）。"""
+    global _ROUTER
+    if _ROUTER is None:
+        with _ROUTER_LOCK:
+            if _ROUTER is None:
+                _ROUTER = ModelRouter()
+    return _ROUTER
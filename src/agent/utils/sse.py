@@ -0,0 +1,165 @@
+r"""字节级增量 SSE 解码器。
+
+直接消费 httpx 的字节块（`aiter_bytes()`），不做逐行 str 解码：
+- 行结束符支持 `\r\n` / `\n` / `\r`（跨 chunk 的 `\r\n` 也能正确处理）
+- 字段：`data:`（多行以 `\n` 拼接）、`event:`、`id:`、`retry:`；`:` 开头的注释行忽略
+- data 保持为 bytes，由调用方决定是否 / 何时做 JSON 解码
+
+参考 WHATWG HTML 规范 "Server-sent events" 的解析规则。
+"""
+
+from __future__ import annotations
+
+import re
+from collections.abc import AsyncIterator, Callable, Collection
+from dataclasses import dataclass
+
+_NODE_NAME_KEY = b'"node_name"'
+_NODE_NAME_VALUE_RE = re.compile(rb'\s*:\s*"([^"\\]*)"')
+
+
+@dataclass(slots=True)
+class SSEMessage:
+    """一个已分发的 SSE 事件（data 为原始字节）。"""
+
+    data: bytes
+    event: str | None = None
+    id: str | None = None
+    retry: int | None = None
+
+
+class SSEDecoder:
+    """增量解码：feed() 返回本次新完成的事件。
+
+    以空行为界整块切分事件，单行 `data:` 事件走快速路径（不逐行解析）；
+    未完成的事件留在缓冲区，等后续 chunk 补齐。
+    """
+
+    __slots__ = ("_buf", "_cr", "_last_id", "_retry")
+
+    def __init__(self) -> None:
+        """创建空解码器（每条 SSE 连接一个）。"""
+        self._buf = b""
+        # 上一个 chunk 以 \r 结尾：可能是被拆开的 \r\n
+        self._cr = False
+        self._last_id: str | None = None
+        self._retry: int | None = None
+
+    @property
+    def last_event_id(self) -> str | None:
+        """最近一次 `id:` 字段的值（用于断线重连的 Last-Event-ID）。"""
+        return self._last_id
+
+    @property
+    def retry(self) -> int | None:
+        """服务端通过 `retry:` 建议的重连间隔（毫秒）。"""
+        return self._retry
+
+    def feed(self, chunk: bytes) -> list[SSEMessage]:
+        """追加字节并解析所有完整的事件。"""
+        if self._cr:
+            chunk = b"\r" + chunk
+            self._cr = False
+        if b"\r" in chunk:
+            if chunk.endswith(b"\r"):
+                chunk = chunk[:-1]
+                self._cr = True
+            chunk = chunk.replace(b"\r\n", b"\n").replace(b"\r", b"\n")
+
+        buf = self._buf
+        if buf:
+            # 长事件跨多个 chunk 时，新 chunk 不含换行就不可能完成事件
+            if b"\n" not in chunk:
+                self._buf = buf + chunk
+                return []
+            buf += chunk
+        else:
+            buf = chunk
+
+        blocks = buf.split(b"\n\n")
+        self._buf = blocks.pop()
+        out: list[SSEMessage] = []
+        for block in blocks:
+            if not block:
+                continue
+            if block[:6] == b"data: " and b"\n" not in block:
+                out.append(SSEMessage(block[6:], None, self._last_id, self._retry))
+            else:
+                self._parse_block(block, out)
+        return out
+
+    def flush(self) -> list[SSEMessage]:
+        """流结束：按规范，未以空行结束的事件直接丢弃。"""
+        self._buf = b""
+        self._cr = False
+        return []
+
+    def _parse_block(self, block: bytes, out: list[SSEMessage]) -> None:
+        data: list[bytes] = []
+        event: str | None = None
+        for line in block.split(b"\n"):
+            if not line or line[0] == 0x3A:  # 空行（块首） / ":" 注释、心跳
+                continue
+            colon = line.find(b":")
+            if colon < 0:
+                field, value = line, b""
+            else:
+                field = line[:colon]
+                value = line[colon + 1 :]
+                if value[:1] == b" ":
+                    value = value[1:]
+
+            if field == b"data":
+                data.append(value)
+            elif field == b"event":
+                event = value.decode("utf-8", "replace")
+            elif field == b"id":
+                if b"\x00" not in value:
+                    self._last_id = value.decode("utf-8", "replace")
+            elif field == b"retry":
+                if value.isdigit():
+                    self._retry = int(value)
+        if data:
+            payload = data[0] if len(data) == 1 else b"\n".join(data)
+            out.append(SSEMessage(payload, event, self._last_id, self._retry))
+
+
+async def aiter_sse(chunks: AsyncIterator[bytes]) -> AsyncIterator[SSEMessage]:
+    """把字节块流解码为 SSE 事件流。"""
+    decoder = SSEDecoder()
+    async for chunk in chunks:
+        for msg in decoder.feed(chunk):
+            yield msg
+    for msg in decoder.flush():
+        yield msg
+
+
+def peek_node_name(data: bytes) -> str | None:
+    """不解析 JSON，直接从 data 字节中提取 node_name（找不到返回 None）。"""
+    i = data.find(_NODE_NAME_KEY)
+    if i < 0:
+        return None
+    m = _NODE_NAME_VALUE_RE.match(data, i + len(_NODE_NAME_KEY))
+    return m.group(1).decode("utf-8", "replace") if m else None
+
+
+def make_node_filter(node_types: Collection[str] | None) -> Callable[[bytes], bool]:
+    """按 node_name 预过滤：不需要的事件跳过 JSON 解码；无法判断时保守地保留。
+
+    常见形态 `{"node_name": "xxx", ...}` 用前缀比较（C 层 startswith）直接放行，
+    其余情况才查找 node_name 字段。
+    """
+    if node_types is None:
+        return lambda data: True
+    wanted = frozenset(node_types)
+    prefixes = tuple(
+        fmt % name.encode("utf-8") for name in wanted for fmt in (b'{"node_name": "%s"', b'{"node_name":"%s"')
+    )
+
+    def _wants(data: bytes) -> bool:
+        if data.startswith(prefixes):
+            return True
+        name = peek_node_name(data)
+        return name is None or name in wanted
+
+    return _wants
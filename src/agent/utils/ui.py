@@ -1,14 +1,23 @@
 """UI 辅助函数模块。
 
-提供 UI 消息推送等功能。
+提供 UI 消息推送等功能：
+- push_shortcut_ui：Shortcut 卡片推送
+- UICoalescer：合并高频的流式 UI 更新（节流 + 去重 + 文本增量）
 """
 
+from __future__ import annotations
+
+import asyncio
 import uuid
+from collections.abc import Callable, Collection
+from dataclasses import dataclass, field
 from typing import Any
 
-from langgraph.graph.ui import AnyUIMessage, push_ui_message
+from langgraph.graph.ui import AnyUIMessage, UIMessage, push_ui_message
 
+from agent.config import UI_COALESCE_INTERVAL_S, UI_COALESCE_MAX_CHARS
 from agent.state import ShortcutState
+from agent.utils import metrics
 
 
 def push_shortcut_ui(
@@ -36,3 +45,174 @@ def push_shortcut_ui(
         message_id=anchor_id,
         merge=merge,
     )
+
+
+@dataclass(slots=True)
+class _Slot:
+    """单个 UI id 的合并状态。"""
+
+    name: str
+    message: Any
+    # 已发送的 props 值（去重用）与待发送的 props（后写覆盖先写）
+    sent: dict[str, Any] = field(default_factory=dict)
+    pending: dict[str, Any] = field(default_factory=dict)
+    # 文本字段：已发送字符数 / 待发送的追加片段
+    offsets: dict[str, int] = field(default_factory=dict)
+    appended: dict[str, list[str]] = field(default_factory=dict)
+    pending_chars: int = 0
+    last_flush: float = float("-inf")
+    timer: asyncio.TimerHandle | None = None
+
+
+class UICoalescer:
+    """合并流式场景下的高频 UI 更新。
+
+    - `update()`：按 UI id 累积 props（后写覆盖先写，与已发送值相同的跳过），
+      文本字段只传新增片段，以 `{field}_delta` + `{field}_offset` 追加式下发；
+      距上次发送超过 interval_s 或累积文本超过 max_chars 时发送，否则定时补发
+    - `push()`：立即发送完整 props（写入 state，丢弃该 id 的待发更新），并作为后续增量的基线
+
+    中间更新只走 stream（state_key=None），最终状态由 `push()` 落到 state.ui。
+    writer 不为空时，额外以 `writer({"ui": [msg]})` 推送（与报表节点的推送方式一致）。
+    """
+
+    def __init__(
+        self,
+        *,
+        text_fields: Collection[str] = (),
+        interval_s: float = UI_COALESCE_INTERVAL_S,
+        max_chars: int = UI_COALESCE_MAX_CHARS,
+        writer: Callable[[Any], None] | None = None,
+    ) -> None:
+        """文本字段（text_fields）按追加片段下发，其余字段整体覆盖。"""
+        self.text_fields = frozenset(text_fields)
+        self.interval_s = interval_s
+        self.max_chars = max_chars
+        self.writer = writer
+        self._slots: dict[str, _Slot] = {}
+
+    def _slot(self, name: str, ui_id: str, message: Any) -> _Slot:
+        slot = self._slots.get(ui_id)
+        if slot is None:
+            slot = self._slots[ui_id] = _Slot(name=name, message=message)
+        elif message is not None:
+            slot.message = message
+        return slot
+
+    def _emit(self, slot: _Slot, ui_id: str, props: dict[str, Any], *, persist: bool, merge: bool) -> UIMessage:
+        msg = push_ui_message(
+            name=slot.name,
+            props=props,
+            id=ui_id,
+            message=slot.message,
+            merge=merge,
+            state_key="ui" if persist else None,
+        )
+        if self.writer is not None:
+            self.writer({"ui": [msg]})
+        return msg
+
+    def push(
+        self,
+        name: str,
+        ui_id: str,
+        props: dict[str, Any],
+        *,
+        message: Any = None,
+        merge: bool = True,
+    ) -> UIMessage:
+        """立即发送完整 props；待发送的增量作废（完整 props 已覆盖）。"""
+        slot = self._slot(name, ui_id, message)
+        self._cancel(slot)
+        slot.pending.clear()
+        slot.appended.clear()
+        slot.pending_chars = 0
+        out = dict(props)
+        for f in self.text_fields:
+            if f in props:
+                # 清除前端合并后残留的增量字段，并以完整文本作为新的基线
+                out[f"{f}_delta"] = None
+                out[f"{f}_offset"] = None
+                slot.offsets[f] = len(props[f] or "")
+        slot.sent = {**slot.sent, **props} if merge else dict(props)
+        slot.last_flush = asyncio.get_running_loop().time()
+        metrics.incr("ui_coalescer.push")
+        return self._emit(slot, ui_id, out, persist=True, merge=merge)
+
+    def update(
+        self,
+        name: str,
+        ui_id: str,
+        props: dict[str, Any] | None = None,
+        *,
+        append: dict[str, str] | None = None,
+        message: Any = None,
+    ) -> None:
+        """累积一次更新（props 合并；append 为文本字段的新增片段）。"""
+        slot = self._slot(name, ui_id, message)
+        metrics.incr("ui_coalescer.update")
+        for k, v in (props or {}).items():
+            if k in slot.sent and slot.sent[k] == v:
+                slot.pending.pop(k, None)
+            else:
+                slot.pending[k] = v
+        for f, piece in (append or {}).items():
+            if piece:
+                slot.appended.setdefault(f, []).append(piece)
+                slot.pending_chars += len(piece)
+        if not slot.pending and not slot.appended:
+            metrics.incr("ui_coalescer.deduped")
+            return
+
+        loop = asyncio.get_running_loop()
+        due = slot.last_flush + self.interval_s
+        if slot.pending_chars >= self.max_chars or loop.time() >= due:
+            self._flush(ui_id, slot)
+        elif slot.timer is None:
+            # call_at 会复制当前 contextvars，定时补发时仍能拿到 LangGraph 的运行上下文
+            slot.timer = loop.call_at(due, self._flush_later, ui_id)
+
+    def _flush_later(self, ui_id: str) -> None:
+        slot = self._slots.get(ui_id)
+        if slot is not None:
+            slot.timer = None
+            self._flush(ui_id, slot)
+
+    def _flush(self, ui_id: str, slot: _Slot) -> None:
+        self._cancel(slot)
+        if not slot.pending and not slot.appended:
+            return
+        props = dict(slot.pending)
+        for f, pieces in slot.appended.items():
+            delta = "".join(pieces)
+            offset = slot.offsets.get(f, 0)
+            props[f"{f}_delta"] = delta
+            props[f"{f}_offset"] = offset
+            slot.offsets[f] = offset + len(delta)
+        slot.sent.update(slot.pending)
+        slot.pending.clear()
+        slot.appended.clear()
+        slot.pending_chars = 0
+        slot.last_flush = asyncio.get_running_loop().time()
+        metrics.incr("ui_coalescer.flush")
+        self._emit(slot, ui_id, props, persist=False, merge=True)
+
+    @staticmethod
+    def _cancel(slot: _Slot) -> None:
+        if slot.timer is not None:
+            slot.timer.cancel()
+            slot.timer = None
+
+    def flush(self, ui_id: str | None = None) -> None:
+        """立即发送待发更新（不指定 ui_id 时发送全部）。"""
+        for key in [ui_id] if ui_id is not None else list(self._slots):
+            slot = self._slots.get(key)
+            if slot is not None:
+                self._flush(key, slot)
+
+    def discard(self, ui_id: str | None = None) -> None:
+        """丢弃待发更新并取消定时补发（不指定 ui_id 时丢弃全部）。"""
+        for key in [ui_id] if ui_id is not None else list(self._slots):
+            slot = self._slots.pop(key, None)
+            if slot is not None:
+                self._cancel(slot)
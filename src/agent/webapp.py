@@ -0,0 +1,27 @@
+"""LangGraph server 自定义 HTTP app（langgraph.json 的 `http.app`）。
+
+不提供额外路由，只挂载进程生命周期钩子：服务关闭时释放共享 httpx 连接池。
+"""
+
+from __future__ import annotations
+
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+from starlette.applications import Starlette
+
+from agent.config import get_logger
+from agent.utils.http import aclose_http_clients
+
+logger = get_logger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: Starlette) -> AsyncIterator[None]:
+    """服务启动后无需初始化（客户端按需懒加载）；关闭时释放共享 httpx 客户端。"""
+    yield
+    await aclose_http_clients()
+    logger.info("[App][lifespan] 共享 HTTP 客户端已关闭")
+
+
+app = Starlette(lifespan=lifespan)
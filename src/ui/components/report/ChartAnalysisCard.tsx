@@ -1,11 +1,29 @@
-import { React } from "../../hooks";
+import { React, useRef } from "../../hooks";
 import type { ChartAnalysisProps } from "../../types";
 import "../../styles.css";
 
+// 后端流式阶段只下发新增片段（delta + offset），在这里按 offset 拼接；
+// 完整 description 到达时（delta 为 null）以完整文本为准
+const useStreamedText = (full?: string, delta?: string | null, offset?: number | null): string => {
+    const streamed = useRef("");
+    const base = full || "";
+    if (typeof delta !== "string" || typeof offset !== "number") {
+        streamed.current = base;
+        return base;
+    }
+    const prev = streamed.current.length >= base.length ? streamed.current : base;
+    // offset 超出已有文本说明中间的增量被合并渲染跳过了：保留已有文本，等待完整 description
+    if (offset <= prev.length) {
+        streamed.current = prev.slice(0, offset) + delta;
+        return streamed.current;
+    }
+    return prev;
+};
+
 export const ChartAnalysisCard: React.FC<ChartAnalysisProps> = (props) => {
     const title = props.chart_title || props.chart_key || "Chart Analysis";
     const chartType = props.chart_type || "chart";
-    const desc = props.description || "";
+    const desc = useStreamedText(props.description, props.description_delta, props.description_offset);
 
     return (
         <div
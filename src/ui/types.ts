@@ -8,6 +8,10 @@ export type IntentRouterProps = {
     route?: string;
     raw?: string;
     elapsed_s?: number | null;
+    decision_source?: "rules" | "cache" | "index" | "llm" | "fallback";
+    confidence?: number;
+    classify_ms?: number;
+    tiers?: Record<string, number>;
     steps?: string[];
     active_step?: number;
     rag_status?: "running" | "done" | "error";
@@ -229,6 +233,9 @@ export type ChartAnalysisProps = {
     chart_title?: string;
     chart_type?: string;
     description?: string;
+    // 流式阶段的增量：从 description_offset 处开始的新增文本（完整 description 到达后为 null）
+    description_delta?: string | null;
+    description_offset?: number | null;
 };
 
 export type ChartAnalysisLoadingProps = {
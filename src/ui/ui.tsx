@@ -5,6 +5,7 @@ import { useStreamContext } from "@langchain/langgraph-sdk/react-ui";
 // react-shim 在部分环境下不包含 hooks 的类型声明，这里用 any 兜底避免 TS 报错
 const useState = (React as any).useState as any;
 const useEffect = (React as any).useEffect as any;
+const useRef = (React as any).useRef as any;
 
 type IntentRouterProps = {
   status: "thinking" | "done" | "error";
@@ -13,6 +14,10 @@ type IntentRouterProps = {
   route?: string;
   raw?: string;
   elapsed_s?: number | null;
+  decision_source?: "rules" | "cache" | "index" | "llm" | "fallback";
+  confidence?: number;
+  classify_ms?: number;
+  tiers?: Record<string, number>;
   steps?: string[];
   active_step?: number;
   rag_status?: "running" | "done" | "error";
@@ -1779,12 +1784,33 @@ type ChartAnalysisProps = {
   chart_title?: string;
   chart_type?: string;
   description?: string;
+  // 流式阶段的增量：从 description_offset 处开始的新增文本（完整 description 到达后为 null）
+  description_delta?: string | null;
+  description_offset?: number | null;
+};
+
+// 后端流式阶段只下发新增片段（delta + offset），在这里按 offset 拼接；
+// 完整 description 到达时（delta 为 null）以完整文本为准
+const useStreamedText = (full?: string, delta?: string | null, offset?: number | null): string => {
+  const streamed = useRef("");
+  const base = full || "";
+  if (typeof delta !== "string" || typeof offset !== "number") {
+    streamed.current = base;
+    return base;
+  }
+  const prev = streamed.current.length >= base.length ? streamed.current : base;
+  // offset 超出已有文本说明中间的增量被合并渲染跳过了：保留已有文本，等待完整 description
+  if (offset <= prev.length) {
+    streamed.current = prev.slice(0, offset) + delta;
+    return streamed.current;
+  }
+  return prev;
 };
 
 const ChartAnalysisCard: React.FC<ChartAnalysisProps> = (props) => {
   const title = props.chart_title || props.chart_key || "Chart Analysis";
   const chartType = props.chart_type || "chart";
-  const desc = props.description || "";
+  const desc = useStreamedText(props.description, props.description_delta, props.description_offset);
 
   return (
     <div
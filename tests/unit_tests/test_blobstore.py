@@ -0,0 +1,72 @@
+import os
+
+import pytest
+
+from agent.utils import blobstore
+from agent.utils.blobstore import (
+    BlobNotFoundError,
+    BlobStore,
+    FileBlobBackend,
+    SQLiteBlobBackend,
+    is_blob_ref,
+)
+
+
+def test_offload_is_content_addressed_and_skips_small_values(tmp_path) -> None:
+    store = BlobStore(FileBlobBackend(str(tmp_path)), min_bytes=64)
+    big = {"rows": [{"v": i} for i in range(50)], "row_count": 50}
+
+    assert store.offload({"ok": True}) == {"ok": True}
+    ref = store.offload(big, kind="ga_result")
+    assert is_blob_ref(ref) and ref["kind"] == "ga_result"
+    # 键顺序不同但内容相同 -> 同一个引用
+    assert store.offload(dict(reversed(list(big.items()))), kind="ga_result") == ref
+    assert store.offload(ref) is ref
+
+    # 冷启动（新的内存层）也能从磁盘取回
+    cold = BlobStore(FileBlobBackend(str(tmp_path)), min_bytes=64)
+    assert cold.resolve(ref) == big
+    assert cold.resolve("inline") == "inline"
+
+
+@pytest.mark.anyio
+async def test_sqlite_backend_roundtrip_and_missing_blob(tmp_path) -> None:
+    store = BlobStore(SQLiteBlobBackend(str(tmp_path / "blobs.sqlite3")), min_bytes=0)
+    ref = await store.aoffload(["a" * 100], kind="tool_schema")
+    store.memory.clear()
+    assert await store.aresolve(ref) == ["a" * 100]
+
+    with pytest.raises(KeyError):
+        store.resolve({"$blob": "sha256:missing", "bytes": 1})
+
+
+@pytest.mark.parametrize("backend", ["fs", "sqlite"])
+def test_purge_drops_blobs_past_retention(tmp_path, backend: str) -> None:
+    if backend == "fs":
+        store = BlobStore(FileBlobBackend(str(tmp_path)), min_bytes=0, retention_s=60)
+    else:
+        store = BlobStore(SQLiteBlobBackend(str(tmp_path / "blobs.sqlite3")), min_bytes=0, retention_s=60)
+    old = store.put(["old"])
+    fresh = store.put(["fresh"])
+    # 把 old 的写入时间改到保留期之前
+    if backend == "fs":
+        os.utime(store.backend._path(old["$blob"]), (0, 0))
+    else:
+        store.backend._conn.execute("UPDATE blobs SET written_at = 0 WHERE digest = ?", (old["$blob"],))
+
+    assert store.purge() == 1
+    with pytest.raises(BlobNotFoundError):
+        store.resolve(old)
+    assert store.resolve(fresh) == ["fresh"]
+
+
+@pytest.mark.anyio
+async def test_module_resolve_raises_when_blob_cannot_be_fetched(monkeypatch: pytest.MonkeyPatch) -> None:
+    ref = {"$blob": "sha256:missing", "bytes": 1}
+    monkeypatch.setattr(blobstore, "get_blob_store", lambda: None)
+    with pytest.raises(BlobNotFoundError):
+        await blobstore.aresolve(ref)
+    monkeypatch.setattr(blobstore, "get_blob_store", lambda: BlobStore())
+    with pytest.raises(BlobNotFoundError):
+        blobstore.resolve(ref)
+    assert await blobstore.aresolve({"inline": True}) == {"inline": True}
@@ -0,0 +1,45 @@
+import json
+
+from agent.insights.reporting.columnar import decode_ga_report
+from agent.insights.reporting.shaping import ChartBudget, bound_ga_result, shape_chart
+
+
+def _report(dim, metrics, rows):
+    return {
+        "dimension_headers": [{"name": dim}],
+        "metric_headers": [{"name": m} for m in metrics],
+        "rows": [
+            {"dimension_values": [{"value": d}], "metric_values": [{"value": v} for v in mv]}
+            for d, mv in rows
+        ],
+    }
+
+
+def test_bar_chart_keeps_top_n_and_buckets_the_rest() -> None:
+    report = _report(
+        "pagePath",
+        ["sessions", "engagementRate"],
+        [(f"/p{i}", [str(i), "0.5"]) for i in range(100)],
+    )
+    chart = shape_chart(decode_ga_report(report), ChartBudget(bars=5))
+
+    assert [row["pagePath"] for row in chart["data"]] == ["/p99", "/p98", "/p97", "/p96", "Other"]
+    assert chart["data"][-1] == {"pagePath": "Other", "sessions": sum(range(96))}
+    assert chart["shaping"] == {"method": "top_n", "total_rows": 100, "shown_rows": 4}
+
+
+def test_long_series_is_downsampled_and_payload_is_bounded() -> None:
+    n = 5000
+    rows = [(f"2024{i:06d}", [str(1000 if i == 1234 else i % 7)]) for i in range(n)]
+    report = _report("date", ["activeUsers"], rows[::-1])
+    frame = decode_ga_report(report)
+
+    chart = shape_chart(frame, ChartBudget(line_points=100))
+    dates = [row["date"] for row in chart["data"]]
+    assert len(dates) == 100
+    assert dates == sorted(dates)
+    assert {rows[0][0], rows[-1][0], rows[1234][0]} <= set(dates)
+
+    bounded = bound_ga_result(report, frame, max_rows=50)
+    assert len(bounded["rows"]) == 50 and bounded["rows_truncated"]["total_rows"] == len(rows)
+    assert len(json.dumps(bounded)) < len(json.dumps(report)) / 50
@@ -0,0 +1,61 @@
+from datetime import date
+
+from agent.insights.reporting.columnar import decode_ga_report
+from agent.insights.reporting.comparison import (
+    compare_frames,
+    previous_period_args,
+    previous_period_range,
+)
+from agent.insights.reporting.rules import RuleContext, _period_comparison
+
+
+def _report(dim: str, rows: list[tuple[str, int]]) -> dict:
+    return {
+        "dimension_headers": [{"name": dim}],
+        "metric_headers": [{"name": "sessions"}, {"name": "engagementRate"}],
+        "rows": [
+            {"dimension_values": [{"value": k}], "metric_values": [{"value": str(v)}, {"value": "0.5"}]}
+            for k, v in rows
+        ],
+    }
+
+
+def test_previous_period_range() -> None:
+    today = date(2024, 5, 20)
+    assert previous_period_range({"start_date": "7daysAgo", "end_date": "yesterday"}, today=today) == {
+        "start_date": "14daysAgo",
+        "end_date": "8daysAgo",
+    }
+    assert previous_period_range({"start_date": "2024-05-01", "end_date": "2024-05-31"}) == {
+        "start_date": "2024-03-31",
+        "end_date": "2024-04-30",
+    }
+    assert previous_period_args("run_realtime_report", {"date_ranges": [{"start_date": "today"}]}) is None
+
+
+def test_compare_frames_movers_and_anomalies() -> None:
+    cur = decode_ga_report(_report("pagePath", [("/a", 100), ("/b", 50), ("/c", 30)]))
+    prev = decode_ga_report(_report("pagePath", [("/a", 60), ("/b", 55), ("/d", 20)]))
+    pages = compare_frames(cur, prev, top_n=3)
+    assert pages["totals"] == {"sessions": {"current": 180, "previous": 135, "delta": 45, "delta_pct": 0.3333}}
+    # /c、/d 只出现在一期（可能只是挤进 / 跌出了 Top N），不作为 movers
+    assert [(m["key"], m["delta"]) for m in pages["movers"]] == [("/a", 40), ("/b", -5)]
+
+    days = compare_frames(
+        decode_ga_report(_report("date", [(f"202405{d:02d}", 400 if d == 5 else 100) for d in range(1, 8)])),
+        decode_ga_report(_report("date", [(f"202404{d:02d}", 95 + d % 3 * 5) for d in range(24, 31)])),
+    )
+    assert days["anomalies"]["baseline"] == "previous_period"
+    assert [f["key"] for f in days["anomalies"]["flags"]] == ["20240505"]
+
+    lines = _period_comparison(RuleContext({}, {}, {}, {"top_pages": pages, "daily_visits": days}), ()).lines
+    assert lines[0].startswith("sessions: 1,000 vs previous period")
+    assert "top_pages top sessions movers vs previous period: /a (+40, +66.7%), /b (-5, -9.1%)" in lines[1]
+
+
+def test_movers_ignore_rows_outside_either_top_n() -> None:
+    # 两期都是 limit=3 的 Top N：/d 本期挤进前三、/c 跌出前三，实际变化未知
+    cur = decode_ga_report(_report("pagePath", [("/a", 500), ("/b", 300), ("/d", 290)]))
+    prev = decode_ga_report(_report("pagePath", [("/a", 480), ("/c", 310), ("/b", 305)]))
+    movers = compare_frames(cur, prev, top_n=5)["movers"]
+    assert [(m["key"], m["delta"]) for m in movers] == [("/a", 20), ("/b", -5)]
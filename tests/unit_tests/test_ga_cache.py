@@ -0,0 +1,69 @@
+import datetime as dt
+
+import pytest
+
+from agent.tools.ga_cache import (
+    CachedGATool,
+    GAReportCache,
+    ga_report_cache_key,
+    ga_report_ttl,
+)
+from agent.utils.cache import MemoryLRUCache, SQLiteCache, TieredCache
+
+NOW = dt.datetime(2025, 3, 10, 12, 0, 0)
+
+
+def _ranges(start: str, end: str) -> dict:
+    return {"date_ranges": [{"start_date": start, "end_date": end}]}
+
+
+def test_ttl_depends_on_date_range() -> None:
+    realtime = ga_report_ttl("run_realtime_report", {}, now=NOW)
+    today = ga_report_ttl("run_report", _ranges("7daysAgo", "today"), now=NOW)
+    relative = ga_report_ttl("run_report", _ranges("7daysAgo", "yesterday"), now=NOW)
+    historical = ga_report_ttl("run_report", _ranges("2025-01-01", "2025-01-31"), now=NOW)
+
+    assert realtime <= 0
+    assert 0 < today < relative < historical
+    # 相对日期最多缓存到当天结束
+    assert relative <= 12 * 3600
+
+
+def test_cache_key_is_order_insensitive_for_dict_keys() -> None:
+    a = {"property_id": "properties/1", "dimensions": ["date"], "metrics": ["sessions"]}
+    b = {"metrics": ["sessions"], "dimensions": ["date"], "property_id": "properties/1"}
+    key = ga_report_cache_key(site_id="s", tenant_id="t", tool_name="run_report", args=a)
+    assert key == ga_report_cache_key(site_id="s", tenant_id="t", tool_name="run_report", args=b)
+    assert key != ga_report_cache_key(site_id="s2", tenant_id="t", tool_name="run_report", args=a)
+
+
+def test_sqlite_tier_survives_memory_eviction(tmp_path) -> None:
+    cache = TieredCache(MemoryLRUCache(1), SQLiteCache(str(tmp_path / "c.sqlite3")))
+    cache.set("a", {"rows": [1]}, 60)
+    cache.set("b", {"rows": [2]}, 60)
+
+    assert cache.get("a") == {"rows": [1]}
+    assert cache.stats()["disk_hits"] == 1
+
+
+@pytest.mark.anyio
+async def test_cached_tool_skips_upstream_on_hit() -> None:
+    class _Tool:
+        name = "run_report"
+        calls = 0
+
+        async def ainvoke(self, args):
+            self.calls += 1
+            return {"rows": [{"metric_values": ["1"]}]}
+
+    tool = _Tool()
+    cached = CachedGATool(
+        tool, GAReportCache(TieredCache(MemoryLRUCache(8))), site_id="s", tenant_id="t"
+    )
+    args = {"property_id": "properties/1", **_ranges("2020-01-01", "2020-01-31")}
+
+    first = await cached.ainvoke(args)
+    second = await cached.ainvoke(args)
+
+    assert first == second
+    assert tool.calls == 1
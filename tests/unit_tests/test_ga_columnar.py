@@ -0,0 +1,54 @@
+from agent.insights.reporting.columnar import (
+    build_chart,
+    build_summary,
+    decode_ga_report,
+)
+
+
+def _report(dims, metrics, rows):
+    return {
+        "dimension_headers": [{"name": d} for d in dims],
+        "metric_headers": [{"name": m} for m in metrics],
+        "rows": [
+            {
+                "dimension_values": [{"value": v} for v in dv],
+                "metric_values": [{"value": v} for v in mv],
+            }
+            for dv, mv in rows
+        ],
+    }
+
+
+def test_bar_chart_keeps_row_parsing_semantics() -> None:
+    report = _report(
+        ["pagePath"],
+        ["sessions", "engagementRate"],
+        [(["/a"], ["10", "0.5"]), (["/b"], ["n/a", "1"]), (["/c"], ["7"])],
+    )
+    chart = build_chart(decode_ga_report(report))
+
+    assert chart["chart_type"] == "bar"
+    assert chart["data"] == [
+        {"pagePath": "/a", "sessions": 10, "engagementRate": 0.5},
+        {"pagePath": "/b", "sessions": "n/a", "engagementRate": 1},
+        {"pagePath": "/c", "sessions": 7},
+    ]
+
+
+def test_pie_summary_and_top_n_share_one_decode() -> None:
+    report = _report(
+        ["deviceCategory"],
+        ["sessions"],
+        [(["desktop"], ["30"]), (["mobile"], ["50"]), (["desktop"], ["20"])],
+    )
+    frame = decode_ga_report(report)
+
+    chart = build_chart(frame)
+    assert chart["chart_type"] == "pie"
+    assert chart["data"] == [
+        {"name": "Desktop", "value": 30},
+        {"name": "Mobile", "value": 50},
+        {"name": "Desktop", "value": 20},
+    ]
+    assert build_summary(frame)["total_visits"] == 100
+    assert frame.top_n("sessions", 2) == [("Mobile", 50.0), ("Desktop", 30.0)]
@@ -0,0 +1,59 @@
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+from agent.history import (
+    HISTORY_ARCHIVE_KEY,
+    IndexedMessages,
+    archive_messages,
+    find_message,
+    is_archive_marker,
+    windowed_messages,
+)
+from agent.utils import blobstore
+from agent.utils.helpers import latest_message_kwarg
+
+
+@pytest.mark.anyio
+async def test_window_archives_oldest_batch_and_keeps_anchors_resolvable(monkeypatch) -> None:
+    store = blobstore.BlobStore(blobstore.MemoryBlobBackend(), min_bytes=0)
+    monkeypatch.setattr(blobstore, "_STORE", store)
+    monkeypatch.setattr(blobstore, "_STORE_INIT", True)
+
+    messages: list = []
+    for i in range(12):
+        turn = [HumanMessage(id=f"h{i}", content=f"q{i}"), AIMessage(id=f"a{i}", content="")]
+        messages = windowed_messages(messages, turn)
+    # reducer 本身不归档
+    assert len(messages) == 24 and isinstance(messages, IndexedMessages)
+    assert await archive_messages(messages, window=30) == []
+
+    messages = windowed_messages(messages, [HumanMessage(id="h12", content="q12")])
+    messages = windowed_messages(messages, await archive_messages(messages, window=8))
+    assert is_archive_marker(messages[0]) and len(messages) == 1 + 6
+    assert [m.id for m in messages[1:]] == ["a9", "h10", "a10", "h11", "a11", "h12"]
+
+    info = messages[0].additional_kwargs[HISTORY_ARCHIVE_KEY]
+    assert info["count"] == 19
+    archived = store.resolve(info["batches"][0])
+    assert archived[0]["content"] == "q0"
+
+    # 热窗口内 O(1) 命中；已归档的 UI 锚点返回同 id 的空锚点
+    assert find_message(messages, "h12").content == "q12"
+    assert find_message(messages, "a0") == AIMessage(id="a0", content="")
+    assert find_message(messages, "h0") is None
+
+    # 再次归档时原位更新标记，累计条数
+    messages = windowed_messages(messages, [HumanMessage(id=f"h{i}", content="q") for i in range(13, 20)])
+    messages = windowed_messages(messages, await archive_messages(messages, window=8))
+    assert is_archive_marker(messages[0]) and sum(is_archive_marker(m) for m in messages) == 1
+    assert messages[0].additional_kwargs[HISTORY_ARCHIVE_KEY]["count"] == 19 + 7
+
+
+def test_latest_message_kwarg_scans_full_history_and_skips_empty_values() -> None:
+    submit = HumanMessage(content="write", additional_kwargs={"direct_intent": "article_task", "confirmed": False})
+    later = [AIMessage(content="", additional_kwargs={"direct_intent": None})] + [AIMessage(content="") for _ in range(80)]
+    state = {"messages": [submit, *later]}
+
+    assert latest_message_kwarg(state, "direct_intent") is None
+    assert latest_message_kwarg(state, "direct_intent", truthy=True) == "article_task"
+    assert latest_message_kwarg(state, "confirmed") is False
@@ -0,0 +1,19 @@
+import pytest
+
+from agent.utils.http import aclose_http_clients, get_http_client
+from agent.webapp import app, lifespan
+
+
+@pytest.mark.anyio
+async def test_clients_are_shared_per_upstream_and_closed_on_shutdown() -> None:
+    async with lifespan(app):
+        rag = get_http_client("rag")
+        assert get_http_client("rag") is rag
+        assert get_http_client("seo") is not rag
+        with pytest.raises(ValueError):
+            get_http_client("unknown")
+    # 服务关闭时释放连接池；之后再取会得到新的客户端
+    assert rag.is_closed
+    fresh = get_http_client("rag")
+    assert fresh is not rag and not fresh.is_closed
+    await aclose_http_clients()
@@ -0,0 +1,79 @@
+
+from agent.insights.report_insights_agent import (
+    AnalysisPlanModel,
+    PlanStepModel,
+    execute_plan,
+)
+from agent.insights.reporting.rules import (
+    REGISTRY,
+    AnalysisRule,
+    RuleRegistry,
+    RuleResult,
+    run_plan,
+)
+
+
+def _pack() -> dict:
+    sessions = [100 + (i % 3) for i in range(14)]
+    sessions[9] = 400
+    return {
+        "summary": {"total_visits": 1234, "total_unique_visitors": 900, "total_page_views": 3000, "pages_per_session": 2.43},
+        "charts": {
+            "daily_visits": {
+                "chart_type": "line",
+                "x_key": "date",
+                "y_keys": ["sessions"],
+                "data": [{"date": f"01-{i + 1:02d}", "sessions": v} for i, v in enumerate(sessions)],
+            },
+            "top_pages": {
+                "chart_type": "bar",
+                "x_key": "pagePath",
+                "y_key": "sessions",
+                "data": [{"pagePath": "/", "sessions": 600}, {"pagePath": "/blog", "sessions": 200}, {"pagePath": "Other", "sessions": 900}],
+            },
+        },
+        "data_quality": {"notes": [], "warnings": ["Small sample"]},
+    }
+
+
+def _plan(*steps: tuple[str, list[str]]) -> AnalysisPlanModel:
+    return AnalysisPlanModel(
+        steps=[PlanStepModel(title=t, evidence_refs=refs, output_expectation="facts") for t, refs in steps]
+    )
+
+
+def test_registry_dispatch_by_keyword_and_path() -> None:
+    names = [rule.name for rule, _ in REGISTRY.match("Key metrics and anomalies", ["charts.daily_visits.data"])]
+    assert names == ["core_metrics", "trend", "period_delta", "anomalies", "concentration"]
+    assert [r.name for r, _ in REGISTRY.match("Misc", [])] == []
+
+
+def test_execute_plan_produces_rule_facts() -> None:
+    plan = _plan(
+        ("Core metrics", ["summary"]),
+        ("Traffic anomalies", ["charts.daily_visits"]),
+        ("Page concentration", ["charts.top_pages"]),
+        ("Something unknown", []),
+    )
+    outputs = execute_plan(evidence_pack=_pack(), plan=plan)
+
+    assert outputs[0]["result"].splitlines()[0] == "Total sessions: 1,234"
+    assert "01-10 400 (z +3.6)" in outputs[1]["result"]
+    assert "last 7 days" in outputs[1]["result"] and outputs[1]["evidence_ref"] == "charts.daily_visits"
+    # "Other" 计入总量但不参与排名
+    assert "top item / holds 35.3%" in outputs[2]["result"]
+    assert outputs[3]["result"].startswith("(No deterministic rule implemented")
+
+
+def test_failed_rules_are_dropped_not_reported_as_facts() -> None:
+    def boom(ctx, refs):
+        raise ZeroDivisionError("division by zero")
+
+    registry = RuleRegistry()
+    registry.register(AnalysisRule("boom", boom, keywords=("broken",)))
+    registry.register(AnalysisRule("ok", lambda ctx, refs: RuleResult(["fine"], None), keywords=("mixed",)))
+    registry.register(AnalysisRule("boom2", boom, keywords=("mixed",)))
+    plan = _plan(("Broken step", []), ("Mixed step", []))
+
+    outputs = run_plan(_pack(), list(plan.steps), registry)
+    assert outputs == [{"step": "Mixed step", "result": "fine", "evidence_ref": None}]
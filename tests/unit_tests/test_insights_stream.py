@@ -0,0 +1,53 @@
+import json
+
+import pytest
+from langchain_core.messages import AIMessageChunk
+
+from agent.insights import report_insights_agent as ria
+from agent.insights.reporting.insights_stream import InsightsStreamParser
+
+_OUTPUT = {
+    "insights": {
+        "one_liner": "Sessions grew 12% on organic search.",
+        "evidence": ["Sessions 1,200 vs 1,070", "Organic share 54%"],
+        "hypotheses": [{"text": "SEO update", "confidence": "medium", "next_step": "Check rankings"}],
+    },
+    "actions": [{"id": "a1", "title": "Expand top posts"}],
+}
+
+
+class _FakeStreamingLLM:
+    def __init__(self, text: str, size: int = 7) -> None:
+        self.pieces = [text[i : i + size] for i in range(0, len(text), size)]
+
+    async def astream(self, *_: object, **__: object):
+        for piece in self.pieces:
+            yield AIMessageChunk(content=piece)
+
+
+def test_parser_pushes_only_completed_items() -> None:
+    parser = InsightsStreamParser()
+    view = parser.feed('{"insights": {"one_liner": "Traffic up", "evidence": ["a", "b')
+    assert view["insights"]["one_liner"] == "Traffic up"
+    assert view["insights"]["evidence"] == ["a"]
+    assert parser.has_insight
+    # 未完成的最后一个条目继续增长时不重复推送
+    assert parser.feed("cd") is None
+    assert parser.feed('"], "hypotheses": [')["insights"]["evidence"] == ["a", "bcd"]
+
+
+@pytest.mark.anyio
+async def test_stream_insights_updates_incrementally() -> None:
+    updates: list[dict] = []
+
+    async def on_update(view: dict) -> None:
+        updates.append(view)
+
+    llm = _FakeStreamingLLM("```json\n" + json.dumps(_OUTPUT) + "\n```")
+    final, ttfi_ms = await ria._stream_insights("prompt", started=0.0, on_update=on_update, llm=llm)
+    assert final.insights.evidence == _OUTPUT["insights"]["evidence"]
+    assert final.actions[0].title == "Expand top posts"
+    assert ttfi_ms is not None
+    evidence_counts = [len(u["insights"]["evidence"]) for u in updates]
+    assert evidence_counts == sorted(evidence_counts) and 1 in evidence_counts
+    assert updates[-1]["actions"] == []  # 最后一个 action 在完整 JSON 之前不推送
@@ -0,0 +1,75 @@
+import asyncio
+import os
+
+import pytest
+
+from agent.intent import (
+    HashingEmbedder,
+    IntentIndexRegistry,
+    classifier,
+    classify_intent,
+    clear_intent_cache,
+    score_intent,
+)
+
+
+@pytest.mark.parametrize(
+    ("text", "label"),
+    [
+        ("hi", "introduction"),
+        ("你好！", "introduction"),
+        ("How many visitors did we have last week?", "site_report"),
+        ("帮我写一篇关于AI的文章", "article_task"),
+        ("Change the site title to Foo", "shortcut"),
+        ("Weekly plan", "seo_planning"),
+    ],
+)
+def test_rules_are_confident_on_obvious_inputs(text: str, label: str) -> None:
+    decision = score_intent(text)
+    assert decision.label == label
+    assert decision.confidence >= 0.8
+
+
+def test_rules_are_unsure_on_mixed_inputs() -> None:
+    assert score_intent("how do I change the logo").confidence < 0.8
+
+
+@pytest.mark.anyio
+async def test_llm_result_is_cached_by_normalized_text(monkeypatch) -> None:
+    calls = []
+
+    async def _fake_llm(text: str) -> str:
+        calls.append(text)
+        return "shortcut"
+
+    monkeypatch.setattr(classifier, "_classify_with_llm", _fake_llm)
+    clear_intent_cache()
+
+    first = await classify_intent("How do I change the logo?")
+    second = await classify_intent("  how do i change the LOGO  ")
+
+    assert (first.source, first.label) == ("llm", "shortcut")
+    assert (second.source, second.label) == ("cache", "shortcut")
+    assert len(calls) == 1
+    assert "llm" not in second.tiers
+
+
+@pytest.mark.anyio
+async def test_index_routes_paraphrases_and_reloads_from_disk(tmp_path) -> None:
+    corpus = tmp_path / "intents.jsonl"
+    corpus.write_text('{"text": "show bounce rate by country", "label": "site_report"}\n')
+    registry = IntentIndexRegistry(str(corpus), HashingEmbedder(), check_interval_s=0)
+
+    index = await registry.get()
+    match = await index.classify("how many users visited yesterday", 5)
+    assert match.label == "site_report"
+    assert match.margin > 0.1
+
+    corpus.write_text('{"text": "translate this page to french", "label": "shortcut"}\n')
+    os.utime(corpus, (0, 0))
+    # 语料变化：先返回旧索引，后台重建完成后再替换
+    assert await registry.get() is index
+    await asyncio.gather(*registry._background)
+    reloaded = await registry.get()
+    assert reloaded is not index
+    assert "translate this page to french" in reloaded.texts
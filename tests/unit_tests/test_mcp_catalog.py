@@ -0,0 +1,67 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from agent.tools.mcp_catalog import MCPToolCatalog, make_catalog_key
+
+_KEY = make_catalog_key({"url": "http://mcp", "headers": {"X-Site-Id": "1", "X-Tenant-Id": "t"}})
+
+
+class _Loader:
+    def __init__(self) -> None:
+        self.calls = 0
+        self.gate: asyncio.Event | None = None
+
+    async def __call__(self) -> list[SimpleNamespace]:
+        self.calls += 1
+        if self.gate is not None:
+            await self.gate.wait()
+        return [SimpleNamespace(name=f"tool_v{self.calls}", description="", inputSchema={})]
+
+
+@pytest.mark.anyio
+async def test_ttl_hit_then_stale_while_revalidate() -> None:
+    catalog = MCPToolCatalog(ttl_s=60, stale_s=60)
+    loader = _Loader()
+    first = await catalog.get(_KEY, loader)
+    assert await catalog.get(_KEY, loader) is first
+    assert loader.calls == 1
+
+    # 过期但在 stale 窗口内：立即返回旧值，后台刷新
+    first.fetched_at -= 90
+    assert (await catalog.get(_KEY, loader)).names == ["tool_v1"]
+    await asyncio.gather(*catalog._background)
+    assert (await catalog.get(_KEY, loader)).names == ["tool_v2"]
+
+    # 超出 stale 窗口：同步重新拉取
+    catalog._entries[_KEY].fetched_at -= 200
+    assert (await catalog.get(_KEY, loader)).names == ["tool_v3"]
+    stats = catalog.stats()
+    assert (stats["hits"], stats["stale_hits"], stats["misses"], stats["fetches"]) == (2, 1, 2, 3)
+
+
+@pytest.mark.anyio
+async def test_singleflight_and_leader_cancel() -> None:
+    catalog = MCPToolCatalog(ttl_s=60, stale_s=0)
+    loader = _Loader()
+    loader.gate = asyncio.Event()
+    tasks = [asyncio.create_task(catalog.get(_KEY, loader)) for _ in range(5)]
+    await asyncio.sleep(0)
+    loader.gate.set()
+    entries = await asyncio.gather(*tasks)
+    assert loader.calls == 1 and all(e is entries[0] for e in entries)
+
+    # leader 被取消：跟随者收到普通异常而不是 CancelledError，下一次请求重新拉取
+    catalog.invalidate(_KEY)
+    loader.gate = asyncio.Event()
+    leader = asyncio.create_task(catalog.get(_KEY, loader))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(catalog.get(_KEY, loader))
+    await asyncio.sleep(0)
+    leader.cancel()
+    with pytest.raises(RuntimeError):
+        await follower
+    assert leader.cancelled()
+    loader.gate.set()
+    assert (await catalog.get(_KEY, loader)).names == ["tool_v3"]
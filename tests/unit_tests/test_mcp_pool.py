@@ -0,0 +1,140 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+import anyio
+import pytest
+from mcp.shared.exceptions import McpError
+from mcp.types import CONNECTION_CLOSED, ErrorData
+
+from agent.tools.mcp_pool import MCPSessionPool, get_mcp_session_pool, make_session_key
+
+
+class _FakeSession:
+    def __init__(self, n: int) -> None:
+        self.n = n
+        self.ping_ok = True
+        self.closed = False
+
+    async def send_ping(self) -> None:
+        if not self.ping_ok:
+            raise ConnectionError("gone")
+
+
+class _Factory:
+    def __init__(self) -> None:
+        self.sessions: list[_FakeSession] = []
+
+    @asynccontextmanager
+    async def __call__(self, server: str, connection: dict):
+        session = _FakeSession(len(self.sessions))
+        self.sessions.append(session)
+        try:
+            yield session
+        finally:
+            session.closed = True
+
+
+def _conn(site: str) -> dict:
+    return {"url": "http://mcp", "headers": {"X-Site-Id": site}}
+
+
+async def _session_no(pool: MCPSessionPool, site: str, **kwargs) -> int:
+    conn = _conn(site)
+    return await pool.run(make_session_key("s", conn), conn, lambda p: _n(p), **kwargs)
+
+
+async def _n(pooled) -> int:
+    return pooled.session.n
+
+
+@pytest.mark.anyio
+async def test_reuse_lru_and_idle_eviction() -> None:
+    factory = _Factory()
+    pool = MCPSessionPool(max_sessions=1, idle_ttl_s=60, keepalive_s=30, session_factory=factory)
+    try:
+        assert [await _session_no(pool, "a") for _ in range(2)] == [0, 0]
+        # 池满：淘汰最久未用的空闲会话
+        assert await _session_no(pool, "b") == 1
+        assert factory.sessions[0].closed
+        assert pool.stats() == {"created": 2, "reused": 1, "evicted": 1, "reconnects": 0, "open": 1}
+
+        # janitor：ping 失败的会话被移除，空闲超时的会话被淘汰
+        pooled = pool._sessions[make_session_key("s", _conn("b"))]
+        pooled.last_used_at -= 40
+        factory.sessions[1].ping_ok = False
+        await pool._sweep()
+        assert factory.sessions[1].closed and pool.stats()["open"] == 0
+
+        await _session_no(pool, "c")
+        next(iter(pool._sessions.values())).last_used_at -= 61
+        await pool._sweep()
+        assert factory.sessions[2].closed and pool.stats()["evicted"] == 2
+        # 建连锁不随 key 累积
+        assert len(pool._key_locks) == 0
+    finally:
+        await pool.aclose()
+
+
+@pytest.mark.anyio
+async def test_retry_only_when_request_never_reached_server() -> None:
+    factory = _Factory()
+    pool = MCPSessionPool(session_factory=factory)
+    conn = _conn("a")
+    key = make_session_key("s", conn)
+    calls: list[int] = []
+
+    def failing(exc: Exception):
+        async def fn(pooled) -> int:
+            calls.append(pooled.session.n)
+            if pooled.session.n == len(factory.sessions) - 1 and len(calls) == 1:
+                raise exc
+            return pooled.session.n
+
+        return fn
+
+    try:
+        await _session_no(pool, "a")
+        # 写入已关闭的流：请求未发出，换新会话重试
+        assert await pool.run(key, conn, failing(anyio.ClosedResourceError())) == 1
+        assert calls == [0, 1] and factory.sessions[0].closed
+
+        # 连接在请求途中断开：非幂等调用不重试，幂等调用重试
+        closed = McpError(ErrorData(code=CONNECTION_CLOSED, message="Connection closed"))
+        calls.clear()
+        with pytest.raises(McpError):
+            await pool.run(key, conn, failing(closed))
+        calls.clear()
+        assert await pool.run(key, conn, failing(closed), idempotent=True) == 2
+        assert pool.stats()["reconnects"] == 2
+    finally:
+        await pool.aclose()
+
+
+@pytest.mark.anyio
+async def test_invalidate_keeps_replacement_and_defers_close() -> None:
+    factory = _Factory()
+    pool = MCPSessionPool(session_factory=factory)
+    conn = _conn("a")
+    key = make_session_key("s", conn)
+    try:
+        async with pool.session(key, conn) as stale:
+            await pool.invalidate(key, stale)
+            # 仍被借出：延迟关闭
+            assert not factory.sessions[0].closed
+            async with pool.session(key, conn) as fresh:
+                assert fresh is not stale
+            # 迟到的失效通知不能移除已替换的新会话
+            await pool.invalidate(key, stale)
+            assert pool._sessions[key] is fresh
+        assert factory.sessions[0].closed and not factory.sessions[1].closed
+    finally:
+        await pool.aclose()
+
+
+def test_pool_is_per_event_loop() -> None:
+    async def get() -> tuple[MCPSessionPool, MCPSessionPool]:
+        return get_mcp_session_pool(), get_mcp_session_pool()
+
+    a1, a2 = asyncio.run(get())
+    b1, _ = asyncio.run(get())
+    assert a1 is a2 and a1 is not b1
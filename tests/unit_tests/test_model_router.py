@@ -0,0 +1,70 @@
+import pytest
+from pydantic import BaseModel
+
+from agent.utils import metrics
+from agent.utils.model_router import ModelRoute, ModelRouter, load_routes
+
+
+class _Label(BaseModel):
+    label: str
+
+
+class _FakeModel:
+    def __init__(self, tier: str, outputs: list[object], **fields: object) -> None:
+        self.tier = tier
+        self.outputs = outputs
+        self.fields = fields
+
+    def model_copy(self, update: dict[str, object]) -> "_FakeModel":
+        return _FakeModel(self.tier, self.outputs, **{**self.fields, **update})
+
+    def with_structured_output(self, schema: type[BaseModel], include_raw: bool = False) -> "_FakeModel":
+        return self
+
+    async def ainvoke(self, *_: object, **__: object) -> object:
+        out = self.outputs.pop(0)
+        if isinstance(out, Exception):
+            raise out
+        return out
+
+
+def _router(nano_outputs: list[object], full_outputs: list[object], built: list[str]) -> ModelRouter:
+    def factory(tier: str, outputs: list[object]):
+        def build(streaming: bool) -> _FakeModel:
+            built.append(tier)
+            return _FakeModel(tier, outputs)
+
+        return build
+
+    routes = {
+        "classify": ModelRoute("nano", cascade=("full",), max_tokens=50, timeout_s=1),
+        "summarize": ModelRoute("full", temperature=0.3),
+    }
+    return ModelRouter(routes, factories={"nano": factory("nano", nano_outputs), "full": factory("full", full_outputs)})
+
+
+def test_router_reuses_one_client_per_tier_and_resolves_scoped_tasks() -> None:
+    built: list[str] = []
+    router = _router([], [], built)
+    classify = router.model("classify")
+    assert classify.tier == "nano" and classify.fields == {"temperature": 0.0, "max_tokens": 50}
+    assert router.model("classify.report") is not None
+    assert router.model("classify") is classify
+    assert router.model("summarize").fields == {"temperature": 0.3}
+    assert built == ["nano", "full"]
+    with pytest.raises(KeyError):
+        router.route("unknown")
+    # 默认配置中每个基础任务都有路由
+    assert {"classify", "extract", "plan", "narrate", "summarize"} <= set(load_routes(""))
+
+
+@pytest.mark.anyio
+async def test_structured_cascades_to_full_on_validation_failure() -> None:
+    metrics.reset()
+    built: list[str] = []
+    router = _router([ValueError("bad json"), None], [_Label(label="a"), _Label(label="b")], built)
+    call = router.structured("classify", _Label)
+    assert (await call.ainvoke("q")).label == "a"
+    # 空结果同样升级
+    assert (await call.ainvoke("q")).label == "b"
+    assert metrics.snapshot("model_router")["counters"]["model_router.classify.cascade"] == 2
@@ -0,0 +1,80 @@
+import asyncio
+
+import pytest
+from langchain_core.messages import AIMessage
+
+from agent.insights.reporting.narration import (
+    BatchNarrator,
+    ChartNarration,
+    ChartNarrations,
+    NarrationCache,
+    narration_cache_key,
+)
+from agent.utils import metrics, model_router
+from agent.utils.cache import MemoryLRUCache, TieredCache
+
+
+class _FakeLLM:
+    def __init__(self, items: list[ChartNarration]) -> None:
+        self.items = items
+        self.prompts: list[str] = []
+
+    def with_structured_output(self, schema, include_raw=False):
+        return self
+
+    async def ainvoke(self, prompt, config=None):
+        self.prompts.append(prompt)
+        raw = AIMessage(content="", usage_metadata={"input_tokens": 120, "output_tokens": 30, "total_tokens": 150})
+        return {"raw": raw, "parsed": ChartNarrations(items=self.items), "parsing_error": None}
+
+
+@pytest.mark.anyio
+async def test_batch_fires_once_after_all_items_and_misses_fall_back() -> None:
+    metrics.reset()
+    llm = _FakeLLM([ChartNarration(id=0, text=" Sessions peaked on Monday. "), ChartNarration(id=9, text="x")])
+    narrator = BatchNarrator(3, llm=llm)
+
+    first = narrator.submit(0, {"title": "Trend", "chart_type": "line", "data": [{"date": "0101", "sessions": 5}]})
+    second = narrator.submit(2, {"title": "Pages", "chart_type": "bar", "data": []})
+    await asyncio.sleep(0)
+    assert not llm.prompts  # 还有 item 未到齐
+
+    narrator.skip(1)
+    assert await first == "Sessions peaked on Monday."
+    assert await second is None  # 模型漏掉的图表由调用方回退逐图表生成
+    assert len(llm.prompts) == 1 and "### Chart 0" in llm.prompts[0] and "### Chart 2" in llm.prompts[0]
+
+    counters = metrics.snapshot("report_narration.batched")["counters"]
+    assert counters["report_narration.batched.llm_calls"] == 1
+    assert counters["report_narration.batched.fallback"] == 1
+    assert counters["report_narration.batched.input_tokens"] == 120
+
+
+@pytest.mark.anyio
+async def test_cache_is_keyed_by_what_the_prompt_sees() -> None:
+    metrics.reset()
+    cache = NarrationCache(TieredCache(MemoryLRUCache(8)), ttl_s=60)
+    chart = {"title": "Pages", "chart_type": "bar", "data": [{"pagePath": f"/p{i}", "sessions": i} for i in range(30)]}
+    await cache.store(chart, "Top page is /p0.")
+
+    # 预览之外的行不同：prompt 完全相同，仍命中
+    same_preview = {**chart, "data": chart["data"][:10] + [{"pagePath": "/other", "sessions": 1}]}
+    assert await cache.lookup(same_preview) == "Top page is /p0."
+    assert await cache.lookup({**chart, "title": "Landing pages"}) is None
+    assert narration_cache_key(chart) != narration_cache_key(chart, model="other-model")
+
+    counters = metrics.snapshot("report_narration.cache")["counters"]
+    assert counters["report_narration.cache.hit"] == 1 and counters["report_narration.cache.miss"] == 1
+    assert counters["report_narration.cache.saved_tokens_est"] > 0
+
+
+def test_cache_key_follows_the_narrate_route(monkeypatch: pytest.MonkeyPatch) -> None:
+    chart = {"title": "Pages", "chart_type": "bar", "data": []}
+    monkeypatch.setattr(model_router, "_ROUTER", model_router.ModelRouter(model_router.load_routes("")))
+    default_key = narration_cache_key(chart)
+    assert default_key == narration_cache_key(chart, model=model_router.TIER_MODELS["nano"])
+
+    overridden = model_router.load_routes('{"narrate": {"tier": "full"}}')
+    monkeypatch.setattr(model_router, "_ROUTER", model_router.ModelRouter(overridden))
+    assert narration_cache_key(chart) == narration_cache_key(chart, model=model_router.TIER_MODELS["full"])
+    assert narration_cache_key(chart) != default_key
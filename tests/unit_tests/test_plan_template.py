@@ -0,0 +1,42 @@
+import pytest
+
+from agent.insights import report_insights_agent as ria
+from agent.insights.reporting.plan_template import template_plan_steps
+from agent.insights.reporting.rules import REGISTRY
+from agent.utils import metrics
+
+
+def _pack(**extra_charts: dict) -> dict:
+    return {
+        "summary": {"total_visits": 1234, "total_unique_visitors": 900},
+        "charts": {
+            "daily_visits": {"chart_type": "line", "data": [{"date": "01-01", "sessions": 10}]},
+            "device_stats": {"chart_type": "pie", "data": [{"name": "mobile", "value": 7}]},
+            **extra_charts,
+        },
+        "data_quality": {"warnings": []},
+    }
+
+
+def test_template_steps_dispatch_to_rules() -> None:
+    steps = template_plan_steps(_pack())
+    assert [s["title"] for s in steps] == [
+        "Core metrics overview",
+        "Daily trend, period change and anomalies",
+        "Traffic source and device mix",
+    ]
+    for step in steps:
+        assert REGISTRY.match(step["title"], step["evidence_refs"])
+    assert template_plan_steps(_pack(country_map={"chart_type": "map", "data": []})) is None
+
+
+@pytest.mark.anyio
+async def test_plan_insights_skips_llm_for_standard_pack(monkeypatch: pytest.MonkeyPatch) -> None:
+    def _no_planner():
+        raise AssertionError("LLM planner should not be called")
+
+    monkeypatch.setattr(ria, "_get_planner", _no_planner)
+    metrics.reset()
+    plan = await ria.plan_insights(evidence_pack=_pack(), mode="auto")
+    assert len(plan.steps) == 3
+    assert metrics.snapshot("report_insights.planner")["counters"] == {"report_insights.planner.template": 1}
@@ -0,0 +1,49 @@
+import asyncio
+
+import pytest
+
+from agent.tools import prewarm
+from agent.utils import metrics
+
+
+def test_pick_prewarm_intents_prefers_hint_and_falls_back_to_rag(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(prewarm, "PREWARM_MAX_INTENTS", 2)
+    monkeypatch.setattr(prewarm, "PREWARM_MIN_SCORE", 0.5)
+    ranked = [("site_report", 0.9), ("shortcut", 0.8), ("rag", 0.7)]
+    assert prewarm.pick_prewarm_intents(ranked) == ["site_report", "shortcut"]
+    assert prewarm.pick_prewarm_intents(ranked, hint="shortcut") == ["shortcut", "site_report"]
+    assert prewarm.pick_prewarm_intents([("shortcut", 0.2)]) == ["rag"]
+
+
+@pytest.mark.anyio
+async def test_start_prewarm_runs_in_background_with_timeout(monkeypatch: pytest.MonkeyPatch) -> None:
+    metrics.reset()
+    seen: list[dict] = []
+
+    async def ok(state: dict) -> None:
+        seen.append(state)
+
+    async def slow(state: dict) -> None:
+        await asyncio.sleep(10)
+
+    async def broken(state: dict) -> None:
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(prewarm, "PREWARM_ENABLED", True)
+    monkeypatch.setattr(prewarm, "PREWARM_TIMEOUT_S", 0.05)
+    monkeypatch.setattr(prewarm, "PREWARMERS", {"rag": ok, "site_report": slow, "shortcut": broken})
+    state = {"site_id": "s1", "tenant_id": "t1", "messages": ["large"]}
+
+    started = prewarm.start_prewarm(["rag", "site_report", "shortcut", "introduction"], state)
+    assert started == ["rag", "site_report", "shortcut"]
+    await asyncio.gather(*prewarm._tasks)
+
+    # 预热只拿到所需字段的快照
+    assert seen == [{"site_id": "s1", "tenant_id": "t1", "mcp_token": None, "mcp_token_expires_at": None}]
+    counters = metrics.snapshot("prewarm")["counters"]
+    assert counters["prewarm.ok.rag"] == 1
+    assert counters["prewarm.timeout.site_report"] == 1
+    assert counters["prewarm.error.shortcut"] == 1
+
+    monkeypatch.setattr(prewarm, "PREWARM_ENABLED", False)
+    assert prewarm.start_prewarm(["rag"], state) == []
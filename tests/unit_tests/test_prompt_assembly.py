@@ -0,0 +1,37 @@
+import pytest
+
+from agent.prompts import assembly
+from agent.prompts.assembly import assemble, content_hash, static_section
+from agent.prompts.report import REPORT_PLANNING_PROMPT, REPORT_PLANNING_USER_PROMPT
+from agent.utils import metrics
+
+
+def test_static_prefix_is_built_once_and_shared_across_requests(monkeypatch: pytest.MonkeyPatch) -> None:
+    metrics.reset()
+    monkeypatch.setattr(assembly, "_sections", assembly.MemoryLRUCache(8))
+    builds: list[str] = []
+
+    def build() -> str:
+        builds.append("x")
+        return REPORT_PLANNING_PROMPT.format(tool_info="### Tool: run_report", property_id="123")
+
+    key = content_hash([{"code": "run_report"}]) + ":123"
+    prompts = [
+        assemble(
+            "report_planning",
+            static_section("report_planning", "2", build, key=key),
+            REPORT_PLANNING_USER_PROMPT.format(user_text=question),
+        )
+        for question in ("traffic last 7 days", "top pages this month")
+    ]
+    assert len(builds) == 1
+    assert prompts[0].prefix == prompts[1].prefix
+    assert prompts[0].text.startswith(prompts[0].prefix)
+    assert "traffic last 7 days" not in prompts[0].prefix and prompts[0].text.endswith("Start generating:\n")
+    # 版本变化时重新构建
+    static_section("report_planning", "3", build, key=key)
+    assert len(builds) == 2
+    snap = metrics.snapshot("prompt_prefix")
+    assert snap["counters"]["prompt_prefix.static.hit"] == 1
+    assert "prompt_prefix.report_planning.prefix_tokens" in snap["observations"]
+    assert prompts[0].messages()[0] == {"role": "system", "content": prompts[0].prefix}
@@ -0,0 +1,57 @@
+from agent.insights.reporting.prompt_pack import (
+    approx_tokens,
+    serialize_datasets,
+    serialize_evidence_pack,
+)
+
+
+def _pack(n_pages: int) -> dict:
+    return {
+        "summary": {"total_visits": 1234, "pages_per_session": 2.43219},
+        "charts": {
+            "daily_visits": {
+                "chart_type": "line",
+                "x_key": "date",
+                "y_keys": ["sessions"],
+                "data": [{"date": f"01-{i + 1:02d}", "sessions": 100 + i} for i in range(14)],
+                "colors": ["#3b82f6"],
+            },
+            "top_pages": {
+                "chart_type": "bar",
+                "x_key": "pagePath",
+                "y_key": "sessions",
+                "data": [{"pagePath": f"/p/{i}", "sessions": 1000 - i} for i in range(n_pages)],
+            },
+        },
+        "raws": [{"tool": "run_report", "args": {"limit": 10000}, "result": {"rows": [{"x": 1}] * 500}}],
+        "data_quality": {"notes": [], "warnings": []},
+    }
+
+
+def test_compact_tables_drop_raws_and_respect_budget() -> None:
+    out = serialize_evidence_pack(_pack(300), budget_tokens=400)
+    assert "run_report" not in out.text
+    assert '"pages_per_session":2.43' in out.text
+    assert "date,sessions\n01-01,100" in out.text
+    # 标准折线图完整保留，低优先级的长表被截断
+    assert approx_tokens(out.text) <= 400 and out.tokens_after < out.tokens_before
+    assert out.trimmed and out.trimmed[0].startswith("charts.top_pages")
+    assert "more rows omitted" in out.text
+    assert serialize_evidence_pack(_pack(300), budget_tokens=400) is out
+
+
+def test_datasets_render_ga_report_as_csv() -> None:
+    raw = {
+        "tool": "run_report",
+        "args": {"dimensions": ["deviceCategory"]},
+        "result": {
+            "dimension_headers": [{"name": "deviceCategory"}],
+            "metric_headers": [{"name": "engagementRate", "type": "TYPE_FLOAT"}],
+            "rows": [{"dimension_values": [{"value": "mobile"}], "metric_values": [{"value": "0.612345"}]}],
+            "row_count": 1,
+        },
+    }
+    text = serialize_datasets([raw]).text
+    assert 'request: {"dimensions":["deviceCategory"]}' in text
+    assert "row_count: 1" in text
+    assert "deviceCategory,engagementRate\nMobile,0.612" in text
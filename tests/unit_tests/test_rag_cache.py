@@ -0,0 +1,74 @@
+from types import SimpleNamespace
+
+import pytest
+from langchain_core.messages import HumanMessage
+
+from agent.intent import HashingEmbedder
+from agent.nodes import rag
+from agent.tools.rag_cache import RAGAnswerCache, iter_answer_chunks
+from agent.utils.cache import MemoryLRUCache, TieredCache
+
+
+def _cache(**kwargs) -> RAGAnswerCache:
+    return RAGAnswerCache(TieredCache(MemoryLRUCache(16)), ttl_s=60, **kwargs)
+
+
+@pytest.mark.anyio
+async def test_exact_hit_is_normalized_and_invalidated_by_kb_version() -> None:
+    cache = _cache()
+    await cache.store("t", "s", "How do I change the logo?", "Go to Settings.")
+
+    hit = await cache.lookup("t", "s", "  how do i change the LOGO  ")
+    assert hit is not None and (hit.match, hit.answer) == ("exact", "Go to Settings.")
+    assert await cache.lookup("other", "s", "How do I change the logo?") is None
+
+    cache.bump_kb_version("t", "s")
+    assert await cache.lookup("t", "s", "How do I change the logo?") is None
+
+
+@pytest.mark.anyio
+async def test_semantic_hit_respects_threshold() -> None:
+    cache = _cache(embedder=HashingEmbedder(), similarity_threshold=0.6)
+    await cache.store("t", "s", "how do i change the site logo", "Go to Settings.")
+
+    hit = await cache.lookup("t", "s", "how can i change the site logo")
+    assert hit is not None and hit.match == "semantic"
+    assert await cache.lookup("t", "s", "what is the refund policy") is None
+
+
+def test_replay_chunks_rebuild_answer() -> None:
+    answer = "x" * 50
+    assert "".join(iter_answer_chunks(answer)) == answer
+
+
+@pytest.mark.anyio
+async def test_follow_up_questions_in_a_session_bypass_cache(monkeypatch: pytest.MonkeyPatch) -> None:
+    calls: list[str] = []
+
+    async def events(*, question: str, **_: object):
+        calls.append(question)
+        yield SimpleNamespace(node_name="generate_answer", data={"answer": f"answer {len(calls)}"})
+        yield SimpleNamespace(node_name="final_answer", data={})
+
+    cache = _cache()
+    monkeypatch.setattr(rag, "get_rag_answer_cache", lambda: cache)
+    monkeypatch.setattr(rag, "rag_cache_enabled_for", lambda *_: True)
+    monkeypatch.setattr(rag, "rag_sse_events", events)
+    monkeypatch.setattr(rag, "get_stream_writer", lambda: None)
+    monkeypatch.setattr(rag, "push_message", lambda *_, **__: None)
+
+    def state() -> dict:
+        return {"messages": [HumanMessage(content="How do I change it?")], "rag_session_id": "thread"}
+
+    first = await rag.handle_rag(state())
+    # 同一会话的追问依赖上游上下文：不命中、也不写入缓存
+    first["messages"].append(HumanMessage(content="How do I change it?"))
+    await rag.handle_rag(first)
+    assert len(calls) == 2 and first["rag_turns"] == 2
+    # 新会话的首个提问命中首轮写入的答案，同时在后台补发给上游会话
+    fresh = await rag.handle_rag(state())
+    assert fresh["messages"][-1].content == "answer 1"
+    # 追问先等补发完成，上游会话因此保有首轮问答
+    fresh["messages"].append(HumanMessage(content="And then?"))
+    await rag.handle_rag(fresh)
+    assert calls[2:] == ["How do I change it?", "And then?"]
@@ -0,0 +1,104 @@
+import asyncio
+from typing import Any
+
+import pytest
+
+from agent.nodes import report
+from agent.utils import ui
+
+
+def _fake_push(*, name: str, props: dict, id: str | None = None, **_: Any) -> dict:
+    return {"name": name, "id": id, "props": props}
+
+
+def _ga_report(dim: str) -> dict:
+    return {
+        "dimension_headers": [{"name": dim}],
+        "metric_headers": [{"name": "sessions"}],
+        "rows": [{"dimension_values": [{"value": v}], "metric_values": [{"value": "1"}]} for v in ("a", "b")],
+    }
+
+
+class _FakeTool:
+    """按 dimension 返回预设结果；记录并发数与被取消的调用。"""
+
+    def __init__(self, outcomes: dict[str, tuple[float, Any]]) -> None:
+        self.outcomes = outcomes
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.cancelled: list[str] = []
+
+    async def ainvoke(self, args: dict) -> Any:
+        dim = args["dimensions"][0]
+        delay, out = self.outcomes[dim]
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            self.cancelled.append(dim)
+            raise
+        finally:
+            self.in_flight -= 1
+        return out
+
+
+async def _execute(monkeypatch: pytest.MonkeyPatch, tool: _FakeTool, dims: list[str]) -> tuple[dict, list[dict]]:
+    pushed: list[dict] = []
+
+    async def plan(*_: Any, **__: Any) -> list[dict]:
+        return [{"tool": "custom_report", "args": {"dimensions": [d]}, "desc": d} for d in dims]
+
+    async def with_tools(*, site_id: Any, tenant_id: Any, fn: Any) -> Any:
+        return await fn({"custom_report": tool})
+
+    async def narrate(chart: dict, *, on_update: Any = None) -> str:
+        return "analysis"
+
+    monkeypatch.setattr(report, "push_ui_message", _fake_push)
+    monkeypatch.setattr(ui, "push_ui_message", _fake_push)
+    monkeypatch.setattr(report, "get_stream_writer", lambda: lambda chunk: pushed.extend(chunk["ui"]))
+    monkeypatch.setattr(report, "generate_report_plan", plan)
+    monkeypatch.setattr(report, "with_ga_tools", with_tools)
+    monkeypatch.setattr(report, "_stream_chart_description_with_llm", narrate)
+    monkeypatch.setattr(report, "get_narration_cache", lambda: None)
+    monkeypatch.setattr(report, "REPORT_NARRATION_MODE", "per_chart")
+    monkeypatch.setattr(report, "REPORT_COMPARISON_ENABLED", False)
+    out = await report.report_execute_tool({"messages": [], "user_text": "report", "property_id": "123"})
+    return out, pushed
+
+
+@pytest.mark.anyio
+async def test_cards_follow_plan_order_within_concurrency_limit(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(report, "REPORT_TOOL_CONCURRENCY", 2)
+    dims = ["country", "pagePath", "deviceCategory", "browser"]
+    # 先规划的调用最后完成
+    tool = _FakeTool({d: (0.04 - 0.01 * i, _ga_report(d)) for i, d in enumerate(dims)})
+    out, pushed = await _execute(monkeypatch, tool, dims)
+
+    assert out["tool_error"] is None
+    assert tool.max_in_flight == 2
+    expected = ["pie_geo_country", "top_pages", "device_stats", "pie_tech_browser"]
+    streamed = [next(iter(m["props"]["report"]["charts"])) for m in pushed if m["name"] == "report_charts"]
+    assert streamed == expected
+    persisted = [next(iter(m["props"]["report"]["charts"])) for m in out["ui"] if m["name"] == "report_charts"]
+    assert persisted == expected
+    assert list(out["tool_result"]["charts"]) == expected
+    assert [r["desc"] for r in out["tool_result"]["raws"]] == dims
+
+
+@pytest.mark.anyio
+async def test_auth_error_wins_and_cancels_remaining_calls(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(report, "REPORT_TOOL_CONCURRENCY", 4)
+    tool = _FakeTool(
+        {
+            "country": (0, {"isError": True, "error": "quota exceeded"}),
+            "pagePath": (0, {"errorCode": "TOKEN_REFRESH_FAILED", "error": "token expired"}),
+            "browser": (10, _ga_report("browser")),
+        }
+    )
+    out, _ = await _execute(monkeypatch, tool, ["country", "pagePath", "browser"])
+
+    assert out["tool_error"] == "token expired"
+    assert out["ui"][-1]["props"]["step"] == "auth_expired"
+    assert tool.cancelled == ["browser"]
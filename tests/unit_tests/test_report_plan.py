@@ -0,0 +1,54 @@
+from datetime import date
+from types import SimpleNamespace
+
+import pytest
+
+from agent.insights.reporting import report_plan
+from agent.insights.reporting.report_plan import (
+    ReportPlanModel,
+    generate_report_plan,
+    parse_plan_text,
+    plan_cache_key,
+    tool_catalog_hash,
+)
+from agent.utils import metrics
+
+_SPECS = [SimpleNamespace(name="run_report", description="Run a GA report", input_schema={"type": "object"})]
+
+
+class _FakePlanner:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    async def ainvoke(self, *_: object, **__: object) -> ReportPlanModel:
+        self.calls += 1
+        return ReportPlanModel.model_validate(
+            {"plan": [{"tool": "run_report", "args": {"dimensions": ["date"]}, "desc": "Daily sessions"}]}
+        )
+
+
+@pytest.mark.anyio
+async def test_repeated_question_skips_planning(monkeypatch: pytest.MonkeyPatch) -> None:
+    metrics.reset()
+    planner = _FakePlanner()
+    monkeypatch.setattr(report_plan, "_PLANNER", planner)
+    monkeypatch.setattr(report_plan, "_PLAN_CACHE", report_plan.MemoryLRUCache(8))
+    catalog = tool_catalog_hash(_SPECS)
+    key = plan_cache_key("Traffic trend last 7 days?", catalog, "123")
+    assert key == plan_cache_key("  traffic   trend last 7 days", catalog, "123")
+    assert key != plan_cache_key("traffic trend last 7 days", catalog, "456")
+    assert key != plan_cache_key("traffic trend last 7 days", catalog, "123", today=date(2020, 1, 1))
+
+    first = await generate_report_plan("prompt", cache_key=key)
+    first[0]["args"]["dimensions"].append("mutated")
+    second = await generate_report_plan("prompt", cache_key=key)
+    assert planner.calls == 1
+    assert second == [{"tool": "run_report", "args": {"dimensions": ["date"]}, "desc": "Daily sessions"}]
+    assert metrics.snapshot("report_plan")["counters"]["report_plan.cache.hit"] == 1
+
+
+def test_parse_plan_text_handles_blocks_and_fences() -> None:
+    blocks = [{"type": "text", "text": '```json\n{"plan": [{"tool": "run_report", "args": {}}]}\n```'}]
+    assert parse_plan_text(blocks) == [{"tool": "run_report", "args": {}, "desc": ""}]
+    assert parse_plan_text("not json") is None
+    assert parse_plan_text('{"plan": []}') is None
@@ -0,0 +1,28 @@
+import pytest
+
+from agent.nodes import shortcut
+from agent.nodes.shortcut import IntentClassificationResult
+
+
+class _FakeStructured:
+    async def ainvoke(self, *_: object, **__: object) -> IntentClassificationResult:
+        return IntentClassificationResult(intent="capability_inquiry", capability_response="")
+
+
+class _FakeRouter:
+    def structured(self, *_: object, **__: object) -> _FakeStructured:
+        return _FakeStructured()
+
+
+@pytest.mark.anyio
+async def test_capability_inquiry_falls_back_to_tool_summary(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(shortcut, "get_model_router", lambda: _FakeRouter())
+    monkeypatch.setattr(shortcut, "_push_workflow_ui", lambda *_, **__: None)
+    tools = [{"code": "site_setting_update", "desc": "Update site settings", "input_schema": {}}]
+    state = {"tools": tools, "user_text": "What can you do?", "messages": []}
+
+    # 第二次调用命中静态前缀缓存（_tools_prefix 不再执行），降级回复仍需包含工具摘要
+    for _ in range(2):
+        out = await shortcut.shortcut_plan(state)
+        assert out["is_capability_inquiry"] is True
+        assert "- site_setting_update: Update site settings" in out["messages"][0].content
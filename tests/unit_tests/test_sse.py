@@ -0,0 +1,35 @@
+from agent.utils.sse import SSEDecoder, make_node_filter
+
+
+def test_decoder_handles_split_crlf_multiline_data_and_fields() -> None:
+    stream = (
+        b": keep-alive\r\n"
+        b"retry: 3000\r\n"
+        b"id: 7\r\n"
+        b"event: message\r\n"
+        b"data: line-1\r\n"
+        b"data: line-2\r\n\r\n"
+        b"data: {\"node_name\": \"final_answer\"}\n\n"
+        b"data: incomplete"
+    )
+    decoder = SSEDecoder()
+    messages = []
+    # 逐字节喂入，覆盖 \r\n 被拆开的情况
+    for i in range(len(stream)):
+        messages.extend(decoder.feed(stream[i : i + 1]))
+
+    assert [m.data for m in messages] == [b"line-1\nline-2", b'{"node_name": "final_answer"}']
+    assert messages[0].event == "message"
+    assert messages[1].event is None
+    assert (messages[1].id, messages[1].retry) == ("7", 3000)
+    assert decoder.flush() == []
+
+
+def test_node_filter_skips_unwanted_nodes_only() -> None:
+    wants = make_node_filter(["generate_answer"])
+
+    assert wants(b'{"node_name": "generate_answer", "answer": "x"}')
+    assert wants(b'{"answer": "x", "node_name" : "generate_answer"}')
+    assert not wants(b'{"node_name": "retrieval_rerank", "sources": []}')
+    # 无法判断时保留，交给 JSON 解码后再判断
+    assert wants(b'{"answer": "x"}')
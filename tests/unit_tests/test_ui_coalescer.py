@@ -0,0 +1,66 @@
+import asyncio
+import json
+
+import pytest
+
+from agent.utils import ui
+from agent.utils.ui import UICoalescer
+
+
+@pytest.fixture
+def sent(monkeypatch) -> list[dict]:
+    events: list[dict] = []
+
+    def _fake_push(*, name, props, id, message, merge, state_key):
+        evt = {"type": "ui", "id": id, "name": name, "props": props, "metadata": {"merge": merge}}
+        events.append({**evt, "state_key": state_key})
+        return evt
+
+    monkeypatch.setattr(ui, "push_ui_message", _fake_push)
+    return events
+
+
+@pytest.mark.anyio
+async def test_streamed_text_is_sent_as_coalesced_deltas(sent) -> None:
+    pieces = [f"tok{i:03d} " for i in range(400)]
+    coalescer = UICoalescer(text_fields=("description",), interval_s=0.05, max_chars=200)
+
+    coalescer.push("chart_analysis", "c1", {"chart_key": "k", "description": ""})
+    for i, piece in enumerate(pieces):
+        coalescer.update("chart_analysis", "c1", append={"description": piece})
+        if i % 50 == 0:
+            await asyncio.sleep(0.06)
+    final = coalescer.push("chart_analysis", "c1", {"chart_key": "k", "description": "".join(pieces)})
+
+    # 按 offset 拼回的是完整文本的前缀；未发送的尾部由最终的完整 push 覆盖
+    text = ""
+    for evt in sent[1:-1]:
+        props = evt["props"]
+        assert evt["state_key"] is None
+        assert props["description_offset"] == len(text)
+        text += props["description_delta"]
+    assert text and "".join(pieces).startswith(text)
+    assert final["props"]["description"] == "".join(pieces)
+    assert final["props"]["description_delta"] is None
+
+    # 对比逐 chunk 推送全量文本
+    naive = sum(len(json.dumps({"description": "".join(pieces[: i + 1])})) for i in range(len(pieces)))
+    coalesced = sum(len(json.dumps(evt["props"])) for evt in sent)
+    assert coalesced * 10 < naive
+
+
+@pytest.mark.anyio
+async def test_unchanged_props_are_dropped_and_trailing_update_flushes(sent) -> None:
+    coalescer = UICoalescer(interval_s=0.02)
+    coalescer.push("intent_router", "r1", {"rag_status": "running", "rag_message": "Initializing..."})
+    for _ in range(20):
+        coalescer.update("intent_router", "r1", {"rag_status": "running", "rag_message": "generating"})
+    assert len(sent) == 1
+
+    await asyncio.sleep(0.05)
+    assert len(sent) == 2
+    assert sent[1]["props"] == {"rag_message": "generating"}
+
+    coalescer.update("intent_router", "r1", {"rag_status": "running", "rag_message": "generating"})
+    await asyncio.sleep(0.05)
+    assert len(sent) == 2